@@ -22,10 +22,14 @@ dependency "cloudfront" {
   config_path = "../cloudfront"
 }
 
+dependency "progress_ws" {
+  config_path = "../progress_ws"
+}
+
 terraform {
   before_hook "build_lambda" {
     commands = ["init", "plan", "apply"]
-    execute  = ["bash", "./build/build.sh"]
+    execute  = ["bash", "./build/build.sh", "--slim"]
   }
   source = "../../../../terraform_modules/lambda"
 }
@@ -41,6 +45,7 @@ inputs = merge(local.environment_vars, {
   bedrock_model_id   = "anthropic.claude-3-5-sonnet-20241022-v2:0"
   bedrock_llm_model_id = "anthropic.claude-3-5-sonnet-20241022-v2:0"
   cloudfront_domain  = dependency.cloudfront.outputs.distribution_domain_name
+  progress_ws_endpoint = dependency.progress_ws.outputs.management_endpoint
   region             = local.environment_vars.region
   account_id         = tostring(local.environment_vars.account_id)
   tags = {
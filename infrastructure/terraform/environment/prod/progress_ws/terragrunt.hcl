@@ -0,0 +1,38 @@
+locals {
+  environment_vars = read_terragrunt_config(find_in_parent_folders("environment.hcl")).inputs
+}
+
+include {
+  path = find_in_parent_folders()
+}
+
+dependency "iam" {
+  config_path = "../iam"
+}
+
+dependency "output_bucket" {
+  config_path = "../s3_output"
+}
+
+terraform {
+  before_hook "build_lambda" {
+    commands = ["init", "plan", "apply"]
+    execute  = ["bash", "./build/build.sh"]
+  }
+  # Copy every module so build.sh can reach the shared progress_channel.py
+  source = "../../../../terraform_modules//progress_ws"
+}
+
+inputs = merge(local.environment_vars, {
+  function_name      = "lpgen-${local.environment_vars.environment}-${local.environment_vars.region}-progress-ws"
+  lambda_zip_path    = "${get_terragrunt_dir()}/../../../../terraform_modules/progress_ws/build/lambda.zip"
+  lambda_role_arn    = dependency.iam.outputs.lambda_role_arn
+  api_name           = "lpgen-${local.environment_vars.environment}-${local.environment_vars.region}-progress"
+  status_bucket_name = dependency.output_bucket.outputs.bucket_name
+  region             = local.environment_vars.region
+  tags = {
+    Environment = local.environment_vars.environment
+    Project     = "laas"
+    Component   = "progress_ws"
+  }
+})
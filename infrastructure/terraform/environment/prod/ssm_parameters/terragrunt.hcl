@@ -38,7 +38,51 @@ EOF
     "/laas/bedrock/prompt" = {
       type      = "String"
       overwrite = true
-      value     = "Create a compelling landing page for the {industry} industry.{theme_context}"
+      # Static instructions first and placeholders last, so everything before {industry} is one cacheable
+      # prefix; together with the system prompt it must stay above the model's minimum cacheable length
+      # (1024 tokens for Claude Sonnet models)
+      value     = <<EOF
+Create a compelling, conversion-focused landing page for the industry given at the end of this message.
+
+Section requirements:
+1. hero_html
+- Wrap the section in <div class="lp-hero">.
+- Open with one <h1> headline of at most ten words that names the main outcome a customer in this industry wants.
+- Follow it with a single <p> of one or two sentences that explains how the business delivers that outcome.
+- End with one <button class="lp-button"> whose label starts with a verb, for example "Book a consultation" or "Start your free trial".
+2. features_html
+- Wrap the section in <div class="lp-features"> with an <h2> title, followed by <div class="lp-feature-grid">.
+- Inside the grid, write exactly four <div class="lp-feature"> elements, each with an <h3> of at most five words and a <p> of one or two sentences.
+- Each feature describes a different, concrete benefit: name the problem it removes and the result the customer gets. Do not repeat words between feature titles.
+3. cta_html
+- Wrap the section in <div class="lp-cta"> with an <h2> and a <p> that restate the main outcome and answer one common objection (price, time, risk or effort).
+- Finish with either a <button class="lp-button"> that uses the same verb as the hero button, or an email form inside <div class="lp-form"> with a <label>, an <input type="email" class="lp-input"> and a submit <button class="lp-button">.
+4. img_prompts
+- Write exactly four image descriptions, in this order:
+  1. A hero background image that captures the essence of the industry
+  2. A feature image showcasing the industry's technology or processes
+  3. A call-to-action image that motivates professionals in the industry
+  4. A secondary feature image highlighting the industry's benefits or outcomes
+- Each description is one sentence of 15 to 30 words naming the subject, setting, lighting and mood, in the style of a professional Unsplash photograph.
+- Never describe text, logos, watermarks, brand names or recognisable people.
+
+Markup rules:
+- Use semantic elements only. No <script>, <iframe> or <style> elements, no inline style attributes and no on* event handler attributes.
+- Every class name starts with lp-.
+- Do not use <html>, <head> or <body>; each field holds one self-contained fragment.
+- Escape double quotes inside the HTML so every field is a valid JSON string, and do not put raw line breaks inside strings.
+
+Copy rules:
+- Write in the second person, in plain English, with short sentences and no jargon the customer would not use.
+- Mention the industry by name at least once in the hero and once in the call to action.
+- Do not invent statistics, prices, awards, testimonials or customer names.
+- Do not use placeholder text such as "Lorem ipsum", "Your Company" or "[Insert]".
+- If theme details follow the industry, use the fonts, colors and logo they list.
+
+Respond with the JSON object only, with the keys hero_html, features_html, cta_html and img_prompts in that order.
+
+Industry: {industry}{theme_context}
+EOF
     },
     "/laas/bedrock/company_landing_prompt" = {
       type      = "String"
@@ -32,12 +32,13 @@ data "aws_iam_policy_document" "lambda_policy" {
   }
 
   statement {
-    actions   = ["bedrock:InvokeModel"]
+    actions   = ["bedrock:InvokeModel", "bedrock:InvokeModelWithResponseStream"]
     resources = [
       "arn:aws:bedrock:*::foundation-model/anthropic.claude-3-*",
       "arn:aws:bedrock:*::foundation-model/stability.stable-diffusion-xl-v1",
       "arn:aws:bedrock:*::foundation-model/amazon.titan-image-generator-v1",
-      "arn:aws:bedrock:*::foundation-model/amazon.titan-image-generator-v2:0"
+      "arn:aws:bedrock:*::foundation-model/amazon.titan-image-generator-v2:0",
+      "arn:aws:bedrock:*::foundation-model/amazon.titan-embed-text-v2:0"
     ]
   }
 
@@ -47,12 +48,83 @@ data "aws_iam_policy_document" "lambda_policy" {
   }
 
   statement {
-    actions   = ["s3:PutObject", "s3:GetObject"]
+    actions   = ["s3:PutObject", "s3:GetObject", "s3:DeleteObject"]
     resources = ["${var.output_bucket_arn}/status/*"]
   }
 
+  # Progress push channel: list a job's subscribed connections and post to them
   statement {
-    actions   = ["ssm:GetParameter"]
+    actions   = ["s3:ListBucket"]
+    resources = [var.output_bucket_arn]
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["status/subscriptions/*"]
+    }
+  }
+
+  statement {
+    actions   = ["execute-api:ManageConnections"]
+    resources = ["arn:aws:execute-api:*:*:*/*/POST/@connections/*"]
+  }
+
+  # The generation cache lists its S3 tier and deletes entries past the cap
+  statement {
+    actions   = ["s3:DeleteObject"]
+    resources = ["${var.output_bucket_arn}/generated/cache/*"]
+  }
+
+  statement {
+    actions   = ["s3:ListBucket"]
+    resources = [var.output_bucket_arn]
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["generated/cache/*"]
+    }
+  }
+
+  # Single-flight leases are released once the generation is cached
+  statement {
+    actions   = ["s3:DeleteObject"]
+    resources = ["${var.output_bucket_arn}/generated/leases/*"]
+  }
+
+  # Image reuse index: list and fold appended deltas into the snapshot
+  statement {
+    actions   = ["s3:DeleteObject"]
+    resources = ["${var.output_bucket_arn}/generated/image-index/deltas/*"]
+  }
+
+  statement {
+    actions   = ["s3:ListBucket"]
+    resources = [var.output_bucket_arn]
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["generated/image-index/*"]
+    }
+  }
+
+  # Pre-generation ranks combinations by listing request history and reads back its run reports
+  statement {
+    actions   = ["s3:ListBucket"]
+    resources = [var.output_bucket_arn]
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["generated/history/*", "generated/pregen/*"]
+    }
+  }
+
+  # Admission control counters of gen_landing
+  statement {
+    actions   = ["dynamodb:UpdateItem"]
+    resources = ["arn:aws:dynamodb:*:*:table/lpgen-*-admission"]
+  }
+
+  statement {
+    actions   = ["ssm:GetParameter", "ssm:GetParameters"]
     resources = [
       "arn:aws:ssm:*:*:parameter/laas/bedrock/prompt",
       "arn:aws:ssm:*:*:parameter/laas/bedrock/system_prompt"
@@ -0,0 +1,161 @@
+"""Versioned, gzip-compressed bundle holding everything produced by one generation.
+
+The bundle replaces the two-object layout (landing_content.json +
+theme_info.json) with a single object, halving S3 requests per
+generation. read_generation_bundle understands both layouts so
+consumers can switch before every writer has been upgraded. This module
+only depends on the standard library and an S3 client, so other stages
+can ship a copy of it.
+"""
+
+import gzip
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+BUNDLE_FORMAT_VERSION: int = 1
+BUNDLE_FILENAME: str = "bundle.json.gz"
+LEGACY_CONTENT_FILENAME: str = "landing_content.json"
+LEGACY_THEME_FILENAME: str = "theme_info.json"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def bundle_key(generation_id: str) -> str:
+    """S3 key of the bundle for a generation."""
+    return f"generated/{generation_id}/{BUNDLE_FILENAME}"
+
+
+def build_bundle(
+    generation_id: str,
+    content: Dict[str, Any],
+    theme_info: Dict[str, Any],
+    model_id: Optional[str] = None,
+    token_usage: Optional[Dict[str, Any]] = None,
+    timings: Optional[Dict[str, Any]] = None,
+    routing: Optional[Dict[str, Any]] = None,
+    images: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Assemble a bundle document.
+
+    Args:
+        generation_id: Generation ID
+        content: Landing content as a plain dict
+        theme_info: Theme information as a plain dict
+        model_id: Bedrock model ID that produced the content
+        token_usage: Input/output token counts reported by Bedrock
+        timings: Stage timings in milliseconds
+        routing: Model, tier and latency per generation sub-task
+        images: Rendered img_prompts with the URLs of their stored variants
+
+    Returns:
+        Bundle dictionary
+    """
+    return {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "generation_id": generation_id,
+        "created_at": time.time(),
+        "model_id": model_id,
+        "content": content,
+        "theme_info": theme_info,
+        "token_usage": token_usage or {},
+        "timings": timings or {},
+        "routing": routing or {},
+        "images": images or [],
+    }
+
+
+def encode_bundle(bundle: Dict[str, Any]) -> bytes:
+    """Serialize a bundle to compact, gzip-compressed JSON."""
+    raw = json.dumps(bundle, separators=(",", ":")).encode("utf-8")
+    # mtime=0 keeps the output deterministic for identical bundles
+    return gzip.compress(raw, compresslevel=6, mtime=0)
+
+
+def decode_bundle(body: bytes) -> Dict[str, Any]:
+    """Deserialize a bundle, accepting both compressed and plain JSON bodies."""
+    if body[:2] == _GZIP_MAGIC:
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def write_generation_bundle(
+    s3_client: Any,
+    bucket: str,
+    bundle: Dict[str, Any],
+    body: Optional[bytes] = None,
+) -> str:
+    """
+    Write a bundle as a single S3 object.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: S3 bucket name
+        bundle: Bundle from build_bundle
+        body: The bundle already passed through encode_bundle, for callers
+            that need its size; encoded here when omitted
+
+    Returns:
+        S3 key of the written bundle
+    """
+    key = bundle_key(bundle["generation_id"])
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=body if body is not None else encode_bundle(bundle),
+        ContentType="application/json",
+        ContentEncoding="gzip",
+        Metadata={"bundle-format-version": str(bundle["format_version"])},
+    )
+    return key
+
+
+def _is_missing(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404")
+
+
+def read_generation_bundle(s3_client: Any, bucket: str, generation_id: str) -> Dict[str, Any]:
+    """
+    Read everything stored for a generation with as few GETs as possible.
+
+    Tries the bundle first and falls back to the legacy two-file layout,
+    which is returned in bundle shape with format_version 0.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: S3 bucket name
+        generation_id: Generation ID
+
+    Returns:
+        Bundle dictionary
+
+    Raises:
+        ClientError: If neither layout exists or S3 fails
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=bundle_key(generation_id))
+        return decode_bundle(response["Body"].read())
+    except ClientError as e:
+        if not _is_missing(e):
+            raise
+
+    prefix = f"generated/{generation_id}"
+    content = json.loads(
+        s3_client.get_object(Bucket=bucket, Key=f"{prefix}/{LEGACY_CONTENT_FILENAME}")["Body"].read()
+    )
+    try:
+        theme_info = json.loads(
+            s3_client.get_object(Bucket=bucket, Key=f"{prefix}/{LEGACY_THEME_FILENAME}")["Body"].read()
+        )
+    except ClientError as e:
+        if not _is_missing(e):
+            raise
+        theme_info = {}
+
+    legacy_bundle = build_bundle(generation_id, content, theme_info)
+    legacy_bundle["format_version"] = 0
+    legacy_bundle["created_at"] = None
+    return legacy_bundle
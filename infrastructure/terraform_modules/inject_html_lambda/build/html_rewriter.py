@@ -0,0 +1,396 @@
+"""Single-pass post-processing of generated landing sections.
+
+Before the landing sections are injected into a host page, three rules are
+applied to them:
+
+- every class gets the lp- prefix, so the injected CSS cannot hit the
+  host page's elements and the host page's CSS cannot hit the injected ones
+- script and iframe elements and on* event handler attributes are removed
+- an id already used on the page or in an earlier section is renamed to
+  lp-<id>. A -2, -3, ... suffix is added if that name is taken too
+
+Applying the rules as separate BeautifulSoup passes parses and serializes
+every section once per rule. FragmentRewriter applies all of them in one
+traversal of the html.parser token stream. It writes output as tokens
+arrive and keeps only the stack of open elements, not a tree.
+
+The output is exactly what the BeautifulSoup passes produce with the
+html.parser builder and the default ("minimal") formatter, so the two can
+replace each other:
+
+- entities are decoded and &, < and > re-escaped
+- attributes are sorted
+- void elements are written as <br/>
+- unclosed elements are closed and stray end tags dropped
+- whitespace-only text is collapsed to a single space or newline outside
+  <pre> and <textarea>
+
+There are two exceptions, where the passes do not agree with themselves:
+
+- A <br/> after a <br> (or the same for another void element) makes
+  BeautifulSoup treat it as an open element. Each pass undoes one such
+  element and may create another, so the output depends on the number of
+  passes. The rewriter writes what repeated passes settle on.
+- A doctype, which never occurs in a section, is written the way a single
+  pass writes it. Further passes add more newlines after it.
+
+This module only depends on the standard library.
+"""
+
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+LP_PREFIX: str = "lp-"
+
+# Elements removed together with their content
+REMOVED_ELEMENTS = frozenset({"script", "iframe"})
+
+# Landing content keys holding HTML sections, in page order
+SECTION_KEYS: Tuple[str, ...] = ("hero_html", "features_html", "cta_html")
+
+# Elements BeautifulSoup's HTML builder treats as void (written as <tag/>)
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+# Attributes BeautifulSoup splits on whitespace and joins with single spaces
+LIST_ATTRIBUTES: Dict[str, frozenset] = {
+    "*": frozenset({"class", "accesskey", "dropzone"}),
+    "a": frozenset({"rel", "rev"}),
+    "link": frozenset({"rel", "rev"}),
+    "td": frozenset({"headers"}),
+    "th": frozenset({"headers"}),
+    "form": frozenset({"accept-charset"}),
+    "object": frozenset({"archive"}),
+    "area": frozenset({"rel"}),
+    "icon": frozenset({"sizes"}),
+    "iframe": frozenset({"sandbox"}),
+    "output": frozenset({"for"}),
+}
+
+# Encoding BeautifulSoup writes into <meta> charset declarations when serializing to str
+OUTPUT_ENCODING: str = "utf-8"
+
+PRESERVE_WHITESPACE_ELEMENTS = frozenset({"pre", "textarea"})
+
+# Text directly inside these elements is written without escaping
+RAW_TEXT_ELEMENTS = frozenset({"script", "style"})
+
+_ASCII_SPACES = frozenset("\x20\x0a\x09\x0c\x0d")
+_TOKENS = re.compile(r"\S+")
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_ESCAPE = re.compile("[&<>]")
+_META_CHARSET = re.compile(r"((^|;)\s*charset=)([^;]*)", re.M)
+
+_ENTITIES: Dict[str, str] = {}
+for _name, _character in sorted(html5.items()):
+    _ENTITIES.setdefault(_name.rstrip(";"), _character)
+
+
+def _escape(text: str) -> str:
+    return _ESCAPE.sub(lambda match: _ESCAPES[match.group(0)], text)
+
+
+def _quote(value: str) -> str:
+    value = _escape(value)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', "&quot;") + '"'
+
+
+def _collapse(text: str) -> str:
+    """A whitespace-only string as BeautifulSoup stores it: one newline or one space."""
+    if all(char in _ASCII_SPACES for char in text):
+        return "\n" if "\n" in text else " "
+    return text
+
+
+def lp_class(name: str) -> str:
+    """A class name with the lp- prefix."""
+    return name if name.startswith(LP_PREFIX) else LP_PREFIX + name
+
+
+def unique_id(value: str, taken_ids: Set[str], suffixes: Optional[Dict[str, int]] = None) -> str:
+    """
+    The id to use for `value` given the ids already on the page.
+
+    Args:
+        value: Id as written in the section
+        taken_ids: Ids already used by the page and earlier elements
+        suffixes: Lowest suffix not yet known to be taken, per base id. Ids
+            are only ever added to `taken_ids`, so passing the same dict for
+            later calls skips the suffixes already tried
+
+    Returns:
+        `value` if it is free, else lp-<value> (or `value` itself if it
+        already has the prefix) with the lowest free -2, -3, ... suffix
+    """
+    if value not in taken_ids:
+        return value
+    base = lp_class(value)
+    if base not in taken_ids:
+        return base
+    suffixes = suffixes if suffixes is not None else {}
+    counter = suffixes.get(base, 2)
+    while f"{base}-{counter}" in taken_ids:
+        counter += 1
+    suffixes[base] = counter
+    return f"{base}-{counter}"
+
+
+class _OpenElement(NamedTuple):
+    name: str
+    written: bool
+    preserve_whitespace: bool
+    end_tag: bool
+
+
+_ROOT = _OpenElement("", True, False, False)
+
+
+class FragmentRewriter(HTMLParser):
+    """
+    Tokenizer that writes a sanitized, lp-prefixed copy of an HTML fragment.
+
+    Args:
+        taken_ids: Ids already used on the page; ids written by the
+            rewriter are added to it
+    """
+
+    def __init__(self, taken_ids: Optional[Set[str]] = None) -> None:
+        super().__init__(convert_charrefs=False)
+        self.taken_ids = taken_ids if taken_ids is not None else set()
+        self._out: List[str] = []
+        # Open elements; a void element is only open after BeautifulSoup's <br><br/> quirk
+        self._stack: List[_OpenElement] = []
+        # End tags BeautifulSoup swallows per void element: one for every <br> without a slash
+        self._closed_voids: Dict[str, int] = {}
+        self._suffixes: Dict[str, int] = {}
+        # Text not written yet: the current segment (since the last tag), the
+        # collapsed segments of the current run (no node between them), and
+        # the collapsed runs that only removed elements separate
+        self._data: List[str] = []
+        self._run: List[str] = []
+        self._runs: List[str] = []
+
+    def _top(self) -> _OpenElement:
+        return self._stack[-1] if self._stack else _ROOT
+
+    def _end_data(self) -> None:
+        """Close the current text segment."""
+        if not self._data:
+            return
+        text = "".join(self._data)
+        self._data = []
+        top = self._top()
+        if top.written:
+            self._run.append(text if top.preserve_whitespace else _collapse(text))
+
+    def _close_run(self, context: _OpenElement) -> None:
+        # Segments with no node between them are one string when the output is parsed again
+        if self._run:
+            text = "".join(self._run)
+            self._run = []
+            self._runs.append(text if context.preserve_whitespace else _collapse(text))
+
+    def _flush(self, context: _OpenElement) -> None:
+        """
+        Write the pending text inside the element `context`.
+
+        Runs separated only by removed elements become one string once the
+        removal is serialized and parsed again, so they are collapsed again.
+        """
+        self._close_run(context)
+        if not self._runs:
+            return
+        text = "".join(self._runs)
+        self._runs = []
+        if not context.preserve_whitespace:
+            text = _collapse(text)
+        self._out.append(text if context.name in RAW_TEXT_ELEMENTS else _escape(text))
+
+    def _attributes(self, name: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        values: Dict[str, str] = {}
+        for key, value in attrs:
+            values[key] = "" if value is None else value
+
+        # Ids are assigned in document order, which is start tag order
+        if "id" in values:
+            values["id"] = unique_id(values["id"], self.taken_ids, self._suffixes)
+            self.taken_ids.add(values["id"])
+
+        # BeautifulSoup declares the encoding it serializes to
+        if name == "meta":
+            if "charset" in values:
+                values["charset"] = OUTPUT_ENCODING
+            elif "content" in values and values.get("http-equiv", "").lower() == "content-type":
+                values["content"] = _META_CHARSET.sub(lambda match: match.group(1) + OUTPUT_ENCODING, values["content"])
+
+        list_attributes = LIST_ATTRIBUTES["*"] | LIST_ATTRIBUTES.get(name, frozenset())
+        parts = []
+        for key in sorted(values):
+            if key.startswith("on"):
+                continue
+            value = values[key]
+            if key == "class":
+                value = " ".join(lp_class(token) for token in _TOKENS.findall(value))
+            elif key in list_attributes:
+                value = " ".join(_TOKENS.findall(value))
+            parts.append(f" {key}={_quote(value)}")
+        return "".join(parts)
+
+    def _start(self, name: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool) -> None:
+        self._end_data()
+        parent = self._top()
+        written = parent.written and name not in REMOVED_ELEMENTS
+        preserve = parent.preserve_whitespace or name in PRESERVE_WHITESPACE_ELEMENTS
+        if parent.written and not written:
+            self._close_run(parent)
+        if written:
+            self._flush(parent)
+            closing = "/" if name in VOID_ELEMENTS else ""
+            self._out.append(f"<{name}{self._attributes(name, attrs)}{closing}>")
+
+        if name in VOID_ELEMENTS:
+            if not self_closing:
+                self._closed_voids[name] = self._closed_voids.get(name, 0) + 1
+            elif self._closed_voids.get(name):
+                # BeautifulSoup takes the end of <br/> for the swallowed end of an
+                # earlier <br>, so this one stays open and the following content
+                # becomes its children until an end tag pops it. Re-parsing turns
+                # them back into siblings, so it is open here but writes no end tag.
+                self._closed_voids[name] -= 1
+                self._stack.append(_OpenElement(name, written, preserve, False))
+            return
+
+        self._stack.append(_OpenElement(name, written, preserve, True))
+        if self_closing:
+            self.handle_endtag(name)
+
+    def _pop(self) -> None:
+        element = self._stack.pop()
+        if element.written and element.end_tag:
+            self._flush(element)
+            self._out.append(f"</{element.name}>")
+
+    def _special(self, prefix: str, data: str, suffix: str) -> None:
+        """Write a comment, doctype, CDATA section or processing instruction."""
+        self._end_data()
+        context = self._top()
+        if context.written:
+            self._flush(context)
+            self._out.append(prefix + (data if context.preserve_whitespace else _collapse(data)) + suffix)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, self_closing=True)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._closed_voids.get(tag):
+            self._closed_voids[tag] -= 1
+            return
+        self._end_data()
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index].name == tag:
+                while len(self._stack) > index:
+                    self._pop()
+                return
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        codepoint = int(name.lstrip("xX"), 16) if name[:1] in ("x", "X") else int(name)
+        data = None
+        if codepoint < 256:
+            try:
+                data = bytes([codepoint]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(codepoint)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name: str) -> None:
+        self.handle_data(_ENTITIES.get(name, f"&{name}"))
+
+    def handle_comment(self, data: str) -> None:
+        self._special("<!--", data, "-->")
+
+    def handle_decl(self, decl: str) -> None:
+        self._special("<!DOCTYPE ", decl[len("DOCTYPE "):], ">\n")
+
+    def unknown_decl(self, data: str) -> None:
+        if data.upper().startswith("CDATA["):
+            self._special("<![CDATA[", data[len("CDATA["):], "]]>")
+        else:
+            self._special("<?", data, "?>")
+
+    def handle_pi(self, data: str) -> None:
+        self._special("<?", data, ">")
+
+    def rewrite(self, html: str) -> str:
+        """
+        Rewrite one fragment.
+
+        Returns:
+            The rewritten fragment, with every element closed
+        """
+        self.reset()
+        self._out, self._stack, self._closed_voids = [], [], {}
+        self._data, self._run, self._runs = [], [], []
+        self.feed(html)
+        self.close()
+        self._end_data()
+        while self._stack:
+            self._pop()
+        self._flush(self._top())
+        return "".join(self._out)
+
+
+def rewrite_fragment(html: str, taken_ids: Optional[Set[str]] = None) -> str:
+    """
+    Apply the lp- prefix, sanitizing and id rules to one HTML fragment.
+
+    Args:
+        html: Generated HTML
+        taken_ids: Ids already used on the page; updated with the ids of
+            the fragment
+
+    Returns:
+        Rewritten HTML
+    """
+    return FragmentRewriter(taken_ids).rewrite(html)
+
+
+def rewrite_landing_content(content: Dict[str, Any], taken_ids: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Rewrite the HTML sections of generated landing content.
+
+    The sections share one set of ids, so an id repeated in a later
+    section is renamed as well.
+
+    Args:
+        content: Landing content (hero_html, features_html, cta_html, ...)
+        taken_ids: Ids already used on the host page; updated in place
+
+    Returns:
+        Copy of `content` with rewritten sections; other keys are unchanged
+    """
+    taken_ids = taken_ids if taken_ids is not None else set()
+    result = dict(content)
+    for key in SECTION_KEYS:
+        if isinstance(result.get(key), str):
+            result[key] = rewrite_fragment(result[key], taken_ids)
+    return result
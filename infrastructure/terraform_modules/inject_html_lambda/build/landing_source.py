@@ -0,0 +1,46 @@
+"""Landing content to inject, passed inline or read from the stored generation.
+
+Callers either pass the landing content and theme in the event, or only
+the generation_id that gen_landing returned. For a generation_id both are
+read with read_generation_bundle: one GET for the bundle, or two for
+generations stored in the legacy landing_content.json/theme_info.json
+layout. generation_bundle.py is a copy of the gen_landing module, and
+the copies must stay identical.
+"""
+
+from typing import Any, Dict, Tuple
+
+from generation_bundle import read_generation_bundle
+
+
+def load_landing_generation(
+    event: Dict[str, Any],
+    s3_client: Any,
+    bucket: str,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Landing content and theme for an injection request.
+
+    Args:
+        event: Invocation event with landing_content (and optionally
+            theme_info), or with the generation_id returned by gen_landing
+        s3_client: Boto3 S3 client
+        bucket: Bucket gen_landing stores generations in
+
+    Returns:
+        Tuple of (landing_content, theme_info); theme_info from the event
+        takes precedence over the stored one
+
+    Raises:
+        ValueError: If the event has neither landing_content nor generation_id
+        ClientError: If nothing is stored for the generation or S3 fails
+    """
+    if event.get("landing_content"):
+        return event["landing_content"], event.get("theme_info") or {}
+
+    generation_id = event.get("generation_id")
+    if not generation_id:
+        raise ValueError("Event has neither landing_content nor generation_id")
+
+    bundle = read_generation_bundle(s3_client, bucket, generation_id)
+    return bundle["content"], event.get("theme_info") or bundle["theme_info"]
@@ -0,0 +1,611 @@
+"""Constant-memory injection of landing sections into very large host pages.
+
+The DOM path parses the whole raw/ page into a BeautifulSoup tree, finds
+the injection point, inserts the sections and CSS, and serializes the
+whole tree again. For a multi-megabyte page this takes seconds and most
+of the Lambda's memory. Yet the only change to the page is the insertion
+of two small blocks of bytes.
+
+This module streams the page from S3 in chunks instead. TagScanner is an
+incremental tokenizer that reports complete tags with their byte
+offsets. It skips comments, the contents of raw-text elements such as
+<script> and <style>, and ">" inside quoted attribute values. PageSplicer
+copies the page bytes through unchanged. It inserts the CSS before
+</head> and the sections at the first of these points, and copies the
+rest of the page without scanning it:
+
+    after_header   after the end of the first <header> element
+    before_main    before <main>, if it starts before any <header> ends
+
+The output is uploaded to public/ as it is produced, in multipart parts.
+Memory use depends on the chunk and part sizes, not on the page size.
+
+Some pages cannot be streamed:
+
+- pages in an encoding that is not ASCII-compatible, such as UTF-16
+- compressed objects
+- tags larger than MAX_TOKEN_BYTES
+- pages with neither a <header> nor a <main>
+
+In those cases StreamingUnsupported is raised, the multipart upload is
+aborted and inject_page falls back to the DOM path. Like html_rewriter,
+this module only depends on the standard library and an S3 client.
+"""
+
+import codecs
+import html
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+DEFAULT_CHUNK_SIZE: int = 256 * 1024
+# S3 rejects multipart parts below 5 MiB except the last one
+DEFAULT_PART_SIZE: int = 8 * 1024 * 1024
+# Smaller pages take the DOM path, which also repairs malformed markup
+DEFAULT_MIN_STREAMING_BYTES: int = 1024 * 1024
+# Longest tag or unterminated construct kept in memory while more bytes arrive
+MAX_TOKEN_BYTES: int = 1024 * 1024
+DEFAULT_ENCODING: str = "utf-8"
+
+# Elements whose content is text up to their end tag, so "<header>" inside them is not a tag
+RAW_TEXT_ELEMENTS = frozenset({"script", "style", "textarea", "title", "xmp", "iframe", "noembed", "noframes"})
+
+_TAG_NAME = re.compile(rb"<(/?)([A-Za-z][^\t\n\f\r />]*)")
+# The end of a tag, or the start of a quoted attribute value that may contain ">"
+_TAG_END = re.compile(rb">|=[\t\n\f\r ]*([\"'])")
+_META_CHARSET = re.compile(rb"charset\s*=\s*[\"']?\s*([A-Za-z0-9_.:-]+)", re.I)
+_ID_ATTRIBUTE = re.compile(rb"[\t\n\f\r /]id[\t\n\f\r ]*=[\t\n\f\r ]*(?:\"([^\"]*)\"|'([^']*)'|([^\t\n\f\r >]+))", re.I)
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, None),
+    (codecs.BOM_UTF32_BE, None),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, None),
+    (codecs.BOM_UTF16_BE, None),
+)
+
+
+class StreamingUnsupported(Exception):
+    """The page has to take the DOM path."""
+
+
+class Tag(NamedTuple):
+    """A complete tag and its byte offsets in the page."""
+
+    name: str
+    closing: bool
+    start: int
+    end: int
+    raw: bytes
+
+
+def charset_of(content_type: Optional[str]) -> Optional[str]:
+    """The charset parameter of a Content-Type header, if any."""
+    match = re.search(r"charset\s*=\s*[\"']?([A-Za-z0-9_.:-]+)", content_type or "", re.I)
+    return match.group(1) if match else None
+
+
+def streamable_encoding(name: str) -> str:
+    """
+    Check that a page's encoding writes tags as plain ASCII bytes.
+
+    Returns:
+        The label, lowercased; it is kept as declared for the output's Content-Type
+
+    Raises:
+        StreamingUnsupported: If the encoding is unknown or not ASCII-compatible
+    """
+    try:
+        codecs.lookup(name)
+    except LookupError:
+        raise StreamingUnsupported(f"Unknown encoding: {name}")
+    if "</header>".encode(name) != b"</header>":
+        raise StreamingUnsupported(f"Encoding is not ASCII-compatible: {name}")
+    return name.lower()
+
+
+class TagScanner:
+    """
+    Incremental tokenizer reporting the tags of an HTML byte stream.
+
+    Bytes are fed in arbitrary chunks. Only an unfinished tag, or the tail
+    of a comment or raw-text element that may hold the start of its
+    terminator, is kept between calls.
+
+    Args:
+        max_token_bytes: Longest unfinished construct to keep before giving up
+    """
+
+    def __init__(self, max_token_bytes: int = MAX_TOKEN_BYTES) -> None:
+        self.max_token_bytes = max_token_bytes
+        self._buffer = b""
+        # Page offset of the first byte of _buffer; everything before it is fully scanned
+        self.offset = 0
+        self._in_comment = False
+        self._raw_text_end: Optional["re.Pattern[bytes]"] = None
+
+    def feed(self, data: bytes) -> List[Tag]:
+        """
+        Scan the next chunk.
+
+        Returns:
+            The tags completed by this chunk, in page order
+
+        Raises:
+            StreamingUnsupported: If an unfinished construct grows beyond max_token_bytes
+        """
+        buffer = self._buffer + data
+        tags: List[Tag] = []
+        pos = 0
+        while True:
+            if self._raw_text_end is not None:
+                match = self._raw_text_end.search(buffer, pos)
+                if match is None:
+                    # Keep enough bytes to match the end tag once the rest arrives
+                    pos = max(pos, len(buffer) - len(self._raw_text_end.pattern))
+                    break
+                pos = match.start()
+                self._raw_text_end = None
+
+            if self._in_comment:
+                end = buffer.find(b"-->", pos)
+                if end < 0:
+                    pos = max(pos, len(buffer) - 2)
+                    break
+                pos = end + 3
+                self._in_comment = False
+
+            start = buffer.find(b"<", pos)
+            if start < 0:
+                pos = len(buffer)
+                break
+            pos = start
+            if len(buffer) - start < 4:
+                break
+
+            if buffer.startswith(b"<!--", start):
+                if buffer[start + 4:start + 5] == b">" or buffer.startswith(b"->", start + 4):
+                    pos = buffer.index(b">", start + 4) + 1
+                else:
+                    self._in_comment = True
+                    pos = start + 4
+                continue
+            if buffer[start + 1] in b"!?":
+                # Doctype, CDATA or bogus comment: ends at the next ">"
+                end = buffer.find(b">", start)
+                if end < 0:
+                    break
+                pos = end + 1
+                continue
+
+            match = _TAG_NAME.match(buffer, start)
+            if match is None:
+                pos = start + 1
+                continue
+            if match.end() == len(buffer):
+                break
+            end = self._tag_end(buffer, match.end())
+            if end is None:
+                break
+
+            name = match.group(2).decode("ascii", "replace").lower()
+            closing = bool(match.group(1))
+            tags.append(Tag(name, closing, self.offset + start, self.offset + end, buffer[start:end]))
+            pos = end
+            if not closing and name in RAW_TEXT_ELEMENTS:
+                self._raw_text_end = re.compile(rb"</" + name.encode("ascii") + rb"[\t\n\f\r />]", re.I)
+
+        if len(buffer) - pos > self.max_token_bytes:
+            raise StreamingUnsupported(f"Unterminated construct longer than {self.max_token_bytes} bytes")
+        self._buffer = buffer[pos:]
+        self.offset += pos
+        return tags
+
+    @staticmethod
+    def _tag_end(buffer: bytes, pos: int) -> Optional[int]:
+        """Offset just past the ">" closing the tag, or None if it has not arrived yet."""
+        while True:
+            match = _TAG_END.search(buffer, pos)
+            if match is None:
+                return None
+            if match.group(1) is None:
+                return match.end()
+            close = buffer.find(match.group(1), match.end())
+            if close < 0:
+                return None
+            pos = close + 1
+
+
+class PageSplicer:
+    """
+    Copy a page through, inserting the CSS and the landing sections.
+
+    Feed the page with feed() and finish with close(). Each call returns
+    the output bytes that are final; concatenated, they are the new page.
+
+    Args:
+        sections_html: Landing sections, already rewritten (see html_rewriter)
+        css: Landing stylesheet, without the <style> element
+        encoding: Charset declared by the object's Content-Type, if any
+        max_token_bytes: See TagScanner
+    """
+
+    def __init__(
+        self,
+        sections_html: str,
+        css: str,
+        encoding: Optional[str] = None,
+        max_token_bytes: int = MAX_TOKEN_BYTES,
+    ) -> None:
+        self.sections_html = sections_html
+        self.css = css
+        self.declared_encoding = streamable_encoding(encoding) if encoding else None
+        self.encoding = self.declared_encoding or DEFAULT_ENCODING
+        self.scanner = TagScanner(max_token_bytes)
+
+        self.injection_point: Optional[str] = None
+        # "head" when the CSS went before </head>, "body" when it went in with the sections
+        self.css_point: Optional[str] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        # Page bytes from offset _base on that are not written yet; _written is the first unwritten offset
+        self._pending = b""
+        self._base = 0
+        self._written = 0
+        self._header_depth = 0
+        self._body_started = False
+        self._meta_encoding = False
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type of the output; its bytes are in the page's own encoding."""
+        return f"text/html; charset={self.encoding}"
+
+    def _encode(self, text: str) -> bytes:
+        return text.encode(self.encoding, "xmlcharrefreplace")
+
+    def _style(self) -> str:
+        return f'<style id="lp-styles">{self.css}</style>' if self.css else ""
+
+    def _check_start(self, data: bytes) -> None:
+        for bom, encoding in _BOMS:
+            if data.startswith(bom):
+                if encoding is None:
+                    raise StreamingUnsupported("Page is not in an ASCII-compatible encoding")
+                self.encoding = self.declared_encoding = encoding
+                return
+
+    def _on_tag(self, tag: Tag, out: List[bytes]) -> None:
+        def insert(offset: int, text: str) -> None:
+            out.append(self._pending[self._written - self._base:offset - self._base])
+            out.append(self._encode(text))
+            self._written = offset
+
+        if self.injection_point is not None:
+            return
+
+        if tag.name == "meta" and not tag.closing and not self._meta_encoding and self.declared_encoding is None:
+            match = _META_CHARSET.search(tag.raw)
+            if match is not None:
+                self._meta_encoding = True
+                name = match.group(1).decode("ascii").lower()
+                # Browsers read a page declaring UTF-16 in a meta tag as UTF-8, since its bytes are ASCII-compatible
+                self.encoding = "utf-8" if name.startswith("utf-16") else streamable_encoding(name)
+
+        if tag.name == "head" and tag.closing and self.css_point is None:
+            self.css_point = "head"
+            insert(tag.start, self._style())
+        elif tag.name == "body" and not tag.closing:
+            self._body_started = True
+        elif tag.name == "header":
+            if not tag.closing:
+                self._header_depth += 1
+            elif self._header_depth:
+                self._header_depth -= 1
+                if not self._header_depth:
+                    self._inject_sections("after_header", tag.end, insert)
+        elif tag.name == "main" and not tag.closing and not self._header_depth:
+            self._inject_sections("before_main", tag.start, insert)
+
+    def _inject_sections(self, point: str, offset: int, insert: Callable[[int, str], None]) -> None:
+        self.injection_point = point
+        block = self.sections_html
+        if self.css_point is None:
+            self.css_point = "body"
+            block = self._style() + block
+        insert(offset, block)
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        Process the next chunk of the page.
+
+        Returns:
+            Output bytes that are final
+
+        Raises:
+            StreamingUnsupported: If the page turns out not to be streamable
+        """
+        if self.bytes_in == 0:
+            self._check_start(data)
+        self.bytes_in += len(data)
+        self._base = self._written
+        self._pending += data
+
+        out: List[bytes] = []
+        if self.injection_point is None:
+            for tag in self.scanner.feed(data):
+                self._on_tag(tag, out)
+
+        if self.injection_point is not None:
+            # Nothing is left to insert, so the rest of the page is copied without scanning
+            safe = self.bytes_in
+        else:
+            # Bytes before the scanner's offset cannot hold an insertion point any more
+            safe = max(self._written, self.scanner.offset)
+        out.append(self._pending[self._written - self._base:safe - self._base])
+        self._pending = self._pending[safe - self._base:]
+        self._written = safe
+        return self._collect(out)
+
+    def close(self) -> bytes:
+        """
+        Finish the page.
+
+        Returns:
+            The remaining output bytes
+
+        Raises:
+            StreamingUnsupported: If the page has no injection point
+        """
+        if self.injection_point is None:
+            raise StreamingUnsupported("Page has neither a <header> nor a <main> element")
+        out, self._pending = [self._pending], b""
+        self._written = self.bytes_in
+        return self._collect(out)
+
+    def _collect(self, out: List[bytes]) -> bytes:
+        data = b"".join(out)
+        self.bytes_out += len(data)
+        return data
+
+
+class S3MultipartWriter:
+    """
+    Upload an object of unknown length as it is produced.
+
+    Output is buffered up to part_size and uploaded in multipart parts. An
+    object that never fills a part is stored with a single PutObject.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Destination bucket
+        key: Destination key
+        part_size: Bytes per part; at least 5 MiB for S3
+        content_type: Content-Type of the object; may be changed until
+            the first part is uploaded
+        extra_args: Further CreateMultipartUpload/PutObject arguments, e.g. CacheControl
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        content_type: str = "text/html; charset=utf-8",
+        extra_args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.content_type = content_type
+        self.extra_args = extra_args or {}
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    @property
+    def parts(self) -> int:
+        """Parts uploaded so far; 0 for an object stored with PutObject."""
+        return len(self._parts)
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type, **self.extra_args
+            )
+            self._upload_id = response["UploadId"]
+        number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=body
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def close(self) -> None:
+        """Upload the rest and complete the object."""
+        if self._upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+                **self.extra_args,
+            )
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        self._buffer = bytearray()
+
+    def abort(self) -> None:
+        """Drop the parts uploaded so far; the destination object is left untouched."""
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+        self._buffer = bytearray()
+        self._parts = []
+
+
+@dataclass
+class InjectionResult:
+    """How a page was injected."""
+
+    path: str
+    injection_point: Optional[str]
+    css_point: Optional[str]
+    bytes_in: int
+    bytes_out: int
+    parts: int
+    latency_ms: float
+    fallback_reason: Optional[str] = None
+
+
+def scan_page_ids(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Set[str]:
+    """
+    Ids used by a page, read in chunks.
+
+    The sections are rewritten against these (see html_rewriter) before
+    they are spliced in, so their ids cannot collide with the page's.
+
+    Raises:
+        StreamingUnsupported: If the page cannot be scanned
+    """
+    scanner = TagScanner()
+    ids = set()
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+    for chunk in body.iter_chunks(chunk_size):
+        for tag in scanner.feed(chunk):
+            if tag.closing:
+                continue
+            match = _ID_ATTRIBUTE.search(tag.raw)
+            if match is not None:
+                value = next(group for group in match.groups() if group is not None)
+                ids.add(html.unescape(value.decode("utf-8", "replace")))
+    return ids
+
+
+def _dom_inject(
+    s3_client: Any,
+    bucket: str,
+    source_key: str,
+    dest_key: str,
+    dom_inject: Callable[[str], str],
+    extra_args: Dict[str, Any],
+    response: Optional[Dict[str, Any]] = None,
+) -> int:
+    if response is None:
+        response = s3_client.get_object(Bucket=bucket, Key=source_key)
+    data = response["Body"].read()
+    try:
+        page = data.decode(charset_of(response.get("ContentType")) or DEFAULT_ENCODING, "replace")
+    except LookupError:
+        page = data.decode(DEFAULT_ENCODING, "replace")
+    body = dom_inject(page).encode("utf-8")
+    s3_client.put_object(
+        Bucket=bucket, Key=dest_key, Body=body, ContentType="text/html; charset=utf-8", **extra_args
+    )
+    return len(body)
+
+
+def inject_page(
+    s3_client: Any,
+    bucket: str,
+    source_key: str,
+    dest_key: str,
+    sections_html: str,
+    css: str,
+    dom_inject: Callable[[str], str],
+    min_streaming_bytes: int = DEFAULT_MIN_STREAMING_BYTES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    part_size: int = DEFAULT_PART_SIZE,
+    extra_args: Optional[Dict[str, Any]] = None,
+) -> InjectionResult:
+    """
+    Inject the landing sections into a raw/ page and store it, streaming large pages.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Bucket holding both objects
+        source_key: Original page, e.g. raw/<site>.html
+        dest_key: Output page, e.g. public/<site>.html
+        sections_html: Landing sections, already rewritten against the page's ids
+        css: Landing stylesheet
+        dom_inject: The DOM path; returns the injected page for the decoded page
+        min_streaming_bytes: Pages below this size take the DOM path
+        chunk_size: Bytes read from S3 at a time
+        part_size: Bytes per uploaded part
+        extra_args: Further PutObject arguments for the output, e.g. CacheControl
+
+    Returns:
+        InjectionResult; path is "streaming" or "dom"
+    """
+    start = time.perf_counter()
+    extra_args = extra_args or {}
+
+    def dom(reason: str, response: Optional[Dict[str, Any]] = None) -> InjectionResult:
+        bytes_out = _dom_inject(s3_client, bucket, source_key, dest_key, dom_inject, extra_args, response)
+        return InjectionResult(
+            path="dom",
+            injection_point=None,
+            css_point=None,
+            bytes_in=size,
+            bytes_out=bytes_out,
+            parts=0,
+            latency_ms=round((time.perf_counter() - start) * 1000, 2),
+            fallback_reason=reason,
+        )
+
+    response = s3_client.get_object(Bucket=bucket, Key=source_key)
+    size = response.get("ContentLength", 0)
+    if size < min_streaming_bytes:
+        return dom("small_page", response)
+    if response.get("ContentEncoding") not in (None, "", "identity"):
+        return dom("content_encoding", response)
+
+    writer = S3MultipartWriter(s3_client, bucket, dest_key, part_size, extra_args=extra_args)
+    try:
+        splicer = PageSplicer(sections_html, css, charset_of(response.get("ContentType")))
+        for chunk in response["Body"].iter_chunks(chunk_size):
+            output = splicer.feed(chunk)
+            writer.content_type = splicer.content_type
+            writer.write(output)
+        writer.write(splicer.close())
+        writer.close()
+    except StreamingUnsupported as e:
+        writer.abort()
+        response["Body"].close()
+        return dom(str(e))
+    except Exception:
+        writer.abort()
+        raise
+
+    return InjectionResult(
+        path="streaming",
+        injection_point=splicer.injection_point,
+        css_point=splicer.css_point,
+        bytes_in=splicer.bytes_in,
+        bytes_out=splicer.bytes_out,
+        parts=writer.parts,
+        latency_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
@@ -52,7 +52,8 @@ resource "aws_iam_role_policy" "inject_html_s3" {
         Action = [
           "s3:GetObject",
           "s3:PutObject",
-          "s3:DeleteObject"
+          "s3:DeleteObject",
+          "s3:AbortMultipartUpload"
         ]
         Resource = [
           "${var.output_bucket_arn}/raw/*",
@@ -0,0 +1,301 @@
+"""Admission control for the Bedrock capacity shared by all tenants.
+
+Every generation reserves requests and tokens from fixed one-minute
+windows before Bedrock is called:
+
+  * a per-tenant budget (keyed by Cognito identity), so one tenant's bulk
+    generations cannot use up the account quota for everyone else;
+  * the shared account capacity, split by weighted fair share between
+    priority classes. A class may fill the capacity up to its share of the
+    total weight. The heaviest class, interactive, may fill all of it, so
+    whatever batch work leaves free stays available to interactive
+    requests.
+
+Over-budget work is refused with the number of seconds until the window
+that frees the budget, which callers wait out or return as Retry-After.
+Token reservations are estimates; `settle` corrects them with the usage
+Bedrock reported.
+
+Counters live in a shared store: DynamoDBAdmissionStore across
+containers, LocalAdmissionStore in-process for tests and local runs.
+"""
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+WINDOW_SECONDS: int = 60
+PRIORITY_CLASSES: Tuple[str, ...] = ("interactive", "batch")
+DEFAULT_CLASS_WEIGHTS: Dict[str, float] = {"interactive": 3.0, "batch": 1.0}
+SHARED_SCOPE: str = "shared"
+
+
+@dataclass(frozen=True)
+class TenantBudget:
+    """Requests and tokens one tenant may use per window."""
+
+    requests_per_window: int
+    tokens_per_window: int
+
+
+@dataclass(frozen=True)
+class AdmissionTicket:
+    """Reservation made for an admitted request; pass it to `settle` once usage is known."""
+
+    tenant_id: str
+    priority: str
+    window: int
+    reserved_tokens: int
+
+
+@dataclass(frozen=True)
+class AdmissionDecision:
+    """Outcome of an admission check."""
+
+    admitted: bool
+    reason: str
+    retry_after: float = 0.0
+    ticket: Optional[AdmissionTicket] = None
+
+
+class LocalAdmissionStore:
+    """In-process counters; not shared between containers."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _current(self, key: str) -> float:
+        value, expires_at = self._counters.get(key, (0.0, 0.0))
+        return value if expires_at > time.time() else 0.0
+
+    def try_add(self, key: str, amount: float, limit: float, expires_at: float) -> bool:
+        """Add `amount` to a counter unless that would take it past `limit`."""
+        with self._lock:
+            value = self._current(key)
+            if value + amount > limit:
+                return False
+            self._counters[key] = (value + amount, expires_at)
+            return True
+
+    def add(self, key: str, amount: float, expires_at: float) -> None:
+        """Add `amount` (possibly negative) to a counter unconditionally."""
+        with self._lock:
+            self._counters[key] = (self._current(key) + amount, expires_at)
+
+
+class DynamoDBAdmissionStore:
+    """
+    Counters in a DynamoDB table shared by every container.
+
+    Each counter is one item (partition key `pk`) updated atomically with
+    a conditional ADD; items carry `expires_at` for DynamoDB TTL.
+
+    Args:
+        dynamodb_client: Boto3 DynamoDB client
+        table_name: Name of the admission table
+    """
+
+    def __init__(self, dynamodb_client: Any, table_name: str) -> None:
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+
+    def _update(self, key: str, amount: float, expires_at: float, headroom: Optional[float] = None) -> None:
+        request: Dict[str, Any] = {
+            "TableName": self.table_name,
+            "Key": {"pk": {"S": key}},
+            "UpdateExpression": "ADD used :amount SET expires_at = :expires_at",
+            "ExpressionAttributeValues": {
+                ":amount": {"N": str(amount)},
+                ":expires_at": {"N": str(int(expires_at))},
+            },
+        }
+        if headroom is not None:
+            request["ConditionExpression"] = "attribute_not_exists(used) OR used <= :headroom"
+            request["ExpressionAttributeValues"][":headroom"] = {"N": str(headroom)}
+        self.dynamodb_client.update_item(**request)
+
+    def try_add(self, key: str, amount: float, limit: float, expires_at: float) -> bool:
+        """Add `amount` to a counter unless that would take it past `limit`."""
+        try:
+            self._update(key, amount, expires_at, headroom=limit - amount)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
+
+    def add(self, key: str, amount: float, expires_at: float) -> None:
+        """Add `amount` (possibly negative) to a counter unconditionally."""
+        self._update(key, amount, expires_at)
+
+
+def _counter_key(tenant_id: Optional[str], resource: str, window: int) -> str:
+    """Store key of a tenant's counter, or of the shared capacity counter when tenant_id is None."""
+    scope = SHARED_SCOPE if tenant_id is None else f"tenant:{tenant_id}"
+    return f"{scope}#{resource}#{window}"
+
+
+def load_class_weights(overrides: str = "") -> Dict[str, float]:
+    """
+    Build the priority class weights from defaults and a JSON override.
+
+    Args:
+        overrides: JSON object keyed by priority class, e.g. {"batch": 2}
+
+    Returns:
+        Weight of every priority class
+
+    Raises:
+        ValueError: If the override names an unknown class or a non-positive weight
+    """
+    weights = dict(DEFAULT_CLASS_WEIGHTS)
+    if not overrides.strip():
+        return weights
+    for priority, weight in json.loads(overrides).items():
+        if priority not in weights:
+            raise ValueError(f"Unknown priority class in admission weights: {priority}")
+        if float(weight) <= 0:
+            raise ValueError(f"Admission weight for {priority} must be positive")
+        weights[priority] = float(weight)
+    return weights
+
+
+def load_tenant_budgets(overrides: str = "") -> Dict[str, Dict[str, int]]:
+    """
+    Parse per-tenant budget overrides.
+
+    Args:
+        overrides: JSON object keyed by tenant ID, e.g.
+            {"tenant-a": {"requests_per_window": 120, "tokens_per_window": 300000}};
+            omitted fields keep the default budget
+
+    Returns:
+        Partial budgets keyed by tenant ID, as dicts of the given fields
+    """
+    if not overrides.strip():
+        return {}
+    return {tenant_id: dict(budget) for tenant_id, budget in json.loads(overrides).items()}
+
+
+class AdmissionController:
+    """
+    Reserve per-tenant and shared Bedrock capacity for each request.
+
+    Args:
+        store: LocalAdmissionStore or DynamoDBAdmissionStore
+        default_budget: Budget of tenants without an override
+        capacity: Requests and tokens per window of the whole account
+        class_weights: Weight of each priority class (see load_class_weights)
+        tenant_budgets: Per-tenant overrides (see load_tenant_budgets)
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        default_budget: TenantBudget,
+        capacity: TenantBudget,
+        class_weights: Optional[Dict[str, float]] = None,
+        tenant_budgets: Optional[Dict[str, Dict[str, int]]] = None,
+    ) -> None:
+        self.store = store
+        self.default_budget = default_budget
+        self.capacity = capacity
+        self.class_weights = class_weights or dict(DEFAULT_CLASS_WEIGHTS)
+        self.tenant_budgets = tenant_budgets or {}
+
+    def budget_for(self, tenant_id: str) -> TenantBudget:
+        """Budget of a tenant, with its overrides applied."""
+        override = self.tenant_budgets.get(tenant_id, {})
+        return TenantBudget(
+            requests_per_window=int(override.get("requests_per_window", self.default_budget.requests_per_window)),
+            tokens_per_window=int(override.get("tokens_per_window", self.default_budget.tokens_per_window)),
+        )
+
+    def class_share(self, priority: str) -> float:
+        """Fraction of the shared capacity a priority class may fill."""
+        return self.class_weights[priority] / max(self.class_weights.values())
+
+    def admit(
+        self,
+        tenant_id: str,
+        priority: str = "interactive",
+        requests: int = 1,
+        tokens: int = 0,
+        now: Optional[float] = None,
+    ) -> AdmissionDecision:
+        """
+        Reserve budget for a request, or explain why it has to wait.
+
+        Counters are reserved one at a time and released again if a later
+        one is full, so a refused request leaves no reservation behind.
+
+        Args:
+            tenant_id: Cognito identity of the caller
+            priority: One of PRIORITY_CLASSES
+            requests: Number of generations (more than one for batches)
+            tokens: Estimated tokens the generations will use
+            now: Current time, for tests
+
+        Returns:
+            AdmissionDecision; `reason` is admitted, tenant_requests,
+            tenant_tokens, capacity_requests or capacity_tokens
+
+        Raises:
+            ValueError: If the priority class is unknown
+        """
+        if priority not in self.class_weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        now = time.time() if now is None else now
+        window = int(now // WINDOW_SECONDS)
+        expires_at = (window + 2) * WINDOW_SECONDS
+        budget = self.budget_for(tenant_id)
+        share = self.class_share(priority)
+
+        counters = [
+            ("tenant_requests", _counter_key(tenant_id, "requests", window), requests, budget.requests_per_window),
+            ("tenant_tokens", _counter_key(tenant_id, "tokens", window), tokens, budget.tokens_per_window),
+            ("capacity_requests", _counter_key(None, "requests", window), requests,
+             math.floor(self.capacity.requests_per_window * share)),
+            ("capacity_tokens", _counter_key(None, "tokens", window), tokens,
+             math.floor(self.capacity.tokens_per_window * share)),
+        ]
+
+        reserved: List[Tuple[str, int]] = []
+        for reason, key, amount, limit in counters:
+            if not self.store.try_add(key, amount, limit, expires_at):
+                for reserved_key, reserved_amount in reserved:
+                    self.store.add(reserved_key, -reserved_amount, expires_at)
+                return AdmissionDecision(
+                    admitted=False,
+                    reason=reason,
+                    retry_after=max(1.0, (window + 1) * WINDOW_SECONDS - now),
+                )
+            reserved.append((key, amount))
+
+        return AdmissionDecision(
+            admitted=True,
+            reason="admitted",
+            ticket=AdmissionTicket(tenant_id, priority, window, tokens),
+        )
+
+    def settle(self, ticket: AdmissionTicket, used_tokens: int) -> None:
+        """
+        Replace a ticket's token estimate with the tokens actually used.
+
+        Args:
+            ticket: Ticket of an admitted request
+            used_tokens: Input and output tokens reported by Bedrock (0 on a cache hit)
+        """
+        delta = used_tokens - ticket.reserved_tokens
+        if delta == 0:
+            return
+        expires_at = (ticket.window + 2) * WINDOW_SECONDS
+        self.store.add(_counter_key(ticket.tenant_id, "tokens", ticket.window), delta, expires_at)
+        self.store.add(_counter_key(None, "tokens", ticket.window), delta, expires_at)
@@ -3,6 +3,23 @@ set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 OUTPUT_ZIP="lambda.zip"
+NUMPY_LAYER_ZIP="numpy_layer.zip"
+
+# --slim (or SLIM_BUILD=true) precompiles bytecode and strips files the Lambda never reads
+SLIM_BUILD="${SLIM_BUILD:-false}"
+# --numpy-layer (or NUMPY_LAYER=true) also builds the NumPy layer that image reuse needs;
+# NumPy is kept out of the function package so deployments without image reuse stay small
+NUMPY_LAYER="${NUMPY_LAYER:-false}"
+for arg in "$@"; do
+    case "$arg" in
+        --slim) SLIM_BUILD=true ;;
+        --numpy-layer) NUMPY_LAYER=true ;;
+    esac
+done
+
+# botocore service models the handler and the X-Ray tracer need; every other service is removed in slim builds
+KEEP_BOTOCORE_SERVICES="${KEEP_BOTOCORE_SERVICES:-dynamodb s3 ssm bedrock-runtime lambda apigatewaymanagementapi sts xray}"
+LAMBDA_PYTHON_VERSION="3.12"
 
 echo "Building gen_landing Lambda..."
 
@@ -13,9 +30,21 @@ rm -f "$OUTPUT_ZIP"
 TEMP_DIR=$(mktemp -d)
 trap "rm -rf $TEMP_DIR" EXIT
 
-# Copy the handler and models to temp directory
+# Copy the handler, its helper modules and models to temp directory
 cp "$SCRIPT_DIR/handler.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/admission.py" "$TEMP_DIR/"
 cp "$SCRIPT_DIR/models.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/generation_bundle.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/generation_cache.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/job_status.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/image_index.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/image_pipeline.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/json_extract.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/model_router.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/progress_channel.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/pregeneration.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/rate_limiter.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/single_flight.py" "$TEMP_DIR/"
 cp "$SCRIPT_DIR/landing_template.html" "$TEMP_DIR/"
 
 # Install dependencies if requirements.txt exists
@@ -27,7 +56,7 @@ if [ -f "$SCRIPT_DIR/requirements.txt" ]; then
         --target "$TEMP_DIR" \
         --platform linux_aarch64 \
         --implementation cp \
-        --python-version 3.12 \
+        --python-version "$LAMBDA_PYTHON_VERSION" \
         --only-binary=:all: \
         --upgrade \
         --no-deps || {
@@ -39,12 +68,90 @@ if [ -f "$SCRIPT_DIR/requirements.txt" ]; then
     }
 fi
 
+# Cumulative import time of handler.py in milliseconds, or n/a when it cannot be imported here
+measure_import_ms() {
+    (cd "$1" && PYTHONDONTWRITEBYTECODE=1 AWS_DEFAULT_REGION=us-west-2 \
+        python3 -X importtime -c "import handler" 2>&1 >/dev/null) \
+        | awk -F'|' '$3 ~ / handler$/ { gsub(/ /, "", $2); printf "%.1f", $2 / 1000; found = 1 } END { if (!found) print "n/a" }' \
+        || echo "n/a"
+}
+
+zip_size() {
+    (cd "$1" && zip -qr - . -x "*.pyc" "__pycache__/*" "*.git*" | wc -c | tr -d ' ')
+}
+
+if [ "$SLIM_BUILD" = "true" ]; then
+    echo "Slim build: measuring the standard package first..."
+    # pip leaves host bytecode behind; the standard zip excludes it, so measure without it
+    find "$TEMP_DIR" -type d -name "__pycache__" -prune -exec rm -rf {} +
+    BASELINE_SIZE=$(zip_size "$TEMP_DIR")
+    BASELINE_IMPORT_MS=$(measure_import_ms "$TEMP_DIR")
+
+    echo "Stripping botocore service data (keeping: $KEEP_BOTOCORE_SERVICES)..."
+    for service_dir in "$TEMP_DIR"/botocore/data/*/; do
+        [ -d "$service_dir" ] || continue
+        service=$(basename "$service_dir")
+        case " $KEEP_BOTOCORE_SERVICES " in
+            *" $service "*) ;;
+            *) rm -rf "$service_dir" ;;
+        esac
+    done
+    # boto3 resource models are unused; the handler only uses low-level clients
+    find "$TEMP_DIR/boto3/data" -mindepth 1 -maxdepth 1 -type d ! -name s3 -exec rm -rf {} + 2>/dev/null || true
+
+    echo "Removing tests, type stubs and dist-info files..."
+    find "$TEMP_DIR" -type d \( -name tests -o -name test \) -prune -exec rm -rf {} +
+    find "$TEMP_DIR" -type f \( -name "*.pyi" -o -name "py.typed" \) -delete
+    # Keep METADATA so importlib.metadata.version() still works
+    find "$TEMP_DIR" -path "*.dist-info/*" -type f ! -name METADATA -delete
+
+    # The Lambda filesystem is read-only, so bytecode is recompiled on every cold start unless shipped.
+    # Bytecode is version specific; only precompile with a matching interpreter.
+    if python3 -c "import sys; sys.exit(0 if '%d.%d' % sys.version_info[:2] == '$LAMBDA_PYTHON_VERSION' else 1)"; then
+        echo "Precompiling bytecode..."
+        python3 -m compileall -q -j 0 --invalidation-mode unchecked-hash "$TEMP_DIR" || true
+    else
+        echo "⚠️  python3 is not $LAMBDA_PYTHON_VERSION - skipping bytecode precompilation"
+    fi
+
+    SLIM_IMPORT_MS=$(measure_import_ms "$TEMP_DIR")
+fi
+
 # Create the zip file
 cd "$TEMP_DIR"
-zip -r "$OUTPUT_ZIP" . -x "*.pyc" "__pycache__/*" "*.git*"
+if [ "$SLIM_BUILD" = "true" ]; then
+    zip -qr "$OUTPUT_ZIP" . -x "*.git*"
+else
+    zip -r "$OUTPUT_ZIP" . -x "*.pyc" "__pycache__/*" "*.git*"
+fi
 
 # Move the zip file to the build directory
 mv "$OUTPUT_ZIP" "$SCRIPT_DIR/"
 
+if [ "$SLIM_BUILD" = "true" ]; then
+    SLIM_SIZE=$(wc -c < "$SCRIPT_DIR/$OUTPUT_ZIP" | tr -d ' ')
+    echo "Slim build report:"
+    echo "  package size: ${BASELINE_SIZE} -> ${SLIM_SIZE} bytes ($(( (SLIM_SIZE - BASELINE_SIZE) * 100 / BASELINE_SIZE ))%)"
+    echo "  import time:  ${BASELINE_IMPORT_MS} -> ${SLIM_IMPORT_MS} ms"
+fi
+
+if [ "$NUMPY_LAYER" = "true" ]; then
+    echo "Building the NumPy layer for image reuse..."
+    LAYER_DIR=$(mktemp -d)
+    trap "rm -rf $TEMP_DIR $LAYER_DIR" EXIT
+    rm -f "$SCRIPT_DIR/$NUMPY_LAYER_ZIP"
+    # Lambda adds the layer's python/ directory to sys.path
+    pip3 install -r "$SCRIPT_DIR/requirements-image-reuse.txt" \
+        --target "$LAYER_DIR/python" \
+        --platform manylinux2014_aarch64 \
+        --implementation cp \
+        --python-version "$LAMBDA_PYTHON_VERSION" \
+        --only-binary=:all: \
+        --upgrade
+    find "$LAYER_DIR" -type d \( -name tests -o -name __pycache__ \) -prune -exec rm -rf {} +
+    (cd "$LAYER_DIR" && zip -qr "$SCRIPT_DIR/$NUMPY_LAYER_ZIP" python)
+    echo "NumPy layer: $SCRIPT_DIR/$NUMPY_LAYER_ZIP"
+fi
+
 echo "Build completed successfully!"
 echo "Lambda package: $SCRIPT_DIR/$OUTPUT_ZIP"
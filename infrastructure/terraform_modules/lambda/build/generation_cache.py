@@ -0,0 +1,240 @@
+"""Content-addressed cache for generated landing content - in-process LRU backed by S3."""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+logger = Logger()
+
+# Cache entries live under the generated/ prefix so existing IAM grants apply
+CACHE_PREFIX: str = "generated/cache"
+CACHE_FORMAT_VERSION: int = 1
+# DeleteObjects accepts at most this many keys per call
+_DELETE_BATCH: int = 1000
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize an industry prompt so trivially different spellings share a cache entry.
+
+    Args:
+        prompt: Industry/business description as typed by the user
+
+    Returns:
+        Lower-cased prompt with collapsed whitespace
+    """
+    return " ".join(prompt.lower().split())
+
+
+def build_cache_key(
+    prompt: str,
+    theme_context: str,
+    model_id: str,
+    prompt_version: str,
+) -> str:
+    """
+    Build the content address for a generation.
+
+    Args:
+        prompt: Industry/business description
+        theme_context: Output of build_theme_context for the request
+        model_id: Bedrock model ID used for generation
+        prompt_version: Version of the SSM prompt template
+
+    Returns:
+        Hex SHA-256 digest identifying the generation inputs
+    """
+    material = json.dumps(
+        {
+            "format": CACHE_FORMAT_VERSION,
+            "prompt": normalize_prompt(prompt),
+            "theme_context": theme_context.strip(),
+            "model_id": model_id,
+            "prompt_version": prompt_version,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """
+    Two-tier cache of landing content keyed by build_cache_key.
+
+    The in-process tier is an LRU capped at `max_entries` that survives
+    across warm invocations. The S3 tier is shared by all containers and
+    capped at `s3_max_entries`: every `evict_every` writes, a container
+    lists the cache prefix and deletes expired entries and the oldest
+    writes beyond the cap. S3 does not record reads, so this tier evicts
+    in write order. The bucket lifecycle rule on the cache prefix is a
+    backstop for entries written while eviction is off.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        ttl_seconds: int = 86400,
+        max_entries: int = 256,
+        prefix: str = CACHE_PREFIX,
+        s3_max_entries: int = 0,
+        evict_every: int = 50,
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.s3_max_entries = s3_max_entries
+        self.evict_every = max(1, evict_every)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _object_key(self, cache_key: str) -> str:
+        return f"{self.prefix}/{cache_key}.json"
+
+    def _remember(self, cache_key: str, entry: Dict[str, Any]) -> None:
+        """Insert an entry into the in-process LRU, evicting the least recently used ones."""
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                logger.debug("Evicted generation cache entry", extra={"cache_key": evicted_key})
+
+    def get(self, cache_key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up cached landing content.
+
+        Args:
+            cache_key: Content address from build_cache_key
+
+        Returns:
+            Tuple of (landing content dict, tier) where tier is "memory" or "s3",
+            or (None, None) on a miss
+        """
+        entry, tier = self.lookup(cache_key)
+        return (entry["content"], tier) if entry is not None else (None, None)
+
+    def lookup(self, cache_key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Look up a whole cache entry, including its origin and timestamps.
+
+        Args:
+            cache_key: Content address from build_cache_key
+
+        Returns:
+            Tuple of (entry, tier) like get, or (None, None) on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(cache_key)
+                    return entry, "memory"
+                del self._entries[cache_key]
+
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self._object_key(cache_key))
+            entry = json.loads(response["Body"].read())
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.warning(f"Generation cache lookup failed, treating as miss: {e}")
+            return None, None
+        except Exception as e:
+            logger.warning(f"Generation cache lookup failed, treating as miss: {e}")
+            return None, None
+
+        if entry.get("expires_at", 0) <= now:
+            return None, None
+
+        self._remember(cache_key, entry)
+        return entry, "s3"
+
+    def put(self, cache_key: str, content: Dict[str, Any], origin: str = "live") -> None:
+        """
+        Store landing content in both tiers.
+
+        Args:
+            cache_key: Content address from build_cache_key
+            content: Landing content as a plain dict
+            origin: "live" for content generated for a request, "pregenerated"
+                for content generated ahead of demand
+        """
+        now = time.time()
+        entry = {
+            "cache_key": cache_key,
+            "created_at": now,
+            "expires_at": now + self.ttl_seconds,
+            "origin": origin,
+            "content": content,
+        }
+        self._remember(cache_key, entry)
+
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self._object_key(cache_key),
+                Body=json.dumps(entry),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            # The cache is an optimization; never fail a generation because of it
+            logger.warning(f"Failed to write generation cache entry: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self.s3_max_entries > 0 and self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Delete expired S3 entries and the oldest ones beyond `s3_max_entries`.
+
+        Returns:
+            Number of entries deleted
+        """
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            objects = []
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/"):
+                objects.extend(page.get("Contents", []))
+
+            # Newest first; everything past the cap or the TTL goes
+            objects.sort(key=lambda item: item["LastModified"], reverse=True)
+            stale = [
+                item["Key"]
+                for position, item in enumerate(objects)
+                if position >= self.s3_max_entries > 0 or item["LastModified"].timestamp() <= cutoff
+            ]
+            for start in range(0, len(stale), _DELETE_BATCH):
+                batch = stale[start:start + _DELETE_BATCH]
+                self.s3_client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+        except Exception as e:
+            logger.warning(f"Generation cache eviction failed: {e}")
+            return 0
+
+        with self._lock:
+            for key in stale:
+                self._entries.pop(key[len(self.prefix) + 1:-len(".json")], None)
+        if stale:
+            logger.info("Evicted generation cache entries from S3", extra={
+                "deleted": len(stale),
+                "remaining": len(objects) - len(stale)
+            })
+        return len(stale)
@@ -1,20 +1,57 @@
 """Lambda handler for gen_landing - generates landing page content using AWS Bedrock."""
 
 import json
+import math
 import os
 import random
-import re
+import string
+import threading
 import time
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any, Union
 
 import boto3
-import requests
 from aws_lambda_powertools import Logger, Tracer, Metrics
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
 from aws_lambda_powertools.utilities.typing import LambdaContext
-from bs4 import BeautifulSoup, Tag
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
 # No longer using pydantic validation
 
+from admission import (
+    AdmissionController,
+    AdmissionTicket,
+    DynamoDBAdmissionStore,
+    TenantBudget,
+    load_class_weights,
+    load_tenant_budgets,
+)
+from generation_bundle import build_bundle, encode_bundle, write_generation_bundle
+from generation_cache import GenerationCache, build_cache_key
+from image_index import DEFAULT_DIMENSIONS, DEFAULT_EMBEDDING_MODEL_ID, ImageIndex, build_embedding_request, extract_embedding
+from image_pipeline import DEFAULT_FORMATS, DEFAULT_WIDTHS, apply_images, render_images
+from job_status import build_status, read_job_status, write_job_status
+from json_extract import JSONFieldScanner, extract_json_object, repair_json
+from model_router import DEFAULT_FAST_MODEL_ID, ModelRoute, describe_routes, load_routes, routes_fingerprint
+from pregeneration import (
+    HistoryBuffer,
+    cost_per_hit,
+    estimate_cost,
+    load_run_reports,
+    summarize_history,
+    top_combinations,
+    write_run_report,
+)
+from progress_channel import JOB_ID_PATTERN, WebSocketProgressChannel, build_job_progress
 from models import (
     BedrockPayload,
     BedrockResponse,
@@ -24,6 +61,8 @@ from models import (
     SSMPrompts,
     ThemeInfo,
 )
+from rate_limiter import AdaptiveRateLimiter
+from single_flight import S3LeaseStore, SingleFlight
 
 # Initialize Powertools
 logger = Logger()
@@ -32,11 +71,91 @@ metrics = Metrics()
 
 # Environment variables
 BEDROCK_REGION: str = os.environ.get("BEDROCK_REGION", "us-west-2")
-
-# AWS clients
-s3_client = boto3.client("s3")
-bedrock_runtime = boto3.client("bedrock-runtime", region_name=BEDROCK_REGION)
-ssm_client = boto3.client("ssm")
+BEDROCK_STREAMING: bool = os.environ.get("BEDROCK_STREAMING", "false").lower() == "true"
+GENERATION_CACHE_ENABLED: bool = os.environ.get("GENERATION_CACHE_ENABLED", "false").lower() == "true"
+GENERATION_CACHE_TTL_SECONDS: int = int(os.environ.get("GENERATION_CACHE_TTL_SECONDS", "86400"))
+GENERATION_CACHE_MAX_ENTRIES: int = int(os.environ.get("GENERATION_CACHE_MAX_ENTRIES", "256"))
+# Cap of the shared S3 tier (0 leaves it to the TTL and the bucket lifecycle rule)
+GENERATION_CACHE_S3_MAX_ENTRIES: int = int(os.environ.get("GENERATION_CACHE_S3_MAX_ENTRIES", "10000"))
+# Identical in-flight generations wait for one leader instead of each calling Bedrock (needs the generation cache)
+SINGLE_FLIGHT_ENABLED: bool = os.environ.get("SINGLE_FLIGHT_ENABLED", "false").lower() == "true"
+SINGLE_FLIGHT_LEASE_SECONDS: float = float(os.environ.get("SINGLE_FLIGHT_LEASE_SECONDS", "90"))
+SINGLE_FLIGHT_POLL_SECONDS: float = float(os.environ.get("SINGLE_FLIGHT_POLL_SECONDS", "0.5"))
+# Count cached-path requests per container; pre-generation ranks requests by the flushed counts
+REQUEST_HISTORY_ENABLED: bool = os.environ.get("REQUEST_HISTORY_ENABLED", "false").lower() == "true"
+# Flush the counts at the end of an invocation once this many requests or seconds accumulated
+REQUEST_HISTORY_FLUSH_EVERY: int = int(os.environ.get("REQUEST_HISTORY_FLUSH_EVERY", "100"))
+REQUEST_HISTORY_FLUSH_SECONDS: float = float(os.environ.get("REQUEST_HISTORY_FLUSH_SECONDS", "300"))
+# Pre-generation runs: how many combinations, from how much history, how many at a time
+PREGEN_TOP_N: int = int(os.environ.get("PREGEN_TOP_N", "10"))
+PREGEN_HISTORY_HOURS: int = int(os.environ.get("PREGEN_HISTORY_HOURS", "24"))
+PREGEN_MAX_CONCURRENCY: int = int(os.environ.get("PREGEN_MAX_CONCURRENCY", "2"))
+# USD per 1,000 tokens of the primary model, for the cost-per-hit report
+PREGEN_PRICE_PER_1K_INPUT_TOKENS: float = float(os.environ.get("PREGEN_PRICE_PER_1K_INPUT_TOKENS", "0.003"))
+PREGEN_PRICE_PER_1K_OUTPUT_TOKENS: float = float(os.environ.get("PREGEN_PRICE_PER_1K_OUTPUT_TOKENS", "0.015"))
+BATCH_MAX_CONCURRENCY: int = int(os.environ.get("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS: int = int(os.environ.get("BATCH_MAX_ITEMS", "50"))
+BEDROCK_READ_TIMEOUT: int = int(os.environ.get("BEDROCK_READ_TIMEOUT", "60"))
+BEDROCK_MAX_RPS: float = float(os.environ.get("BEDROCK_MAX_RPS", "5"))
+# Continuation requests allowed when the model stops at max_tokens
+MAX_CONTINUATIONS: int = int(os.environ.get("BEDROCK_MAX_CONTINUATIONS", "2"))
+# "single" asks for the whole page in one completion, "parallel" asks for each section concurrently
+GENERATION_STRATEGY: str = os.environ.get("GENERATION_STRATEGY", "single")
+GENERATION_STRATEGIES: Tuple[str, ...] = ("single", "parallel")
+# Lower model tier and optional per-sub-task overrides of the routing table (JSON)
+BEDROCK_FAST_MODEL_ID: str = os.environ.get("BEDROCK_FAST_MODEL_ID", DEFAULT_FAST_MODEL_ID)
+MODEL_ROUTES: str = os.environ.get("MODEL_ROUTES", "")
+# Mark the static system prompt and template prefix as cacheable (needs a model with Bedrock prompt caching)
+BEDROCK_PROMPT_CACHING: bool = os.environ.get("BEDROCK_PROMPT_CACHING", "false").lower() == "true"
+# Shorter prefixes are not cached by Bedrock (1024 tokens for Claude Sonnet models, 2048 for Claude Haiku)
+PROMPT_CACHE_MIN_TOKENS: int = int(os.environ.get("PROMPT_CACHE_MIN_TOKENS", "1024"))
+# Acknowledge requests with 202 and generate in an asynchronous self-invocation (per-request "async" overrides)
+ASYNC_MODE: bool = os.environ.get("ASYNC_MODE", "false").lower() == "true"
+# Bucket holding async job status objects; defaults to OUTPUT_BUCKET
+STATUS_BUCKET: str = os.environ.get("STATUS_BUCKET", "")
+# Management endpoint of the progress WebSocket API; status changes are also pushed there when set
+PROGRESS_WS_ENDPOINT: str = os.environ.get("PROGRESS_WS_ENDPOINT", "")
+# Per-tenant budgets and weighted sharing of the Bedrock quota (see admission.py)
+ADMISSION_CONTROL: bool = os.environ.get("ADMISSION_CONTROL", "false").lower() == "true"
+# DynamoDB table shared by all containers; admission control stays off without it
+ADMISSION_TABLE: str = os.environ.get("ADMISSION_TABLE", "")
+ADMISSION_TENANT_RPM: int = int(os.environ.get("ADMISSION_TENANT_RPM", "30"))
+ADMISSION_TENANT_TPM: int = int(os.environ.get("ADMISSION_TENANT_TPM", "60000"))
+ADMISSION_CAPACITY_RPM: int = int(os.environ.get("ADMISSION_CAPACITY_RPM", "200"))
+ADMISSION_CAPACITY_TPM: int = int(os.environ.get("ADMISSION_CAPACITY_TPM", "400000"))
+ADMISSION_CLASS_WEIGHTS: str = os.environ.get("ADMISSION_CLASS_WEIGHTS", "")
+ADMISSION_TENANT_BUDGETS: str = os.environ.get("ADMISSION_TENANT_BUDGETS", "")
+# Tokens reserved per generation until Bedrock reports the real usage
+ADMISSION_TOKEN_ESTIMATE: int = int(os.environ.get("ADMISSION_TOKEN_ESTIMATE", "3000"))
+# Over-budget requests wait this long for the next window before being refused with 429
+ADMISSION_MAX_WAIT_SECONDS: float = float(os.environ.get("ADMISSION_MAX_WAIT_SECONDS", "5"))
+# Render img_prompts with the image model (IMAGE_MODEL_ID) and store them as responsive AVIF/WebP variants
+IMAGE_GENERATION_ENABLED: bool = os.environ.get("IMAGE_GENERATION_ENABLED", "false").lower() == "true"
+IMAGE_MODEL_ID: str = os.environ.get("IMAGE_MODEL_ID", "amazon.titan-image-generator-v1")
+# Images rendered at the same time; image models have far lower quotas than text models
+IMAGE_MAX_CONCURRENCY: int = int(os.environ.get("IMAGE_MAX_CONCURRENCY", "2"))
+IMAGE_WIDTHS: Tuple[int, ...] = tuple(
+    int(width) for width in os.environ.get("IMAGE_WIDTHS", ",".join(map(str, DEFAULT_WIDTHS))).split(",") if width
+)
+IMAGE_FORMATS: Tuple[str, ...] = tuple(
+    fmt.strip().lower() for fmt in os.environ.get("IMAGE_FORMATS", ",".join(DEFAULT_FORMATS)).split(",") if fmt.strip()
+)
+# Rendered size as WIDTHxHEIGHT; must be a size the image model supports
+IMAGE_SIZE: Tuple[int, int] = tuple(int(value) for value in os.environ.get("IMAGE_SIZE", "1280x768").split("x"))
+IMAGE_QUALITY: int = int(os.environ.get("IMAGE_QUALITY", "70"))
+# An image is only started while this much time is left
+IMAGE_MIN_SECONDS: float = float(os.environ.get("IMAGE_MIN_SECONDS", "15"))
+CLOUDFRONT_DOMAIN: str = os.environ.get("CLOUDFRONT_DOMAIN", "")
+# Reuse an earlier image when its prompt embedding is at least this similar (see image_index; NumPy comes from the numpy layer)
+IMAGE_REUSE_ENABLED: bool = os.environ.get("IMAGE_REUSE_ENABLED", "false").lower() == "true"
+IMAGE_REUSE_THRESHOLD: float = float(os.environ.get("IMAGE_REUSE_THRESHOLD", "0.92"))
+IMAGE_EMBEDDING_MODEL_ID: str = os.environ.get("IMAGE_EMBEDDING_MODEL_ID", DEFAULT_EMBEDDING_MODEL_ID)
+IMAGE_EMBEDDING_DIMENSIONS: int = int(os.environ.get("IMAGE_EMBEDDING_DIMENSIONS", str(DEFAULT_DIMENSIONS)))
+# Appended entries that trigger folding the index deltas into a new snapshot
+IMAGE_INDEX_COMPACT_AFTER: int = int(os.environ.get("IMAGE_INDEX_COMPACT_AFTER", "50"))
+IMAGE_INDEX_REFRESH_SECONDS: float = float(os.environ.get("IMAGE_INDEX_REFRESH_SECONDS", "60"))
+# Also write landing_content.json/theme_info.json, for readers that do not use read_generation_bundle
+WRITE_LEGACY_ASSETS: bool = os.environ.get("WRITE_LEGACY_ASSETS", "false").lower() == "true"
 
 # CORS headers
 CORS_HEADERS: Dict[str, str] = {
@@ -51,327 +170,2580 @@ BASE_DELAY: float = 1.0
 MAX_TOTAL_TIME: int = 120
 REQUEST_TIMEOUT: int = 5
 
+# Time kept back from the Lambda's remaining time so a response can always be returned
+DEADLINE_SAFETY_MARGIN_SECONDS: float = 2.0
+# Time generation leaves for storing its results
+STORE_RESERVE_SECONDS: float = 2.0
+
+# Bedrock retries are handled solely by invoke_bedrock_with_retry, so botocore must not retry too
+BEDROCK_CLIENT_CONFIG = Config(
+    connect_timeout=REQUEST_TIMEOUT,
+    read_timeout=BEDROCK_READ_TIMEOUT,
+    retries={"max_attempts": 1, "mode": "standard"},
+)
+AWS_CLIENT_CONFIG = Config(
+    connect_timeout=REQUEST_TIMEOUT,
+    read_timeout=REQUEST_TIMEOUT,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+# AWS clients, created on first use and then reused by warm invocations
+s3_client: Any = None
+bedrock_runtime: Any = None
+ssm_client: Any = None
+lambda_client: Any = None
+dynamodb_client: Any = None
+progress_channel: Any = None
+admission_controller: Any = None
+_client_lock = threading.Lock()
+
+# Bedrock error codes worth retrying; everything else fails fast
+THROTTLING_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+})
+TRANSIENT_ERROR_CODES = frozenset({
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelStreamErrorException",
+    "ModelTimeoutException",
+    "ServiceUnavailableException",
+})
+
+# Shared by every Bedrock call made from this container, including batch workers
+bedrock_rate_limiter = AdaptiveRateLimiter(max_rate=BEDROCK_MAX_RPS)
+
+# Top-level LandingContent fields, in the order the model is asked to emit them
+LANDING_SECTIONS: Tuple[str, ...] = ("hero_html", "features_html", "cta_html", "img_prompts")
+
+# Event key marking the asynchronous self-invocation that does the work of a 202-acknowledged request
+ASYNC_JOB_EVENT_KEY: str = "async_job"
+# Event key of the scheduled pre-generation run
+PREGENERATE_EVENT_KEY: str = "pregenerate"
+# Tenant that pre-generation is admitted and billed as
+PREGENERATION_TENANT_ID: str = "pregeneration"
+
+# Cache breakpoint placed after each static prompt block
+CACHE_CONTROL: Dict[str, str] = {"type": "ephemeral"}
+
+# Per-section instructions of the parallel strategy; models and max_tokens come from the routing table
+SECTION_INSTRUCTIONS: Dict[str, str] = {
+    "hero_html": "Write only the hero section: headline, one-sentence subheadline and primary call to action.",
+    "features_html": "Write only the features section: three or four features, each with a short description.",
+    "cta_html": "Write only the closing call-to-action section.",
+    "img_prompts": "Write only the image prompts: a list of four short prompts for an image generation model.",
+}
+
+# System prompt of every section request of the parallel strategy; the page prompt from SSM asks for all sections at once
+SECTION_SYSTEM_PROMPT: str = (
+    "You are an expert landing page copywriter and visual content specialist. Each request asks for exactly one "
+    "section of a landing page and names it. Respond ONLY with a valid JSON object whose single key is that section. "
+    "HTML sections are semantic, sit in a single <section> element and use the 'lp-' prefix for CSS classes. "
+    "'img_prompts' is an array of industry-specific Unsplash-style image descriptions. "
+    "Do not include any explanation, markdown, or text outside the JSON object."
+)
+
+# SSM prompt parameters, fetched together in a single GetParameters call
+PROMPT_PARAMETER_NAMES: Dict[str, str] = {
+    "system_prompt": "/laas/bedrock/system_prompt",
+    "prompt_template": "/laas/bedrock/prompt",
+}
+PROMPT_CACHE_TTL_SECONDS: int = int(os.environ.get("PROMPT_CACHE_TTL_SECONDS", "300"))
+
+# Fallback prompts, used only when SSM is unreachable and nothing is cached
+DEFAULT_SYSTEM_PROMPT: str = (
+    "You are an expert landing page copywriter and visual content specialist. Given a business or industry description, "
+    "respond ONLY with a valid JSON object with the following fields: "
+    "'hero_html' (hero section HTML), 'features_html' (features section HTML), "
+    "'cta_html' (call to action HTML), and 'img_prompts' (array of exactly 4 industry-specific Unsplash-style image descriptions). "
+    "The HTML should be semantic and use the 'lp-' prefix for CSS classes. "
+    "For img_prompts, create vivid, industry-specific descriptions that will yield high-quality, relevant images for the specified industry. "
+    "Each image prompt should be detailed and professional, avoiding generic stock photo descriptions. "
+    "Do not include any explanation, markdown, or text outside the JSON object."
+)
+# Placeholders come last so the text before them is an identical, cacheable prefix on every request
+DEFAULT_PROMPT_TEMPLATE: str = (
+    "For images, generate 4 industry-specific Unsplash-style prompts that are highly relevant to the industry given below. "
+    "The prompts should be:\n"
+    "1. A hero background image that captures the essence of the industry\n"
+    "2. A feature image showcasing the industry's technology or processes\n"
+    "3. A call-to-action image that motivates professionals in the industry\n"
+    "4. A secondary feature image highlighting the industry's benefits or outcomes\n\n"
+    "Make each image prompt specific, professional, and visually compelling for the industry's sector.\n\n"
+    "Industry: {industry}{theme_context}"
+)
+
+# Warm-container prompt cache shared across invocations
+_prompt_cache: Dict[str, Any] = {
+    "prompts": None,
+    "versions": None,
+    "fetched_at": 0.0,
+    "refreshing": False,
+}
+_prompt_cache_lock = threading.Lock()
+
+# Generation cache per output bucket, kept across warm invocations
+_generation_caches: Dict[str, GenerationCache] = {}
+
+# Single-flight coordinator per output bucket, kept across warm invocations
+_single_flights: Dict[str, SingleFlight] = {}
+
+# Image reuse index per output bucket, kept across warm invocations
+_image_indexes: Dict[str, ImageIndex] = {}
+
+# Request history counters, kept across warm invocations until flushed
+request_history = HistoryBuffer(REQUEST_HISTORY_FLUSH_EVERY, REQUEST_HISTORY_FLUSH_SECONDS)
+
+# Routing table per primary model ID, built on first use
+_model_routes: Dict[str, Dict[str, ModelRoute]] = {}
+
 
 class BedrockError(Exception):
     """Custom exception for Bedrock-related errors."""
     pass
 
 
+class BedrockThrottledError(BedrockError):
+    """Raised when Bedrock keeps throttling a model."""
+    pass
+
+
 class SSMError(Exception):
     """Custom exception for SSM-related errors."""
     pass
 
 
-class LandingValidationError(Exception):
-    """Custom exception for validation errors."""
-    pass
+class LandingValidationError(Exception):
+    """Custom exception for validation errors."""
+    pass
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when the invocation's time budget runs out."""
+    pass
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a tenant or the shared Bedrock capacity has no budget left for a request."""
+    
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"Bedrock capacity exhausted ({reason}), retry in {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Deadline:
+    """Time budget for one invocation, derived from the Lambda's remaining time."""
+    
+    def __init__(self, budget_seconds: float) -> None:
+        self.expires_at = time.monotonic() + budget_seconds
+    
+    @classmethod
+    def from_context(cls, context: LambdaContext, safety_margin: float = DEADLINE_SAFETY_MARGIN_SECONDS) -> "Deadline":
+        """
+        Build a deadline from the Lambda context.
+        
+        Args:
+            context: Lambda context
+            safety_margin: Seconds kept back to build and return the response
+        
+        Returns:
+            Deadline expiring safety_margin seconds before the Lambda timeout
+        """
+        remaining_seconds = context.get_remaining_time_in_millis() / 1000
+        return cls(max(0.0, remaining_seconds - safety_margin))
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def check(self, stage: str) -> None:
+        """
+        Raise if the budget is already spent.
+        
+        Args:
+            stage: Name of the stage about to start, used in the error message
+        
+        Raises:
+            DeadlineExceededError: If no time is left
+        """
+        if self.expired():
+            raise DeadlineExceededError(f"Deadline exceeded before {stage}")
+
+
+def get_s3_client() -> Any:
+    """Return the shared S3 client, creating it on first use."""
+    global s3_client
+    if s3_client is None:
+        with _client_lock:
+            if s3_client is None:
+                s3_client = boto3.client("s3", config=AWS_CLIENT_CONFIG)
+    return s3_client
+
+
+def get_bedrock_runtime() -> Any:
+    """Return the shared bedrock-runtime client, creating it on first use."""
+    global bedrock_runtime
+    if bedrock_runtime is None:
+        with _client_lock:
+            if bedrock_runtime is None:
+                bedrock_runtime = boto3.client(
+                    "bedrock-runtime", region_name=BEDROCK_REGION, config=BEDROCK_CLIENT_CONFIG
+                )
+    return bedrock_runtime
+
+
+def get_ssm_client() -> Any:
+    """Return the shared SSM client, creating it on first use."""
+    global ssm_client
+    if ssm_client is None:
+        with _client_lock:
+            if ssm_client is None:
+                ssm_client = boto3.client("ssm", config=AWS_CLIENT_CONFIG)
+    return ssm_client
+
+
+def get_lambda_client() -> Any:
+    """Return the shared Lambda client, creating it on first use."""
+    global lambda_client
+    if lambda_client is None:
+        with _client_lock:
+            if lambda_client is None:
+                lambda_client = boto3.client("lambda", config=AWS_CLIENT_CONFIG)
+    return lambda_client
+
+
+def get_dynamodb_client() -> Any:
+    """Return the shared DynamoDB client, creating it on first use."""
+    global dynamodb_client
+    if dynamodb_client is None:
+        with _client_lock:
+            if dynamodb_client is None:
+                dynamodb_client = boto3.client("dynamodb", config=AWS_CLIENT_CONFIG)
+    return dynamodb_client
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Return the shared admission controller, or None when admission control is off."""
+    global admission_controller
+    if admission_controller is None and ADMISSION_CONTROL:
+        if not ADMISSION_TABLE:
+            # In-process counters would give every container the whole account's capacity
+            logger.warning("Admission control disabled: ADMISSION_TABLE is not set")
+            return None
+        store = DynamoDBAdmissionStore(get_dynamodb_client(), ADMISSION_TABLE)
+        with _client_lock:
+            if admission_controller is None:
+                admission_controller = AdmissionController(
+                    store,
+                    default_budget=TenantBudget(ADMISSION_TENANT_RPM, ADMISSION_TENANT_TPM),
+                    capacity=TenantBudget(ADMISSION_CAPACITY_RPM, ADMISSION_CAPACITY_TPM),
+                    class_weights=load_class_weights(ADMISSION_CLASS_WEIGHTS),
+                    tenant_budgets=load_tenant_budgets(ADMISSION_TENANT_BUDGETS),
+                )
+    return admission_controller
+
+
+def get_progress_channel(status_bucket: str) -> Any:
+    """Return the shared progress channel, or None when no push endpoint is configured."""
+    global progress_channel
+    if progress_channel is None and PROGRESS_WS_ENDPOINT:
+        # get_s3_client takes _client_lock itself, so it must be called before acquiring it
+        client = get_s3_client()
+        with _client_lock:
+            if progress_channel is None:
+                progress_channel = WebSocketProgressChannel(
+                    boto3.client("apigatewaymanagementapi", endpoint_url=PROGRESS_WS_ENDPOINT, config=AWS_CLIENT_CONFIG),
+                    client,
+                    status_bucket,
+                )
+    return progress_channel
+
+
+def classify_bedrock_error(error: Exception) -> str:
+    """
+    Classify a Bedrock failure for the retry policy.
+    
+    Args:
+        error: Exception raised by the bedrock-runtime client
+    
+    Returns:
+        "throttled" or "transient" for retryable errors, "fatal" otherwise
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if code in THROTTLING_ERROR_CODES or status_code == 429:
+            return "throttled"
+        if code in TRANSIENT_ERROR_CODES or status_code >= 500:
+            return "transient"
+        return "fatal"
+    
+    if isinstance(error, (ConnectTimeoutError, ReadTimeoutError, EndpointConnectionError, ConnectionClosedError)):
+        return "transient"
+    
+    if "Throttling" in str(error):
+        return "throttled"
+    
+    return "fatal"
+
+
+def record_stage_metric(name: str, unit: MetricUnit, value: float, **dimensions: Optional[str]) -> None:
+    """
+    Emit one metric with its own dimensions, such as model_id and outcome.
+    
+    Metrics added through `metrics` share a single dimension set per
+    invocation, so per-call dimensions need their own EMF document.
+    
+    Args:
+        name: Metric name
+        unit: Metric unit
+        value: Metric value
+        **dimensions: Dimension values; None values are left out
+    """
+    with single_metric(name=name, unit=unit, value=value) as metric:
+        for dimension, dimension_value in dimensions.items():
+            if dimension_value is not None:
+                metric.add_dimension(name=dimension, value=str(dimension_value))
+
+
+def record_retry_decision(decision: str, error_class: str, model_id: Optional[str] = None) -> None:
+    """
+    Emit a metric for a retry decision.
+    
+    Args:
+        decision: retry, fail_fast, fall_back, exhausted or out_of_time
+        error_class: Result of classify_bedrock_error
+        model_id: Model the failed call went to
+    """
+    record_stage_metric(
+        "BedrockRetryDecision", MetricUnit.Count, 1,
+        decision=decision, error_class=error_class, model_id=model_id
+    )
+
+
+def record_bedrock_latency(
+    model_id: str,
+    outcome: str,
+    total_ms: float,
+    first_byte_ms: Optional[float] = None,
+) -> None:
+    """
+    Emit the latency of one Bedrock completion, including any retries and continuations.
+    
+    Args:
+        model_id: Model that produced the completion
+        outcome: success, timeout, error, or parse_error when the completion
+            arrived but held no usable content
+        total_ms: Time until the whole completion was received
+        first_byte_ms: Time until the first completion text arrived, when known
+    """
+    record_stage_metric("BedrockLatency", MetricUnit.Milliseconds, total_ms, model_id=model_id, outcome=outcome)
+    if first_byte_ms is not None:
+        record_stage_metric(
+            "BedrockTimeToFirstByte", MetricUnit.Milliseconds, first_byte_ms, model_id=model_id, outcome=outcome
+        )
+
+
+def record_s3_write(object_type: str, elapsed_ms: float, size: int, outcome: str) -> None:
+    """
+    Emit the latency and size of one S3 write.
+    
+    Args:
+        object_type: bundle, section, legacy, status or image
+        elapsed_ms: Duration of the PutObject call
+        size: Body size in bytes
+        outcome: success or error
+    """
+    record_stage_metric("S3WriteLatency", MetricUnit.Milliseconds, elapsed_ms, object=object_type, outcome=outcome)
+    record_stage_metric("S3WriteBytes", MetricUnit.Bytes, size, object=object_type, outcome=outcome)
+
+
+def put_s3_object(bucket: str, key: str, body: Any, object_type: str, **put_kwargs: Any) -> None:
+    """
+    Write an object to S3, recording the write latency and size.
+    
+    Args:
+        bucket: S3 bucket name
+        key: Object key
+        body: Object body as text or bytes
+        object_type: Metric dimension describing the object (see record_s3_write)
+        **put_kwargs: Extra PutObject arguments, e.g. ContentType
+    """
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    outcome = "error"
+    start_time = time.perf_counter()
+    try:
+        get_s3_client().put_object(Bucket=bucket, Key=key, Body=data, **put_kwargs)
+        outcome = "success"
+    finally:
+        record_s3_write(object_type, (time.perf_counter() - start_time) * 1000, len(data), outcome)
+
+
+@tracer.capture_method
+def invoke_bedrock_with_retry(
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    payload: Union[BedrockPayload, Dict[str, Any]],
+    max_retries: int = MAX_RETRIES,
+    base_delay: float = BASE_DELAY,
+    max_total_time: int = MAX_TOTAL_TIME,
+    stream: bool = False,
+    throttle_retries: Optional[int] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Invoke Bedrock with exponential backoff retry and timeout per request.
+    
+    Throttling and transient errors are retried; validation, access and
+    other client errors fail immediately. Every call first takes a token
+    from the container-wide adaptive rate limiter, which slows down when
+    Bedrock throttles.
+    
+    Args:
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: The Bedrock model ID to use
+        payload: Validated payload for Bedrock, or the request body of a
+            non-Messages model (e.g. an image model) as a dict
+        max_retries: Maximum number of retry attempts
+        base_delay: Base delay for exponential backoff
+        max_total_time: Maximum total time for all attempts
+        stream: Use the response-stream API; only opening the stream is retried
+        throttle_retries: Throttled attempts to retry before raising
+            BedrockThrottledError so the caller can switch models; None
+            retries throttling like any other retryable error
+        cancelled: Once set, no further attempt is started and a pending
+            backoff ends early; a request already sent still runs to completion
+    
+    Returns:
+        Bedrock response dictionary
+    
+    Raises:
+        BedrockError: If Bedrock invocation fails or is cancelled
+        BedrockThrottledError: If throttling persists or is not retried
+        TimeoutError: If operation exceeds time limits
+    """
+    start_time = time.time()
+    throttles = 0
+    
+    for attempt in range(max_retries + 1):
+        if cancelled is not None and cancelled.is_set():
+            raise BedrockError("Bedrock invocation cancelled")
+        
+        # Check if we're approaching the total time limit
+        elapsed_time = time.time() - start_time
+        if elapsed_time >= max_total_time:
+            raise TimeoutError(f"Bedrock invocation exceeded maximum total time of {max_total_time}s")
+        
+        # Pace calls across threads; never wait past the remaining time budget
+        bedrock_rate_limiter.acquire(timeout=max_total_time - elapsed_time)
+        
+        call_start = time.perf_counter()
+        try:
+            logger.info(f"Bedrock invocation attempt {attempt + 1}/{max_retries + 1}")
+            
+            # Convert dataclass to dict for JSON serialization
+            payload_dict = payload if isinstance(payload, dict) else vars(payload)
+            
+            invoke = (
+                bedrock_runtime_client.invoke_model_with_response_stream
+                if stream
+                else bedrock_runtime_client.invoke_model
+            )
+            response = invoke(
+                modelId=llm_model_id,
+                body=json.dumps(payload_dict),
+                contentType="application/json",
+                accept="application/json",
+            )
+            
+            bedrock_rate_limiter.on_success()
+            # For streams this covers opening the stream; BedrockTimeToFirstByte covers the first text
+            record_stage_metric(
+                "BedrockCallLatency", MetricUnit.Milliseconds, (time.perf_counter() - call_start) * 1000,
+                model_id=llm_model_id, outcome="success"
+            )
+            record_stage_metric("BedrockRetries", MetricUnit.Count, attempt, model_id=llm_model_id)
+            return response
+            
+        except Exception as e:
+            error_message = str(e)
+            error_class = classify_bedrock_error(e)
+            record_stage_metric(
+                "BedrockCallLatency", MetricUnit.Milliseconds, (time.perf_counter() - call_start) * 1000,
+                model_id=llm_model_id, outcome=error_class
+            )
+            logger.warning(f"Bedrock attempt {attempt + 1} failed ({error_class}): {error_message}")
+            
+            if error_class == "throttled":
+                bedrock_rate_limiter.on_throttle()
+                throttles += 1
+                if throttle_retries is not None and throttles > throttle_retries:
+                    record_retry_decision("fall_back", error_class, llm_model_id)
+                    raise BedrockThrottledError(f"Bedrock throttled {llm_model_id}: {error_message}")
+            
+            # Client errors will never succeed, so don't spend time retrying them
+            if error_class == "fatal":
+                record_retry_decision("fail_fast", error_class, llm_model_id)
+                raise BedrockError(f"Bedrock invocation failed with a non-retryable error: {error_message}")
+            
+            # Don't retry on the last attempt
+            if attempt == max_retries:
+                record_retry_decision("exhausted", error_class, llm_model_id)
+                error_type = BedrockThrottledError if error_class == "throttled" else BedrockError
+                raise error_type(f"Bedrock invocation failed after {max_retries + 1} attempts: {error_message}")
+            
+            # Exponential backoff with jitter
+            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+            delay = min(delay, 30)  # Cap at 30 seconds
+            
+            # Check if we have time for another retry once the backoff is over
+            elapsed_time = time.time() - start_time
+            if elapsed_time + delay >= max_total_time:
+                record_retry_decision("out_of_time", error_class, llm_model_id)
+                raise TimeoutError(f"Not enough time remaining for retry. Elapsed: {elapsed_time}s")
+            
+            record_retry_decision("retry", error_class, llm_model_id)
+            
+            logger.info(f"Retrying Bedrock call in {delay:.2f} seconds...")
+            if cancelled is not None:
+                cancelled.wait(delay)
+            else:
+                time.sleep(delay)
+    
+    raise BedrockError("Maximum retry attempts exceeded")
+
+
+def get_model_routes(primary_model_id: str) -> Dict[str, ModelRoute]:
+    """
+    Get the routing table for a primary model, building it on first use.
+    
+    Args:
+        primary_model_id: Model from BEDROCK_LLM_MODEL_ID
+    
+    Returns:
+        Route for every generation sub-task
+    """
+    routes = _model_routes.get(primary_model_id)
+    if routes is None:
+        routes = load_routes(primary_model_id, BEDROCK_FAST_MODEL_ID, MODEL_ROUTES)
+        _model_routes[primary_model_id] = routes
+        logger.info("Model routes loaded", extra={"routes": describe_routes(routes)})
+    return routes
+
+
+def invoke_routed(
+    bedrock_runtime_client: Any,
+    primary_model_id: str,
+    sub_task: str,
+    payload: BedrockPayload,
+    max_total_time: float = MAX_TOTAL_TIME,
+    stream: bool = False,
+    routing: Optional[Dict[str, Any]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Invoke the model routed for a sub-task, dropping to the next tier when a tier stays throttled.
+    
+    Args:
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        primary_model_id: Model from BEDROCK_LLM_MODEL_ID, selecting the routing table
+        sub_task: Key of the routing table, e.g. "page" or "img_prompts"
+        payload: Validated payload for Bedrock
+        max_total_time: Time budget across all tiers
+        stream: Use the response-stream API
+        routing: Dict filled with the model_id and tier that answered, and
+            the models that were skipped because they were throttled
+        cancelled: Stops retries and tier fallbacks once set (see invoke_bedrock_with_retry)
+    
+    Returns:
+        Bedrock response dictionary
+    
+    Raises:
+        BedrockError: If the last tier fails
+        TimeoutError: If the budget runs out
+    """
+    route = get_model_routes(primary_model_id)[sub_task]
+    start_time = time.perf_counter()
+    fell_back_from: List[str] = []
+    
+    for tier, model_id in enumerate(route.models):
+        last_tier = tier == len(route.models) - 1
+        try:
+            response = invoke_bedrock_with_retry(
+                bedrock_runtime_client,
+                model_id,
+                payload,
+                max_total_time=max_total_time - (time.perf_counter() - start_time),
+                stream=stream,
+                # A lower tier is waiting, so a throttled one only gets its own few backoffs
+                throttle_retries=None if last_tier else route.throttle_retries,
+                cancelled=cancelled,
+            )
+        except BedrockThrottledError:
+            if last_tier:
+                raise
+            logger.warning("Model throttled, falling back to the next tier", extra={
+                "sub_task": sub_task,
+                "model_id": model_id,
+                "next_model_id": route.models[tier + 1]
+            })
+            with single_metric(name="ModelTierFallback", unit=MetricUnit.Count, value=1) as metric:
+                metric.add_dimension(name="sub_task", value=sub_task)
+            fell_back_from.append(model_id)
+            continue
+        
+        if routing is not None:
+            routing.update({"model_id": model_id, "tier": tier, "fell_back_from": fell_back_from})
+        return response
+    
+    raise BedrockError(f"No model configured for {sub_task}")
+
+
+def record_sub_task(
+    primary_model_id: str,
+    sub_task: str,
+    routing: Dict[str, Any],
+    elapsed_ms: float,
+    stats: Optional[Dict[str, Any]],
+) -> None:
+    """
+    Record the model choice and latency of a sub-task against its SLO.
+    
+    Args:
+        primary_model_id: Model from BEDROCK_LLM_MODEL_ID, selecting the routing table
+        sub_task: Key of the routing table
+        routing: Routing decision filled by invoke_routed
+        elapsed_ms: Wall-clock time of the sub-task
+        stats: Generation stats; the entry is stored under stats["routing"][sub_task]
+    """
+    slo_ms = get_model_routes(primary_model_id)[sub_task].slo_ms
+    slo_met = elapsed_ms <= slo_ms
+    if stats is not None:
+        stats.setdefault("routing", {})[sub_task] = dict(
+            routing, latency_ms=round(elapsed_ms, 2), slo_ms=slo_ms, slo_met=slo_met
+        )
+    
+    with single_metric(name="SubTaskLatency", unit=MetricUnit.Milliseconds, value=elapsed_ms) as metric:
+        metric.add_dimension(name="sub_task", value=sub_task)
+        metric.add_dimension(name="model_id", value=routing.get("model_id", "unknown"))
+    if not slo_met:
+        with single_metric(name="SubTaskSLOBreach", unit=MetricUnit.Count, value=1) as metric:
+            metric.add_dimension(name="sub_task", value=sub_task)
+
+
+def _fetch_prompts_from_ssm() -> Tuple[SSMPrompts, Dict[str, int]]:
+    """
+    Fetch both prompt parameters from SSM in a single batched call.
+    
+    Returns:
+        Tuple of (SSMPrompts, parameter versions keyed by parameter name)
+    
+    Raises:
+        SSMError: If any prompt parameter is missing
+    """
+    start_time = time.perf_counter()
+    try:
+        response = get_ssm_client().get_parameters(Names=list(PROMPT_PARAMETER_NAMES.values()))
+    except Exception:
+        record_stage_metric(
+            "SSMFetchLatency", MetricUnit.Milliseconds, (time.perf_counter() - start_time) * 1000, outcome="error"
+        )
+        raise
+    fetch_ms = (time.perf_counter() - start_time) * 1000
+    outcome = "missing" if response.get("InvalidParameters") else "success"
+    record_stage_metric("SSMFetchLatency", MetricUnit.Milliseconds, fetch_ms, outcome=outcome)
+    
+    if response.get("InvalidParameters"):
+        raise SSMError(f"Missing SSM parameters: {', '.join(response['InvalidParameters'])}")
+    
+    parameters = {parameter["Name"]: parameter for parameter in response["Parameters"]}
+    prompts = SSMPrompts(
+        system_prompt=parameters[PROMPT_PARAMETER_NAMES["system_prompt"]]["Value"],
+        prompt_template=parameters[PROMPT_PARAMETER_NAMES["prompt_template"]]["Value"],
+    )
+    versions = {name: parameter["Version"] for name, parameter in parameters.items()}
+    
+    logger.info("Prompts fetched from SSM", extra={"fetch_ms": round(fetch_ms, 2), "versions": versions})
+    if BEDROCK_PROMPT_CACHING:
+        cacheable_tokens = estimate_cacheable_tokens(prompts)
+        if cacheable_tokens < PROMPT_CACHE_MIN_TOKENS:
+            logger.warning("Static prompt prefix is too short to be cached", extra={
+                "estimated_tokens": cacheable_tokens,
+                "min_tokens": PROMPT_CACHE_MIN_TOKENS,
+                "versions": versions
+            })
+    return prompts, versions
+
+
+def _refresh_prompt_cache() -> None:
+    """Refresh stale cached prompts in the background, swapping them only when SSM versions changed."""
+    try:
+        prompts, versions = _fetch_prompts_from_ssm()
+        with _prompt_cache_lock:
+            if versions != _prompt_cache["versions"]:
+                logger.info("SSM prompt versions changed, replacing cached prompts", extra={"versions": versions})
+                _prompt_cache["prompts"] = prompts
+                _prompt_cache["versions"] = versions
+            _prompt_cache["fetched_at"] = time.monotonic()
+    except Exception as e:
+        logger.warning(f"Background prompt refresh failed, keeping cached prompts: {e}")
+    finally:
+        with _prompt_cache_lock:
+            _prompt_cache["refreshing"] = False
+
+
+@tracer.capture_method
+def get_prompts_from_ssm(deadline: Optional[Deadline] = None) -> SSMPrompts:
+    """
+    Retrieve Bedrock prompts from SSM parameters.
+    
+    Prompts are cached for PROMPT_CACHE_TTL_SECONDS across warm invocations.
+    Once the TTL expires the cached prompts keep being served while a
+    background refresh checks SSM for new parameter versions.
+    
+    Args:
+        deadline: Invocation deadline; SSM is skipped when less than one request timeout is left
+    
+    Returns:
+        SSMPrompts model with validated system and user prompts
+    """
+    with _prompt_cache_lock:
+        cached_prompts = _prompt_cache["prompts"]
+        if cached_prompts is not None:
+            metrics.add_metric(name="PromptCacheHit", unit=MetricUnit.Count, value=1)
+            age = time.monotonic() - _prompt_cache["fetched_at"]
+            if age >= PROMPT_CACHE_TTL_SECONDS and not _prompt_cache["refreshing"]:
+                _prompt_cache["refreshing"] = True
+                threading.Thread(target=_refresh_prompt_cache, daemon=True).start()
+            return cached_prompts
+    
+    metrics.add_metric(name="PromptCacheMiss", unit=MetricUnit.Count, value=1)
+    
+    if deadline is not None and deadline.remaining() < REQUEST_TIMEOUT:
+        logger.warning("Not enough time left for SSM, using default prompts", extra={"remaining_s": deadline.remaining()})
+        return SSMPrompts(
+            system_prompt=DEFAULT_SYSTEM_PROMPT,
+            prompt_template=DEFAULT_PROMPT_TEMPLATE
+        )
+    
+    try:
+        prompts, versions = _fetch_prompts_from_ssm()
+    except Exception as e:
+        logger.warning(f"Failed to get prompts from SSM, using defaults: {e}")
+        # Fallback to hardcoded prompts
+        return SSMPrompts(
+            system_prompt=DEFAULT_SYSTEM_PROMPT,
+            prompt_template=DEFAULT_PROMPT_TEMPLATE
+        )
+    
+    with _prompt_cache_lock:
+        _prompt_cache["prompts"] = prompts
+        _prompt_cache["versions"] = versions
+        _prompt_cache["fetched_at"] = time.monotonic()
+    
+    return prompts
+
+
+def get_prompt_version() -> str:
+    """
+    Describe the prompt template version currently in use.
+    
+    Returns:
+        SSM parameter versions of the cached prompts, or "default" for the hardcoded fallback
+    """
+    with _prompt_cache_lock:
+        versions = _prompt_cache["versions"]
+    if not versions:
+        return "default"
+    return ",".join(f"{name}:{version}" for name, version in sorted(versions.items()))
+
+
+@tracer.capture_method
+def build_theme_context(theme_info: ThemeInfo) -> str:
+    """
+    Build theme context string from theme information.
+    
+    Args:
+        theme_info: Validated theme information
+    
+    Returns:
+        Formatted theme context string
+    """
+    theme_context = ""
+    
+    if theme_info.fonts:
+        theme_context += f" Use fonts: {', '.join(theme_info.fonts)}. "
+    
+    if theme_info.color_palette:
+        theme_context += f" Use colors: {', '.join(theme_info.color_palette)}. "
+    
+    if theme_info.logo_url:
+        theme_context += f" Include logo from: {theme_info.logo_url}. "
+    
+    return theme_context
+
+
+def static_template_prefix(prompt_template: str) -> str:
+    """
+    Text of a prompt template before its first placeholder.
+    
+    This part is identical for every request, so it can be cached by
+    Bedrock; templates should keep industry and theme placeholders last.
+    
+    Args:
+        prompt_template: Prompt template from SSM
+    
+    Returns:
+        The literal text before the first replacement field, unescaped
+    """
+    literal_parts = []
+    for literal_text, field_name, _, _ in string.Formatter().parse(prompt_template):
+        literal_parts.append(literal_text)
+        if field_name is not None:
+            break
+    return "".join(literal_parts)
+
+
+def estimate_cacheable_tokens(prompts: SSMPrompts) -> int:
+    """
+    Estimate the tokens before the last cache breakpoint of a page request.
+    
+    Bedrock counts everything before a breakpoint, so this is the system
+    prompt plus the static template prefix. English prompt text averages
+    about four characters per token.
+    
+    Args:
+        prompts: System prompt and prompt template
+    
+    Returns:
+        Estimated token count of the cacheable prefix
+    """
+    static_text = prompts.system_prompt + static_template_prefix(prompts.prompt_template)
+    return len(static_text) // 4
+
+
+def build_system_blocks(system_prompt: str) -> Any:
+    """
+    Build the payload's system field, with a cache breakpoint when prompt caching is enabled.
+    
+    Args:
+        system_prompt: System prompt from SSM
+    
+    Returns:
+        The plain prompt, or a single cacheable text block
+    """
+    if not BEDROCK_PROMPT_CACHING:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+
+def build_user_content(user_prompt: str, static_prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Build the user message content, splitting off the static prefix as a cacheable block.
+    
+    Args:
+        user_prompt: Formatted user prompt
+        static_prefix: Leading text shared by every request (see static_template_prefix)
+    
+    Returns:
+        Messages API content blocks; the variable text always comes last
+    """
+    if not (BEDROCK_PROMPT_CACHING and static_prefix.strip() and user_prompt.startswith(static_prefix)):
+        return [{"type": "text", "text": user_prompt}]
+    
+    content = [{"type": "text", "text": static_prefix, "cache_control": CACHE_CONTROL}]
+    variable_text = user_prompt[len(static_prefix):]
+    if variable_text:
+        content.append({"type": "text", "text": variable_text})
+    return content
+
+
+def record_token_usage(usage: Dict[str, Any], model_id: Optional[str] = None) -> None:
+    """
+    Emit token usage metrics, including prompt cache reads and writes.
+    
+    Args:
+        usage: Token usage summed over the Bedrock calls made to one model
+        model_id: Model that consumed the tokens
+    """
+    token_metrics = [("InputTokens", "input_tokens"), ("OutputTokens", "output_tokens")]
+    if BEDROCK_PROMPT_CACHING:
+        token_metrics += [
+            ("CacheReadInputTokens", "cache_read_input_tokens"),
+            ("CacheWriteInputTokens", "cache_creation_input_tokens"),
+        ]
+    for name, usage_key in token_metrics:
+        record_stage_metric(name, MetricUnit.Count, usage.get(usage_key, 0), model_id=model_id)
+
+
+def iter_bedrock_stream_text(
+    response: Dict[str, Any],
+    usage: Optional[Dict[str, Any]] = None,
+    message_info: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Yield completion text deltas from an invoke_model_with_response_stream response.
+    
+    Args:
+        response: Bedrock response-stream dictionary
+        usage: Dict updated with the token usage reported by the stream
+        message_info: Dict updated with the stop_reason reported by the stream
+    
+    Yields:
+        Text deltas in arrival order
+    
+    Raises:
+        BedrockError: If the stream reports an error event
+    """
+    for event in response["body"]:
+        if "chunk" not in event:
+            error_type = next(iter(event), "unknown")
+            raise BedrockError(f"Bedrock stream error: {error_type}: {event.get(error_type)}")
+        
+        data = json.loads(event["chunk"]["bytes"])
+        if usage is not None:
+            if data.get("type") == "message_start":
+                usage.update(data.get("message", {}).get("usage", {}))
+            elif data.get("type") == "message_delta":
+                usage.update(data.get("usage", {}))
+        if message_info is not None and data.get("type") == "message_delta":
+            message_info["stop_reason"] = data.get("delta", {}).get("stop_reason")
+        
+        if data.get("type") == "content_block_delta":
+            delta = data.get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
+
+
+@tracer.capture_method
+def stream_landing_completion(
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    payload: BedrockPayload,
+    on_section: Optional[Callable[[str, Any], None]] = None,
+    max_total_time: float = MAX_TOTAL_TIME,
+    usage: Optional[Dict[str, Any]] = None,
+    message_info: Optional[Dict[str, Any]] = None,
+    routing: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Stream a Bedrock completion, handing each landing section to `on_section` as soon as it is complete.
+    
+    Args:
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: Primary Bedrock model ID; the model routed for "page" is used
+        payload: Validated payload for Bedrock
+        on_section: Callback receiving (section_name, value) for each completed section
+        max_total_time: Time budget for opening and reading the whole stream
+        usage: Dict updated with the token usage reported by the stream
+        message_info: Dict updated with the stop_reason reported by the stream and
+            first_byte_ms, the time until the first completion text arrived
+        routing: Dict filled with the routing decision
+    
+    Returns:
+        The full completion text
+    
+    Raises:
+        DeadlineExceededError: If the stream is still running when the budget is spent;
+            sections already handed to on_section are kept
+    """
+    start_time = time.perf_counter()
+    response = invoke_routed(
+        bedrock_runtime_client, llm_model_id, "page", payload,
+        max_total_time=max_total_time, stream=True, routing=routing
+    )
+    
+    # Same candidate rules as parse_landing_content, so streamed and final sections agree
+    parser = JSONFieldScanner(required_keys=LANDING_SECTIONS)
+    chunks: List[str] = []
+    first_section_seen = False
+    
+    for text in iter_bedrock_stream_text(response, usage, message_info):
+        if time.perf_counter() - start_time >= max_total_time:
+            raise DeadlineExceededError("Deadline exceeded while streaming the Bedrock response")
+        if not chunks and message_info is not None:
+            message_info["first_byte_ms"] = (time.perf_counter() - start_time) * 1000
+        chunks.append(text)
+        for section_name, value in parser.feed(text):
+            if section_name not in LANDING_SECTIONS:
+                continue
+            
+            if not first_section_seen:
+                first_section_seen = True
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                metrics.add_metric(name="TimeToFirstSection", unit=MetricUnit.Milliseconds, value=elapsed_ms)
+                logger.info("First landing section streamed", extra={"section": section_name, "elapsed_ms": round(elapsed_ms, 2)})
+            
+            if on_section:
+                try:
+                    on_section(section_name, value)
+                except Exception as e:
+                    # Early persistence is best effort; the full content is stored afterwards
+                    logger.warning(f"Failed to emit streamed section {section_name}: {e}")
+    
+    completion_text = "".join(chunks)
+    logger.info("Bedrock stream completed", extra={"response_length": len(completion_text)})
+    return completion_text
+
+
+def record_recovery(path: str, outcome: str) -> None:
+    """
+    Emit a metric for an attempt to salvage a bad completion instead of regenerating it.
+    
+    Args:
+        path: continuation or json_repair
+        outcome: recovered or failed
+    """
+    with single_metric(name="LandingRecovery", unit=MetricUnit.Count, value=1) as metric:
+        metric.add_dimension(name="path", value=path)
+        metric.add_dimension(name="outcome", value=outcome)
+
+
+def _has_landing_sections(landing_json: Optional[Dict[str, Any]]) -> bool:
+    return landing_json is not None and all(section in landing_json for section in LANDING_SECTIONS)
+
+
+def parse_landing_content(completion_text: str) -> LandingContent:
+    """
+    Extract and validate the landing content JSON from a model completion.
+    
+    Small syntax defects (trailing commas, raw newlines in strings, missing
+    closing brackets) are fixed locally rather than regenerated.
+    
+    Args:
+        completion_text: Raw completion text from the model
+    
+    Returns:
+        Validated LandingContent model
+    
+    Raises:
+        LandingValidationError: If no valid landing content JSON is found
+    """
+    start_time = time.perf_counter()
+    outcome = "failed"
+    try:
+        # Single linear pass; tolerates code fences, prose and braces inside the HTML
+        landing_json = extract_json_object(completion_text, required_keys=LANDING_SECTIONS)
+        parsed_outcome = "ok"
+        
+        if not _has_landing_sections(landing_json):
+            repaired = repair_json(completion_text)
+            if repaired is not None:
+                repaired_json = extract_json_object(repaired, required_keys=LANDING_SECTIONS)
+                if _has_landing_sections(repaired_json):
+                    logger.info("Repaired malformed landing content JSON")
+                    record_recovery("json_repair", "recovered")
+                    landing_json = repaired_json
+                    parsed_outcome = "repaired"
+                else:
+                    record_recovery("json_repair", "failed")
+        
+        if landing_json is None:
+            raise LandingValidationError("No valid JSON found in Bedrock response")
+        
+        # Validate the structure
+        try:
+            landing_content = LandingContent(**landing_json)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid JSON in Bedrock response: {e}")
+            raise LandingValidationError(f"Invalid landing content structure: {e}")
+        
+        outcome = parsed_outcome
+        return landing_content
+    finally:
+        record_stage_metric(
+            "LandingParseTime", MetricUnit.Milliseconds, (time.perf_counter() - start_time) * 1000, outcome=outcome
+        )
+
+
+def _completion_text(bedrock_response: BedrockResponse) -> str:
+    """Text of the first content block of a Messages API response."""
+    if bedrock_response.content and len(bedrock_response.content) > 0:
+        first_content = bedrock_response.content[0]
+        if isinstance(first_content, dict) and "text" in first_content:
+            return first_content["text"]
+    return ""
+
+
+@tracer.capture_method
+def continue_truncated_completion(
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    payload: BedrockPayload,
+    partial_text: str,
+    max_total_time: float,
+    usage: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Finish a completion that stopped at max_tokens instead of regenerating it.
+    
+    The partial output is sent back as a prefilled assistant turn, so the
+    model only produces the missing tail. Up to MAX_CONTINUATIONS requests
+    are made while the model keeps hitting the token limit.
+    
+    Args:
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: The Bedrock model ID to use
+        payload: Payload of the original request
+        partial_text: Completion text received so far
+        max_total_time: Time budget for all continuation requests
+        usage: Dict whose token counts are increased by the continuation usage
+    
+    Returns:
+        The partial text joined with the generated tail; the original text if
+        it already contains the landing object or the budget is spent
+    """
+    start_time = time.perf_counter()
+    completion_text = partial_text
+    
+    for attempt in range(MAX_CONTINUATIONS):
+        if _has_landing_sections(extract_json_object(completion_text, required_keys=LANDING_SECTIONS)):
+            break
+        
+        remaining = max_total_time - (time.perf_counter() - start_time)
+        if remaining <= 0:
+            logger.warning("No time left to continue the truncated completion")
+            break
+        
+        # The API rejects an assistant prefill that ends with whitespace
+        prefill = completion_text.rstrip()
+        continuation_payload = BedrockPayload(
+            anthropic_version=payload.anthropic_version,
+            max_tokens=payload.max_tokens,
+            temperature=payload.temperature,
+            system=payload.system,
+            messages=list(payload.messages) + [
+                {"role": "assistant", "content": [{"type": "text", "text": prefill}]}
+            ]
+        )
+        
+        logger.info("Continuing truncated completion", extra={
+            "attempt": attempt + 1,
+            "partial_length": len(prefill)
+        })
+        response = invoke_bedrock_with_retry(
+            bedrock_runtime_client, llm_model_id, continuation_payload, max_total_time=remaining
+        )
+        continuation = BedrockResponse(**json.loads(response["body"].read().decode("utf-8")))
+        completion_text = prefill + _completion_text(continuation)
+        
+        if usage is not None:
+            for key, value in (continuation.usage or {}).items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+        
+        if continuation.stop_reason != "max_tokens":
+            break
+    
+    return completion_text
+
+
+def build_style_brief(prompt: str, theme_context: str) -> str:
+    """
+    Build the style brief shared by every section request of the parallel strategy.
+    
+    Sections generated separately cannot see each other, so the brief pins
+    down the choices a single completion would otherwise keep consistent.
+    
+    Args:
+        prompt: Industry/business description
+        theme_context: Output of build_theme_context
+    
+    Returns:
+        Style brief text
+    """
+    lines = [
+        "Style brief shared by every section of this page; follow it exactly so the sections read as one page:",
+        f"- Business: {prompt.strip()}",
+        "- Voice: confident and concise, second person, no placeholder text",
+        "- Markup: semantic HTML in a single <section>, every class prefixed with lp-, no scripts or inline event handlers",
+        "- Call to action wording: reuse the same verb in the hero and closing sections",
+    ]
+    if theme_context.strip():
+        lines.append(f"- Theme: {theme_context.strip()}")
+    return "\n".join(lines)
+
+
+def _generate_section(
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    section_name: str,
+    user_prompt: str,
+    style_brief: str,
+    max_total_time: float,
+    static_prefix: str = "",
+    cancelled: Optional[threading.Event] = None,
+) -> Tuple[Any, Dict[str, Any], float, Dict[str, Any]]:
+    """
+    Generate one landing section with its own small request, on the model routed for it.
+    
+    The request uses SECTION_SYSTEM_PROMPT and the style brief. The page
+    prompt from SSM, which describes the image prompts, is only sent with
+    the img_prompts request.
+    
+    Returns:
+        Tuple of (section value, token usage, elapsed milliseconds, routing decision)
+    
+    Raises:
+        LandingValidationError: If the completion does not contain the section
+    """
+    section_prompt = (
+        f"{style_brief}\n\n{SECTION_INSTRUCTIONS[section_name]}\n"
+        f'Respond with a JSON object with exactly one key, "{section_name}".'
+    )
+    if section_name == "img_prompts":
+        section_prompt = f"{user_prompt}\n\n{section_prompt}"
+    else:
+        static_prefix = ""
+    payload = BedrockPayload(
+        anthropic_version="bedrock-2023-05-31",
+        max_tokens=get_model_routes(llm_model_id)[section_name].max_tokens,
+        temperature=0.7,
+        system=build_system_blocks(SECTION_SYSTEM_PROMPT),
+        messages=[
+            {
+                "role": "user",
+                "content": build_user_content(section_prompt, static_prefix)
+            }
+        ]
+    )
+    
+    routing: Dict[str, Any] = {}
+    start_time = time.perf_counter()
+    try:
+        response = invoke_routed(
+            bedrock_runtime_client, llm_model_id, section_name, payload,
+            max_total_time=max_total_time, routing=routing, cancelled=cancelled
+        )
+        bedrock_response = BedrockResponse(**json.loads(response["body"].read().decode("utf-8")))
+    except Exception:
+        record_bedrock_latency(
+            routing.get("model_id", llm_model_id), "error", (time.perf_counter() - start_time) * 1000
+        )
+        raise
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    model_id = routing.get("model_id", llm_model_id)
+    usage = dict(bedrock_response.usage or {})
+    
+    section_json = extract_json_object(_completion_text(bedrock_response), required_keys=(section_name,))
+    if section_json is None or section_name not in section_json:
+        # A non-streamed response arrives in one piece, so its first byte is its last
+        record_bedrock_latency(model_id, "parse_error", elapsed_ms, elapsed_ms)
+        # The tokens are billed even though the section is unusable
+        record_token_usage(usage, model_id)
+        raise LandingValidationError(f"Section request for {section_name} returned no {section_name} field")
+    record_bedrock_latency(model_id, "success", elapsed_ms, elapsed_ms)
+    
+    return section_json[section_name], usage, elapsed_ms, routing
+
+
+@tracer.capture_method
+def generate_sections_in_parallel(
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    user_prompt: str,
+    style_brief: str,
+    max_total_time: float,
+    on_section: Optional[Callable[[str, Any], None]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    static_prefix: str = "",
+) -> LandingContent:
+    """
+    Generate every landing section with concurrent requests and merge the results.
+    
+    Wall-clock time is bounded by the slowest section rather than the sum
+    of all sections. When one section fails, the other section requests
+    are cancelled: queued ones never start and running ones make no
+    further attempts.
+    
+    Args:
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: Primary Bedrock model ID; each section uses the model routed for it
+        user_prompt: Prompt template from SSM, formatted for this request
+        style_brief: Output of build_style_brief
+        max_total_time: Time budget for all section requests
+        on_section: Callback receiving (section_name, value) as each section completes
+        stats: Dict filled with token_usage and timings
+        static_prefix: Cacheable start of user_prompt, shared by every section request
+    
+    Returns:
+        Validated LandingContent model
+    
+    Raises:
+        Exception: The first section failure; remaining requests are cancelled
+    """
+    stats = stats if stats is not None else {}
+    timings = stats.setdefault("timings", {})
+    usage: Dict[str, int] = {}
+    sections: Dict[str, Any] = {}
+    section_ms: Dict[str, float] = {}
+    
+    start_time = time.perf_counter()
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(LANDING_SECTIONS))
+    try:
+        futures = {
+            executor.submit(
+                _generate_section, bedrock_runtime_client, llm_model_id, section_name,
+                user_prompt, style_brief, max_total_time, static_prefix, cancelled
+            ): section_name
+            for section_name in LANDING_SECTIONS
+        }
+        for future in as_completed(futures, timeout=max_total_time):
+            section_name = futures[future]
+            value, section_usage, elapsed_ms, routing = future.result()
+            sections[section_name] = value
+            section_ms[section_name] = round(elapsed_ms, 2)
+            record_sub_task(llm_model_id, section_name, routing, elapsed_ms, stats)
+            record_token_usage(section_usage, routing.get("model_id", llm_model_id))
+            for key, count in section_usage.items():
+                if isinstance(count, int):
+                    usage[key] = usage.get(key, 0) + count
+            if on_section:
+                try:
+                    on_section(section_name, value)
+                except Exception as e:
+                    logger.warning(f"Failed to emit generated section {section_name}: {e}")
+    except BaseException:
+        # The fallback replaces every section, so stop paying for the others
+        cancelled.set()
+        raise
+    finally:
+        # A request already sent cannot be recalled; don't hold up the fallback waiting for it
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    wall_ms = (time.perf_counter() - start_time) * 1000
+    timings["sections_ms"] = section_ms
+    timings["parallel_wall_ms"] = round(wall_ms, 2)
+    stats["token_usage"] = usage
+    logger.info("Sections generated in parallel", extra={"wall_ms": round(wall_ms, 2), "sections_ms": section_ms})
+    
+    try:
+        return LandingContent(**sections)
+    except (TypeError, ValueError) as e:
+        raise LandingValidationError(f"Invalid merged landing content: {e}")
+
+
+@tracer.capture_method
+def generate_landing_content(
+    prompt: str,
+    theme_info: ThemeInfo,
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    stream: bool = False,
+    on_section: Optional[Callable[[str, Any], None]] = None,
+    deadline: Optional[Deadline] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    strategy: Optional[str] = None,
+) -> LandingContent:
+    """
+    Use Bedrock LLM to generate structured landing page content.
+    
+    Args:
+        prompt: Industry/business description
+        theme_info: Theme information from target site
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: Primary Bedrock model ID; sub-tasks use the models routed for them
+        stream: Use the response-stream API and emit sections as they complete
+        on_section: Callback receiving (section_name, value) as sections complete
+        deadline: Invocation deadline; Bedrock retries are sized to what is left of it
+        stats: Dict filled with token_usage and timings for the stored generation
+        strategy: "single" or "parallel"; defaults to GENERATION_STRATEGY. The
+            parallel strategy falls back to a single completion if any section
+            fails, and every section of that completion is handed to on_section
+            again so it replaces what the parallel attempt emitted
+    
+    Returns:
+        Validated LandingContent model
+    
+    Raises:
+        BedrockError: If content generation fails
+        DeadlineExceededError: If the time budget runs out
+        ValidationError: If generated content is invalid
+    """
+    # Get prompts from SSM parameters
+    ssm_prompts = get_prompts_from_ssm(deadline)
+    
+    # Build the prompt with theme context
+    theme_context = build_theme_context(theme_info)
+    
+    # Use the template from SSM with replacements
+    user_prompt = ssm_prompts.prompt_template.format(
+        industry=prompt,
+        theme_context=theme_context
+    )
+    static_prefix = static_template_prefix(ssm_prompts.prompt_template)
+    
+    # Create validated payload using Messages API format; static blocks first so they can be cached
+    payload = BedrockPayload(
+        anthropic_version="bedrock-2023-05-31",
+        max_tokens=get_model_routes(llm_model_id)["page"].max_tokens,
+        temperature=0.7,
+        system=build_system_blocks(ssm_prompts.system_prompt),
+        messages=[
+            {
+                "role": "user",
+                "content": build_user_content(user_prompt, static_prefix)
+            }
+        ]
+    )
+    
+    # Leave enough of the budget to store the result
+    max_total_time: float = MAX_TOTAL_TIME
+    if deadline is not None:
+        max_total_time = min(MAX_TOTAL_TIME, deadline.remaining() - STORE_RESERVE_SECONDS)
+        if max_total_time <= 0:
+            raise DeadlineExceededError("Not enough time left to call Bedrock")
+    
+    stats = stats if stats is not None else {}
+    stats.setdefault("timings", {})
+    bedrock_start = time.perf_counter()
+    
+    strategy = strategy or GENERATION_STRATEGY
+    if strategy == "parallel":
+        try:
+            landing_content = generate_sections_in_parallel(
+                bedrock_runtime_client, llm_model_id, user_prompt,
+                build_style_brief(prompt, theme_context), max_total_time,
+                on_section=on_section, stats=stats, static_prefix=static_prefix
+            )
+            stats["strategy"] = "parallel"
+            stats["timings"]["bedrock_ms"] = round((time.perf_counter() - bedrock_start) * 1000, 2)
+            return landing_content
+        except Exception as e:
+            logger.warning(f"Parallel section generation failed, falling back to a single completion: {e}")
+            metrics.add_metric(name="ParallelGenerationFallback", unit=MetricUnit.Count, value=1)
+            stats["strategy"] = "parallel_fallback"
+            max_total_time -= time.perf_counter() - bedrock_start
+            if max_total_time <= 0:
+                raise DeadlineExceededError("No time left for the single-completion fallback")
+    else:
+        stats["strategy"] = "single"
+    
+    page_routing: Dict[str, Any] = {}
+    page_start = time.perf_counter()
+    first_byte_ms: Optional[float] = None
+    
+    try:
+        if stream:
+            usage: Dict[str, Any] = {}
+            message_info: Dict[str, Any] = {}
+            completion_text = stream_landing_completion(
+                bedrock_runtime_client, llm_model_id, payload, on_section,
+                max_total_time=max_total_time, usage=usage, message_info=message_info,
+                routing=page_routing
+            )
+            stop_reason = message_info.get("stop_reason")
+            first_byte_ms = message_info.get("first_byte_ms")
+        else:
+            # Use retry logic with exponential backoff, on the model routed for the page
+            response = invoke_routed(
+                bedrock_runtime_client, llm_model_id, "page", payload,
+                max_total_time=max_total_time, routing=page_routing
+            )
+            
+            response_body = response["body"].read().decode("utf-8")
+            first_byte_ms = (time.perf_counter() - page_start) * 1000
+            logger.info("Bedrock response received", extra={"response_length": len(response_body)})
+            
+            # Parse Bedrock response
+            response_json = json.loads(response_body)
+            bedrock_response = BedrockResponse(**response_json)
+            usage = dict(bedrock_response.usage or {})
+            stop_reason = bedrock_response.stop_reason
+            
+            # Extract JSON from the response (get text from first content block)
+            completion_text = _completion_text(bedrock_response)
+        
+        if stop_reason == "max_tokens":
+            # Ask for the missing tail only instead of paying for a new generation
+            remaining = max_total_time - (time.perf_counter() - bedrock_start)
+            continued_text = continue_truncated_completion(
+                bedrock_runtime_client, page_routing.get("model_id", llm_model_id), payload, completion_text,
+                max_total_time=remaining, usage=usage
+            )
+            if continued_text != completion_text:
+                recovered = _has_landing_sections(
+                    extract_json_object(continued_text, required_keys=LANDING_SECTIONS)
+                )
+                record_recovery("continuation", "recovered" if recovered else "failed")
+                completion_text = continued_text
+        
+        page_ms = (time.perf_counter() - page_start) * 1000
+        page_model_id = page_routing.get("model_id", llm_model_id)
+        record_sub_task(llm_model_id, "page", page_routing, page_ms, stats)
+        stats["timings"]["bedrock_ms"] = round((time.perf_counter() - bedrock_start) * 1000, 2)
+        stats["token_usage"] = usage
+        # The tokens are billed whether or not the completion parses
+        record_token_usage(usage, page_model_id)
+        
+        outcome = "parse_error"
+        try:
+            landing_content = parse_landing_content(completion_text)
+            outcome = "success"
+        finally:
+            record_bedrock_latency(page_model_id, outcome, page_ms, first_byte_ms)
+        
+        if on_section and not stream and stats["strategy"] == "parallel_fallback":
+            # Sections the parallel attempt already handed out must not be mixed with this completion
+            for section_name, value in vars(landing_content).items():
+                try:
+                    on_section(section_name, value)
+                except Exception as e:
+                    logger.warning(f"Failed to emit fallback section {section_name}: {e}")
+        return landing_content
+        
+    except TimeoutError as e:
+        logger.error("Bedrock generation ran out of time", extra={"error": str(e)})
+        record_bedrock_latency(
+            page_routing.get("model_id", llm_model_id), "timeout", (time.perf_counter() - page_start) * 1000
+        )
+        raise DeadlineExceededError(str(e))
+    
+    except LandingValidationError as e:
+        # Bedrock answered; the completion itself was unusable (see LandingParseTime)
+        logger.error("Bedrock generation failed", extra={"error": str(e)})
+        raise BedrockError(f"Content generation failed: {str(e)}")
+    
+    except Exception as e:
+        logger.error("Bedrock generation failed", extra={"error": str(e)})
+        record_bedrock_latency(
+            page_routing.get("model_id", llm_model_id), "error", (time.perf_counter() - page_start) * 1000
+        )
+        raise BedrockError(f"Content generation failed: {str(e)}")
+
+
+@tracer.capture_method
+def store_landing_assets(
+    landing_content: LandingContent,
+    bucket: str,
+    theme_info: ThemeInfo,
+    generation_id: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    model_id: Optional[str] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Dict[str, str]]:
+    """
+    Store landing page assets in S3.
+    
+    Content, theme, model ID, token usage and timings are written as a
+    single gzip-compressed bundle (see generation_bundle). Only when
+    WRITE_LEGACY_ASSETS is on is the legacy
+    landing_content.json/theme_info.json pair written as well, with its
+    keys returned as content_key/theme_key next to bundle_key.
+    
+    Args:
+        landing_content: Validated landing content
+        bucket: S3 bucket name
+        theme_info: Theme information
+        generation_id: Pre-allocated generation ID (a new one is created if omitted)
+        deadline: Invocation deadline, checked before each write
+        model_id: Bedrock model ID that produced the content
+        stats: Generation stats (token_usage, timings) recorded in the bundle
+    
+    Returns:
+        Tuple of (generation_id, assets_dict)
+    
+    Raises:
+        DeadlineExceededError: If the time budget runs out before the content is written
+        Exception: If S3 operations fail
+    """
+    if deadline is not None:
+        deadline.check("storing landing assets")
+    
+    generation_id = generation_id or str(uuid.uuid4())
+    assets: Dict[str, str] = {}
+    stats = stats or {}
+    
+    try:
+        # Store content, theme and generation metadata as one object
+        bundle = build_bundle(
+            generation_id,
+            vars(landing_content),
+            vars(theme_info),
+            model_id=model_id,
+            token_usage=stats.get("token_usage"),
+            timings=stats.get("timings"),
+            routing=stats.get("routing"),
+            images=stats.get("images"),
+        )
+        body = encode_bundle(bundle)
+        outcome = "error"
+        write_start = time.perf_counter()
+        try:
+            assets["bundle_key"] = write_generation_bundle(get_s3_client(), bucket, bundle, body=body)
+            outcome = "success"
+        finally:
+            record_s3_write("bundle", (time.perf_counter() - write_start) * 1000, len(body), outcome)
+        
+        if WRITE_LEGACY_ASSETS:
+            # Store the landing content JSON
+            content_key = f"generated/{generation_id}/landing_content.json"
+            put_s3_object(
+                bucket, content_key, json.dumps(vars(landing_content)), "legacy", ContentType="application/json"
+            )
+            assets["content_key"] = content_key
+            
+            # Store theme information
+            theme_key = f"generated/{generation_id}/theme_info.json"
+            put_s3_object(bucket, theme_key, json.dumps(vars(theme_info)), "legacy", ContentType="application/json")
+            assets["theme_key"] = theme_key
+        
+        logger.info(f"Assets stored successfully", extra={
+            "generation_id": generation_id,
+            "assets": list(assets.keys())
+        })
+        
+        return generation_id, assets
+        
+    except Exception as e:
+        logger.error(f"Failed to store assets", extra={"error": str(e)})
+        raise
+
+
+def public_url(bucket: str, key: str) -> str:
+    """URL of a stored object: through CloudFront when configured, else the S3 URL."""
+    if CLOUDFRONT_DOMAIN:
+        return f"https://{CLOUDFRONT_DOMAIN}/{key}"
+    return f"https://{bucket}.s3.amazonaws.com/{key}"
+
+
+def embed_text(text: str) -> List[float]:
+    """Embedding of a text from IMAGE_EMBEDDING_MODEL_ID."""
+    response = invoke_bedrock_with_retry(
+        get_bedrock_runtime(),
+        IMAGE_EMBEDDING_MODEL_ID,
+        build_embedding_request(text, IMAGE_EMBEDDING_DIMENSIONS),
+        max_retries=1,
+        max_total_time=REQUEST_TIMEOUT * 2,
+    )
+    return extract_embedding(json.loads(response["body"].read()))
+
+
+def get_image_index(bucket: str) -> Optional[ImageIndex]:
+    """
+    Return the image reuse index for a bucket, creating it on first use.
+    
+    Args:
+        bucket: S3 bucket holding the index
+    
+    Returns:
+        ImageIndex, or None when reuse is disabled or NumPy is not installed
+    """
+    if not IMAGE_REUSE_ENABLED:
+        return None
+    client = get_s3_client()
+    with _client_lock:
+        index = _image_indexes.get(bucket)
+        if index is None:
+            try:
+                index = ImageIndex(
+                    client,
+                    bucket,
+                    embed_text,
+                    threshold=IMAGE_REUSE_THRESHOLD,
+                    compact_after=IMAGE_INDEX_COMPACT_AFTER,
+                    refresh_seconds=IMAGE_INDEX_REFRESH_SECONDS,
+                    lease_store=S3LeaseStore(client, bucket),
+                )
+            except ImportError:
+                logger.warning("Image reuse disabled: NumPy is not installed; attach the numpy layer")
+                return None
+            _image_indexes[bucket] = index
+    return index
+
+
+@tracer.capture_method
+def generate_page_images(
+    img_prompts: List[str],
+    bucket: str,
+    generation_id: str,
+    deadline: Optional[Deadline] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Render a page's img_prompts and store them as responsive variants.
+    
+    See image_pipeline. Failed images are reported, not raised, so the page
+    is stored either way.
+    
+    Args:
+        img_prompts: Image prompts of the landing content
+        bucket: S3 bucket for the variants
+        generation_id: Generation the images belong to
+        deadline: Invocation deadline; images are not started without enough time left
+    
+    Returns:
+        One dict per prompt with outcome, latency_ms, png_bytes, saved_bytes,
+        src, srcset (per format) and the stored variants
+    """
+    def invoke(body: Dict[str, Any]) -> Dict[str, Any]:
+        max_total_time = MAX_TOTAL_TIME
+        if deadline is not None:
+            max_total_time = min(max_total_time, deadline.remaining() - STORE_RESERVE_SECONDS)
+        response = invoke_bedrock_with_retry(get_bedrock_runtime(), IMAGE_MODEL_ID, body, max_total_time=max_total_time)
+        return json.loads(response["body"].read())
+    
+    index = get_image_index(bucket)
+    
+    def reuse(prompt: str) -> Optional[Dict[str, Any]]:
+        try:
+            match, similarity = index.find(prompt)
+        except Exception as e:
+            # The index only saves work; render when it is unavailable
+            logger.warning(f"Image index lookup failed: {e}")
+            record_stage_metric("ImageIndexLookup", MetricUnit.Count, 1, outcome="error")
+            return None
+        record_stage_metric("ImageIndexLookup", MetricUnit.Count, 1, outcome="hit" if match else "miss")
+        record_stage_metric("ImageIndexSimilarity", MetricUnit.NoUnit, similarity)
+        if match is None:
+            return None
+        return dict(match["image"], reused_from=match["prompt"], similarity=round(similarity, 4))
+    
+    def remember(prompt: str, image: Dict[str, Any]) -> None:
+        try:
+            if index.add(prompt, image):
+                record_stage_metric("ImageIndexCompaction", MetricUnit.Count, 1)
+                record_stage_metric("ImageIndexSize", MetricUnit.Count, len(index))
+        except Exception as e:
+            logger.warning(f"Failed to add image to the index: {e}")
+    
+    def store(key: str, body: bytes, content_type: str) -> None:
+        # Keys are content hashes, so a stored variant never changes
+        put_s3_object(
+            bucket, key, body, "image", ContentType=content_type, CacheControl="public, max-age=31536000, immutable"
+        )
+    
+    results = render_images(
+        img_prompts,
+        generation_id,
+        IMAGE_MODEL_ID,
+        invoke,
+        store,
+        lambda key: public_url(bucket, key),
+        widths=IMAGE_WIDTHS,
+        formats=IMAGE_FORMATS,
+        size=IMAGE_SIZE,
+        quality=IMAGE_QUALITY,
+        max_concurrency=IMAGE_MAX_CONCURRENCY,
+        time_left=deadline.remaining if deadline is not None else None,
+        min_seconds=IMAGE_MIN_SECONDS,
+        reuse=reuse if index is not None else None,
+        remember=remember if index is not None else None,
+    )
+    
+    for result in results:
+        record_stage_metric("ImageRenders", MetricUnit.Count, 1, model_id=IMAGE_MODEL_ID, outcome=result.outcome)
+        if result.outcome == "skipped":
+            continue
+        record_stage_metric(
+            "ImageLatency", MetricUnit.Milliseconds, result.latency_ms, model_id=IMAGE_MODEL_ID, outcome=result.outcome
+        )
+        if result.outcome in ("success", "reused"):
+            record_stage_metric("ImageBytesSaved", MetricUnit.Bytes, result.saved_bytes, model_id=IMAGE_MODEL_ID)
+        else:
+            logger.warning("Image generation failed", extra={"index": result.index, "error": result.error})
+    
+    logger.info("Page images rendered", extra={
+        "generation_id": generation_id,
+        "outcomes": [result.outcome for result in results],
+        "latency_ms": [result.latency_ms for result in results],
+        "saved_bytes": sum(result.saved_bytes for result in results),
+    })
+    return [asdict(result) for result in results]
+
+
+def get_generation_cache(bucket: str) -> GenerationCache:
+    """
+    Return the warm-container generation cache for a bucket, creating it on first use.
+    
+    Args:
+        bucket: S3 bucket holding the shared cache tier
+    
+    Returns:
+        GenerationCache instance
+    """
+    cache = _generation_caches.get(bucket)
+    if cache is None:
+        cache = GenerationCache(
+            get_s3_client(),
+            bucket,
+            ttl_seconds=GENERATION_CACHE_TTL_SECONDS,
+            max_entries=GENERATION_CACHE_MAX_ENTRIES,
+            s3_max_entries=GENERATION_CACHE_S3_MAX_ENTRIES,
+        )
+        _generation_caches[bucket] = cache
+    return cache
+
+
+def get_single_flight(bucket: str) -> SingleFlight:
+    """
+    Return the single-flight coordinator for a bucket, creating it on first use.
+    
+    Args:
+        bucket: S3 bucket holding the lease objects
+    
+    Returns:
+        SingleFlight instance
+    """
+    single_flight = _single_flights.get(bucket)
+    if single_flight is None:
+        single_flight = SingleFlight(
+            S3LeaseStore(get_s3_client(), bucket),
+            lease_seconds=SINGLE_FLIGHT_LEASE_SECONDS,
+            poll_interval=SINGLE_FLIGHT_POLL_SECONDS,
+        )
+        _single_flights[bucket] = single_flight
+    return single_flight
+
+
+def generation_cache_key(prompt: str, theme_info: ThemeInfo, llm_model_id: str) -> str:
+    """
+    Generation cache key of a request under the current prompts and routing.
+    
+    Call get_prompts_from_ssm first so the prompt version is current.
+    
+    Args:
+        prompt: Industry/business description
+        theme_info: Theme information from target site
+        llm_model_id: Primary Bedrock model ID
+    
+    Returns:
+        Cache key from build_cache_key
+    """
+    # Routed models and budgets shape the output, so they are part of the address
+    model_key = f"{llm_model_id}|{routes_fingerprint(get_model_routes(llm_model_id))}"
+    return build_cache_key(prompt, build_theme_context(theme_info), model_key, get_prompt_version())
+
+
+def record_request_history(cache_key: str, prompt: str, theme_info: ThemeInfo, served_by: str) -> None:
+    """
+    Count a live request for pre-generation, when REQUEST_HISTORY_ENABLED is set.
+    
+    Only the in-memory buffer is touched; flush_request_history writes it.
+    
+    Args:
+        cache_key: Generation cache key of the request
+        prompt: Industry/business description
+        theme_info: Theme information from target site
+        served_by: generated, single_flight, cache, pregenerated or bypass
+    """
+    if REQUEST_HISTORY_ENABLED:
+        request_history.record(cache_key, prompt, vars(theme_info), served_by)
+
+
+def flush_request_history(bucket: str, force: bool = False) -> None:
+    """
+    Write the buffered request history once it is due, at the end of an invocation.
+    
+    Args:
+        bucket: Output bucket
+        force: Flush whatever is pending, due or not
+    """
+    if not request_history.pending or not (force or request_history.due()):
+        return
+    try:
+        keys = request_history.flush(get_s3_client(), bucket)
+        logger.debug("Flushed request history", extra={"keys": keys})
+    except Exception as e:
+        # History only steers pre-generation; never fail a request because of it
+        logger.warning(f"Failed to flush request history: {e}")
+
+
+@tracer.capture_method
+def get_or_generate_landing_content(
+    prompt: str,
+    theme_info: ThemeInfo,
+    bedrock_runtime_client: Any,
+    llm_model_id: str,
+    bucket: str,
+    bypass_cache: bool = False,
+    deadline: Optional[Deadline] = None,
+    **generate_kwargs: Any,
+) -> LandingContent:
+    """
+    Serve landing content from the generation cache, generating it with Bedrock on a miss.
+    
+    With SINGLE_FLIGHT_ENABLED, a miss first takes a lease on the cache key;
+    concurrent identical requests on any container wait for the lease
+    holder to put its result in the cache instead of generating it again.
+    
+    Args:
+        prompt: Industry/business description
+        theme_info: Theme information from target site
+        bedrock_runtime_client: Boto3 bedrock-runtime client
+        llm_model_id: The Bedrock model ID to use
+        bucket: S3 bucket holding the shared cache tier
+        bypass_cache: Skip the lookup and always generate (the result is still cached)
+        deadline: Invocation deadline passed on to generation
+        **generate_kwargs: Extra arguments for generate_landing_content
+    
+    Returns:
+        Validated LandingContent model
+    """
+    if not GENERATION_CACHE_ENABLED:
+        return generate_landing_content(
+            prompt, theme_info, bedrock_runtime_client, llm_model_id, deadline=deadline, **generate_kwargs
+        )
+    
+    # Make sure the prompt version reflects what generation would use
+    get_prompts_from_ssm(deadline)
+    cache_key = generation_cache_key(prompt, theme_info, llm_model_id)
+    cache = get_generation_cache(bucket)
+    
+    if bypass_cache:
+        record_stage_metric("GenerationCacheBypass", MetricUnit.Count, 1, model_id=llm_model_id)
+    else:
+        entry, tier = cache.lookup(cache_key)
+        if entry is not None:
+            origin = entry.get("origin", "live")
+            record_stage_metric(
+                "GenerationCacheHit", MetricUnit.Count, 1, model_id=llm_model_id, tier=tier, origin=origin
+            )
+            logger.info("Generation cache hit", extra={"cache_key": cache_key, "tier": tier, "origin": origin})
+            if generate_kwargs.get("stats") is not None:
+                generate_kwargs["stats"]["cache_hit"] = tier
+            record_request_history(
+                cache_key, prompt, theme_info, "pregenerated" if origin == "pregenerated" else "cache"
+            )
+            return LandingContent(**entry["content"])
+        record_stage_metric("GenerationCacheMiss", MetricUnit.Count, 1, model_id=llm_model_id)
+    
+    def generate_and_cache() -> LandingContent:
+        landing_content = generate_landing_content(
+            prompt, theme_info, bedrock_runtime_client, llm_model_id, deadline=deadline, **generate_kwargs
+        )
+        cache.put(cache_key, vars(landing_content))
+        return landing_content
+    
+    # A bypass asks for a fresh generation, so it never reuses an in-flight one
+    if not SINGLE_FLIGHT_ENABLED or bypass_cache:
+        landing_content = generate_and_cache()
+        record_request_history(cache_key, prompt, theme_info, "bypass" if bypass_cache else "generated")
+        return landing_content
+    
+    def lookup() -> Optional[LandingContent]:
+        cached_content, _ = cache.get(cache_key)
+        return LandingContent(**cached_content) if cached_content is not None else None
+    
+    # Waiting longer than our own budget allows would not leave time to generate either
+    max_wait = SINGLE_FLIGHT_LEASE_SECONDS
+    if deadline is not None:
+        max_wait = min(max_wait, deadline.remaining() - STORE_RESERVE_SECONDS)
+    
+    wait_start = time.perf_counter()
+    landing_content, role = get_single_flight(bucket).run(cache_key, generate_and_cache, lookup, max_wait)
+    record_stage_metric("SingleFlight", MetricUnit.Count, 1, model_id=llm_model_id, role=role)
+    if role == "follower":
+        wait_ms = (time.perf_counter() - wait_start) * 1000
+        record_stage_metric("SingleFlightWait", MetricUnit.Milliseconds, wait_ms, model_id=llm_model_id)
+        logger.info("Reused an in-flight generation", extra={"cache_key": cache_key, "wait_ms": round(wait_ms, 2)})
+        if generate_kwargs.get("stats") is not None:
+            generate_kwargs["stats"]["cache_hit"] = "single_flight"
+    record_request_history(
+        cache_key, prompt, theme_info, "single_flight" if role == "follower" else "generated"
+    )
+    return landing_content
+
+
+def store_landing_section(
+    section_name: str,
+    value: Any,
+    bucket: str,
+    generation_id: str,
+) -> str:
+    """
+    Store a single streamed landing section under the generation prefix.
+    
+    Args:
+        section_name: LandingContent field name (e.g. hero_html)
+        value: Section value; HTML sections are stored as text/html, others as JSON
+        bucket: S3 bucket name
+        generation_id: Generation ID the section belongs to
+    
+    Returns:
+        S3 key of the stored section
+    """
+    if section_name.endswith("_html") and isinstance(value, str):
+        section_key = f"generated/{generation_id}/sections/{section_name}.html"
+        body, content_type = value, "text/html"
+    else:
+        section_key = f"generated/{generation_id}/sections/{section_name}.json"
+        body, content_type = json.dumps(value), "application/json"
+    
+    put_s3_object(bucket, section_key, body, "section", ContentType=content_type)
+    logger.info("Streamed section stored", extra={"generation_id": generation_id, "section": section_name})
+    return section_key
+
+
+def parse_generation_request(parsed_body: Dict[str, Any]) -> GenerationRequest:
+    """
+    Build a GenerationRequest from a decoded request body.
+    
+    Args:
+        parsed_body: Decoded JSON request body
+    
+    Returns:
+        Validated GenerationRequest
+    
+    Raises:
+        TypeError: If the body has unknown or missing fields
+    """
+    # Convert theme_info dict to ThemeInfo instance if present
+    if "theme_info" in parsed_body and parsed_body["theme_info"] is not None:
+        theme_info_dict = parsed_body["theme_info"]
+        if isinstance(theme_info_dict, dict):
+            parsed_body["theme_info"] = ThemeInfo(**theme_info_dict)
+    
+    # Validate request using dataclass
+    return GenerationRequest(**parsed_body)
+
+
+def tenant_id_from_event(event: Dict[str, Any], body_tenant_id: Optional[str] = None) -> str:
+    """
+    Identify the tenant a request is billed to.
+    
+    API Gateway requests use the Cognito identity (`sub` claim) from the
+    authorizer; a tenant_id in the body is only trusted on direct
+    invocations, which carry no request context.
+    
+    Args:
+        event: Lambda event dictionary
+        body_tenant_id: tenant_id field of the request body
+    
+    Returns:
+        Tenant ID, "anonymous" when the request carries none
+    """
+    request_context = event.get("requestContext") if isinstance(event, dict) else None
+    if request_context is None:
+        return str(body_tenant_id or "anonymous")
+    
+    authorizer = request_context.get("authorizer") or {}
+    claims = (authorizer.get("jwt") or {}).get("claims") or authorizer.get("claims") or {}
+    return str(claims.get("sub") or "anonymous")
+
+
+def admit_generation(
+    tenant_id: str,
+    priority: str = "interactive",
+    deadline: Optional[Deadline] = None,
+) -> Optional[AdmissionTicket]:
+    """
+    Reserve Bedrock capacity for one generation, waiting briefly when the budget is spent.
+    
+    Args:
+        tenant_id: Tenant the generation is billed to
+        priority: interactive or batch
+        deadline: Invocation deadline; the wait never runs into it
+    
+    Returns:
+        Ticket to settle once the usage is known, or None when admission control is off
+    
+    Raises:
+        AdmissionRejectedError: If no budget frees up within ADMISSION_MAX_WAIT_SECONDS
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return None
+    
+    waited = 0.0
+    while True:
+        decision = controller.admit(tenant_id, priority, tokens=ADMISSION_TOKEN_ESTIMATE)
+        if decision.admitted:
+            record_stage_metric(
+                "AdmissionDecision", MetricUnit.Count, 1,
+                priority=priority, outcome="queued" if waited else "admitted"
+            )
+            return decision.ticket
+        
+        max_wait = ADMISSION_MAX_WAIT_SECONDS - waited
+        if deadline is not None:
+            max_wait = min(max_wait, deadline.remaining() - STORE_RESERVE_SECONDS)
+        if decision.retry_after > max_wait:
+            record_stage_metric(
+                "AdmissionDecision", MetricUnit.Count, 1,
+                priority=priority, outcome="rejected", reason=decision.reason
+            )
+            logger.warning("Generation refused by admission control", extra={
+                "tenant_id": tenant_id,
+                "priority": priority,
+                "reason": decision.reason,
+                "retry_after": round(decision.retry_after, 2)
+            })
+            raise AdmissionRejectedError(decision.reason, decision.retry_after)
+        
+        # Budgets refill when the next window starts
+        time.sleep(decision.retry_after)
+        waited += decision.retry_after
+
+
+def settle_admission(ticket: Optional[AdmissionTicket], usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Replace a ticket's token estimate with the usage Bedrock reported.
+    
+    Args:
+        ticket: Ticket from admit_generation (None when admission control is off)
+        usage: Token usage of the generation; None or empty if Bedrock was not called
+    """
+    if ticket is None:
+        return
+    usage = usage or {}
+    used_tokens = sum(usage.get(key, 0) for key in ("input_tokens", "output_tokens"))
+    try:
+        get_admission_controller().settle(ticket, used_tokens)
+    except ClientError as e:
+        logger.warning(f"Failed to settle admission ticket: {e}", extra={"tenant_id": ticket.tenant_id})
+
+
+def admission_rejected_response(error: AdmissionRejectedError) -> Dict[str, Any]:
+    """429 response telling the client when to retry."""
+    return {
+        "statusCode": 429,
+        "headers": {**CORS_HEADERS, "Retry-After": str(math.ceil(error.retry_after))},
+        "body": json.dumps({
+            "error": str(error),
+            "status": "throttled",
+            "reason": error.reason,
+            "retry_after": math.ceil(error.retry_after),
+        })
+    }
 
 
 @tracer.capture_method
-def invoke_bedrock_with_retry(
-    bedrock_runtime_client: Any,
+def process_batch_request(
+    items: List[Dict[str, Any]],
+    default_theme_info: Optional[Dict[str, Any]],
+    output_bucket: str,
     llm_model_id: str,
-    payload: BedrockPayload,
-    max_retries: int = MAX_RETRIES,
-    base_delay: float = BASE_DELAY,
-    max_total_time: int = MAX_TOTAL_TIME,
-) -> Dict[str, Any]:
+    bypass_cache: bool = False,
+    deadline: Optional[Deadline] = None,
+    tenant_id: str = "anonymous",
+) -> List[Dict[str, Any]]:
     """
-    Invoke Bedrock with exponential backoff retry and timeout per request.
+    Generate and store landing content for several requests on a bounded thread pool.
+    
+    Each item is admitted separately at batch priority, so items over the
+    tenant's budget are reported as throttled while the rest proceed.
+    Admitted items go through generate_and_store_landing like a single
+    request, including image rendering and settling the admission ticket.
     
     Args:
-        bedrock_runtime_client: Boto3 bedrock-runtime client
+        items: Request bodies, each with a prompt and optional theme_info
+        default_theme_info: theme_info used for items that do not set their own
+        output_bucket: S3 bucket for generated assets
         llm_model_id: The Bedrock model ID to use
-        payload: Validated payload for Bedrock
-        max_retries: Maximum number of retry attempts
-        base_delay: Base delay for exponential backoff
-        max_total_time: Maximum total time for all attempts
+        bypass_cache: Skip generation cache lookups for every item
+        deadline: Invocation deadline shared by all items
+        tenant_id: Tenant the batch is billed to
     
     Returns:
-        Bedrock response dictionary
-    
-    Raises:
-        BedrockError: If Bedrock invocation fails
-        TimeoutError: If operation exceeds time limits
+        Per-item results in request order; failed items carry an error instead of a generation_id
     """
-    start_time = time.time()
-    
-    for attempt in range(max_retries + 1):
-        # Check if we're approaching the total time limit
-        elapsed_time = time.time() - start_time
-        if elapsed_time >= max_total_time:
-            raise TimeoutError(f"Bedrock invocation exceeded maximum total time of {max_total_time}s")
-        
+    def process_item(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            logger.info(f"Bedrock invocation attempt {attempt + 1}/{max_retries + 1}")
-            
-            # Convert dataclass to dict for JSON serialization
-            payload_dict = vars(payload)
+            if not isinstance(item, dict):
+                raise TypeError("Batch item must be an object")
+            item = dict(item)
+            if item.get("theme_info") is None and default_theme_info is not None:
+                item["theme_info"] = default_theme_info
             
-            response = bedrock_runtime_client.invoke_model(
-                modelId=llm_model_id,
-                body=json.dumps(payload_dict),
-                contentType="application/json",
-                accept="application/json",
+            request_data = parse_generation_request(item)
+            ticket = admit_generation(tenant_id, "batch", deadline=deadline)
+            generation_id, assets = generate_and_store_landing(
+                request_data,
+                output_bucket,
+                llm_model_id,
+                str(uuid.uuid4()),
+                {},
+                deadline=deadline,
+                bypass_cache=bypass_cache,
+                admission_ticket=ticket,
             )
-            
-            return response
-            
+            return {"index": index, "status": "generated", "generation_id": generation_id, "assets": assets}
+        
+        except AdmissionRejectedError as e:
+            return {
+                "index": index, "status": "throttled", "error": str(e), "retry_after": math.ceil(e.retry_after)
+            }
+        
+        except DeadlineExceededError as e:
+            logger.warning("Batch item ran out of time", extra={"index": index, "error": str(e)})
+            return {"index": index, "status": "timeout", "error": str(e)}
+        
         except Exception as e:
-            error_message = str(e)
-            logger.warning(f"Bedrock attempt {attempt + 1} failed: {error_message}")
-            
-            # Don't retry on the last attempt
-            if attempt == max_retries:
-                raise BedrockError(f"Bedrock invocation failed after {max_retries + 1} attempts: {error_message}")
-            
-            # Check if we have time for another retry
-            elapsed_time = time.time() - start_time
-            if elapsed_time >= max_total_time - 10:  # Leave 10s buffer for the next attempt
-                raise TimeoutError(f"Not enough time remaining for retry. Elapsed: {elapsed_time}s")
-            
-            # Exponential backoff with jitter
-            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-            delay = min(delay, 30)  # Cap at 30 seconds
-            
-            logger.info(f"Retrying Bedrock call in {delay:.2f} seconds...")
-            time.sleep(delay)
+            logger.warning("Batch item failed", extra={"index": index, "error": str(e)})
+            return {"index": index, "status": "failed", "error": str(e)}
     
-    raise BedrockError("Maximum retry attempts exceeded")
+    max_workers = max(1, min(BATCH_MAX_CONCURRENCY, len(items)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(process_item, range(len(items)), items))
+    
+    succeeded = sum(1 for result in results if result["status"] == "generated")
+    metrics.add_metric(name="BatchItemsSucceeded", unit=MetricUnit.Count, value=succeeded)
+    metrics.add_metric(name="BatchItemsFailed", unit=MetricUnit.Count, value=len(results) - succeeded)
+    logger.info("Batch generation finished", extra={"items": len(results), "succeeded": succeeded})
+    
+    return results
 
 
 @tracer.capture_method
-def get_prompts_from_ssm() -> SSMPrompts:
+def generate_and_store_landing(
+    request_data: GenerationRequest,
+    output_bucket: str,
+    llm_model_id: str,
+    generation_id: str,
+    section_assets: Dict[str, str],
+    deadline: Optional[Deadline] = None,
+    stream: bool = False,
+    bypass_cache: bool = False,
+    strategy: Optional[str] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    admission_ticket: Optional[AdmissionTicket] = None,
+) -> Tuple[str, Dict[str, str]]:
     """
-    Retrieve Bedrock prompts from SSM parameters.
+    Generate landing content for one request and store its assets.
     
-    Returns:
-        SSMPrompts model with validated system and user prompts
+    Args:
+        request_data: Validated generation request
+        output_bucket: S3 bucket for generated assets
+        llm_model_id: Primary Bedrock model ID
+        generation_id: Generation ID allocated for the request
+        section_assets: Dict filled with the keys of sections stored as they complete
+        deadline: Invocation deadline
+        stream: Use the response-stream API
+        bypass_cache: Skip the generation cache
+        strategy: "single" or "parallel"; defaults to GENERATION_STRATEGY
+        on_stage: Callback receiving "generating" and "storing" as the request advances
+        admission_ticket: Capacity reserved for the request, settled with the tokens it used
     
-    Raises:
-        SSMError: If SSM parameter retrieval fails
+    Returns:
+        Tuple of (generation_id, S3 keys of the stored assets)
     """
-    try:
-        # Get system prompt from SSM
-        system_prompt_response = ssm_client.get_parameter(
-            Name="/laas/bedrock/system_prompt"
-        )
-        system_prompt = system_prompt_response['Parameter']['Value']
-        
-        # Get prompt template from SSM  
-        prompt_template_response = ssm_client.get_parameter(
-            Name="/laas/bedrock/prompt"
-        )
-        prompt_template = prompt_template_response['Parameter']['Value']
-        
-        return SSMPrompts(
-            system_prompt=system_prompt,
-            prompt_template=prompt_template
-        )
-        
-    except Exception as e:
-        logger.warning(f"Failed to get prompts from SSM, using defaults: {e}")
-        # Fallback to hardcoded prompts
-        system_prompt = (
-            "You are an expert landing page copywriter and visual content specialist. Given a business or industry description, "
-            "respond ONLY with a valid JSON object with the following fields: "
-            "'hero_html' (hero section HTML), 'features_html' (features section HTML), "
-            "'cta_html' (call to action HTML), and 'img_prompts' (array of exactly 4 industry-specific Unsplash-style image descriptions). "
-            "The HTML should be semantic and use the 'lp-' prefix for CSS classes. "
-            "For img_prompts, create vivid, industry-specific descriptions that will yield high-quality, relevant images for the specified industry. "
-            "Each image prompt should be detailed and professional, avoiding generic stock photo descriptions. "
-            "Do not include any explanation, markdown, or text outside the JSON object."
+    def on_section(section_name: str, value: Any) -> None:
+        section_assets[f"{section_name}_key"] = store_landing_section(
+            section_name, value, output_bucket, generation_id
         )
-        prompt_template = (
-            "Industry: {industry}{theme_context}\n\n"
-            "For images, generate 4 industry-specific Unsplash-style prompts that are highly relevant to the {industry} industry. "
-            "The prompts should be:\n"
-            "1. A hero background image that captures the essence of {industry}\n"
-            "2. A feature image showcasing {industry} technology or processes\n"
-            "3. A call-to-action image that motivates {industry} professionals\n"
-            "4. A secondary feature image highlighting {industry} benefits or outcomes\n\n"
-            "Make each image prompt specific, professional, and visually compelling for the {industry} sector."
+    
+    if on_stage:
+        on_stage("generating")
+    
+    # Generate landing content using Bedrock
+    theme_info = request_data.theme_info if request_data.theme_info else ThemeInfo()
+    generation_stats: Dict[str, Any] = {}
+    generation_start = time.perf_counter()
+    try:
+        landing_content = get_or_generate_landing_content(
+            request_data.prompt,
+            theme_info,
+            get_bedrock_runtime(),
+            llm_model_id,
+            output_bucket,
+            bypass_cache=bypass_cache,
+            deadline=deadline,
+            stream=stream,
+            on_section=on_section,
+            stats=generation_stats,
+            strategy=strategy,
         )
-        
-        return SSMPrompts(
-            system_prompt=system_prompt,
-            prompt_template=prompt_template
+    finally:
+        settle_admission(admission_ticket, generation_stats.get("token_usage"))
+    generation_stats.setdefault("timings", {})["generation_ms"] = round(
+        (time.perf_counter() - generation_start) * 1000, 2
+    )
+    
+    if IMAGE_GENERATION_ENABLED and landing_content.img_prompts:
+        images_start = time.perf_counter()
+        generation_stats["images"] = generate_page_images(
+            landing_content.img_prompts, output_bucket, generation_id, deadline=deadline
         )
+        # The stored sections reference the rendered variants instead of the stock images
+        landing_content = LandingContent(**apply_images(vars(landing_content), generation_stats["images"]))
+        generation_stats["timings"]["images_ms"] = round((time.perf_counter() - images_start) * 1000, 2)
+    
+    if on_stage:
+        on_stage("storing")
+    
+    # Store assets in S3
+    generation_id, assets = store_landing_assets(
+        landing_content,
+        output_bucket,
+        theme_info,
+        generation_id=generation_id,
+        deadline=deadline,
+        model_id=llm_model_id,
+        stats=generation_stats
+    )
+    assets.update(section_assets)
+    return generation_id, assets
 
 
-@tracer.capture_method
-def build_theme_context(theme_info: ThemeInfo) -> str:
+def update_job_status(
+    status_bucket: str,
+    generation_id: str,
+    state: str,
+    job_id: Optional[str] = None,
+    **fields: Any,
+) -> None:
     """
-    Build theme context string from theme information.
+    Write a job's status object and push the change to subscribed clients.
+    
+    Both steps log instead of failing the job when they are unavailable;
+    clients that miss a push still see the status object when they poll.
     
     Args:
-        theme_info: Validated theme information
+        status_bucket: Bucket holding status objects
+        generation_id: Generation ID of the job
+        state: queued, generating, storing, done or failed
+        job_id: Orchestrator job the generation belongs to, whose clients are pushed the change too
+        **fields: Extra fields stored with the state
+    """
+    try:
+        write_job_status(get_s3_client(), status_bucket, generation_id, state, **fields)
+    except ClientError as e:
+        logger.warning(f"Failed to write job status {state}: {e}", extra={"generation_id": generation_id})
     
-    Returns:
-        Formatted theme context string
+    publish_progress(status_bucket, generation_id, build_status(generation_id, state, **fields))
+    if job_id:
+        publish_progress(status_bucket, job_id, build_job_progress(job_id, generation_id, state, **fields))
+
+
+def publish_progress(status_bucket: str, watched_id: str, message: Dict[str, Any]) -> None:
     """
-    theme_context = ""
+    Push a message to the clients watching a job or generation, when a push endpoint is configured.
     
-    if theme_info.fonts:
-        theme_context += f" Use fonts: {', '.join(theme_info.fonts)}. "
+    Args:
+        status_bucket: Bucket holding the subscription objects
+        watched_id: Generation ID or orchestrator job ID the clients subscribed to
+        message: Message in the schema those clients parse
+    """
+    channel = get_progress_channel(status_bucket)
+    if channel is None:
+        return
+    try:
+        delivered = channel.publish(watched_id, message)
+        metrics.add_metric(name="ProgressPushDelivered", unit=MetricUnit.Count, value=delivered)
+    except ClientError as e:
+        logger.warning(f"Failed to push job status {message['status']}: {e}", extra={"watched_id": watched_id})
+
+
+@tracer.capture_method
+def enqueue_generation_job(job: Dict[str, Any], status_bucket: str, context: LambdaContext) -> str:
+    """
+    Record a job as queued and hand it to an asynchronous invocation of this function.
     
-    if theme_info.color_palette:
-        theme_context += f" Use colors: {', '.join(theme_info.color_palette)}. "
+    Args:
+        job: Job description: generation_id, the request body and generation options
+        status_bucket: Bucket holding status objects
+        context: Lambda context, identifying the function to invoke
     
-    if theme_info.logo_url:
-        theme_context += f" Include logo from: {theme_info.logo_url}. "
+    Returns:
+        S3 key of the job's status object
     
-    return theme_context
+    Raises:
+        ClientError: If the status object cannot be written or the invocation is rejected
+    """
+    key = write_job_status(get_s3_client(), status_bucket, job["generation_id"], "queued")
+    get_lambda_client().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({ASYNC_JOB_EVENT_KEY: job}).encode("utf-8"),
+    )
+    metrics.add_metric(name="AsyncJobQueued", unit=MetricUnit.Count, value=1)
+    return key
 
 
 @tracer.capture_method
-def generate_landing_content(
-    prompt: str,
-    theme_info: ThemeInfo,
-    bedrock_runtime_client: Any,
-    llm_model_id: str,
-) -> LandingContent:
+def run_generation_job(job: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """
-    Use Bedrock LLM to generate structured landing page content.
+    Do the work of an async request, recording each stage in its status object.
+    
+    Failures are recorded as a failed status and not raised, and the
+    function's async retries are turned off in terraform, so the generation
+    is not run a second time. An event delivered again after the job has
+    left the queued state is skipped for the same reason.
     
     Args:
-        prompt: Industry/business description
-        theme_info: Theme information from target site
-        bedrock_runtime_client: Boto3 bedrock-runtime client
-        llm_model_id: The Bedrock model ID to use
+        job: Job description written by enqueue_generation_job
+        context: Lambda context
     
     Returns:
-        Validated LandingContent model
-    
-    Raises:
-        BedrockError: If content generation fails
-        ValidationError: If generated content is invalid
+        Summary of the job outcome
     """
-    # Get prompts from SSM parameters
-    ssm_prompts = get_prompts_from_ssm()
+    deadline = Deadline.from_context(context)
+    generation_id = job["generation_id"]
+    job_id = job.get("job_id")
+    output_bucket = os.environ["OUTPUT_BUCKET"]
+    status_bucket = STATUS_BUCKET or output_bucket
     
-    # Build the prompt with theme context
-    theme_context = build_theme_context(theme_info)
+    try:
+        current = read_job_status(get_s3_client(), status_bucket, generation_id)
+    except ClientError as e:
+        logger.warning(f"Failed to read job status: {e}", extra={"generation_id": generation_id})
+        current = None
+    if current is not None and current["status"] != "queued":
+        logger.warning("Async job already started, skipping duplicate delivery", extra={
+            "generation_id": generation_id,
+            "status": current["status"]
+        })
+        metrics.add_metric(name="AsyncJobDuplicate", unit=MetricUnit.Count, value=1)
+        return {"generation_id": generation_id, "status": "skipped"}
     
-    # Use the template from SSM with replacements
-    user_prompt = ssm_prompts.prompt_template.format(
-        industry=prompt,
-        theme_context=theme_context
-    )
+    llm_model_id = os.environ.get("BEDROCK_LLM_MODEL_ID", "anthropic.claude-3-sonnet-20240229")
+    section_assets: Dict[str, str] = {}
     
-    # Create validated payload using Messages API format
-    payload = BedrockPayload(
-        anthropic_version="bedrock-2023-05-31",
-        max_tokens=1024,
-        temperature=0.7,
-        system=ssm_prompts.system_prompt,
-        messages=[
-            {
-                "role": "user",
-                "content": [{"type": "text", "text": user_prompt}]
-            }
-        ]
-    )
+    queue_delay_ms = max(0.0, (time.time() - job.get("queued_at", time.time())) * 1000)
+    metrics.add_metric(name="AsyncJobQueueDelay", unit=MetricUnit.Milliseconds, value=queue_delay_ms)
+    logger.info("Async generation job started", extra={
+        "generation_id": generation_id,
+        "queue_delay_ms": round(queue_delay_ms, 2)
+    })
     
     try:
-        # Use retry logic with exponential backoff
-        response = invoke_bedrock_with_retry(bedrock_runtime_client, llm_model_id, payload)
-        
-        response_body = response["body"].read().decode("utf-8")
-        logger.info("Bedrock response received", extra={"response_length": len(response_body)})
-        
-        # Parse Bedrock response
-        response_json = json.loads(response_body)
-        bedrock_response = BedrockResponse(**response_json)
-        
-        # Extract JSON from the response (get text from first content block)
-        completion_text = ""
-        if bedrock_response.content and len(bedrock_response.content) > 0:
-            first_content = bedrock_response.content[0]
-            if isinstance(first_content, dict) and "text" in first_content:
-                completion_text = first_content["text"]
-        
-        # Try to extract JSON from markdown code blocks first
-        match = re.search(r'```(?:json)?\s*({[\s\S]*?})\s*```', completion_text)
-        if match:
-            json_str = match.group(1)
-        else:
-            # Fallback: extract first JSON object
-            match = re.search(r'\{[\s\S]*?\}', completion_text)
-            if match:
-                json_str = match.group(0)
-            else:
-                raise LandingValidationError("No valid JSON found in Bedrock response")
-        
-        # Parse and validate the JSON
-        try:
-            parsed_json = json.loads(json_str)
-            landing_content = LandingContent(**parsed_json)
-        except (json.JSONDecodeError, TypeError, ValueError) as e:
-            logger.error(f"Invalid JSON in Bedrock response: {e}")
-            raise LandingValidationError(f"Invalid landing content structure: {e}")
-        
-        return landing_content
-        
+        generation_id, assets = generate_and_store_landing(
+            parse_generation_request(dict(job["request"])),
+            output_bucket,
+            llm_model_id,
+            generation_id,
+            section_assets,
+            deadline=deadline,
+            stream=job.get("stream", False),
+            bypass_cache=job.get("bypass_cache", False),
+            strategy=job.get("strategy"),
+            on_stage=lambda state: update_job_status(status_bucket, generation_id, state, job_id=job_id),
+            admission_ticket=AdmissionTicket(**job["admission"]) if job.get("admission") else None,
+        )
     except Exception as e:
-        logger.error("Bedrock generation failed", extra={"error": str(e)})
-        raise BedrockError(f"Content generation failed: {str(e)}")
+        logger.error(f"Async generation job failed: {e}", extra={"generation_id": generation_id})
+        metrics.add_metric(name="AsyncJobFailed", unit=MetricUnit.Count, value=1)
+        status = "timeout" if isinstance(e, DeadlineExceededError) else "failed"
+        update_job_status(
+            status_bucket, generation_id, "failed", job_id=job_id,
+            error=str(e), error_type=status, assets=section_assets or None
+        )
+        return {"generation_id": generation_id, "status": "failed"}
+    
+    update_job_status(status_bucket, generation_id, "done", job_id=job_id, assets=assets)
+    metrics.add_metric(name="AsyncJobSucceeded", unit=MetricUnit.Count, value=1)
+    logger.info("Async generation job finished", extra={"generation_id": generation_id})
+    return {"generation_id": generation_id, "status": "done"}
 
 
 @tracer.capture_method
-def store_landing_assets(
-    landing_content: LandingContent,
-    bucket: str,
-    theme_info: ThemeInfo,
-) -> Tuple[str, Dict[str, str]]:
+def run_pregeneration(options: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """
-    Store landing page assets in S3.
+    Generate the most requested combinations ahead of demand into the generation cache.
+    
+    The top combinations of the request history are submitted as one bulk
+    job to a pool of PREGEN_MAX_CONCURRENCY workers, each going through
+    generate_landing_content like a live request. Combinations already
+    cached are skipped. Generation is admitted at batch priority, so it
+    yields to interactive traffic. Items that do not get capacity, or time,
+    are deferred to the next run.
     
     Args:
-        landing_content: Validated landing content
-        bucket: S3 bucket name
-        theme_info: Theme information
+        options: Optional overrides: top_n, history_hours, max_concurrency
+        context: Lambda context
     
     Returns:
-        Tuple of (generation_id, assets_dict)
-    
-    Raises:
-        Exception: If S3 operations fail
+        Run summary: item counts by status, plus the live requests that
+        pre-generated content served in the history window and its cost per hit
     """
-    generation_id = str(uuid.uuid4())
-    assets: Dict[str, str] = {}
+    deadline = Deadline.from_context(context)
+    output_bucket = os.environ["OUTPUT_BUCKET"]
+    llm_model_id = os.environ.get("BEDROCK_LLM_MODEL_ID", "anthropic.claude-3-sonnet-20240229")
+    top_n = int(options.get("top_n", PREGEN_TOP_N))
+    history_hours = int(options.get("history_hours", PREGEN_HISTORY_HOURS))
+    max_concurrency = int(options.get("max_concurrency", PREGEN_MAX_CONCURRENCY))
     
-    try:
-        # Store the landing content JSON
-        content_key = f"generated/{generation_id}/landing_content.json"
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=content_key,
-            Body=json.dumps(vars(landing_content)),
-            ContentType="application/json"
-        )
-        assets["content_key"] = content_key
-        
-        # Store theme information
-        theme_key = f"generated/{generation_id}/theme_info.json"
-        s3_client.put_object(
-            Bucket=bucket,
-            Key=theme_key,
-            Body=json.dumps(vars(theme_info)),
-            ContentType="application/json"
-        )
-        assets["theme_key"] = theme_key
-        
-        logger.info(f"Assets stored successfully", extra={
-            "generation_id": generation_id,
-            "assets": list(assets.keys())
-        })
+    if not GENERATION_CACHE_ENABLED:
+        logger.warning("Pre-generation skipped: the generation cache is disabled")
+        return {"status": "disabled"}
+    
+    started_at = time.time()
+    # This container's own counts would otherwise wait for the next live request
+    flush_request_history(output_bucket, force=True)
+    summary = summarize_history(get_s3_client(), output_bucket, history_hours)
+    # Spend of earlier runs against the hits their content served in the same window
+    savings = cost_per_hit(
+        summary, load_run_reports(get_s3_client(), output_bucket, since=started_at - history_hours * 3600)
+    )
+    candidates = top_combinations(summary, top_n)
+    cache = get_generation_cache(output_bucket)
+    get_prompts_from_ssm(deadline)
+    
+    def pregenerate(candidate: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"requests": candidate["requests"]}
+        try:
+            request = candidate["request"]
+            theme_info = ThemeInfo(**request["theme_info"])
+            # Recompute the key: prompts or routing may have changed since the request
+            cache_key = generation_cache_key(request["prompt"], theme_info, llm_model_id)
+            result["cache_key"] = cache_key
+            if cache.lookup(cache_key)[0] is not None:
+                return dict(result, status="cached")
+            
+            stats: Dict[str, Any] = {}
+            ticket = admit_generation(PREGENERATION_TENANT_ID, "batch", deadline=deadline)
+            try:
+                landing_content = generate_landing_content(
+                    request["prompt"], theme_info, get_bedrock_runtime(), llm_model_id,
+                    deadline=deadline, stats=stats
+                )
+            finally:
+                settle_admission(ticket, stats.get("token_usage"))
+            cache.put(cache_key, vars(landing_content), origin="pregenerated")
+            
+            usage = stats.get("token_usage", {})
+            return dict(
+                result,
+                status="pregenerated",
+                token_usage=usage,
+                cost_usd=round(estimate_cost(
+                    usage, PREGEN_PRICE_PER_1K_INPUT_TOKENS, PREGEN_PRICE_PER_1K_OUTPUT_TOKENS
+                ), 6),
+            )
         
-        return generation_id, assets
+        except (AdmissionRejectedError, DeadlineExceededError) as e:
+            return dict(result, status="deferred", error=str(e))
         
-    except Exception as e:
-        logger.error(f"Failed to store assets", extra={"error": str(e)})
-        raise
+        except Exception as e:
+            logger.warning("Pre-generation item failed", extra={"candidate": candidate["cache_key"], "error": str(e)})
+            return dict(result, status="failed", error=str(e))
+    
+    # Bulk submission with its own concurrency cap, independent of BATCH_MAX_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(candidates) or 1))) as executor:
+        items = list(executor.map(pregenerate, candidates))
+    
+    counts = Counter(item["status"] for item in items)
+    report = {
+        "run_id": str(uuid.uuid4()),
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "model_id": llm_model_id,
+        "items": items,
+        "cost_usd": round(sum(item.get("cost_usd", 0.0) for item in items), 6),
+    }
+    write_run_report(get_s3_client(), output_bucket, report)
+    
+    for status, count in counts.items():
+        record_stage_metric("PregenerationItems", MetricUnit.Count, count, status=status)
+    metrics.add_metric(name="PregenerationHits", unit=MetricUnit.Count, value=savings["live_hits"])
+    if savings["cost_per_hit_usd"] is not None:
+        metrics.add_metric(name="PregenerationCostPerHit", unit=MetricUnit.NoUnit, value=savings["cost_per_hit_usd"])
+    
+    run_summary = {
+        "run_id": report["run_id"],
+        "candidates": len(candidates),
+        **{status: counts.get(status, 0) for status in ("pregenerated", "cached", "deferred", "failed")},
+        "cost_usd": report["cost_usd"],
+        **savings,
+    }
+    logger.info("Pre-generation run finished", extra=run_summary)
+    return run_summary
 
 
 @logger.inject_lambda_context
@@ -390,6 +2762,24 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """
     logger.info("gen_landing Lambda invoked")
     
+    # Second half of a 202-acknowledged request
+    if isinstance(event, dict) and ASYNC_JOB_EVENT_KEY in event:
+        try:
+            return run_generation_job(event[ASYNC_JOB_EVENT_KEY], context)
+        finally:
+            flush_request_history(os.environ["OUTPUT_BUCKET"])
+    
+    # Scheduled off-peak run
+    if isinstance(event, dict) and PREGENERATE_EVENT_KEY in event:
+        return run_pregeneration(event[PREGENERATE_EVENT_KEY] or {}, context)
+    
+    # Every stage sizes its timeouts and retries against this budget
+    deadline = Deadline.from_context(context)
+    
+    # Allocate the generation ID up front so streamed sections can be stored early
+    generation_id = str(uuid.uuid4())
+    section_assets: Dict[str, str] = {}
+    
     # Environment variables
     output_bucket = os.environ["OUTPUT_BUCKET"]
     llm_model_id = os.environ.get("BEDROCK_LLM_MODEL_ID", "anthropic.claude-3-sonnet-20240229")
@@ -406,14 +2796,38 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
             else:
                 parsed_body = event if isinstance(event, dict) else json.loads(str(event))
             
-            # Convert theme_info dict to ThemeInfo instance if present
-            if "theme_info" in parsed_body and parsed_body["theme_info"] is not None:
-                theme_info_dict = parsed_body["theme_info"]
-                if isinstance(theme_info_dict, dict):
-                    parsed_body["theme_info"] = ThemeInfo(**theme_info_dict)
+            # Per-request override of the streaming mode
+            stream_override = parsed_body.pop("stream", None)
+            use_streaming = BEDROCK_STREAMING if stream_override is None else bool(stream_override)
+            bypass_cache = bool(parsed_body.pop("bypass_cache", False))
+            strategy = parsed_body.pop("strategy", None)
+            if strategy is not None and strategy not in GENERATION_STRATEGIES:
+                raise ValueError(f"strategy must be one of {', '.join(GENERATION_STRATEGIES)}")
+            async_override = parsed_body.pop("async", None)
+            if async_override is not None and not isinstance(async_override, bool):
+                raise ValueError("async must be a boolean")
+            async_mode = ASYNC_MODE if async_override is None else async_override
+            tenant_id = tenant_id_from_event(event, parsed_body.pop("tenant_id", None))
+            # Orchestrator job this generation is a stage of; its web clients are pushed our progress
+            job_id = parsed_body.pop("job_id", None)
+            if job_id is not None and not (isinstance(job_id, str) and JOB_ID_PATTERN.fullmatch(job_id)):
+                raise ValueError("job_id must be 1-64 letters, digits or dashes")
             
-            # Validate request using dataclass
-            request_data = GenerationRequest(**parsed_body)
+            # Batch mode: a list of prompts/theme_infos in one invocation
+            batch_items = parsed_body.pop("items", None)
+            if batch_items is not None:
+                if not isinstance(batch_items, list) or not batch_items:
+                    raise ValueError("items must be a non-empty list")
+                if len(batch_items) > BATCH_MAX_ITEMS:
+                    raise ValueError(f"Batch exceeds the maximum of {BATCH_MAX_ITEMS} items")
+                if async_override:
+                    raise ValueError("async is not supported for batch requests")
+                if job_id is not None:
+                    raise ValueError("job_id is not supported for batch requests")
+            else:
+                # Keep the plain body for the async worker; parsing replaces theme_info with a ThemeInfo
+                job_request = dict(parsed_body)
+                request_data = parse_generation_request(parsed_body)
             
         except (json.JSONDecodeError, TypeError, ValueError) as e:
             logger.error(f"Invalid request format: {e}")
@@ -423,21 +2837,91 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
                 "body": json.dumps({"error": f"Invalid request format: {str(e)}"})
             }
         
-        # Generate landing content using Bedrock
-        theme_info = request_data.theme_info if request_data.theme_info else ThemeInfo()
-        landing_content = generate_landing_content(
-            request_data.prompt,
-            theme_info,
-            bedrock_runtime,
-            llm_model_id
-        )
+        if batch_items is not None:
+            results = process_batch_request(
+                batch_items,
+                parsed_body.get("theme_info"),
+                output_bucket,
+                llm_model_id,
+                bypass_cache=bypass_cache,
+                deadline=deadline,
+                tenant_id=tenant_id,
+            )
+            failed = sum(1 for result in results if result["status"] != "generated")
+            return {
+                # 207 Multi-Status signals that some items failed
+                "statusCode": 207 if failed else 200,
+                "headers": CORS_HEADERS,
+                "body": json.dumps({
+                    "status": "partial" if failed else "generated",
+                    "succeeded": len(results) - failed,
+                    "failed": failed,
+                    "results": results,
+                })
+            }
+        
+        # Capacity is reserved before acknowledging, so over-budget async requests also get 429
+        admission_ticket = admit_generation(tenant_id, "interactive", deadline=deadline)
+        
+        if async_mode:
+            job = {
+                "generation_id": generation_id,
+                "request": job_request,
+                "stream": use_streaming,
+                "bypass_cache": bypass_cache,
+                "strategy": strategy,
+                "queued_at": time.time(),
+                "admission": asdict(admission_ticket) if admission_ticket else None,
+                "job_id": job_id,
+            }
+            try:
+                status_key = enqueue_generation_job(job, STATUS_BUCKET or output_bucket, context)
+            except ClientError as e:
+                logger.error(f"Failed to queue async generation: {e}")
+                settle_admission(admission_ticket, None)
+                update_job_status(STATUS_BUCKET or output_bucket, generation_id, "failed", job_id=job_id, error=str(e))
+                return {
+                    "statusCode": 503,
+                    "headers": CORS_HEADERS,
+                    "body": json.dumps({"error": "Could not queue the generation, please retry"})
+                }
+            
+            if job_id:
+                publish_progress(
+                    STATUS_BUCKET or output_bucket, job_id, build_job_progress(job_id, generation_id, "queued")
+                )
+            logger.info("Async generation queued", extra={"generation_id": generation_id})
+            return {
+                "statusCode": 202,
+                "headers": CORS_HEADERS,
+                "body": json.dumps({
+                    "generation_id": generation_id,
+                    "status": "queued",
+                    "status_key": status_key,
+                })
+            }
         
-        # Store assets in S3
-        generation_id, assets = store_landing_assets(
-            landing_content,
+        def push_stage(state: str, **fields: Any) -> None:
+            # Synchronous requests keep no status object, so stages are only pushed
+            publish_progress(
+                STATUS_BUCKET or output_bucket, job_id, build_job_progress(job_id, generation_id, state, **fields)
+            )
+        
+        generation_id, assets = generate_and_store_landing(
+            request_data,
             output_bucket,
-            theme_info
+            llm_model_id,
+            generation_id,
+            section_assets,
+            deadline=deadline,
+            stream=use_streaming,
+            bypass_cache=bypass_cache,
+            strategy=strategy,
+            on_stage=push_stage if job_id else None,
+            admission_ticket=admission_ticket,
         )
+        if job_id:
+            push_stage("done", assets=assets)
         
         # Create validated response
         response_data = GenerationResponse(
@@ -456,6 +2940,23 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
             "body": json.dumps(vars(response_data))
         }
         
+    except AdmissionRejectedError as e:
+        return admission_rejected_response(e)
+    
+    except DeadlineExceededError as e:
+        logger.error(f"Deadline exceeded: {e}")
+        # Report whatever was checkpointed so the client can pick it up
+        return {
+            "statusCode": 504,
+            "headers": CORS_HEADERS,
+            "body": json.dumps({
+                "error": f"Generation did not finish in time: {str(e)}",
+                "status": "timeout",
+                "generation_id": generation_id,
+                "assets": section_assets,
+            })
+        }
+    
     except BedrockError as e:
         logger.error(f"Bedrock error: {e}")
         return {
@@ -489,3 +2990,6 @@ def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
             "headers": CORS_HEADERS,
             "body": json.dumps({"error": f"Unexpected error: {str(e)}"})
         }
+    
+    finally:
+        flush_request_history(output_bucket)
@@ -0,0 +1,316 @@
+"""Embedding index of rendered images, for reusing them across similar prompts.
+
+Image prompts recur with small wording changes across pages and tenants
+("modern dental office with natural light"). Every rendered image is
+indexed by the embedding of its prompt. A new prompt whose embedding has
+a cosine similarity of at least `threshold` with an indexed one reuses
+that image instead of rendering a new one.
+
+The index is an in-memory float32 matrix of unit vectors, so a lookup is
+one matrix-vector product. It is persisted in S3 as:
+
+    generated/image-index/snapshot.npz            vectors and entries, compacted
+    generated/image-index/deltas/<ms>-<id>.json   one appended entry each
+
+Appends only write a small delta object, so containers never rewrite
+the shared snapshot on the request path. Containers refresh by reading
+deltas they have not seen. Once `compact_after` deltas have piled up,
+one container folds them into a new snapshot and deletes them. It holds
+a lease (see single_flight) while doing so, so that concurrent
+compactions cannot drop each other's deltas. Entries carry an ID, so a
+delta that is read both from the snapshot and from a not-yet-deleted
+object is only counted once.
+
+NumPy is imported on first use. It is not in the function package; it
+is attached as a Lambda layer where reuse is enabled. Embeddings come
+from a callable supplied by the caller (Titan Text Embeddings in the
+Lambda, a hashing fake in tests).
+"""
+
+import io
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+from generation_cache import normalize_prompt
+
+INDEX_PREFIX: str = "generated/image-index"
+DEFAULT_EMBEDDING_MODEL_ID: str = "amazon.titan-embed-text-v2:0"
+DEFAULT_DIMENSIONS: int = 256
+COMPACTION_LEASE: str = "image-index-compaction"
+
+# Prompts whose embeddings are kept, so an add after a missed lookup does not embed again
+EMBEDDING_MEMO_SIZE: int = 256
+
+
+def build_embedding_request(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> Dict[str, Any]:
+    """InvokeModel body for Titan Text Embeddings v2, asking for a unit vector."""
+    return {"inputText": text, "dimensions": dimensions, "normalize": True}
+
+
+def extract_embedding(response_body: Dict[str, Any]) -> List[float]:
+    """The embedding of a Titan Text Embeddings response body."""
+    return response_body["embedding"]
+
+
+class ImageIndex:
+    """
+    Cosine-similarity index of image prompts, persisted as an S3 snapshot plus deltas.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Bucket holding the index
+        embed: Returns the embedding of a text
+        threshold: Lowest cosine similarity that counts as a match
+        compact_after: Deltas that trigger a compaction
+        refresh_seconds: How often a warm container looks for new deltas
+        lease_store: LocalLeaseStore or S3LeaseStore guarding compaction;
+            None compacts without a lease (single process only)
+        prefix: Key prefix of the index objects
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        embed: Callable[[str], Sequence[float]],
+        threshold: float = 0.92,
+        compact_after: int = 50,
+        refresh_seconds: float = 60.0,
+        lease_store: Any = None,
+        prefix: str = INDEX_PREFIX,
+    ) -> None:
+        import numpy
+
+        self._np = numpy
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.embed = embed
+        self.threshold = threshold
+        self.compact_after = compact_after
+        self.refresh_seconds = refresh_seconds
+        self.lease_store = lease_store
+        self.snapshot_key = f"{prefix}/snapshot.npz"
+        self.delta_prefix = f"{prefix}/deltas/"
+
+        self._vectors: Any = None
+        self._pending: List[Any] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._ids: set = set()
+        self._snapshot_etag: Optional[str] = None
+        self._seen_deltas: set = set()
+        self._refreshed_at = 0.0
+        self._embeddings: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def embedding(self, text: str) -> Any:
+        """Unit-length float32 embedding of a prompt, memoized per normalized prompt."""
+        text = normalize_prompt(text)
+        with self._lock:
+            vector = self._embeddings.get(text)
+            if vector is not None:
+                self._embeddings.move_to_end(text)
+                return vector
+
+        vector = self._np.asarray(self.embed(text), dtype=self._np.float32)
+        norm = float(self._np.linalg.norm(vector))
+        if norm > 0:
+            vector = vector / norm
+
+        with self._lock:
+            self._embeddings[text] = vector
+            while len(self._embeddings) > EMBEDDING_MEMO_SIZE:
+                self._embeddings.popitem(last=False)
+        return vector
+
+    def _append(self, entry: Dict[str, Any], vector: Any) -> None:
+        """Add an entry to the in-memory index (caller holds the lock)."""
+        if entry["id"] in self._ids:
+            return
+        self._ids.add(entry["id"])
+        self._entries.append(entry)
+        self._pending.append(self._np.asarray(vector, dtype=self._np.float32))
+
+    def _matrix(self) -> Any:
+        """All vectors as one matrix, folding in pending rows in one copy (caller holds the lock)."""
+        if self._pending:
+            rows = [self._vectors] if self._vectors is not None else []
+            self._vectors = self._np.vstack(rows + self._pending)
+            self._pending = []
+        return self._vectors
+
+    def _list_deltas(self) -> List[str]:
+        keys = []
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.delta_prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        return sorted(keys)
+
+    def _load_snapshot(self) -> None:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.snapshot_key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return
+            raise
+
+        etag = response.get("ETag")
+        if etag == self._snapshot_etag:
+            return
+        with self._np.load(io.BytesIO(response["Body"].read())) as snapshot:
+            vectors = snapshot["vectors"]
+            entries = json.loads(snapshot["entries"].tobytes().decode("utf-8"))
+
+        snapshot_ids = {entry["id"] for entry in entries}
+        with self._lock:
+            # Entries appended here but not yet in the snapshot are kept
+            matrix = self._matrix()
+            extra = [
+                (entry, matrix[row]) for row, entry in enumerate(self._entries) if entry["id"] not in snapshot_ids
+            ]
+            self._vectors, self._pending, self._entries, self._ids = None, [], [], set()
+            if entries:
+                self._vectors = vectors.astype(self._np.float32, copy=False)
+                self._entries = entries
+                self._ids = snapshot_ids
+            for entry, vector in extra:
+                self._append(entry, vector)
+            self._snapshot_etag = etag
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Pick up a new snapshot and deltas written by other containers.
+
+        Args:
+            force: Refresh even if the last refresh is recent
+
+        Returns:
+            Number of deltas not yet compacted into the snapshot
+        """
+        if not force and time.time() - self._refreshed_at < self.refresh_seconds:
+            with self._lock:
+                return len(self._seen_deltas)
+
+        self._load_snapshot()
+        delta_keys = self._list_deltas()
+        for key in delta_keys:
+            if key in self._seen_deltas:
+                continue
+            try:
+                delta = json.loads(self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"].read())
+            except ClientError as e:
+                # Deleted by a compaction since the listing; its entry is in the snapshot
+                if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                    continue
+                raise
+            with self._lock:
+                self._append(delta["entry"], delta["vector"])
+
+        with self._lock:
+            self._seen_deltas = set(delta_keys)
+            self._refreshed_at = time.time()
+            return len(self._seen_deltas)
+
+    def find(self, prompt: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Find the indexed image whose prompt is most similar to `prompt`.
+
+        Args:
+            prompt: Image prompt
+
+        Returns:
+            Tuple of (entry, similarity); entry is None when the best
+            similarity is below the threshold or the index is empty
+        """
+        self.refresh()
+        vector = self.embedding(prompt)
+        with self._lock:
+            matrix = self._matrix()
+            if matrix is None or not len(matrix):
+                return None, 0.0
+            scores = matrix @ vector
+            best = int(self._np.argmax(scores))
+            score = float(scores[best])
+            entry = self._entries[best]
+        return (entry if score >= self.threshold else None), score
+
+    def add(self, prompt: str, image: Dict[str, Any]) -> bool:
+        """
+        Index a rendered image and persist it as a delta.
+
+        Args:
+            prompt: Prompt the image was rendered from
+            image: Image record to hand out on a match (src, srcset, variants, ...)
+
+        Returns:
+            True if the append triggered a compaction
+        """
+        vector = self.embedding(prompt)
+        entry = {"id": str(uuid.uuid4()), "prompt": prompt, "image": image, "created_at": time.time()}
+        key = f"{self.delta_prefix}{int(entry['created_at'] * 1000):013d}-{entry['id']}.json"
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps({"entry": entry, "vector": vector.tolist()}, separators=(",", ":")),
+            ContentType="application/json",
+        )
+        with self._lock:
+            self._append(entry, vector)
+            self._seen_deltas.add(key)
+            pending_deltas = len(self._seen_deltas)
+
+        if pending_deltas >= self.compact_after:
+            return self.compact()
+        return False
+
+    def compact(self) -> bool:
+        """
+        Fold all deltas into a new snapshot and delete them.
+
+        Returns:
+            True if this call compacted, False if another container holds the lease
+        """
+        owner = str(uuid.uuid4())
+        if self.lease_store is not None and not self.lease_store.acquire(COMPACTION_LEASE, owner, 60):
+            return False
+        try:
+            self.refresh(force=True)
+            with self._lock:
+                vectors = self._matrix()
+                entries = list(self._entries)
+                compacted = sorted(self._seen_deltas)
+
+            buffer = io.BytesIO()
+            self._np.savez_compressed(
+                buffer,
+                vectors=vectors if vectors is not None else self._np.zeros((0, 0), dtype=self._np.float32),
+                entries=self._np.frombuffer(json.dumps(entries, separators=(",", ":")).encode("utf-8"), dtype=self._np.uint8),
+            )
+            response = self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.snapshot_key,
+                Body=buffer.getvalue(),
+                ContentType="application/octet-stream",
+            )
+            # Deltas are only deleted once the snapshot holding them is stored
+            for start in range(0, len(compacted), 1000):
+                self.s3_client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in compacted[start:start + 1000]], "Quiet": True},
+                )
+            with self._lock:
+                self._snapshot_etag = response.get("ETag")
+                self._seen_deltas -= set(compacted)
+            return True
+        finally:
+            if self.lease_store is not None:
+                self.lease_store.release(COMPACTION_LEASE, owner)
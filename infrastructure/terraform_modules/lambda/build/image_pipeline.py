@@ -0,0 +1,407 @@
+"""Render a page's img_prompts with a Bedrock image model and store web-ready variants.
+
+Every prompt is rendered once by Amazon Titan Image Generator, which
+returns a PNG. The PNG is re-encoded to modern formats (AVIF and WebP by
+default) at several responsive widths, and each variant is stored under
+a content-hashed key:
+
+    generated/<generation_id>/images/<sha256 prefix>-<width>w.<ext>
+
+Identical bytes always map to the same key, so variants can be cached
+forever by CloudFront and browsers, and a key is only written once per
+render even when two prompts (a repeated prompt, for one) come out the
+same.
+
+Prompts are rendered concurrently with a bounded pool, because the image
+model has a much lower quota than the text models. A failed image never
+fails the page: its result records the error and the page keeps its
+remote stock images. An optional reuse hook (see image_index) can hand
+out an image rendered earlier for a similar prompt instead.
+
+apply_images writes the rendered images back into the section HTML: the
+n-th image of a section replaces the section's n-th <img> with a
+<picture> offering every stored format, and is added at the end of the
+section when there is no <img> to replace.
+
+Re-encoding needs Pillow, which is imported on first use so the cold
+start of text-only invocations does not pay for it. Formats that the
+installed Pillow cannot encode are skipped. Without Pillow the PNG is
+stored as the only variant. Apart from Pillow, this module only depends
+on the standard library; Bedrock and S3 are reached through callables
+supplied by the caller.
+"""
+
+import base64
+import hashlib
+import html
+import io
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_WIDTHS: Tuple[int, ...] = (480, 960, 1280)
+DEFAULT_FORMATS: Tuple[str, ...] = ("avif", "webp")
+DEFAULT_SIZE: Tuple[int, int] = (1280, 768)
+
+MIME_TYPES: Dict[str, str] = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "png": "image/png",
+}
+
+# Encoder options per format; AVIF at speed 8 keeps encoding well under a second per variant
+ENCODER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "avif": {"speed": 8},
+    "webp": {"method": 4},
+    "png": {"optimize": True},
+}
+
+# Titan accepts at most 512 characters of prompt text
+TITAN_MAX_PROMPT_CHARS: int = 512
+TITAN_MAX_SEED: int = 2147483646
+
+# Section each img_prompt illustrates, in the order the prompt template asks for them
+IMAGE_SLOTS: Tuple[str, ...] = ("hero_html", "features_html", "cta_html", "features_html")
+IMAGE_SIZES: str = "100vw"
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_IMG_TAG = re.compile(r"<img\b[^>]*>", re.I)
+_REPLACED_ATTRIBUTES = re.compile(r"""\s(?:src|srcset|sizes)\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)""", re.I)
+
+
+@dataclass
+class ImageVariant:
+    """One stored encoding of a rendered image."""
+
+    format: str
+    width: int
+    height: int
+    key: str
+    url: str
+    bytes: int
+
+
+@dataclass
+class ImageResult:
+    """Outcome of rendering one img_prompt."""
+
+    index: int
+    prompt: str
+    outcome: str
+    latency_ms: float = 0.0
+    png_bytes: int = 0
+    saved_bytes: int = 0
+    src: Optional[str] = None
+    srcset: Dict[str, str] = field(default_factory=dict)
+    variants: List[ImageVariant] = field(default_factory=list)
+    error: Optional[str] = None
+    reused_from: Optional[str] = None
+    similarity: Optional[float] = None
+
+
+def image_record(result: ImageResult) -> Dict[str, Any]:
+    """The parts of a rendered image that another prompt can reuse."""
+    return {
+        "png_bytes": result.png_bytes,
+        "saved_bytes": result.saved_bytes,
+        "src": result.src,
+        "srcset": dict(result.srcset),
+        "variants": [vars(variant) for variant in result.variants],
+    }
+
+
+def prompt_seed(prompt: str) -> int:
+    """Deterministic seed for a prompt, so a repeated prompt renders the same image."""
+    return int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16) % (TITAN_MAX_SEED + 1)
+
+
+def build_image_request(model_id: str, prompt: str, size: Tuple[int, int] = DEFAULT_SIZE) -> Dict[str, Any]:
+    """
+    Build the InvokeModel body for a text-to-image request.
+
+    Args:
+        model_id: Bedrock image model ID (Titan Image Generator v1 or v2)
+        prompt: Image description
+        size: Width and height; must be a size the model supports
+
+    Returns:
+        Request body as a dict
+
+    Raises:
+        ValueError: If the model is not a Titan image model
+    """
+    if not model_id.startswith("amazon.titan-image-generator"):
+        raise ValueError(f"Unsupported image model: {model_id}")
+    width, height = size
+    return {
+        "taskType": "TEXT_IMAGE",
+        "textToImageParams": {"text": prompt[:TITAN_MAX_PROMPT_CHARS]},
+        "imageGenerationConfig": {
+            "numberOfImages": 1,
+            "width": width,
+            "height": height,
+            "cfgScale": 8.0,
+            "seed": prompt_seed(prompt),
+        },
+    }
+
+
+def extract_image(response_body: Dict[str, Any]) -> bytes:
+    """
+    Decode the PNG from a Titan response body.
+
+    Raises:
+        ValueError: If the model returned no image, e.g. when it filtered the prompt
+    """
+    images = response_body.get("images") or []
+    if not images:
+        raise ValueError(response_body.get("error") or "Image model returned no image")
+    return base64.b64decode(images[0])
+
+
+def png_dimensions(png: bytes) -> Tuple[int, int]:
+    """Width and height from a PNG's IHDR chunk."""
+    if png[:8] != _PNG_SIGNATURE or png[12:16] != b"IHDR":
+        raise ValueError("Not a PNG image")
+    return struct.unpack(">II", png[16:24])
+
+
+def supported_formats(formats: Sequence[str]) -> List[str]:
+    """
+    The requested formats the installed Pillow can encode.
+
+    Returns:
+        Formats in the requested order, or ["png"] when Pillow is unavailable
+    """
+    try:
+        from PIL import features
+    except ImportError:
+        return ["png"]
+    available = [fmt for fmt in formats if fmt == "png" or features.check(fmt)]
+    return available or ["png"]
+
+
+def encode_variants(
+    png: bytes,
+    widths: Sequence[int],
+    formats: Sequence[str],
+    quality: int,
+) -> List[Tuple[str, int, int, bytes]]:
+    """
+    Re-encode a PNG at every responsive width and format.
+
+    Widths above the source width are clamped to it, since upscaling only
+    adds bytes.
+
+    Args:
+        png: Source image
+        widths: Responsive widths in pixels
+        formats: Formats from supported_formats
+        quality: Encoder quality, 1-100
+
+    Returns:
+        List of (format, width, height, body), narrowest first
+    """
+    source_width, source_height = png_dimensions(png)
+    if formats == ["png"]:
+        return [("png", source_width, source_height, png)]
+
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+
+    variants = []
+    for width in sorted({min(width, source_width) for width in widths}):
+        height = round(source_height * width / source_width)
+        resized = image if width == source_width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality, **ENCODER_OPTIONS.get(fmt, {}))
+            variants.append((fmt, width, height, buffer.getvalue()))
+    return variants
+
+
+def variant_key(generation_id: str, body: bytes, width: int, fmt: str) -> str:
+    """Content-hashed S3 key of an image variant."""
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    return f"generated/{generation_id}/images/{digest}-{width}w.{fmt}"
+
+
+def render_images(
+    prompts: Sequence[str],
+    generation_id: str,
+    model_id: str,
+    invoke: Callable[[Dict[str, Any]], Dict[str, Any]],
+    store: Callable[[str, bytes, str], None],
+    url_for: Callable[[str], str],
+    widths: Sequence[int] = DEFAULT_WIDTHS,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    size: Tuple[int, int] = DEFAULT_SIZE,
+    quality: int = 70,
+    max_concurrency: int = 2,
+    time_left: Optional[Callable[[], float]] = None,
+    min_seconds: float = 10.0,
+    reuse: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+    remember: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> List[ImageResult]:
+    """
+    Render, encode and store every prompt with bounded parallelism.
+
+    Args:
+        prompts: The page's img_prompts
+        generation_id: Generation the images belong to
+        model_id: Bedrock image model ID
+        invoke: Sends a request body to the image model and returns the decoded response body
+        store: Writes (key, body, content_type) to S3
+        url_for: Public URL of a stored key
+        widths: Responsive widths in pixels
+        formats: Preferred formats, best first
+        size: Rendered width and height
+        quality: Encoder quality, 1-100
+        max_concurrency: Images rendered at the same time
+        time_left: Seconds left in the invocation; an image is only started
+            while at least min_seconds remain
+        min_seconds: Time one image needs to render and store
+        reuse: Returns an image_record, plus reused_from and similarity, of
+            an earlier image to use instead of rendering, or None
+        remember: Receives (prompt, image_record) of every newly rendered image
+
+    Returns:
+        One ImageResult per prompt, in prompt order; outcome is "success",
+        "reused", "failed" or "skipped" (not started for lack of time)
+    """
+    usable_formats = supported_formats(formats)
+    key_locks: Dict[str, threading.Lock] = {}
+    stored_keys: Set[str] = set()
+    guard = threading.Lock()
+
+    def store_once(key: str, body: bytes, content_type: str) -> None:
+        # Identical variants share a key; the first render writes it and the others wait for that write
+        with guard:
+            key_lock = key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in stored_keys:
+                store(key, body, content_type)
+                stored_keys.add(key)
+
+    def render(index: int, prompt: str) -> ImageResult:
+        result = ImageResult(index=index, prompt=prompt, outcome="skipped")
+        start = time.perf_counter()
+        reused = reuse(prompt) if reuse is not None else None
+        if reused is not None:
+            result.outcome = "reused"
+            result.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            result.png_bytes = reused["png_bytes"]
+            result.saved_bytes = reused["saved_bytes"]
+            result.src = reused["src"]
+            result.srcset = dict(reused["srcset"])
+            result.variants = [ImageVariant(**variant) for variant in reused["variants"]]
+            result.reused_from = reused.get("reused_from")
+            result.similarity = reused.get("similarity")
+            return result
+
+        if time_left is not None and time_left() < min_seconds:
+            return result
+
+        try:
+            png = extract_image(invoke(build_image_request(model_id, prompt, size)))
+            result.png_bytes = len(png)
+            for fmt, width, height, body in encode_variants(png, widths, usable_formats, quality):
+                key = variant_key(generation_id, body, width, fmt)
+                store_once(key, body, MIME_TYPES[fmt])
+                result.variants.append(ImageVariant(fmt, width, height, key, url_for(key), len(body)))
+        except Exception as e:
+            result.outcome = "failed"
+            result.error = str(e)
+            return result
+        finally:
+            result.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        result.outcome = "success"
+        for fmt in usable_formats:
+            result.srcset[fmt] = ", ".join(
+                f"{variant.url} {variant.width}w" for variant in result.variants if variant.format == fmt
+            )
+        # A full-width download of the best format, against serving the PNG as rendered
+        widest = [variant for variant in result.variants if variant.format == usable_formats[0]][-1]
+        result.src = widest.url
+        result.saved_bytes = result.png_bytes - widest.bytes
+        if remember is not None:
+            remember(prompt, image_record(result))
+        return result
+
+    if not prompts:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(prompts)))) as executor:
+        return list(executor.map(render, range(len(prompts)), prompts))
+
+
+def picture_html(image: Dict[str, Any], img_tag: Optional[str] = None) -> str:
+    """
+    A <picture> for a rendered image, with one <source> per stored format.
+
+    Args:
+        image: ImageResult as a dict, with src and srcset
+        img_tag: Existing <img> to keep the attributes of (alt, class, ...);
+            its src, srcset and sizes are replaced
+
+    Returns:
+        The <picture> element
+    """
+    sources = "".join(
+        f'<source type="{MIME_TYPES[fmt]}" srcset="{html.escape(srcset)}" sizes="{IMAGE_SIZES}">'
+        for fmt, srcset in image["srcset"].items()
+        if srcset
+    )
+    src = html.escape(image["src"])
+    if img_tag is None:
+        img = f'<img class="lp-image" src="{src}" alt="{html.escape(image["prompt"])}" loading="lazy">'
+    else:
+        img = f'<img src="{src}"' + _REPLACED_ATTRIBUTES.sub("", img_tag)[len("<img"):]
+    return f"<picture>{sources}{img}</picture>"
+
+
+def apply_images(content: Dict[str, Any], images: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reference the rendered images from the sections they illustrate.
+
+    Images that failed or were skipped leave their section as it is.
+
+    Args:
+        content: Landing content as a dict
+        images: ImageResults as dicts, in prompt order
+
+    Returns:
+        A copy of the content with the images in its section HTML
+    """
+    content = dict(content)
+    placed: Dict[str, int] = {}
+    for image in images:
+        if image["index"] >= len(IMAGE_SLOTS) or image["outcome"] not in ("success", "reused") or not image["src"]:
+            continue
+        section = IMAGE_SLOTS[image["index"]]
+        if not isinstance(content.get(section), str):
+            continue
+        nth = placed.get(section, 0)
+        placed[section] = nth + 1
+
+        # Every image placed so far left exactly one <img> at or before its slot
+        tags = list(_IMG_TAG.finditer(content[section]))
+        if nth < len(tags):
+            match = tags[nth]
+            content[section] = (
+                content[section][:match.start()] + picture_html(image, match.group(0)) + content[section][match.end():]
+            )
+        else:
+            # Inside the section's root element when it has one
+            end = content[section].rfind("</")
+            end = end if end > 0 else len(content[section])
+            content[section] = content[section][:end] + picture_html(image) + content[section][end:]
+    return content
+
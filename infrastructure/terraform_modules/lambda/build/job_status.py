@@ -0,0 +1,98 @@
+"""Compact status objects for asynchronous gen_landing jobs.
+
+An async request is acknowledged with 202 before any work is done; the
+worker invocation then records each stage of the job in one small JSON
+object per generation under the status prefix, which clients poll
+instead of holding a connection open. Like generation_bundle, this
+module only depends on the standard library and an S3 client.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+STATUS_PREFIX: str = "status/"
+JOB_STATES: Tuple[str, ...] = ("queued", "generating", "storing", "done", "failed")
+TERMINAL_STATES: Tuple[str, ...] = ("done", "failed")
+
+
+def status_key(generation_id: str) -> str:
+    """S3 key of the status object for a generation."""
+    return f"{STATUS_PREFIX}{generation_id}.json"
+
+
+def build_status(generation_id: str, state: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Assemble a status document.
+
+    Args:
+        generation_id: Generation ID
+        state: One of JOB_STATES
+        **fields: Extra fields, e.g. assets when done or error when failed
+
+    Returns:
+        Status dictionary
+
+    Raises:
+        ValueError: If the state is unknown
+    """
+    if state not in JOB_STATES:
+        raise ValueError(f"Unknown job state: {state}")
+    return {
+        "generation_id": generation_id,
+        "status": state,
+        "updated_at": round(time.time(), 3),
+        **{name: value for name, value in fields.items() if value is not None},
+    }
+
+
+def write_job_status(s3_client: Any, bucket: str, generation_id: str, state: str, **fields: Any) -> str:
+    """
+    Overwrite the status object of a job.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Status bucket name
+        generation_id: Generation ID
+        state: One of JOB_STATES
+        **fields: Extra fields stored with the state
+
+    Returns:
+        S3 key of the status object
+    """
+    key = status_key(generation_id)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(build_status(generation_id, state, **fields), separators=(",", ":")).encode("utf-8"),
+        ContentType="application/json",
+        # Pollers must always see the latest state
+        CacheControl="no-store",
+    )
+    return key
+
+
+def read_job_status(s3_client: Any, bucket: str, generation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the status object of a job.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Status bucket name
+        generation_id: Generation ID
+
+    Returns:
+        Status dictionary, or None if the job is unknown
+
+    Raises:
+        ClientError: If S3 fails for any other reason
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=status_key(generation_id))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(response["Body"].read())
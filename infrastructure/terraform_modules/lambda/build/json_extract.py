@@ -0,0 +1,377 @@
+"""Linear-time extraction of JSON objects embedded in model completions.
+
+Completions wrap the payload in prose, code fences or both, and the
+payload itself carries HTML that may contain braces. JSONObjectScanner
+tracks braces and string literals in a single pass (jumping between
+significant characters with precompiled patterns, so nothing
+backtracks), hands each balanced top-level candidate to
+json.JSONDecoder.raw_decode, and accepts the text in arbitrary chunks
+so it can run directly on a streamed response. JSONFieldScanner builds
+on it to report each top-level field of a streamed object as soon as
+its value is complete.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Characters that matter inside an object but outside strings
+_OBJECT_TOKEN = re.compile(r'[{}"]')
+# Characters that matter inside a string
+_STRING_TOKEN = re.compile(r'["\\]')
+_NON_WHITESPACE = re.compile(r"\S")
+# Characters that can end a top-level value
+_FIELD_END = re.compile(r"[,}]")
+
+
+class JSONObjectScanner:
+    """
+    Incrementally find top-level JSON objects in free-form text.
+
+    A `{` outside any object only starts a candidate when the next
+    non-whitespace character is `"` or `}`, so template placeholders and
+    braces in prose ("{industry}", "use {braces}") are skipped instead of
+    swallowing the real payload. Candidates that fail to decode are
+    counted in `rejected` and scanning continues after them.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._parts: List[str] = []
+        self._depth = 0
+        self._opening = False
+        self._in_string = False
+        self._escape = False
+        self._offset = 0
+        self._start = 0
+        self.rejected = 0
+
+    @property
+    def in_object(self) -> bool:
+        """True while a candidate object is open, e.g. when the text was cut off."""
+        return self._depth > 0 and not self._opening
+
+    @property
+    def pending_text(self) -> str:
+        """Text of the open candidate object, if any."""
+        return "".join(self._parts)
+
+    @property
+    def candidate_start(self) -> Optional[int]:
+        """Offset of the open candidate's `{` in all text fed so far, if any."""
+        return self._start if self.in_object else None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Next piece of the completion
+
+        Returns:
+            Objects completed by this chunk, in order
+        """
+        found: List[Dict[str, Any]] = []
+        segment_start: Optional[int] = 0 if self._depth else None
+        pos = 0
+        length = len(chunk)
+
+        while pos < length:
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                match = _STRING_TOKEN.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            if self._opening:
+                match = _NON_WHITESPACE.search(chunk, pos)
+                if match is None:
+                    break
+                self._opening = False
+                pos = match.start()
+                if match.group() not in '"}':
+                    # Not a JSON object - drop the candidate and rescan from here
+                    self._depth = 0
+                    self._parts = []
+                    segment_start = None
+                continue
+
+            if self._depth == 0:
+                start = chunk.find("{", pos)
+                if start < 0:
+                    break
+                self._depth = 1
+                self._opening = True
+                self._parts = []
+                self._start = self._offset + start
+                segment_start = start
+                pos = start + 1
+                continue
+
+            match = _OBJECT_TOKEN.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            token = match.group()
+            if token == '"':
+                self._in_string = True
+            elif token == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[segment_start:pos])
+                    candidate = self._decode("".join(self._parts))
+                    self._parts = []
+                    segment_start = None
+                    if candidate is not None:
+                        found.append(candidate)
+
+        if self._depth and segment_start is not None:
+            self._parts.append(chunk[segment_start:])
+
+        self._offset += length
+        return found
+
+    def _decode(self, candidate: str) -> Optional[Dict[str, Any]]:
+        try:
+            value, _ = self._decoder.raw_decode(candidate)
+        except ValueError:
+            self.rejected += 1
+            return None
+        return value if isinstance(value, dict) else None
+
+
+class JSONFieldScanner:
+    """
+    Report the top-level fields of a streamed JSON object as each value completes.
+
+    Candidate objects come from JSONObjectScanner, so prose, code fences
+    and placeholders before the payload are skipped by the same rules
+    extract_json_object applies to the finished text. Candidates are
+    followed in order until one closes with all `required_keys`, which is
+    the object extract_json_object picks when one has them; fields of an
+    earlier candidate may already have been reported and are reported
+    again from the payload. The full text is still validated once the
+    stream ends.
+    """
+
+    def __init__(self, required_keys: Iterable[str] = ()) -> None:
+        self._required = tuple(required_keys)
+        self._objects = JSONObjectScanner()
+        self._decoder = json.JSONDecoder()
+        self._text = ""
+        self._start: Optional[int] = None
+        self._pos = 0
+        self._emitted: Set[str] = set()
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk: Next piece of the streamed completion
+
+        Returns:
+            (field_name, value) pairs completed by this chunk, in order
+        """
+        self._text += chunk
+        objects = self._objects.feed(chunk)
+        if self.done:
+            return []
+
+        fields: List[Tuple[str, Any]] = []
+        for obj in objects:
+            if all(key in obj for key in self._required):
+                # The payload closed in this chunk; report whatever is left of it
+                fields.extend(
+                    (key, value) for key, value in obj.items() if key not in self._emitted
+                )
+                self.done = True
+                return fields
+            # Not the payload - follow the next candidate from scratch
+            self._start = None
+
+        start = self._objects.candidate_start
+        if start is None:
+            return fields
+        if start != self._start:
+            self._start = start
+            self._pos = start + 1
+            self._emitted.clear()
+        elif _FIELD_END.search(chunk) is None:
+            # A value only counts as complete once a `,` or `}` follows it
+            return fields
+
+        self._advance(fields)
+        return fields
+
+    def _advance(self, fields: List[Tuple[str, Any]]) -> None:
+        """Decode every field of the followed object that is complete in the text so far."""
+        text = self._text
+        while True:
+            key_match = _NON_WHITESPACE.search(text, self._pos)
+            if key_match is None or key_match.group() != '"':
+                return
+            try:
+                key, pos = self._decoder.raw_decode(text, key_match.start())
+                colon = _NON_WHITESPACE.search(text, pos)
+                if colon is None or colon.group() != ":":
+                    return
+                value_match = _NON_WHITESPACE.search(text, colon.end())
+                if value_match is None:
+                    return
+                value, pos = self._decoder.raw_decode(text, value_match.start())
+            except ValueError:
+                # Incomplete (or malformed) so far - retry when more text arrives
+                return
+
+            end = _NON_WHITESPACE.search(text, pos)
+            if end is None or end.group() not in ",}":
+                return
+            fields.append((key, value))
+            self._emitted.add(key)
+            self._pos = end.end()
+            if end.group() == "}":
+                return
+
+
+def extract_json_object(
+    text: str,
+    required_keys: Iterable[str] = (),
+) -> Optional[Dict[str, Any]]:
+    """
+    Return the JSON object embedded in a completion.
+
+    Args:
+        text: Completion text, possibly with prose and code fences around the JSON
+        required_keys: Keys the wanted object must contain; the first object
+            containing all of them wins over earlier objects
+
+    Returns:
+        The first object with all required keys, else the first decodable
+        object, else None
+    """
+    required = tuple(required_keys)
+    first: Optional[Dict[str, Any]] = None
+
+    for candidate in JSONObjectScanner().feed(text):
+        if all(key in candidate for key in required):
+            return candidate
+        if first is None:
+            first = candidate
+
+    return first
+
+
+_OBJECT_START = re.compile(r'\{\s*"')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Fix small syntax defects in the first JSON object of a completion.
+
+    Repairs trailing commas, raw newlines and tabs inside strings, Python
+    literals (True/False/None), mismatched closing brackets and missing
+    closers at the end. Text that stops inside a string or right after a
+    key is truncated rather than malformed; it is left alone so no content
+    is invented.
+
+    Args:
+        text: Completion text containing a defective JSON object
+
+    Returns:
+        The repaired object text, or None if no object could be repaired
+    """
+    match = _OBJECT_START.search(text)
+    if match is None:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    pending_comma = False
+    pos = match.start()
+    length = len(text)
+
+    while pos < length:
+        char = text[pos]
+
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\t":
+                char = "\\t"
+            out.append(char)
+            pos += 1
+            continue
+
+        if char in " \t\r\n":
+            pos += 1
+            continue
+
+        if char == "`":
+            # A closing code fence ends the object early
+            break
+
+        if char == ",":
+            pending_comma = True
+            pos += 1
+            continue
+
+        if char in "}]":
+            # Trailing commas are dropped; closers always match the open bracket
+            pending_comma = False
+            out.append(_CLOSERS[stack.pop()])
+            pos += 1
+            if not stack:
+                return "".join(out)
+            continue
+
+        if pending_comma:
+            out.append(",")
+            pending_comma = False
+
+        if char in "{[":
+            stack.append(char)
+            out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char.isalpha():
+            end = pos
+            while end < length and text[end].isalpha():
+                end += 1
+            word = text[pos:end]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            pos = end
+            continue
+        else:
+            out.append(char)
+        pos += 1
+
+    if in_string or (out and out[-1] == ":"):
+        return None
+
+    out.extend(_CLOSERS[opener] for opener in reversed(stack))
+    return "".join(out)
@@ -0,0 +1,120 @@
+"""Per-sub-task model routing for gen_landing.
+
+Each generation sub-task (the single-completion "page", or the hero,
+features, CTA and image-prompt requests of the parallel strategy) maps
+to an ordered list of model tiers, a max_tokens budget and a latency
+SLO. The first tier is preferred; later tiers are used when the ones
+before them are still throttled after their throttle retries.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+SUB_TASKS: Tuple[str, ...] = ("page", "hero_html", "features_html", "cta_html", "img_prompts")
+DEFAULT_FAST_MODEL_ID: str = "anthropic.claude-3-haiku-20240307-v1:0"
+# Backoff retries a throttled tier gets before the sub-task drops to the next one
+DEFAULT_THROTTLE_RETRIES: int = 1
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Model tiers (preferred first), output budget, latency SLO and throttle retries of one sub-task."""
+
+    models: Tuple[str, ...]
+    max_tokens: int
+    slo_ms: float
+    throttle_retries: int = DEFAULT_THROTTLE_RETRIES
+
+
+def _tiers(*model_ids: str) -> Tuple[str, ...]:
+    """Ordered, de-duplicated model tiers."""
+    return tuple(dict.fromkeys(model_id for model_id in model_ids if model_id))
+
+
+def default_routes(primary_model_id: str, fast_model_id: str = DEFAULT_FAST_MODEL_ID) -> Dict[str, ModelRoute]:
+    """
+    Routes used when nothing is configured.
+
+    Copy sections prefer the primary model and drop to the fast model when
+    it is still throttled after a backoff retry; image prompts are short lists that the fast model
+    writes well, so they never use the primary one.
+
+    Args:
+        primary_model_id: Model from BEDROCK_LLM_MODEL_ID
+        fast_model_id: Faster, cheaper model used as the lower tier
+
+    Returns:
+        Route for every sub-task
+    """
+    copy_tiers = _tiers(primary_model_id, fast_model_id)
+    return {
+        "page": ModelRoute(copy_tiers, max_tokens=1024, slo_ms=20000),
+        "hero_html": ModelRoute(copy_tiers, max_tokens=400, slo_ms=8000),
+        "features_html": ModelRoute(copy_tiers, max_tokens=700, slo_ms=12000),
+        "cta_html": ModelRoute(copy_tiers, max_tokens=300, slo_ms=6000),
+        "img_prompts": ModelRoute(_tiers(fast_model_id), max_tokens=250, slo_ms=3000),
+    }
+
+
+def load_routes(
+    primary_model_id: str,
+    fast_model_id: str = DEFAULT_FAST_MODEL_ID,
+    overrides: str = "",
+) -> Dict[str, ModelRoute]:
+    """
+    Build the routing table from defaults and a JSON override.
+
+    Args:
+        primary_model_id: Model from BEDROCK_LLM_MODEL_ID
+        fast_model_id: Lower-tier model
+        overrides: JSON object keyed by sub-task, e.g.
+            {"img_prompts": {"models": ["model-a"], "max_tokens": 200, "slo_ms": 2500}};
+            omitted fields keep their defaults. "throttle_retries": 0 makes a
+            throttled tier hand over to the next one at once
+
+    Returns:
+        Route for every sub-task
+
+    Raises:
+        ValueError: If the override names an unknown sub-task or has no models
+    """
+    routes = default_routes(primary_model_id, fast_model_id)
+    if not overrides.strip():
+        return routes
+
+    for sub_task, config in json.loads(overrides).items():
+        if sub_task not in routes:
+            raise ValueError(f"Unknown sub-task in model routes: {sub_task}")
+        base = routes[sub_task]
+        models = _tiers(*config.get("models", base.models))
+        if not models:
+            raise ValueError(f"Model route for {sub_task} has no models")
+        routes[sub_task] = ModelRoute(
+            models=models,
+            max_tokens=int(config.get("max_tokens", base.max_tokens)),
+            slo_ms=float(config.get("slo_ms", base.slo_ms)),
+            throttle_retries=int(config.get("throttle_retries", base.throttle_retries)),
+        )
+    return routes
+
+
+def routes_fingerprint(routes: Dict[str, ModelRoute]) -> str:
+    """Stable description of the models and budgets that shape generated content."""
+    return json.dumps(
+        {sub_task: [list(route.models), route.max_tokens] for sub_task, route in sorted(routes.items())},
+        separators=(",", ":"),
+    )
+
+
+def describe_routes(routes: Dict[str, ModelRoute]) -> Dict[str, Any]:
+    """Routing table as plain data for logging."""
+    return {
+        sub_task: {
+            "models": list(route.models),
+            "max_tokens": route.max_tokens,
+            "slo_ms": route.slo_ms,
+            "throttle_retries": route.throttle_retries,
+        }
+        for sub_task, route in routes.items()
+    }
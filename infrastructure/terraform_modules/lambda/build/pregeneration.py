@@ -0,0 +1,298 @@
+"""Request history and the bookkeeping of speculative pre-generation.
+
+Live requests are counted in memory by a per-container HistoryBuffer,
+keyed by hour, cache key and how the request was served. The buffer is
+flushed as one object per hour bucket once enough requests accumulated
+or enough time passed:
+
+    generated/history/<YYYYMMDDHH>/batch-<uuid>.json
+
+holding the counts and one request body (prompt and theme_info) per
+cache key, which is what a pre-generation run regenerates from. Counts
+still in a buffer when its container is reclaimed are lost; history
+only steers pre-generation, so that is traded for keeping S3 off the
+request path. served_by is "generated", "single_flight", "cache",
+"pregenerated" (a cache hit on pre-generated content) or "bypass".
+
+Each pre-generation run writes a report with the tokens and estimated
+cost of what it generated. Combined with the history, this tells how
+many live requests the pre-generated content served and what it cost per
+hit. Like generation_bundle, this module only depends on the standard
+library and an S3 client.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+HISTORY_PREFIX: str = "generated/history"
+RUNS_PREFIX: str = "generated/pregen/runs"
+
+
+def _hour_bucket(timestamp: float) -> str:
+    return time.strftime("%Y%m%d%H", time.gmtime(timestamp))
+
+
+class HistoryBuffer:
+    """
+    Per-container request counters, written to S3 in batches.
+
+    Thread-safe, so batch items generated in parallel can record into the
+    same buffer. Callers check `due` once per invocation and flush then.
+    """
+
+    def __init__(self, flush_every: int = 100, flush_seconds: float = 300.0) -> None:
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], Counter] = {}
+        self._requests: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._pending = 0
+        self._oldest: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        """Requests recorded since the last flush."""
+        return self._pending
+
+    def record(
+        self,
+        cache_key: str,
+        prompt: str,
+        theme_info: Dict[str, Any],
+        served_by: str,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Count one live request.
+
+        Args:
+            cache_key: Generation cache key of the request
+            prompt: Industry/business description
+            theme_info: Theme information as a plain dict
+            served_by: How the request was served (see module docstring)
+            now: Request time, for tests
+        """
+        now = time.time() if now is None else now
+        slot = (_hour_bucket(now), cache_key)
+        with self._lock:
+            self._counts.setdefault(slot, Counter())[served_by] += 1
+            self._requests.setdefault(slot, {"prompt": prompt, "theme_info": theme_info})
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = now
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """True once flush_every requests are pending or the oldest is flush_seconds old."""
+        if not self._pending:
+            return False
+        now = time.time() if now is None else now
+        return self._pending >= self.flush_every or now - self._oldest >= self.flush_seconds
+
+    def flush(self, s3_client: Any, bucket: str) -> List[str]:
+        """
+        Write the pending counts, one object per hour bucket, and reset the buffer.
+
+        Counts are only dropped from the buffer once written, so a failed
+        write is retried by the next flush.
+
+        Args:
+            s3_client: Boto3 S3 client
+            bucket: Output bucket
+
+        Returns:
+            S3 keys of the written objects
+        """
+        with self._lock:
+            counts, requests = self._counts, self._requests
+            self._counts, self._requests = {}, {}
+            self._pending, self._oldest = 0, None
+
+        by_hour: Dict[str, Dict[str, Any]] = {}
+        for (hour, cache_key), served in counts.items():
+            batch = by_hour.setdefault(hour, {"counts": {}, "requests": {}})
+            batch["counts"][cache_key] = dict(served)
+            batch["requests"][cache_key] = requests[(hour, cache_key)]
+
+        keys: List[str] = []
+        for hour, batch in sorted(by_hour.items()):
+            key = f"{HISTORY_PREFIX}/{hour}/batch-{uuid.uuid4()}.json"
+            try:
+                s3_client.put_object(
+                    Bucket=bucket,
+                    Key=key,
+                    Body=json.dumps(dict(batch, recorded_at=time.time()), separators=(",", ":")),
+                    ContentType="application/json",
+                )
+            except Exception:
+                self._restore(hour, batch, counts, requests)
+                raise
+            keys.append(key)
+        return keys
+
+    def _restore(
+        self,
+        hour: str,
+        batch: Dict[str, Any],
+        counts: Dict[Tuple[str, str], Counter],
+        requests: Dict[Tuple[str, str], Dict[str, Any]],
+    ) -> None:
+        """Put the counts of an unwritten hour, and of those after it, back into the buffer."""
+        with self._lock:
+            for slot, served in counts.items():
+                if slot[0] < hour:
+                    continue
+                self._counts.setdefault(slot, Counter()).update(served)
+                self._requests.setdefault(slot, requests[slot])
+                self._pending += sum(served.values())
+            if self._oldest is None:
+                self._oldest = time.time()
+
+
+def summarize_history(
+    s3_client: Any,
+    bucket: str,
+    hours: int,
+    now: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Count the recorded requests of the last `hours` hours by cache key.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Output bucket
+        hours: Length of the history window
+        now: End of the window, for tests
+
+    Returns:
+        Per cache key: requests (total), served (Counter by served_by) and
+        request (prompt and theme_info of one of the requests)
+    """
+    now = time.time() if now is None else now
+    summary: Dict[str, Dict[str, Any]] = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+
+    for hour in range(hours):
+        prefix = f"{HISTORY_PREFIX}/{_hour_bucket(now - hour * 3600)}/batch-"
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                batch = json.loads(s3_client.get_object(Bucket=bucket, Key=item["Key"])["Body"].read())
+                for cache_key, served in batch.get("counts", {}).items():
+                    entry = summary.setdefault(
+                        cache_key,
+                        {"requests": 0, "served": Counter(), "request": batch["requests"][cache_key]},
+                    )
+                    entry["served"].update(served)
+                    entry["requests"] += sum(served.values())
+
+    return summary
+
+
+def top_combinations(summary: Dict[str, Dict[str, Any]], top_n: int) -> List[Dict[str, Any]]:
+    """
+    The most requested cache keys, most popular first.
+
+    Args:
+        summary: Output of summarize_history
+        top_n: Number of combinations to return
+
+    Returns:
+        Dicts with cache_key, requests and request (prompt and theme_info)
+    """
+    ranked = sorted(summary.items(), key=lambda item: (-item[1]["requests"], item[0]))
+    return [
+        {"cache_key": cache_key, "requests": entry["requests"], "request": entry["request"]}
+        for cache_key, entry in ranked[:top_n]
+    ]
+
+
+def estimate_cost(usage: Dict[str, Any], price_per_1k_input: float, price_per_1k_output: float) -> float:
+    """
+    Estimated Bedrock cost of a generation in USD.
+
+    Args:
+        usage: Token usage reported by Bedrock
+        price_per_1k_input: USD per 1,000 input tokens
+        price_per_1k_output: USD per 1,000 output tokens
+
+    Returns:
+        Estimated cost
+    """
+    return (
+        usage.get("input_tokens", 0) / 1000 * price_per_1k_input
+        + usage.get("output_tokens", 0) / 1000 * price_per_1k_output
+    )
+
+
+def write_run_report(s3_client: Any, bucket: str, report: Dict[str, Any]) -> str:
+    """
+    Store the report of a pre-generation run.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Output bucket
+        report: Run report with run_id, finished_at, items and cost_usd
+
+    Returns:
+        S3 key of the report
+    """
+    key = f"{RUNS_PREFIX}/{report['run_id']}.json"
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(report, separators=(",", ":")),
+        ContentType="application/json",
+    )
+    return key
+
+
+def load_run_reports(s3_client: Any, bucket: str, since: float) -> List[Dict[str, Any]]:
+    """
+    Reports of the pre-generation runs that finished after `since`.
+
+    Args:
+        s3_client: Boto3 S3 client
+        bucket: Output bucket
+        since: Unix timestamp
+
+    Returns:
+        Run reports, oldest first
+    """
+    reports = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{RUNS_PREFIX}/"):
+        for item in page.get("Contents", []):
+            if item["LastModified"].timestamp() < since:
+                continue
+            report = json.loads(s3_client.get_object(Bucket=bucket, Key=item["Key"])["Body"].read())
+            if report.get("finished_at", 0) >= since:
+                reports.append(report)
+    return sorted(reports, key=lambda report: report.get("finished_at", 0))
+
+
+def cost_per_hit(summary: Dict[str, Dict[str, Any]], reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    What pre-generated content cost per live request it served.
+
+    All pre-generation spend in the window counts, including content that
+    was never requested, so the figure can be compared directly with the
+    cost of generating live.
+
+    Args:
+        summary: Output of summarize_history for the window
+        reports: Run reports of the same window
+
+    Returns:
+        Dict with live_hits, pregeneration_cost_usd and cost_per_hit_usd
+        (None while nothing was served)
+    """
+    hits = sum(entry["served"].get("pregenerated", 0) for entry in summary.values())
+    cost = sum(report.get("cost_usd", 0.0) for report in reports)
+    return {
+        "live_hits": hits,
+        "pregeneration_cost_usd": round(cost, 6),
+        "cost_per_hit_usd": round(cost / hits, 6) if hits else None,
+    }
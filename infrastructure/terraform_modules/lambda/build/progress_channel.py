@@ -0,0 +1,183 @@
+"""Push channel for job progress.
+
+Clients used to poll the status endpoint every two seconds, which reads
+the status object from S3 on every poll. Stages now also push each
+status change to the clients watching the job:
+
+  * WebSocketProgressChannel posts to API Gateway WebSocket connections.
+    The progress_ws Lambda records a subscription object per connection
+    when a client connects with ?job_id=..., and removes it again when
+    the client disconnects.
+  * LocalProgressChannel is an in-process stand-in with the same publish
+    interface, for tests and local runs without AWS.
+
+Web clients follow the orchestrator's job, not the generation, and parse
+the orchestrator's status schema (processing with a step, completed,
+failed). build_job_progress translates a generation state into that
+schema so gen_landing can publish under the job ID the client watches.
+
+Publishing is best effort; the status object stays the source of truth
+and polling remains the fallback. Like job_status, this module only
+depends on the standard library and boto3 clients, so other stages can
+ship a copy of it.
+"""
+
+import json
+import queue
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+SUBSCRIPTION_PREFIX: str = "status/subscriptions/"
+CONNECTION_PREFIX: str = "status/connections/"
+
+# Job and generation IDs are UUIDs; anything else never becomes an S3 key
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+# Web client step and message of each generation state; content generation is step 2 of the
+# injection flow and step 3 (creating the final page) follows once the content is stored
+JOB_PROGRESS_STEPS: Dict[str, Tuple[int, str]] = {
+    "queued": (2, "Landing page content generation queued"),
+    "generating": (2, "Generating landing page content"),
+    "storing": (2, "Storing landing page content"),
+    "done": (3, "Landing page content ready"),
+}
+
+
+def subscription_prefix(job_id: str) -> str:
+    """S3 prefix holding one object per connection subscribed to a job."""
+    return f"{SUBSCRIPTION_PREFIX}{job_id}/"
+
+
+def connection_key(connection_id: str) -> str:
+    """S3 key mapping a connection back to the job it watches."""
+    return f"{CONNECTION_PREFIX}{connection_id}"
+
+
+def build_job_progress(job_id: str, generation_id: str, state: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Progress message for clients following an orchestrator job, in the job status schema.
+
+    A generation never completes the job, since the final page is built
+    after it, so only a failure is terminal.
+
+    Args:
+        job_id: Orchestrator job ID the client watches
+        generation_id: Generation ID of the gen_landing request
+        state: Generation state (queued, generating, storing, done or failed)
+        **fields: Fields recorded with the state, e.g. assets or error
+
+    Returns:
+        Message with job_id, status and data (or error)
+    """
+    if state == "failed":
+        return {"job_id": job_id, "status": "failed", "error": fields.get("error") or "Landing page generation failed"}
+    step, message = JOB_PROGRESS_STEPS[state]
+    data: Dict[str, Any] = {"step": step, "message": message, "generation_id": generation_id}
+    if fields.get("assets"):
+        data["assets"] = fields["assets"]
+    return {"job_id": job_id, "status": "processing", "data": data}
+
+
+class LocalProgressChannel:
+    """In-process progress channel; each subscriber receives messages on its own queue."""
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> queue.Queue:
+        """Start receiving the messages published for a job."""
+        subscriber: queue.Queue = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, job_id: str, subscriber: queue.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+
+    def publish(self, job_id: str, message: Dict[str, Any]) -> int:
+        """
+        Deliver a message to every subscriber of a job.
+
+        Returns:
+            Number of subscribers the message was delivered to
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, []))
+        for subscriber in subscribers:
+            subscriber.put(message)
+        return len(subscribers)
+
+
+class WebSocketProgressChannel:
+    """
+    Progress channel backed by an API Gateway WebSocket API.
+
+    Args:
+        management_client: Boto3 apigatewaymanagementapi client for the API's stage
+        s3_client: Boto3 S3 client
+        bucket: Bucket holding the subscription objects (the status bucket)
+    """
+
+    def __init__(self, management_client: Any, s3_client: Any, bucket: str) -> None:
+        self.management_client = management_client
+        self.s3_client = s3_client
+        self.bucket = bucket
+
+    def subscribe(self, job_id: str, connection_id: str) -> None:
+        """Record that a connection watches a job."""
+        self.s3_client.put_object(Bucket=self.bucket, Key=f"{subscription_prefix(job_id)}{connection_id}", Body=b"")
+        self.s3_client.put_object(Bucket=self.bucket, Key=connection_key(connection_id), Body=job_id.encode("utf-8"))
+
+    def unsubscribe(self, connection_id: str) -> Optional[str]:
+        """
+        Forget a connection.
+
+        Returns:
+            The job the connection watched, or None if it had no subscription
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=connection_key(connection_id))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        job_id = response["Body"].read().decode("utf-8")
+        self.s3_client.delete_object(Bucket=self.bucket, Key=f"{subscription_prefix(job_id)}{connection_id}")
+        self.s3_client.delete_object(Bucket=self.bucket, Key=connection_key(connection_id))
+        return job_id
+
+    def publish(self, job_id: str, message: Dict[str, Any]) -> int:
+        """
+        Post a message to every connection subscribed to a job.
+
+        Connections that have gone away are unsubscribed.
+
+        Returns:
+            Number of connections the message was delivered to
+        """
+        prefix = subscription_prefix(job_id)
+        # A listing page holds at most 1,000 keys; collect them all before unsubscribing any
+        connection_ids = []
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            connection_ids.extend(item["Key"][len(prefix):] for item in page.get("Contents", []))
+        data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        delivered = 0
+
+        for connection_id in connection_ids:
+            try:
+                self.management_client.post_to_connection(ConnectionId=connection_id, Data=data)
+                delivered += 1
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "GoneException":
+                    raise
+                self.unsubscribe(connection_id)
+
+        return delivered
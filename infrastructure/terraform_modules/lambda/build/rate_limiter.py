@@ -0,0 +1,74 @@
+"""Process-wide adaptive token bucket used to pace Bedrock calls from a Lambda container."""
+
+import threading
+import time
+from typing import Optional
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to throttling.
+
+    Every throttle halves the refill rate (down to `min_rate`); every
+    success raises it additively by `recovery_step` of `max_rate`, so the
+    container backs off quickly and recovers gradually (AIMD).
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float = 0.1,
+        burst: Optional[float] = None,
+        recovery_step: float = 0.1,
+    ) -> None:
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.capacity = burst if burst is not None else max(1.0, max_rate)
+        self.recovery_step = recovery_step
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Block until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait; None waits indefinitely
+
+        Returns:
+            Seconds spent waiting for the token
+
+        Raises:
+            TimeoutError: If no token can be obtained within `timeout`
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                wait = (1 - self._tokens) / self.rate
+
+            if timeout is not None and (now - start) + wait > timeout:
+                raise TimeoutError(f"Rate limiter wait of {wait:.2f}s exceeds the remaining {timeout:.2f}s")
+            time.sleep(wait)
+
+    def on_throttle(self) -> None:
+        """Halve the refill rate and drain the burst after a throttling response."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_success(self) -> None:
+        """Recover the refill rate after a successful call."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery_step)
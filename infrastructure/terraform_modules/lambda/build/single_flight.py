@@ -0,0 +1,194 @@
+"""Cross-instance single-flight coalescing of identical generations.
+
+When many users submit the same request within seconds, only the first
+one should pay for a Bedrock generation. That request takes a lease keyed
+on the request fingerprint (the generation cache key) and generates.
+Concurrent duplicates see the lease, wait for the leader's result to
+appear through `lookup` (the shared generation cache), and reuse it.
+
+A lease records when it expires. If the leader crashes, the lease is
+taken over once it expires. If the leader fails cleanly, it releases the
+lease at once and one of the waiters takes over. Waiters that run out of
+patience generate themselves: coalescing saves work but is never needed
+for a correct result.
+
+S3LeaseStore creates leases with a conditional PutObject (If-None-Match),
+so exactly one container wins. LocalLeaseStore coordinates the threads of
+one process, for tests and local runs.
+"""
+
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from botocore.exceptions import ClientError
+
+# Lease objects live under the generated/ prefix so existing IAM grants apply
+LEASE_PREFIX: str = "generated/leases"
+
+# S3 answers a conditional put on an existing key with 412, or 409 when another conditional put is in flight
+LEASE_HELD_ERROR_CODES = frozenset({"PreconditionFailed", "ConditionalRequestConflict"})
+
+T = TypeVar("T")
+
+
+class LocalLeaseStore:
+    """In-process leases; not shared between containers."""
+
+    def __init__(self) -> None:
+        self._leases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Take the lease unless an unexpired one exists."""
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease["expires_at"] > time.time():
+                return False
+            self._leases[key] = {"owner": owner, "expires_at": time.time() + ttl_seconds}
+            return True
+
+    def holder(self, key: str) -> Optional[Dict[str, Any]]:
+        """The current lease (owner, expires_at), or None."""
+        with self._lock:
+            lease = self._leases.get(key)
+            return dict(lease) if lease is not None else None
+
+    def release(self, key: str, owner: str) -> None:
+        """Drop the lease if `owner` still holds it."""
+        with self._lock:
+            if self._leases.get(key, {}).get("owner") == owner:
+                del self._leases[key]
+
+
+class S3LeaseStore:
+    """
+    Leases stored as S3 objects and created with a conditional put.
+
+    Args:
+        s3_client: Boto3 S3 client (botocore 1.35 or later, for IfNoneMatch)
+        bucket: Bucket holding the lease objects
+        prefix: Key prefix of the lease objects
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, prefix: str = LEASE_PREFIX) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json"
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Take the lease unless an unexpired one exists.
+
+        An expired lease is deleted and the conditional put is tried once
+        more, so only one of several containers taking over wins.
+
+        Returns:
+            True if this owner now holds the lease
+        """
+        for _ in range(2):
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket,
+                    Key=self._object_key(key),
+                    Body=json.dumps({"owner": owner, "expires_at": time.time() + ttl_seconds}),
+                    ContentType="application/json",
+                    IfNoneMatch="*",
+                )
+                return True
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in LEASE_HELD_ERROR_CODES:
+                    raise
+
+            lease = self.holder(key)
+            if lease is not None and lease["expires_at"] > time.time():
+                return False
+            if lease is not None:
+                self.release(key, lease["owner"])
+        return False
+
+    def holder(self, key: str) -> Optional[Dict[str, Any]]:
+        """The current lease (owner, expires_at), or None."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+        return json.loads(response["Body"].read())
+
+    def release(self, key: str, owner: str) -> None:
+        """Delete the lease if `owner` still holds it."""
+        lease = self.holder(key)
+        if lease is not None and lease.get("owner") == owner:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+class SingleFlight:
+    """
+    Run one producer per fingerprint across all containers sharing a lease store.
+
+    Args:
+        store: LocalLeaseStore or S3LeaseStore
+        lease_seconds: Lease lifetime; longer than the slowest generation,
+            since a crashed leader blocks duplicates for this long
+        poll_interval: Seconds between checks for the leader's result
+    """
+
+    def __init__(self, store: Any, lease_seconds: float = 90.0, poll_interval: float = 0.5) -> None:
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def run(
+        self,
+        fingerprint: str,
+        produce: Callable[[], T],
+        lookup: Callable[[], Optional[T]],
+        max_wait: float,
+    ) -> Tuple[T, str]:
+        """
+        Produce the result for a fingerprint, or wait for the container already producing it.
+
+        Args:
+            fingerprint: Identity of the request, e.g. the generation cache key
+            produce: Generates the result and publishes it where `lookup` finds it
+            lookup: Returns the published result, or None while it is missing
+            max_wait: Longest time to wait for another container's result
+
+        Returns:
+            Tuple of (result, role) where role is "leader" when this call
+            produced the result, "follower" when it reused another one, and
+            "timeout" when it gave up waiting and produced it anyway
+        """
+        owner = str(uuid.uuid4())
+        wait_until = time.monotonic() + max_wait
+
+        while True:
+            if self.store.acquire(fingerprint, owner, self.lease_seconds):
+                try:
+                    return produce(), "leader"
+                finally:
+                    self.store.release(fingerprint, owner)
+
+            while True:
+                result = lookup()
+                if result is not None:
+                    return result, "follower"
+                if time.monotonic() + self.poll_interval > wait_until:
+                    return produce(), "timeout"
+
+                time.sleep(self.poll_interval)
+                lease = self.store.holder(fingerprint)
+                if lease is None or lease["expires_at"] <= time.time():
+                    # The leader finished, failed or crashed; a finished leader
+                    # published its result before releasing the lease
+                    result = lookup()
+                    if result is not None:
+                        return result, "follower"
+                    break
@@ -7,6 +7,8 @@ resource "aws_lambda_function" "gen_landing" {
   architectures   = ["arm64"]
   timeout         = var.timeout
   memory_size     = 256
+  # NumPy for image reuse comes from a layer, so the function package stays slim without it
+  layers          = aws_lambda_layer_version.numpy[*].arn
 
       environment {
       variables = {
@@ -17,12 +19,117 @@ resource "aws_lambda_function" "gen_landing" {
         BEDROCK_LLM_MODEL_ID = var.bedrock_llm_model_id
         BEDROCK_REGION      = var.region
         CLOUDFRONT_DOMAIN   = var.cloudfront_domain
+        PROMPT_CACHE_TTL_SECONDS = var.prompt_cache_ttl_seconds
+        BEDROCK_STREAMING   = tostring(var.bedrock_streaming)
+        GENERATION_CACHE_ENABLED     = tostring(var.generation_cache_enabled)
+        GENERATION_CACHE_TTL_SECONDS = var.generation_cache_ttl_seconds
+        GENERATION_CACHE_MAX_ENTRIES = var.generation_cache_max_entries
+        GENERATION_CACHE_S3_MAX_ENTRIES = var.generation_cache_s3_max_entries
+        SINGLE_FLIGHT_ENABLED        = tostring(var.single_flight_enabled)
+        SINGLE_FLIGHT_LEASE_SECONDS  = var.single_flight_lease_seconds
+        BATCH_MAX_CONCURRENCY        = var.batch_max_concurrency
+        BEDROCK_MAX_RPS              = var.bedrock_max_rps
+        BEDROCK_MAX_CONTINUATIONS    = var.bedrock_max_continuations
+        GENERATION_STRATEGY          = var.generation_strategy
+        BEDROCK_FAST_MODEL_ID        = var.bedrock_fast_model_id
+        MODEL_ROUTES                 = var.model_routes
+        BEDROCK_PROMPT_CACHING       = tostring(var.bedrock_prompt_caching)
+        ASYNC_MODE                   = tostring(var.async_mode)
+        STATUS_BUCKET                = var.status_bucket_name != "" ? var.status_bucket_name : var.output_bucket_name
+        PROGRESS_WS_ENDPOINT         = var.progress_ws_endpoint
+        ADMISSION_CONTROL            = tostring(var.admission_control)
+        ADMISSION_TABLE              = aws_dynamodb_table.admission.name
+        ADMISSION_TENANT_RPM         = var.admission_tenant_rpm
+        ADMISSION_TENANT_TPM         = var.admission_tenant_tpm
+        ADMISSION_CAPACITY_RPM       = var.admission_capacity_rpm
+        ADMISSION_CAPACITY_TPM       = var.admission_capacity_tpm
+        ADMISSION_CLASS_WEIGHTS      = var.admission_class_weights
+        ADMISSION_TENANT_BUDGETS     = var.admission_tenant_budgets
+        ADMISSION_MAX_WAIT_SECONDS   = var.admission_max_wait_seconds
+        WRITE_LEGACY_ASSETS          = tostring(var.write_legacy_assets)
+        IMAGE_GENERATION_ENABLED     = tostring(var.image_generation_enabled)
+        IMAGE_MODEL_ID               = var.image_model_id
+        IMAGE_MAX_CONCURRENCY        = var.image_max_concurrency
+        IMAGE_WIDTHS                 = var.image_widths
+        IMAGE_FORMATS                = var.image_formats
+        IMAGE_REUSE_ENABLED          = tostring(var.image_reuse_enabled)
+        IMAGE_REUSE_THRESHOLD        = var.image_reuse_threshold
+        IMAGE_INDEX_COMPACT_AFTER    = var.image_index_compact_after
+        REQUEST_HISTORY_ENABLED      = tostring(var.pregeneration_enabled)
+        REQUEST_HISTORY_FLUSH_EVERY   = var.request_history_flush_every
+        REQUEST_HISTORY_FLUSH_SECONDS = var.request_history_flush_seconds
+        PREGEN_TOP_N                 = var.pregen_top_n
+        PREGEN_HISTORY_HOURS         = var.pregen_history_hours
+        PREGEN_MAX_CONCURRENCY       = var.pregen_max_concurrency
+        PREGEN_PRICE_PER_1K_INPUT_TOKENS  = var.pregen_price_per_1k_input_tokens
+        PREGEN_PRICE_PER_1K_OUTPUT_TOKENS = var.pregen_price_per_1k_output_tokens
+        POWERTOOLS_SERVICE_NAME = "gen_landing"
+        POWERTOOLS_METRICS_NAMESPACE = "LaaS"
       }
     }
 
   tags = var.tags
 }
 
+resource "aws_lambda_layer_version" "numpy" {
+  count                    = var.image_reuse_enabled ? 1 : 0
+  layer_name               = "${var.function_name}-numpy"
+  filename                 = var.numpy_layer_zip_path
+  source_code_hash         = filebase64sha256(var.numpy_layer_zip_path)
+  compatible_runtimes      = ["python3.12"]
+  compatible_architectures = ["arm64"]
+}
+
+# Async self-invocations run a Bedrock generation; a timed-out or crashed worker must not run it again
+resource "aws_lambda_function_event_invoke_config" "gen_landing" {
+  function_name          = aws_lambda_function.gen_landing.function_name
+  maximum_retry_attempts = 0
+}
+
+# Per-tenant and shared Bedrock budget counters, one item per counter and window
+resource "aws_dynamodb_table" "admission" {
+  name         = "${var.function_name}-admission"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "pk"
+
+  attribute {
+    name = "pk"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  tags = var.tags
+}
+
+# Off-peak run that generates the most requested combinations into the generation cache
+resource "aws_cloudwatch_event_rule" "pregeneration" {
+  count               = var.pregeneration_enabled ? 1 : 0
+  name                = "${var.function_name}-pregeneration"
+  schedule_expression = var.pregeneration_schedule
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "pregeneration" {
+  count = var.pregeneration_enabled ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.pregeneration[0].name
+  arn   = aws_lambda_function.gen_landing.arn
+  input = jsonencode({ pregenerate = {} })
+}
+
+resource "aws_lambda_permission" "pregeneration" {
+  count         = var.pregeneration_enabled ? 1 : 0
+  statement_id  = "AllowPregenerationSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.gen_landing.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.pregeneration[0].arn
+}
+
 # CloudWatch Log Group is automatically created by AWS Lambda
 
 
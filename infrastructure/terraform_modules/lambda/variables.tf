@@ -50,6 +50,281 @@ variable "cloudfront_domain" {
   description = "CloudFront distribution domain name"
 }
 
+variable "prompt_cache_ttl_seconds" {
+  type        = number
+  description = "How long SSM prompts are cached in a warm container before a background refresh"
+  default     = 300
+}
+
+variable "bedrock_streaming" {
+  type        = bool
+  description = "Use the Bedrock response-stream API and store sections as they complete"
+  default     = false
+}
+
+variable "generation_cache_enabled" {
+  type        = bool
+  description = "Serve repeated prompt/theme/model combinations from the generation cache"
+  default     = false
+}
+
+variable "generation_cache_ttl_seconds" {
+  type        = number
+  description = "Lifetime of a generation cache entry"
+  default     = 86400
+}
+
+variable "generation_cache_max_entries" {
+  type        = number
+  description = "Maximum number of generation cache entries kept in a warm container"
+  default     = 256
+}
+
+variable "generation_cache_s3_max_entries" {
+  type        = number
+  description = "Maximum number of generation cache entries kept in S3; the oldest writes are evicted (0 relies on the TTL and lifecycle rule only)"
+  default     = 10000
+}
+
+variable "batch_max_concurrency" {
+  type        = number
+  description = "Concurrent Bedrock generations per batch invocation; size to the account's Bedrock quota"
+  default     = 4
+}
+
+variable "bedrock_max_rps" {
+  type        = number
+  description = "Upper bound of Bedrock requests per second per container; lowered automatically on throttling"
+  default     = 5
+}
+
+variable "bedrock_max_continuations" {
+  type        = number
+  description = "Continuation requests allowed when a completion stops at max_tokens, instead of regenerating it"
+  default     = 2
+}
+
+variable "generation_strategy" {
+  type        = string
+  description = "single: one completion per page; parallel: concurrent per-section completions with single-call fallback"
+  default     = "single"
+
+  validation {
+    condition     = contains(["single", "parallel"], var.generation_strategy)
+    error_message = "generation_strategy must be single or parallel."
+  }
+}
+
+variable "bedrock_fast_model_id" {
+  type        = string
+  description = "Lower-tier Bedrock model used for image prompts and when the primary model is throttled"
+  default     = "anthropic.claude-3-haiku-20240307-v1:0"
+}
+
+variable "model_routes" {
+  type        = string
+  description = "JSON overrides of per-sub-task model tiers, max_tokens, latency SLOs and throttle_retries (empty uses the defaults)"
+  default     = ""
+}
+
+variable "bedrock_prompt_caching" {
+  type        = bool
+  description = "Mark the system prompt and static prompt prefix as cacheable; the routed models must support Bedrock prompt caching"
+  default     = false
+}
+
+variable "async_mode" {
+  type        = bool
+  description = "Answer generation requests with 202 and generate in an asynchronous self-invocation"
+  default     = false
+}
+
+variable "status_bucket_name" {
+  type        = string
+  description = "S3 bucket for async job status objects (empty uses the output bucket)"
+  default     = ""
+}
+
+variable "progress_ws_endpoint" {
+  type        = string
+  description = "Management endpoint of the progress WebSocket API that job status changes are pushed to (empty disables pushing)"
+  default     = ""
+}
+
+variable "single_flight_enabled" {
+  type        = bool
+  description = "Let identical in-flight generations wait for one S3 lease holder instead of each calling Bedrock (requires generation_cache_enabled)"
+  default     = false
+}
+
+variable "single_flight_lease_seconds" {
+  type        = number
+  description = "Lifetime of a single-flight lease; duplicates of a crashed generation wait at most this long"
+  default     = 90
+}
+
+variable "admission_control" {
+  type        = bool
+  description = "Reserve per-tenant and shared Bedrock budgets before generating; over-budget requests get 429 with Retry-After"
+  default     = false
+}
+
+variable "admission_tenant_rpm" {
+  type        = number
+  description = "Generations per minute allowed to each tenant without an override"
+  default     = 30
+}
+
+variable "admission_tenant_tpm" {
+  type        = number
+  description = "Bedrock tokens per minute allowed to each tenant without an override"
+  default     = 60000
+}
+
+variable "admission_capacity_rpm" {
+  type        = number
+  description = "Generations per minute shared by all tenants (keep below the account's Bedrock quota)"
+  default     = 200
+}
+
+variable "admission_capacity_tpm" {
+  type        = number
+  description = "Bedrock tokens per minute shared by all tenants (keep below the account's Bedrock quota)"
+  default     = 400000
+}
+
+variable "admission_class_weights" {
+  type        = string
+  description = "JSON weights of the interactive and batch priority classes (empty uses 3:1)"
+  default     = ""
+}
+
+variable "admission_tenant_budgets" {
+  type        = string
+  description = "JSON per-tenant overrides of requests_per_window and tokens_per_window, keyed by Cognito sub"
+  default     = ""
+}
+
+variable "admission_max_wait_seconds" {
+  type        = number
+  description = "How long an over-budget request waits for the next window before it is refused"
+  default     = 5
+}
+
+variable "write_legacy_assets" {
+  type        = bool
+  description = "Also write landing_content.json and theme_info.json next to the generation bundle, for readers that do not use read_generation_bundle"
+  default     = false
+}
+
+variable "image_generation_enabled" {
+  type        = bool
+  description = "Render img_prompts with image_model_id and store responsive AVIF/WebP variants"
+  default     = false
+}
+
+variable "image_model_id" {
+  type        = string
+  description = "Bedrock image model used when image_generation_enabled is set; must be a Titan image model"
+  default     = "amazon.titan-image-generator-v1"
+}
+
+variable "image_max_concurrency" {
+  type        = number
+  description = "Images rendered at the same time per generation; keep within the image model's quota"
+  default     = 2
+}
+
+variable "image_widths" {
+  type        = string
+  description = "Comma-separated responsive widths, in pixels, of the stored image variants"
+  default     = "480,960,1280"
+}
+
+variable "image_formats" {
+  type        = string
+  description = "Comma-separated image formats to store, best first; formats Pillow cannot encode are skipped"
+  default     = "avif,webp"
+}
+
+variable "image_reuse_enabled" {
+  type        = bool
+  description = "Reuse an earlier image when its prompt embedding is similar enough, instead of rendering a new one; attaches the NumPy layer"
+  default     = false
+}
+
+variable "numpy_layer_zip_path" {
+  type        = string
+  description = "Path to the NumPy layer ZIP built by build.sh --numpy-layer; only read when image_reuse_enabled is set"
+  default     = ""
+}
+
+variable "image_reuse_threshold" {
+  type        = number
+  description = "Lowest cosine similarity between prompt embeddings at which an image is reused"
+  default     = 0.92
+}
+
+variable "image_index_compact_after" {
+  type        = number
+  description = "Image index deltas that trigger folding them into a new snapshot"
+  default     = 50
+}
+
+variable "pregeneration_enabled" {
+  type        = bool
+  description = "Record request history and pre-generate the most requested combinations on a schedule (requires generation_cache_enabled)"
+  default     = false
+}
+
+variable "request_history_flush_every" {
+  type        = number
+  description = "Buffered requests after which a container writes its request history to S3"
+  default     = 100
+}
+
+variable "request_history_flush_seconds" {
+  type        = number
+  description = "Age in seconds of the oldest buffered request after which a container writes its request history"
+  default     = 300
+}
+
+variable "pregeneration_schedule" {
+  type        = string
+  description = "EventBridge schedule of the pre-generation run; pick an off-peak hour"
+  default     = "cron(0 9 * * ? *)"
+}
+
+variable "pregen_top_n" {
+  type        = number
+  description = "Number of most requested industry/theme combinations to pre-generate per run"
+  default     = 10
+}
+
+variable "pregen_history_hours" {
+  type        = number
+  description = "Hours of request history that popularity and cost per hit are computed from"
+  default     = 24
+}
+
+variable "pregen_max_concurrency" {
+  type        = number
+  description = "Concurrent generations of a pre-generation run"
+  default     = 2
+}
+
+variable "pregen_price_per_1k_input_tokens" {
+  type        = number
+  description = "USD per 1,000 input tokens of the primary model, for the cost-per-hit report"
+  default     = 0.003
+}
+
+variable "pregen_price_per_1k_output_tokens" {
+  type        = number
+  description = "USD per 1,000 output tokens of the primary model, for the cost-per-hit report"
+  default     = 0.015
+}
+
 variable "tags" {
   type        = map(string)
   description = "Tags to apply to the Lambda function"
@@ -0,0 +1,43 @@
+#!/bin/bash
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+OUTPUT_ZIP="lambda.zip"
+# progress_channel.py is shared with gen_landing, which publishes to the same subscriptions
+SHARED_DIR="$SCRIPT_DIR/../../lambda/build"
+LAMBDA_PYTHON_VERSION="3.12"
+
+echo "Building progress_ws Lambda..."
+
+rm -f "$OUTPUT_ZIP"
+
+TEMP_DIR=$(mktemp -d)
+trap "rm -rf $TEMP_DIR" EXIT
+
+cp "$SCRIPT_DIR/handler.py" "$TEMP_DIR/"
+cp "$SHARED_DIR/progress_channel.py" "$TEMP_DIR/"
+
+if [ -f "$SCRIPT_DIR/requirements.txt" ]; then
+    echo "Installing Python dependencies for ARM64 Lambda runtime..."
+    pip3 install -r "$SCRIPT_DIR/requirements.txt" \
+        --target "$TEMP_DIR" \
+        --platform linux_aarch64 \
+        --implementation cp \
+        --python-version "$LAMBDA_PYTHON_VERSION" \
+        --only-binary=:all: \
+        --upgrade \
+        --no-deps || {
+
+        echo "ARM64 wheel installation failed, trying without platform constraints..."
+        pip3 install -r "$SCRIPT_DIR/requirements.txt" \
+            --target "$TEMP_DIR" \
+            --upgrade
+    }
+fi
+
+cd "$TEMP_DIR"
+zip -r "$OUTPUT_ZIP" . -x "*.pyc" "__pycache__/*" "*.git*"
+mv "$OUTPUT_ZIP" "$SCRIPT_DIR/"
+
+echo "Build completed successfully!"
+echo "Lambda package: $SCRIPT_DIR/$OUTPUT_ZIP"
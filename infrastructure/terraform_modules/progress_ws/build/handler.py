@@ -0,0 +1,76 @@
+"""Lambda handler for progress_ws - tracks WebSocket connections watching job progress."""
+
+import os
+import threading
+from typing import Any, Dict
+
+import boto3
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from botocore.config import Config
+
+from progress_channel import JOB_ID_PATTERN, WebSocketProgressChannel
+
+logger = Logger()
+
+STATUS_BUCKET: str = os.environ.get("STATUS_BUCKET", "")
+
+AWS_CLIENT_CONFIG = Config(
+    connect_timeout=5,
+    read_timeout=5,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+# Created on first use and reused by warm invocations
+s3_client: Any = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client() -> Any:
+    """Return the shared S3 client, creating it on first use."""
+    global s3_client
+    if s3_client is None:
+        with _client_lock:
+            if s3_client is None:
+                s3_client = boto3.client("s3", config=AWS_CLIENT_CONFIG)
+    return s3_client
+
+
+@logger.inject_lambda_context
+def handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Subscribe a connection to a job on $connect and unsubscribe it on $disconnect.
+
+    Clients connect with ?job_id=<id>. Messages are only ever pushed by the
+    stages through WebSocketProgressChannel.publish, so no other route is
+    handled here.
+
+    Args:
+        event: API Gateway WebSocket event
+        context: Lambda context
+
+    Returns:
+        Response whose status code accepts or rejects the connection
+    """
+    request_context = event["requestContext"]
+    route_key = request_context["routeKey"]
+    connection_id = request_context["connectionId"]
+    # Only the S3 side of the channel is needed to manage subscriptions
+    channel = WebSocketProgressChannel(None, get_s3_client(), STATUS_BUCKET)
+
+    if route_key == "$connect":
+        job_id = (event.get("queryStringParameters") or {}).get("job_id", "")
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            logger.warning("Rejected connection without a valid job_id", extra={"connection_id": connection_id})
+            return {"statusCode": 400}
+
+        channel.subscribe(job_id, connection_id)
+        logger.info("Connection subscribed", extra={"connection_id": connection_id, "job_id": job_id})
+        return {"statusCode": 200}
+
+    if route_key == "$disconnect":
+        job_id = channel.unsubscribe(connection_id)
+        logger.info("Connection unsubscribed", extra={"connection_id": connection_id, "job_id": job_id})
+        return {"statusCode": 200}
+
+    return {"statusCode": 400}
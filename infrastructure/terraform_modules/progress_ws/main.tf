@@ -0,0 +1,68 @@
+resource "aws_lambda_function" "progress_ws" {
+  filename         = var.lambda_zip_path
+  function_name    = var.function_name
+  role            = var.lambda_role_arn
+  handler         = "handler.handler"
+  runtime         = "python3.12"
+  architectures   = ["arm64"]
+  timeout         = 10
+  memory_size     = 128
+
+  environment {
+    variables = {
+      STATUS_BUCKET           = var.status_bucket_name
+      POWERTOOLS_SERVICE_NAME = "progress_ws"
+    }
+  }
+
+  tags = var.tags
+}
+
+# WebSocket API clients connect to with ?job_id=<id>; stages push status changes to its connections
+resource "aws_apigatewayv2_api" "progress" {
+  name                       = var.api_name
+  protocol_type              = "WEBSOCKET"
+  route_selection_expression = "$request.body.action"
+}
+
+resource "aws_apigatewayv2_integration" "progress" {
+  api_id           = aws_apigatewayv2_api.progress.id
+  integration_type = "AWS_PROXY"
+  integration_uri  = aws_lambda_function.progress_ws.invoke_arn
+}
+
+resource "aws_apigatewayv2_route" "connect" {
+  api_id    = aws_apigatewayv2_api.progress.id
+  route_key = "$connect"
+  target    = "integrations/${aws_apigatewayv2_integration.progress.id}"
+}
+
+resource "aws_apigatewayv2_route" "disconnect" {
+  api_id    = aws_apigatewayv2_api.progress.id
+  route_key = "$disconnect"
+  target    = "integrations/${aws_apigatewayv2_integration.progress.id}"
+}
+
+resource "aws_apigatewayv2_stage" "progress" {
+  api_id      = aws_apigatewayv2_api.progress.id
+  name        = var.stage_name
+  auto_deploy = true
+}
+
+resource "aws_lambda_permission" "apigw_invoke" {
+  statement_id  = "AllowProgressWebSocketInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.progress_ws.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.progress.execution_arn}/*/*"
+}
+
+output "websocket_url" {
+  description = "URL clients connect to (wss://...)"
+  value       = aws_apigatewayv2_stage.progress.invoke_url
+}
+
+output "management_endpoint" {
+  description = "Connections management endpoint stages publish to (PROGRESS_WS_ENDPOINT)"
+  value       = "https://${aws_apigatewayv2_api.progress.id}.execute-api.${var.region}.amazonaws.com/${aws_apigatewayv2_stage.progress.name}"
+}
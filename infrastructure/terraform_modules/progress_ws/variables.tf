@@ -0,0 +1,41 @@
+variable "function_name" {
+  type        = string
+  description = "Name of the Lambda function handling $connect/$disconnect"
+}
+
+variable "lambda_zip_path" {
+  type        = string
+  description = "Path to the Lambda function ZIP file"
+}
+
+variable "lambda_role_arn" {
+  type        = string
+  description = "ARN of the IAM role for the Lambda function"
+}
+
+variable "api_name" {
+  type        = string
+  description = "Name of the WebSocket API"
+}
+
+variable "stage_name" {
+  type        = string
+  description = "WebSocket API stage name"
+  default     = "prod"
+}
+
+variable "status_bucket_name" {
+  type        = string
+  description = "Name of the S3 bucket holding job status objects and subscriptions"
+}
+
+variable "region" {
+  type        = string
+  description = "AWS region of the WebSocket API"
+}
+
+variable "tags" {
+  type        = map(string)
+  description = "Tags to apply to the Lambda function"
+  default     = {}
+}
@@ -18,6 +18,46 @@ resource "aws_s3_bucket_public_access_block" "block" {
   restrict_public_buckets = true
 }
 
+# Expire generation cache entries; the Lambda also enforces a per-entry TTL
+resource "aws_s3_bucket_lifecycle_configuration" "this" {
+  bucket = aws_s3_bucket.this.id
+
+  rule {
+    id     = "expire-generation-cache"
+    status = "Enabled"
+
+    filter {
+      prefix = "generated/cache/"
+    }
+
+    expiration {
+      days = var.generation_cache_expiration_days
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+
+  # Request history only has to cover the pre-generation window
+  rule {
+    id     = "expire-request-history"
+    status = "Enabled"
+
+    filter {
+      prefix = "generated/history/"
+    }
+
+    expiration {
+      days = var.request_history_expiration_days
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+}
+
 # Configure the bucket for static website hosting so that
 # CloudFront can serve the generated HTML pages.
 resource "aws_s3_bucket_website_configuration" "this" {
@@ -6,3 +6,15 @@ variable "force_destroy" {
   type    = bool
   default = false
 }
+
+variable "generation_cache_expiration_days" {
+  type        = number
+  description = "Days after which generation cache objects under generated/cache/ are deleted"
+  default     = 7
+}
+
+variable "request_history_expiration_days" {
+  type        = number
+  description = "Days after which request history objects under generated/history/ are deleted"
+  default     = 7
+}
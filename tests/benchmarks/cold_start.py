@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the gen_landing Lambda.
+
+Every sample runs in fresh interpreters so module caches never leak
+between samples:
+
+  * `python -X importtime cold_start_sample.py import` gives the total
+    handler import time and a per-dependency breakdown (cumulative time
+    of every module imported directly by handler.py)
+  * `python cold_start_sample.py invoke` times the first and a warm
+    handler() call against moto-backed S3/SSM with a fake Bedrock
+    client, and reports peak RSS
+
+Medians across samples are written as JSON. When a baseline file is
+given, the run fails if any headline metric regressed by more than the
+threshold.
+
+Usage:
+    python tests/benchmarks/cold_start.py --samples 5 --output cold_start.json
+    python tests/benchmarks/cold_start.py --baseline cold_start_baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+SAMPLE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cold_start_sample.py")
+HANDLER_MODULE = "handler"
+HEADLINE_METRICS = ("import_ms", "first_invoke_ms", "warm_invoke_ms", "peak_rss_mb")
+DEFAULT_THRESHOLD = float(os.environ.get("COLD_START_REGRESSION_THRESHOLD", "0.20"))
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Parse `-X importtime` output.
+
+    Args:
+        stderr: Interpreter stderr containing `import time:` lines
+
+    Returns:
+        Tuple of (handler import ms, {direct dependency: cumulative ms})
+    """
+    total_ms = 0.0
+    dependencies: Dict[str, float] = {}
+    # importtime prints children before their parent, so direct
+    # dependencies of handler are the depth-1 lines preceding it
+    pending: Dict[str, float] = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        module = name.strip()
+        cumulative_ms = int(cumulative.strip()) / 1000
+
+        if depth == 0:
+            if module == HANDLER_MODULE:
+                total_ms = cumulative_ms
+                dependencies = pending
+            pending = {}
+        elif depth == 1:
+            top_level = module.split(".")[0]
+            pending[top_level] = pending.get(top_level, 0.0) + cumulative_ms
+
+    return total_ms, dependencies
+
+
+def run_sample(python: str) -> Dict[str, Any]:
+    """Collect one sample using fresh interpreters."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+
+    importtime = subprocess.run(
+        [python, "-X", "importtime", SAMPLE_SCRIPT, "import"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    import_ms, dependencies = parse_importtime(importtime.stderr)
+
+    invoke = subprocess.run(
+        [python, SAMPLE_SCRIPT, "invoke"],
+        capture_output=True, text=True, env=env,
+    )
+    if invoke.returncode != 0:
+        raise RuntimeError(f"Invoke sample failed:\n{invoke.stderr}")
+    measurements = json.loads(invoke.stdout.strip().splitlines()[-1])
+
+    return {"import_ms": import_ms, "dependencies": dependencies, **measurements}
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce samples to medians, plus min/max for headline metrics."""
+    metrics = {}
+    for name in HEADLINE_METRICS + ("import_with_moto_ms",):
+        values = [sample[name] for sample in samples]
+        metrics[name] = {
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+
+    dependency_names = {name for sample in samples for name in sample["dependencies"]}
+    dependencies = {
+        name: statistics.median(sample["dependencies"].get(name, 0.0) for sample in samples)
+        for name in dependency_names
+    }
+
+    return {
+        "metrics": metrics,
+        "dependencies_ms": dict(sorted(dependencies.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+def find_regressions(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare medians against a baseline run.
+
+    Args:
+        results: Output of this run
+        baseline: Output of a previous run
+        threshold: Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        Human-readable description of every regressed metric
+    """
+    regressions = []
+    for name in HEADLINE_METRICS:
+        current = results["metrics"][name]["median"]
+        previous = baseline.get("metrics", {}).get(name, {}).get("median")
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        if change > threshold:
+            regressions.append(f"{name}: {previous:.1f} -> {current:.1f} (+{change:.0%}, limit {threshold:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--samples", type=int, default=5, help="Fresh-interpreter samples to collect")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to benchmark")
+    parser.add_argument("--output", default="cold_start_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="Allowed relative regression (default: COLD_START_REGRESSION_THRESHOLD or 0.20)",
+    )
+    args = parser.parse_args()
+
+    samples = []
+    for index in range(args.samples):
+        sample = run_sample(args.python)
+        samples.append(sample)
+        print(
+            f"sample {index + 1}/{args.samples}: import {sample['import_ms']:.0f} ms, "
+            f"first {sample['first_invoke_ms']:.0f} ms, warm {sample['warm_invoke_ms']:.1f} ms, "
+            f"rss {sample['peak_rss_mb']:.0f} MB"
+        )
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "samples": args.samples,
+        **summarize(samples),
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    print("Slowest direct imports of handler.py:")
+    for name, ms in list(results["dependencies_ms"].items())[:10]:
+        print(f"  {name:<30} {ms:8.1f} ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print("Cold-start regressions detected:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
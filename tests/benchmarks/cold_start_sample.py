@@ -0,0 +1,104 @@
+"""One cold-start sample of the gen_landing handler, run in a fresh interpreter by cold_start.py.
+
+Modes:
+    import   - import handler.py once (run under -X importtime by the driver)
+    invoke   - import handler.py against moto-backed S3/SSM and a fake
+               Bedrock client, then time the first and a warm handler() call
+
+The invoke mode prints a single JSON object on stdout.
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HANDLER_DIR = os.path.join(REPO_ROOT, "infrastructure", "terraform_modules", "lambda", "build")
+BUCKET = "bench-laas-bucket"
+
+BENCH_ENV = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-west-2",
+    "OUTPUT_BUCKET": BUCKET,
+    "POWERTOOLS_METRICS_NAMESPACE": "LaaSBench",
+    "POWERTOOLS_TRACE_DISABLED": "true",
+    "POWERTOOLS_LOG_LEVEL": "ERROR",
+}
+
+class BenchContext:
+    """Minimal LambdaContext."""
+
+    function_name = "bench-gen-landing"
+    function_version = "$LATEST"
+    invoked_function_arn = "arn:aws:lambda:us-west-2:123456789012:function:bench-gen-landing"
+    memory_limit_in_mb = 256
+    aws_request_id = "bench-request"
+    log_group_name = "/aws/lambda/bench-gen-landing"
+    log_stream_name = "bench"
+
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+
+def seed_aws_resources() -> None:
+    """Create the output bucket and prompt parameters inside an active moto mock."""
+    import boto3
+
+    boto3.client("s3").create_bucket(
+        Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "us-west-2"}
+    )
+    ssm = boto3.client("ssm")
+    ssm.put_parameter(Name="/laas/bedrock/prompt", Value="Industry: {industry}{theme_context}", Type="String")
+    ssm.put_parameter(Name="/laas/bedrock/system_prompt", Value="Respond with landing JSON.", Type="String")
+
+
+def run_import() -> None:
+    sys.path.insert(0, HANDLER_DIR)
+    import handler  # noqa: F401
+
+
+def run_invoke() -> None:
+    from moto import mock_s3, mock_ssm
+
+    from fake_bedrock import FakeBedrockRuntime
+
+    with mock_s3(), mock_ssm():
+        seed_aws_resources()
+
+        sys.path.insert(0, HANDLER_DIR)
+        import_start = time.perf_counter()
+        import handler
+        import_ms = (time.perf_counter() - import_start) * 1000
+
+        handler.bedrock_runtime = FakeBedrockRuntime()
+        event = {"prompt": "dental clinic", "theme_info": {"fonts": ["Arial"], "color_palette": ["#333"]}}
+
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            response = handler.handler(dict(event), BenchContext())
+            timings.append((time.perf_counter() - start) * 1000)
+            if response["statusCode"] != 200:
+                raise RuntimeError(f"handler returned {response['statusCode']}: {response['body']}")
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        "import_with_moto_ms": import_ms,
+        "first_invoke_ms": timings[0],
+        "warm_invoke_ms": timings[1],
+        "peak_rss_mb": peak_rss_mb,
+    }))
+
+
+if __name__ == "__main__":
+    os.environ.update(BENCH_ENV)
+    mode = sys.argv[1] if len(sys.argv) > 1 else "invoke"
+    if mode == "import":
+        run_import()
+    else:
+        run_invoke()
@@ -0,0 +1,321 @@
+"""
+Configurable in-process fake of the bedrock-runtime client.
+
+Moto has no Bedrock mock, so this stands in for `handler.bedrock_runtime`
+when exercising retries, the rate limiter and streaming offline. It
+implements invoke_model and invoke_model_with_response_stream with the
+Messages API response shapes, and can inject:
+
+  * latency drawn from a distribution (fixed, uniform or lognormal)
+  * throttling, either at a fixed rate or above a concurrency quota
+  * transient 5xx errors
+  * malformed completions (truncated at max_tokens, prose, wrong fields)
+
+A request whose last message is a prefilled assistant turn is answered
+with the rest of the completion, like a real continuation. Prompt
+blocks marked with cache_control are remembered, and the usage reports
+cache writes on first sight and cache reads afterwards. Titan
+TEXT_IMAGE requests are answered with a gradient PNG of the requested
+size, and Titan embedding requests with a hashed bag-of-words vector, so
+reworded prompts come out similar.
+
+All counters are thread-safe so the fake can be shared by a load driver.
+"""
+
+import base64
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+LatencyFn = Callable[[random.Random], float]
+
+DEFAULT_COMPLETION: str = json.dumps({
+    "hero_html": '<section class="lp-hero"><h1 class="lp-title">Benchmark</h1></section>',
+    "features_html": '<section class="lp-features"><ul class="lp-list"><li>Fast</li></ul></section>',
+    "cta_html": '<section class="lp-cta"><a class="lp-btn" href="#">Start</a></section>',
+    "img_prompts": ["hero image", "feature icon", "team photo", "product shot"],
+})
+
+
+def fixed_latency(ms: float) -> LatencyFn:
+    """Every call takes exactly `ms` milliseconds."""
+    return lambda rng: ms
+
+
+def uniform_latency(low_ms: float, high_ms: float) -> LatencyFn:
+    """Latency uniformly distributed between `low_ms` and `high_ms`."""
+    return lambda rng: rng.uniform(low_ms, high_ms)
+
+
+def lognormal_latency(median_ms: float, sigma: float = 0.5) -> LatencyFn:
+    """Right-skewed latency with the given median, the usual shape of LLM response times."""
+    mu = math.log(median_ms)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def _client_error(code: str, status_code: int, message: str, operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status_code},
+        },
+        operation,
+    )
+
+
+def gradient_png(width: int, height: int, seed: int = 0) -> bytes:
+    """An RGB PNG with a diagonal gradient shifted by `seed`, standing in for a rendered image."""
+    rows = b"".join(
+        b"\x00" + bytes(
+            channel for x in range(width) for channel in (x * 255 // width, y * 255 // height, (x + y + seed) % 256)
+        )
+        for y in range(height)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def hashed_embedding(text: str, dimensions: int = 256) -> list:
+    """Unit vector with one signed component per word, a cheap stand-in for a text embedding."""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        digest = zlib.crc32(word.encode("utf-8"))
+        vector[digest % dimensions] += 1.0 if digest & 0x80000000 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class _Body:
+    """Mimics the StreamingBody returned by invoke_model."""
+
+    def __init__(self, payload: bytes) -> None:
+        self._payload = payload
+
+    def read(self) -> bytes:
+        return self._payload
+
+
+class FakeBedrockRuntime:
+    """
+    Fake bedrock-runtime client with injectable latency and failures.
+
+    Args:
+        latency: Latency distribution for a whole completion, in milliseconds
+        throttle_rate: Probability that a call raises ThrottlingException
+        transient_error_rate: Probability that a call raises a 503 ServiceUnavailableException
+        malformed_rate: Probability that a successful call returns an unusable completion
+        max_in_flight: Calls above this many concurrent ones are throttled (0 disables)
+        completion: Completion text returned by well-formed calls
+        stream_chunk_size: Characters per content_block_delta event when streaming
+        first_byte_fraction: Share of the latency spent before the first stream event
+        reference_max_tokens: When set, latency is scaled by the request's
+            max_tokens relative to this value, so smaller requests finish sooner
+        seed: Seed for reproducible runs
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyFn] = None,
+        throttle_rate: float = 0.0,
+        transient_error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        max_in_flight: int = 0,
+        completion: str = DEFAULT_COMPLETION,
+        stream_chunk_size: int = 40,
+        first_byte_fraction: float = 0.3,
+        reference_max_tokens: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency or fixed_latency(0)
+        self.throttle_rate = throttle_rate
+        self.transient_error_rate = transient_error_rate
+        self.malformed_rate = malformed_rate
+        self.max_in_flight = max_in_flight
+        self.completion = completion
+        self.stream_chunk_size = stream_chunk_size
+        self.first_byte_fraction = first_byte_fraction
+        self.reference_max_tokens = reference_max_tokens
+        self.stats: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._cached_prefixes: set = set()
+
+    def _draw(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide the fate of one call under the lock so the shared RNG stays consistent."""
+        with self._lock:
+            self.stats["calls"] += 1
+            over_quota = self.max_in_flight and self._in_flight >= self.max_in_flight
+            if over_quota or self._rng.random() < self.throttle_rate:
+                self.stats["throttled"] += 1
+                return {"error": "throttled"}
+            if self._rng.random() < self.transient_error_rate:
+                self.stats["transient_errors"] += 1
+                return {"error": "transient"}
+
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            latency_s = max(0.0, self.latency(self._rng)) / 1000
+            if self.reference_max_tokens:
+                latency_s *= request.get("max_tokens", self.reference_max_tokens) / self.reference_max_tokens
+
+            cache = self._cache_usage(request)
+            prefill = self._prefill(request)
+            if prefill and self.completion.startswith(prefill):
+                self.stats["continuations"] += 1
+                return {"latency_s": latency_s, "text": self.completion[len(prefill):], "stop_reason": "end_turn", "cache": cache}
+
+            if self._rng.random() < self.malformed_rate:
+                self.stats["malformed"] += 1
+                text, stop_reason = self._malformed_completion()
+                return {"latency_s": latency_s, "text": text, "stop_reason": stop_reason, "cache": cache}
+
+            return {"latency_s": latency_s, "text": self.completion, "stop_reason": "end_turn", "cache": cache}
+
+    def _cache_usage(self, request: Dict[str, Any]) -> Dict[str, int]:
+        """Cache read/write token counts for the prompt up to the last cache_control block (caller holds the lock)."""
+        system = request.get("system")
+        blocks = list(system) if isinstance(system, list) else [{"type": "text", "text": system or ""}]
+        for message in request.get("messages", []):
+            content = message.get("content")
+            blocks.extend(content if isinstance(content, list) else [{"type": "text", "text": content or ""}])
+
+        breakpoints = [index for index, block in enumerate(blocks) if block.get("cache_control")]
+        if not breakpoints:
+            return {}
+        prefix = "".join(block.get("text", "") for block in blocks[: breakpoints[-1] + 1])
+        tokens = max(1, len(prefix) // 4)
+        if prefix in self._cached_prefixes:
+            self.stats["cache_reads"] += 1
+            return {"cache_read_input_tokens": tokens, "cache_creation_input_tokens": 0}
+        self._cached_prefixes.add(prefix)
+        self.stats["cache_writes"] += 1
+        return {"cache_read_input_tokens": 0, "cache_creation_input_tokens": tokens}
+
+    def _malformed_completion(self) -> Tuple[str, str]:
+        variant = self._rng.randrange(3)
+        if variant == 0:
+            # Output cut off mid-object by the token limit
+            return self.completion[: len(self.completion) // 2], "max_tokens"
+        if variant == 1:
+            return "I'm sorry, I can't produce a landing page for that request.", "end_turn"
+        return json.dumps({"headline": "Wrong shape", "body": "Missing every expected field"}), "end_turn"
+
+    @staticmethod
+    def _prefill(request: Dict[str, Any]) -> str:
+        """Text of a trailing assistant turn in the request, if any."""
+        messages = request.get("messages", [])
+        if not messages or messages[-1].get("role") != "assistant":
+            return ""
+        content = messages[-1].get("content")
+        if isinstance(content, str):
+            return content
+        return "".join(block.get("text", "") for block in content)
+
+    def _raise(self, error: str, operation: str) -> None:
+        if error == "throttled":
+            raise _client_error("ThrottlingException", 429, "Too many requests, please wait before trying again.", operation)
+        raise _client_error("ServiceUnavailableException", 503, "Service temporarily unavailable", operation)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _usage(self, outcome: Dict[str, Any]) -> Dict[str, int]:
+        return {"input_tokens": 350, "output_tokens": max(1, len(outcome["text"]) // 4), **outcome["cache"]}
+
+    def invoke_model(self, **kwargs: Any) -> Dict[str, Any]:
+        request = json.loads(kwargs.get("body", "{}"))
+        outcome = self._draw(request)
+        if "error" in outcome:
+            self._raise(outcome["error"], "InvokeModel")
+
+        try:
+            time.sleep(outcome["latency_s"])
+        finally:
+            self._release()
+
+        if request.get("taskType") == "TEXT_IMAGE":
+            with self._lock:
+                self.stats["images"] += 1
+            config = request["imageGenerationConfig"]
+            image = gradient_png(config["width"], config["height"], config.get("seed", 0))
+            body = {"images": [base64.b64encode(image).decode("ascii")], "error": None}
+            return {"body": _Body(json.dumps(body).encode("utf-8")), "contentType": "application/json"}
+
+        if "inputText" in request:
+            with self._lock:
+                self.stats["embeddings"] += 1
+            embedding = hashed_embedding(request["inputText"], request.get("dimensions", 256))
+            body = {"embedding": embedding, "inputTextTokenCount": len(request["inputText"].split())}
+            return {"body": _Body(json.dumps(body).encode("utf-8")), "contentType": "application/json"}
+
+        body = {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": kwargs.get("modelId"),
+            "content": [{"type": "text", "text": outcome["text"]}],
+            "stop_reason": outcome["stop_reason"],
+            "stop_sequence": None,
+            "usage": self._usage(outcome),
+        }
+        return {"body": _Body(json.dumps(body).encode("utf-8")), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(self, **kwargs: Any) -> Dict[str, Any]:
+        outcome = self._draw(json.loads(kwargs.get("body", "{}")))
+        if "error" in outcome:
+            self._raise(outcome["error"], "InvokeModelWithResponseStream")
+        self.stats["streams"] += 1
+        return {"body": self._stream_events(outcome, kwargs.get("modelId")), "contentType": "application/json"}
+
+    def _stream_events(self, outcome: Dict[str, Any], model_id: Optional[str]) -> Iterator[Dict[str, Any]]:
+        text = outcome["text"]
+        usage = self._usage(outcome)
+        chunks = [text[i:i + self.stream_chunk_size] for i in range(0, len(text), self.stream_chunk_size)] or [""]
+        first_byte_s = outcome["latency_s"] * self.first_byte_fraction
+        per_chunk_s = (outcome["latency_s"] - first_byte_s) / len(chunks)
+
+        def event(data: Dict[str, Any]) -> Dict[str, Any]:
+            return {"chunk": {"bytes": json.dumps(data).encode("utf-8")}}
+
+        try:
+            time.sleep(first_byte_s)
+            yield event({
+                "type": "message_start",
+                "message": {
+                    "id": "msg_fake",
+                    "model": model_id,
+                    "usage": {key: value for key, value in usage.items() if key != "output_tokens"},
+                },
+            })
+            yield event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for chunk in chunks:
+                time.sleep(per_chunk_s)
+                yield event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+            yield event({"type": "content_block_stop", "index": 0})
+            yield event({
+                "type": "message_delta",
+                "delta": {"stop_reason": outcome["stop_reason"]},
+                "usage": {"output_tokens": usage["output_tokens"]},
+            })
+            yield event({"type": "message_stop"})
+        finally:
+            self._release()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: section post-processing, BeautifulSoup passes vs. single-pass rewriter.
+
+Compares the three BeautifulSoup passes (lp- prefixes, sanitizing,
+duplicate ids), each of which re-parses and re-serializes the section,
+with html_rewriter on generated sections of growing size. Every size is
+also checked for identical output.
+
+Usage:
+    python tests/benchmarks/html_rewrite_bench.py [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Dict, Optional, Set
+
+from bs4 import BeautifulSoup
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INJECT_DIR = os.path.join(REPO_ROOT, "infrastructure", "terraform_modules", "inject_html_lambda", "build")
+
+sys.path.insert(0, INJECT_DIR)
+from html_rewriter import (  # noqa: E402
+    REMOVED_ELEMENTS,
+    SECTION_KEYS,
+    lp_class,
+    rewrite_fragment,
+    rewrite_landing_content,
+    unique_id,
+)
+
+
+def enforce_lp_prefixes_pass(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(class_=True):
+        tag["class"] = [lp_class(name) for name in tag["class"]]
+    return str(soup)
+
+
+def sanitize_pass(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(list(REMOVED_ELEMENTS)):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        for attribute in [name for name in tag.attrs if name.startswith("on")]:
+            del tag[attribute]
+    return str(soup)
+
+
+def resolve_duplicate_ids_pass(html: str, taken_ids: Set[str]) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup.find_all(id=True):
+        tag["id"] = unique_id(tag["id"], taken_ids)
+        taken_ids.add(tag["id"])
+    return str(soup)
+
+
+def multipass_rewrite(html: str, taken_ids: Optional[Set[str]] = None) -> str:
+    """The three BeautifulSoup passes rewrite_fragment replaces, in their original order."""
+    taken_ids = taken_ids if taken_ids is not None else set()
+    return resolve_duplicate_ids_pass(sanitize_pass(enforce_lp_prefixes_pass(html)), taken_ids)
+
+
+def make_section(cards: int) -> str:
+    """A features section with `cards` cards, carrying the markup the passes rewrite."""
+    card = (
+        '<div class="card shadow" id="card" onclick="track()">'
+        '<img src="https://example.com/a.png" alt="Feature &amp; more">\n'
+        '  <h3 class="title">Fast <em>&ndash;</em> reliable</h3>'
+        '<script>console.log("x")</script>'
+        '<p class="text lp-muted">Details&nbsp;here<br>and there.</p>\n'
+        '</div>'
+    )
+    return '<section class="features" id="features"><h2>Features</h2>' + card * cards + "</section>"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    print(f"{'cards':>6} {'bytes':>9} {'passes ms':>10} {'single ms':>10} {'speedup':>8} {'equal':>6}")
+    for cards in (1, 10, 100, 1000):
+        html = make_section(cards)
+        equal = multipass_rewrite(html) == rewrite_fragment(html)
+        passes_ms = timeit.timeit(lambda: multipass_rewrite(html), number=args.repeat) / args.repeat * 1e3
+        single_ms = timeit.timeit(lambda: rewrite_fragment(html), number=args.repeat) / args.repeat * 1e3
+        print(
+            f"{cards:>6} {len(html):>9} {passes_ms:>10.2f} {single_ms:>10.2f} "
+            f"{passes_ms / single_ms:>7.1f}x {str(equal):>6}"
+        )
+
+    content: Dict[str, Any] = {key: make_section(10) for key in SECTION_KEYS}
+    taken_ids: Set[str] = set()
+    reference = {key: multipass_rewrite(content[key], taken_ids) for key in SECTION_KEYS}
+    print(f"\nLanding content (ids shared across sections) equal: {reference == rewrite_landing_content(content)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: page injection, BeautifulSoup DOM vs. streaming splice.
+
+Injects the landing sections into generated e-commerce pages of growing
+size. It compares parsing the page into a BeautifulSoup tree and
+serializing it against streaming_injector.PageSplicer fed in 256 KiB
+chunks. It reports the time and the peak of Python allocations
+(tracemalloc) of each. For the streaming side it also checks that the
+output is the page with only the CSS and sections added.
+
+Usage:
+    python tests/benchmarks/inject_stream_bench.py [--sizes 1,2,4] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable
+
+from bs4 import BeautifulSoup
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INJECT_DIR = os.path.join(REPO_ROOT, "infrastructure", "terraform_modules", "inject_html_lambda", "build")
+
+sys.path.insert(0, INJECT_DIR)
+from streaming_injector import DEFAULT_CHUNK_SIZE, PageSplicer  # noqa: E402
+
+SECTIONS = '<section class="lp-hero"><h1 class="lp-title">Welcome</h1></section>'
+CSS = ".lp-hero{padding:4rem 1rem}.lp-title{font-size:2.5rem}"
+
+
+def make_page(megabytes: int) -> bytes:
+    """A product listing page of about `megabytes` MiB with inline scripts and JSON."""
+    product = (
+        '<li class="product" data-sku="{i}"><a href="/p/{i}?ref=list&amp;pos={i}">'
+        '<img src="/img/{i}.jpg" alt="Product {i} &gt; details" loading="lazy"></a>'
+        '<h3 class="product-title">Product {i}</h3><span class="price">$ {i}.99</span>'
+        "<script>dataLayer.push({{\"sku\": \"{i}\", \"html\": \"<header></header>\"}})</script></li>\n"
+    )
+    head = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Shop</title>'
+        "<style>.product{display:inline-block}</style></head><body>"
+        '<header class="site-header"><nav><a href="/">Shop</a></nav></header><main><ul class="grid">\n'
+    )
+    tail = "</ul></main><footer>Footer</footer></body></html>"
+    items = []
+    size, i = len(head) + len(tail), 0
+    while size < megabytes * 1024 * 1024:
+        item = product.format(i=i)
+        items.append(item)
+        size += len(item)
+        i += 1
+    return (head + "".join(items) + tail).encode("utf-8")
+
+
+def dom_inject(page: bytes) -> bytes:
+    """Parse, insert after the header and serialize, as the DOM path does."""
+    soup = BeautifulSoup(page.decode("utf-8"), "html.parser")
+    soup.head.append(BeautifulSoup(f"<style>{CSS}</style>", "html.parser"))
+    soup.header.insert_after(BeautifulSoup(SECTIONS, "html.parser"))
+    return str(soup).encode("utf-8")
+
+
+def stream_inject(page: bytes) -> bytes:
+    splicer = PageSplicer(SECTIONS, CSS)
+    out = [splicer.feed(page[start:start + DEFAULT_CHUNK_SIZE]) for start in range(0, len(page), DEFAULT_CHUNK_SIZE)]
+    out.append(splicer.close())
+    return b"".join(out)
+
+
+def stream_discard(page: bytes) -> None:
+    """Streaming without keeping the output, as when every chunk goes straight to S3."""
+    splicer = PageSplicer(SECTIONS, CSS)
+    for start in range(0, len(page), DEFAULT_CHUNK_SIZE):
+        splicer.feed(page[start:start + DEFAULT_CHUNK_SIZE])
+    splicer.close()
+
+
+def peak_mib(func: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="1,2,4", help="Page sizes in MiB, comma-separated")
+    parser.add_argument("--repeat", type=int, default=3, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    print(f"{'MiB':>5} {'dom s':>8} {'dom peak':>9} {'stream s':>9} {'stream peak':>12} {'spliced ok':>11}")
+    for megabytes in (int(size) for size in args.sizes.split(",")):
+        page = make_page(megabytes)
+        expected = page.replace(b"</head>", f"<style id=\"lp-styles\">{CSS}</style></head>".encode(), 1)
+        expected = expected.replace(b"</header>", b"</header>" + SECTIONS.encode(), 1)
+        ok = stream_inject(page) == expected
+
+        dom_s = timeit.timeit(lambda: dom_inject(page), number=args.repeat) / args.repeat
+        stream_s = timeit.timeit(lambda: stream_discard(page), number=args.repeat) / args.repeat
+        dom_peak = peak_mib(lambda: dom_inject(page))
+        stream_peak = peak_mib(lambda: stream_discard(page))
+        print(f"{megabytes:>5} {dom_s:>8.2f} {dom_peak:>8.1f}M {stream_s:>9.3f} {stream_peak:>11.1f}M {str(ok):>11}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
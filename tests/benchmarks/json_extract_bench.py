@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON extraction from completions, regex vs. scanner.
+
+Compares the old lazy-regex extraction with json_extract on completions
+of growing size (brace-heavy HTML wrapped in prose, with and without a
+code fence), on whole text and on streamed chunks, and checks both
+against the completion corpus.
+
+Usage:
+    python tests/benchmarks/json_extract_bench.py [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+from typing import Any, Dict, Optional
+
+from cold_start_sample import HANDLER_DIR
+
+sys.path.insert(0, HANDLER_DIR)
+from json_extract import JSONObjectScanner, extract_json_object  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "completion_corpus.json")
+REQUIRED_KEYS = ("hero_html", "features_html", "cta_html", "img_prompts")
+
+
+def regex_extract(text: str) -> Optional[Dict[str, Any]]:
+    """The extraction parse_landing_content used before json_extract."""
+    match = re.search(r'```(?:json)?\s*({[\s\S]*?})\s*```', text)
+    if match:
+        json_str = match.group(1)
+    else:
+        match = re.search(r'\{[\s\S]*?\}', text)
+        if not match:
+            return None
+        json_str = match.group(0)
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+
+def make_completion(sections: int, fenced: bool) -> str:
+    """Completion whose HTML carries inline CSS braces, sized by `sections`."""
+    block = '<div class="lp-card"><style>.lp-card{padding:1rem}.lp-card h3{margin:0}</style><h3>Feature</h3></div>'
+    landing = {
+        "hero_html": '<section class="lp-hero"><h1>Hello</h1></section>',
+        "features_html": '<section class="lp-features">' + block * sections + "</section>",
+        "cta_html": '<section class="lp-cta"><a class="lp-btn">Go</a></section>',
+        "img_prompts": ["one", "two", "three", "four"],
+    }
+    payload = json.dumps(landing, indent=2)
+    if fenced:
+        payload = "```json\n" + payload + "\n```"
+    return "Here is your landing page:\n" + payload + "\nEnjoy!"
+
+
+def scan_chunks(text: str, chunk_size: int) -> Optional[Dict[str, Any]]:
+    scanner = JSONObjectScanner()
+    for start in range(0, len(text), chunk_size):
+        for candidate in scanner.feed(text[start:start + chunk_size]):
+            if all(key in candidate for key in REQUIRED_KEYS):
+                return candidate
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    print(f"{'fenced':>6} {'size':>8} {'regex ok':>9} {'regex us':>10} {'scan us':>10} {'scan/32B us':>12}")
+    for fenced, sections in ((fenced, sections) for fenced in (True, False) for sections in (1, 10, 100, 1000)):
+        text = make_completion(sections, fenced)
+        regex_ok = "cta_html" in (regex_extract(text) or {})
+        regex_us = timeit.timeit(lambda: regex_extract(text), number=args.repeat) / args.repeat * 1e6
+        scan_us = timeit.timeit(
+            lambda: extract_json_object(text, REQUIRED_KEYS), number=args.repeat
+        ) / args.repeat * 1e6
+        chunk_us = timeit.timeit(lambda: scan_chunks(text, 32), number=args.repeat) / args.repeat * 1e6
+        print(f"{str(fenced):>6} {len(text):>8} {str(regex_ok):>9} {regex_us:>10.1f} {scan_us:>10.1f} {chunk_us:>12.1f}")
+
+    with open(CORPUS_PATH) as f:
+        corpus = json.load(f)
+
+    print("\nCorpus (expected -> regex / scanner):")
+    for case in corpus:
+        def usable(result: Optional[Dict[str, Any]]) -> bool:
+            return result is not None and all(key in result for key in REQUIRED_KEYS)
+
+        regex_result = usable(regex_extract(case["completion"]))
+        scan_result = usable(extract_json_object(case["completion"], REQUIRED_KEYS))
+        print(f"  {case['name']:<35} {str(case['valid']):>5} -> {str(regex_result):>5} / {str(scan_result):>5}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Load driver for the gen_landing handler against a fake Bedrock.
+
+Fires N requests with bounded concurrency through the real handler()
+(moto-backed S3/SSM, FakeBedrockRuntime in place of bedrock-runtime)
+and reports throughput, latency percentiles, retry and recovery
+decisions and failure categories.
+
+All worker threads share one handler module, so they share one
+adaptive rate limiter - the run models a single warm container serving
+concurrent work (e.g. batch items). Use --max-in-flight on the fake to
+model the account-wide Bedrock quota and --max-rps for the per-container
+limiter.
+
+Usage:
+    python tests/benchmarks/load_test.py --requests 200 --concurrency 20 \\
+        --latency-ms 1500 --throttle-rate 0.05 --malformed-rate 0.02 --stream
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from cold_start_sample import BENCH_ENV, HANDLER_DIR, BenchContext, seed_aws_resources
+from fake_bedrock import FakeBedrockRuntime, fixed_latency, lognormal_latency, uniform_latency
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def categorize(response: Dict[str, Any]) -> str:
+    """
+    Map a handler response to a failure category.
+
+    Args:
+        response: Handler response dictionary
+
+    Returns:
+        "ok" for success, otherwise a short failure category
+    """
+    status_code = response["statusCode"]
+    if status_code == 200:
+        return "ok"
+    if status_code == 504:
+        return "timeout"
+
+    error = json.loads(response["body"]).get("error", "")
+    if status_code == 400:
+        return "bad_request"
+    if "non-retryable" in error:
+        return "fatal"
+    if "attempts" in error:
+        return "retries_exhausted"
+    if "JSON" in error or "landing content" in error:
+        return "malformed_output"
+    if "Configuration error" in error:
+        return "ssm"
+    return f"http_{status_code}"
+
+
+def build_latency(args: argparse.Namespace):
+    if args.latency_dist == "fixed":
+        return fixed_latency(args.latency_ms)
+    if args.latency_dist == "uniform":
+        return uniform_latency(args.latency_ms * 0.5, args.latency_ms * 1.5)
+    return lognormal_latency(args.latency_ms, args.latency_sigma)
+
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive the handler and collect per-request outcomes."""
+    from moto import mock_s3, mock_ssm
+
+    fake = FakeBedrockRuntime(
+        latency=build_latency(args),
+        throttle_rate=args.throttle_rate,
+        transient_error_rate=args.transient_rate,
+        malformed_rate=args.malformed_rate,
+        max_in_flight=args.max_in_flight,
+        reference_max_tokens=1024,
+        seed=args.seed,
+    )
+
+    with mock_s3(), mock_ssm():
+        seed_aws_resources()
+
+        sys.path.insert(0, HANDLER_DIR)
+        import handler
+
+        handler.bedrock_runtime = fake
+
+        # Count retry and recovery decisions as the handler makes them
+        retry_decisions: Counter = Counter()
+        recoveries: Counter = Counter()
+        decision_lock = threading.Lock()
+
+        def counting(record, counter: Counter):
+            def wrapper(first: str, second: str, *args: Any) -> None:
+                with decision_lock:
+                    counter[f"{first}:{second}"] += 1
+                record(first, second, *args)
+            return wrapper
+
+        handler.record_retry_decision = counting(handler.record_retry_decision, retry_decisions)
+        handler.record_recovery = counting(handler.record_recovery, recoveries)
+
+        def one_request(index: int) -> Tuple[float, str]:
+            event = {
+                "prompt": f"load test industry {index % args.distinct_prompts}",
+                "stream": args.stream,
+                "bypass_cache": True,
+                "strategy": args.strategy,
+            }
+            start = time.perf_counter()
+            response = handler.handler(event, BenchContext())
+            return (time.perf_counter() - start) * 1000, categorize(response)
+
+        # Powertools prints EMF metric blobs to stdout; keep them out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                outcomes = list(executor.map(one_request, range(args.requests)))
+            wall_s = time.perf_counter() - run_start
+
+    latencies = [latency for latency, _ in outcomes]
+    ok_latencies = [latency for latency, category in outcomes if category == "ok"]
+    categories = Counter(category for _, category in outcomes)
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "requests": args.requests,
+        "wall_seconds": round(wall_s, 3),
+        "throughput_rps": round(args.requests / wall_s, 3),
+        "success_rps": round(categories["ok"] / wall_s, 3),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1),
+        },
+        "success_latency_ms": {
+            "p50": round(percentile(ok_latencies, 50), 1),
+            "p95": round(percentile(ok_latencies, 95), 1),
+            "p99": round(percentile(ok_latencies, 99), 1),
+        },
+        "outcomes": dict(categories),
+        "retry_decisions": dict(retry_decisions),
+        "retries": sum(count for key, count in retry_decisions.items() if key.startswith("retry:")),
+        "recoveries": dict(recoveries),
+        "bedrock": dict(fake.stats),
+        "final_limiter_rate": round(handler.bedrock_rate_limiter.rate, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--requests", type=int, default=100, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests in flight at once")
+    parser.add_argument("--distinct-prompts", type=int, default=20, help="Number of distinct prompts to cycle through")
+    parser.add_argument("--stream", action="store_true", help="Use the response-stream path")
+    parser.add_argument("--strategy", choices=("single", "parallel"), default="single", help="Generation strategy")
+    parser.add_argument("--latency-dist", choices=("fixed", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median latency of a 1024-token completion")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal sigma")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of ThrottlingException")
+    parser.add_argument("--transient-rate", type=float, default=0.0, help="Probability of a 503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Probability of an unusable completion")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="Fake Bedrock concurrency quota (0 = unlimited)")
+    parser.add_argument("--max-rps", type=float, default=5.0, help="BEDROCK_MAX_RPS for the handler's rate limiter")
+    parser.add_argument("--prompt-caching", action="store_true", help="Enable BEDROCK_PROMPT_CACHING in the handler")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible fault injection")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.update(BENCH_ENV)
+    warnings.filterwarnings("ignore", message="No application metrics to publish")
+    os.environ["POWERTOOLS_LOG_LEVEL"] = "CRITICAL"
+    os.environ["BEDROCK_MAX_RPS"] = str(args.max_rps)
+    os.environ["BEDROCK_PROMPT_CACHING"] = str(args.prompt_caching).lower()
+
+    report = run_load(args)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
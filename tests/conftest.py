@@ -9,6 +9,12 @@ from moto import mock_s3, mock_lambda, mock_ssm, mock_cloudfront
 from moto.core import DEFAULT_ACCOUNT_ID as ACCOUNT_ID
 
 
+@pytest.fixture(autouse=True)
+def metrics_namespace(monkeypatch):
+    """Metrics namespace that terraform sets on the deployed functions."""
+    monkeypatch.setenv('POWERTOOLS_METRICS_NAMESPACE', 'LaaS')
+
+
 @pytest.fixture
 def aws_credentials():
     """Mocked AWS Credentials for moto."""
@@ -153,8 +159,17 @@ def lambda_context():
             self.invoked_function_arn = f"arn:aws:lambda:us-west-2:{ACCOUNT_ID}:function:test-function"
             self.memory_limit_in_mb = 128
             self.remaining_time_in_millis = lambda: 300000
+            self.get_remaining_time_in_millis = lambda: 300000
             self.aws_request_id = "test-request-id"
             self.log_group_name = "/aws/lambda/test-function"
             self.log_stream_name = "test-stream"
     
-    return MockContext() 
\ No newline at end of file
+    return MockContext() 
+
+@pytest.fixture
+def fake_bedrock():
+    """Factory for the configurable fake bedrock-runtime client (moto has no Bedrock mock)."""
+    import sys
+    sys.path.append('tests/benchmarks')
+    from fake_bedrock import FakeBedrockRuntime
+    return FakeBedrockRuntime
@@ -148,4 +148,1672 @@ class TestGenLandingLambda:
         assert 'class="lp-hero"' in result['hero_html']
         assert 'class="lp-title"' in result['hero_html']
         assert 'class="lp-features"' in result['features_html']
-        assert 'class="lp-btn"' in result['cta_html'] 
\ No newline at end of file
+        assert 'class="lp-btn"' in result['cta_html'] 
+    def test_prompt_cache_batches_and_reuses_ssm_fetch(self, ssm_client, ssm_parameters):
+        """Test that prompts are fetched in one batched call and served from cache afterwards."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        handler._prompt_cache["prompts"] = None
+        spy = MagicMock(wraps=ssm_client)
+        with patch.object(handler, 'ssm_client', spy):
+            first = handler.get_prompts_from_ssm()
+            second = handler.get_prompts_from_ssm()
+        
+        assert first is second
+        assert first.prompt_template == "Industry: {industry}{theme_context}"
+        assert spy.get_parameters.call_count == 1
+        assert spy.get_parameter.call_count == 0
+
+    def test_prompt_cache_falls_back_to_defaults(self):
+        """Test that hardcoded prompts are used when SSM is unreachable and nothing is cached."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        handler._prompt_cache["prompts"] = None
+        failing_ssm = MagicMock()
+        failing_ssm.get_parameters.side_effect = Exception("SSM unavailable")
+        with patch.object(handler, 'ssm_client', failing_ssm):
+            prompts = handler.get_prompts_from_ssm()
+        
+        assert prompts.system_prompt == handler.DEFAULT_SYSTEM_PROMPT
+        assert prompts.prompt_template == handler.DEFAULT_PROMPT_TEMPLATE
+        assert handler._prompt_cache["prompts"] is None
+
+    def test_streaming_field_scanner_emits_completed_fields(self):
+        """Test that streamed JSON fields are reported as soon as each value is complete."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        from json_extract import JSONFieldScanner
+        
+        parser = JSONFieldScanner()
+        completion = '```json\n{"hero_html": "<div class=\\"lp-hero\\">{Hero}</div>", "img_prompts": ["a", "b"], "count": 2}\n```'
+        
+        emitted = []
+        for i in range(0, len(completion), 7):
+            emitted.extend(parser.feed(completion[i:i + 7]))
+        
+        assert emitted == [
+            ("hero_html", '<div class="lp-hero">{Hero}</div>'),
+            ("img_prompts", ["a", "b"]),
+            ("count", 2),
+        ]
+        assert parser.done
+
+    def test_streaming_generation_emits_sections(self, ssm_client, ssm_parameters):
+        """Test that streaming mode hands each section to the callback before returning."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        completion = json.dumps({
+            'hero_html': '<div class="lp-hero">Test</div>',
+            'features_html': '<div class="lp-features">Test</div>',
+            'cta_html': '<div class="lp-cta">Test</div>',
+            'img_prompts': ['test image']
+        })
+        events = [
+            {'chunk': {'bytes': json.dumps({
+                'type': 'content_block_delta',
+                'delta': {'type': 'text_delta', 'text': completion[i:i + 20]}
+            }).encode()}}
+            for i in range(0, len(completion), 20)
+        ]
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model_with_response_stream.return_value = {'body': iter(events)}
+        
+        sections = []
+        with patch.object(handler, 'ssm_client', ssm_client):
+            result = handler.generate_landing_content(
+                "technology", ThemeInfo(), mock_bedrock, "test-model",
+                stream=True, on_section=lambda name, value: sections.append(name)
+            )
+        
+        assert sections == ['hero_html', 'features_html', 'cta_html', 'img_prompts']
+        assert result.hero_html == '<div class="lp-hero">Test</div>'
+        mock_bedrock.invoke_model.assert_not_called()
+
+    def test_streaming_skips_prose_braces_before_payload(self):
+        """Test that placeholders in prose before the payload do not hide the streamed sections."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        payload = json.dumps({
+            'hero_html': '<div class="lp-hero">{Hero}</div>',
+            'features_html': '<div class="lp-features">Test</div>',
+            'cta_html': '<div class="lp-cta">Test</div>',
+            'img_prompts': ['test image']
+        })
+        completion = f'Here is the {{industry}} page: {payload}'
+        events = [
+            {'chunk': {'bytes': json.dumps({
+                'type': 'content_block_delta',
+                'delta': {'type': 'text_delta', 'text': completion[i:i + 9]}
+            }).encode()}}
+            for i in range(0, len(completion), 9)
+        ]
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model_with_response_stream.return_value = {'body': iter(events)}
+        
+        sections = {}
+        text = handler.stream_landing_completion(
+            mock_bedrock, "test-model",
+            handler.BedrockPayload(
+                anthropic_version="bedrock-2023-05-31", max_tokens=10, temperature=0.7,
+                system="system", messages=[]
+            ),
+            on_section=lambda name, value: sections.setdefault(name, value)
+        )
+        
+        assert list(sections) == list(handler.LANDING_SECTIONS)
+        assert sections == vars(handler.parse_landing_content(text))
+
+    def test_streamed_and_buffered_generation_agree(self, ssm_client, ssm_parameters, fake_bedrock, sample_landing_content):
+        """Test that streaming ends with the same sections as the buffered path when an example object comes first."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        completion = (
+            'Fields look like {"hero_html": "<div>example</div>", "note": "draft"}. '
+            f'Final page for {{industry}}:\n```json\n{json.dumps(sample_landing_content)}\n```'
+        )
+        fake = fake_bedrock(completion=completion, stream_chunk_size=11)
+        
+        sections = {}
+        with patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'bedrock_rate_limiter', handler.AdaptiveRateLimiter(max_rate=100)):
+            buffered = handler.generate_landing_content("technology", ThemeInfo(), fake, "test-model")
+            streamed = handler.generate_landing_content(
+                "technology", ThemeInfo(), fake, "test-model",
+                stream=True, on_section=sections.__setitem__
+            )
+        
+        assert vars(streamed) == vars(buffered) == sample_landing_content
+        assert sections == sample_landing_content
+
+    def test_batch_reports_partial_failures(self, monkeypatch, s3_client, test_bucket, lambda_context, sample_landing_content):
+        """Test that a batch returns per-item results and a failed item does not fail the batch."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        
+        def fake_generate(prompt, *args, **kwargs):
+            if prompt == "broken":
+                raise handler.BedrockError("model unavailable")
+            return handler.LandingContent(**sample_landing_content)
+        
+        event = {
+            "theme_info": {"fonts": ["Arial"], "color_palette": ["#333"]},
+            "items": [{"prompt": "dental clinic"}, {"prompt": "broken"}, {"prompt": "saas startup"}],
+        }
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'get_or_generate_landing_content', side_effect=fake_generate):
+            response = handler.handler(event, lambda_context)
+        
+        body = json.loads(response["body"])
+        assert response["statusCode"] == 207
+        assert (body["succeeded"], body["failed"]) == (2, 1)
+        assert [result["status"] for result in body["results"]] == ["generated", "failed", "generated"]
+        assert "model unavailable" in body["results"][1]["error"]
+        assert body["results"][0]["generation_id"] != body["results"][2]["generation_id"]
+
+    def test_batch_items_take_the_single_request_path(self, s3_client, test_bucket, sample_landing_content):
+        """Test that batch items are generated and stored by generate_and_store_landing, images included."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'IMAGE_GENERATION_ENABLED', True), \
+             patch.object(handler, 'generate_page_images', return_value=[]) as render, \
+             patch.object(handler, 'get_or_generate_landing_content',
+                          return_value=handler.LandingContent(**sample_landing_content)), \
+             patch.object(handler, 'generate_and_store_landing',
+                          wraps=handler.generate_and_store_landing) as generate_and_store:
+            results = handler.process_batch_request(
+                [{"prompt": "dental clinic"}, {"prompt": "saas startup"}], None, test_bucket, "test-model"
+            )
+        
+        assert [result["status"] for result in results] == ["generated", "generated"]
+        assert generate_and_store.call_count == 2
+        assert render.call_count == 2
+        for result in results:
+            assert result["assets"]["bundle_key"] == f"generated/{result['generation_id']}/bundle.json.gz"
+
+    def test_client_errors_fail_fast(self):
+        """Test that non-retryable Bedrock errors are not retried."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from botocore.exceptions import ClientError
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = ClientError(
+            {"Error": {"Code": "ValidationException", "Message": "bad input"},
+             "ResponseMetadata": {"HTTPStatusCode": 400}},
+            "InvokeModel"
+        )
+        payload = handler.BedrockPayload(
+            anthropic_version="bedrock-2023-05-31", max_tokens=10, temperature=0.7,
+            system="system", messages=[]
+        )
+        
+        with patch('time.sleep') as mock_sleep, pytest.raises(handler.BedrockError, match="non-retryable"):
+            handler.invoke_bedrock_with_retry(mock_bedrock, "test-model", payload)
+        
+        assert mock_bedrock.invoke_model.call_count == 1
+        mock_sleep.assert_not_called()
+
+    def test_short_budget_still_retries(self):
+        """Test that a budget of a few seconds leaves room for a retry when the backoff fits."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from botocore.exceptions import ClientError
+        
+        transient = ClientError(
+            {"Error": {"Code": "InternalServerException"}, "ResponseMetadata": {"HTTPStatusCode": 500}},
+            "InvokeModel"
+        )
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = [transient, {"body": "ok"}]
+        payload = handler.BedrockPayload(
+            anthropic_version="bedrock-2023-05-31", max_tokens=10, temperature=0.7,
+            system="system", messages=[]
+        )
+        
+        with patch('time.sleep') as mock_sleep:
+            response = handler.invoke_bedrock_with_retry(
+                mock_bedrock, "test-model", payload, base_delay=0.1, max_total_time=5
+            )
+            assert response == {"body": "ok"}
+            assert mock_sleep.call_count == 1
+        
+        mock_bedrock.invoke_model.side_effect = [transient, {"body": "ok"}]
+        with patch('time.sleep') as mock_sleep, pytest.raises(TimeoutError):
+            handler.invoke_bedrock_with_retry(
+                mock_bedrock, "test-model", payload, base_delay=2, max_total_time=1
+            )
+        mock_sleep.assert_not_called()
+
+    def test_error_classification(self):
+        """Test that throttling and transient errors are retryable and client errors are not."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        from handler import classify_bedrock_error
+        from botocore.exceptions import ClientError, ReadTimeoutError
+        
+        def client_error(code, status):
+            return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "InvokeModel")
+        
+        assert classify_bedrock_error(client_error("ThrottlingException", 429)) == "throttled"
+        assert classify_bedrock_error(client_error("ModelNotReadyException", 429)) == "throttled"
+        assert classify_bedrock_error(client_error("InternalServerException", 500)) == "transient"
+        assert classify_bedrock_error(client_error("AccessDeniedException", 403)) == "fatal"
+        assert classify_bedrock_error(client_error("ValidationException", 400)) == "fatal"
+        assert classify_bedrock_error(ReadTimeoutError(endpoint_url="https://bedrock")) == "transient"
+        assert classify_bedrock_error(KeyError("body")) == "fatal"
+
+    def test_rate_limiter_backs_off_on_throttle(self):
+        """Test that the shared limiter halves its rate on throttling and recovers on success."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        from rate_limiter import AdaptiveRateLimiter
+        
+        limiter = AdaptiveRateLimiter(max_rate=4.0, min_rate=1.0)
+        assert limiter.acquire() == pytest.approx(0, abs=0.01)
+        
+        limiter.on_throttle()
+        limiter.on_throttle()
+        limiter.on_throttle()
+        assert limiter.rate == 1.0
+        with pytest.raises(TimeoutError):
+            limiter.acquire(timeout=0.1)
+        
+        limiter.on_success()
+        assert limiter.rate == pytest.approx(1.4)
+
+    def test_deadline_returns_504_with_checkpointed_sections(self, monkeypatch, s3_client, test_bucket,
+                                                            ssm_client, ssm_parameters, lambda_context):
+        """Test that running out of time returns 504 and keeps the sections streamed so far."""
+        import sys
+        import time
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        # Leaves roughly 0.3s for Bedrock after the safety margin and store reserve
+        budget_ms = (handler.DEADLINE_SAFETY_MARGIN_SECONDS + handler.STORE_RESERVE_SECONDS + 0.3) * 1000
+        lambda_context.get_remaining_time_in_millis = lambda: budget_ms
+        
+        def slow_stream():
+            for text in ['{"hero_html": "<div class=\\"lp-hero\\">Hi</div>", ', '"features_html": "<div>']:
+                yield {'chunk': {'bytes': json.dumps({
+                    'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}
+                }).encode()}}
+                time.sleep(0.5)
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model_with_response_stream.return_value = {'body': slow_stream()}
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'bedrock_runtime', mock_bedrock):
+            response = handler.handler({"prompt": "dental clinic", "stream": True}, lambda_context)
+        
+        body = json.loads(response["body"])
+        assert response["statusCode"] == 504
+        assert body["status"] == "timeout"
+        hero = s3_client.get_object(Bucket=test_bucket, Key=body["assets"]["hero_html_key"])
+        assert hero["Body"].read() == b'<div class="lp-hero">Hi</div>'
+
+    def test_no_bedrock_call_without_budget(self, ssm_client, ssm_parameters):
+        """Test that generation refuses to start when the deadline leaves no room for Bedrock."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        mock_bedrock = MagicMock()
+        with patch.object(handler, 'ssm_client', ssm_client), pytest.raises(handler.DeadlineExceededError):
+            handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "test-model", deadline=handler.Deadline(1.0)
+            )
+        
+        mock_bedrock.invoke_model.assert_not_called()
+
+    def test_clients_are_created_lazily_once(self):
+        """Test that AWS clients are built on first use and reused afterwards."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        
+        with patch.object(handler, 's3_client', None), \
+             patch.object(handler, 'bedrock_runtime', None), \
+             patch('boto3.client') as mock_boto3:
+            assert mock_boto3.call_count == 0
+            first = handler.get_s3_client()
+            second = handler.get_s3_client()
+            
+            assert first is second
+            assert mock_boto3.call_count == 1
+            handler.get_bedrock_runtime()
+            assert mock_boto3.call_args.args == ("bedrock-runtime",)
+
+    def test_handler_recovers_from_throttling_with_fake_bedrock(self, monkeypatch, fake_bedrock, s3_client, test_bucket,
+                                                               ssm_client, ssm_parameters, lambda_context):
+        """Test an end-to-end streamed generation that is throttled before it succeeds."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from rate_limiter import AdaptiveRateLimiter
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        fake = fake_bedrock(max_in_flight=1)
+        # Occupy the only slot so the first call is throttled, then free it
+        fake._in_flight = 1
+        
+        def sleep_and_release(seconds):
+            if not fake.stats["streams"]:
+                fake._in_flight = 0
+        
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'bedrock_runtime', fake), \
+             patch.object(handler, 'bedrock_rate_limiter', AdaptiveRateLimiter(max_rate=100)), \
+             patch('time.sleep', side_effect=sleep_and_release):
+            response = handler.handler({"prompt": "dental clinic", "stream": True}, lambda_context)
+        
+        body = json.loads(response["body"])
+        assert response["statusCode"] == 200
+        assert fake.stats["throttled"] == 1
+        assert fake.stats["streams"] == 1
+        assert "hero_html_key" in body["assets"]
+
+    def test_truncated_completion_is_continued_not_regenerated(self, ssm_client, ssm_parameters, sample_landing_content):
+        """Test that a max_tokens stop sends only a continuation request with the partial output prefilled."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        completion = json.dumps(sample_landing_content)
+        head, tail = completion[:60] + "  ", completion[60:]
+        
+        def bedrock_body(text, stop_reason, output_tokens):
+            return {'body': MagicMock(read=lambda: json.dumps({
+                'content': [{'type': 'text', 'text': text}],
+                'stop_reason': stop_reason,
+                'usage': {'input_tokens': 100, 'output_tokens': output_tokens}
+            }).encode())}
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = [
+            bedrock_body(head, 'max_tokens', 1024),
+            bedrock_body(tail, 'end_turn', 40),
+        ]
+        stats = {}
+        with patch.object(handler, 'ssm_client', ssm_client):
+            result = handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "test-model", stats=stats
+            )
+        
+        assert result.cta_html == sample_landing_content['cta_html']
+        assert mock_bedrock.invoke_model.call_count == 2
+        continuation_messages = json.loads(mock_bedrock.invoke_model.call_args.kwargs['body'])['messages']
+        assert continuation_messages[-1] == {
+            'role': 'assistant', 'content': [{'type': 'text', 'text': head.rstrip()}]
+        }
+        assert stats['token_usage'] == {'input_tokens': 200, 'output_tokens': 1064}
+
+    def test_parallel_strategy_merges_sections(self, ssm_client, ssm_parameters, fake_bedrock, sample_landing_content):
+        """Test that the parallel strategy sends one small request per section and merges the results."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        fake = fake_bedrock(completion=json.dumps(sample_landing_content))
+        sections = []
+        stats = {}
+        with patch.object(handler, 'ssm_client', ssm_client):
+            result = handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), fake, "test-model", strategy="parallel",
+                on_section=lambda name, value: sections.append(name), stats=stats
+            )
+        
+        assert vars(result) == sample_landing_content
+        assert fake.stats["calls"] == 4
+        assert sorted(sections) == sorted(handler.LANDING_SECTIONS)
+        assert stats["strategy"] == "parallel"
+        assert set(stats["timings"]["sections_ms"]) == set(handler.LANDING_SECTIONS)
+        assert stats["token_usage"]["input_tokens"] == 4 * 350
+
+    def test_parallel_strategy_falls_back_to_single_call(self, ssm_client, ssm_parameters, sample_landing_content):
+        """Test that a failed section request falls back to one full completion."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        page_content = dict(sample_landing_content, hero_html='<div class="lp-hero">Fallback</div>')
+        
+        def invoke_model(**kwargs):
+            request = json.loads(kwargs['body'])
+            if request['max_tokens'] == handler.get_model_routes('test-model')['cta_html'].max_tokens:
+                text = 'Sorry, no.'
+            elif request['max_tokens'] == handler.get_model_routes('test-model')['page'].max_tokens:
+                text = json.dumps(page_content)
+            else:
+                text = json.dumps(sample_landing_content)
+            return {'body': MagicMock(read=lambda: json.dumps({
+                'content': [{'type': 'text', 'text': text}], 'stop_reason': 'end_turn'
+            }).encode())}
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = invoke_model
+        sections = {}
+        stats = {}
+        with patch.object(handler, 'ssm_client', ssm_client):
+            result = handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "test-model", strategy="parallel",
+                on_section=sections.__setitem__, stats=stats
+            )
+        
+        assert vars(result) == page_content
+        assert stats["strategy"] == "parallel_fallback"
+        assert json.loads(mock_bedrock.invoke_model.call_args.kwargs['body'])['max_tokens'] == 1024
+        # The fallback overwrites the sections the parallel attempt had already emitted
+        assert sections == page_content
+        
+        # Section requests still queued when cta_html failed were cancelled, so not every section was sent
+        requests = [json.loads(call.kwargs['body']) for call in mock_bedrock.invoke_model.call_args_list]
+        section_requests = [request for request in requests if request['max_tokens'] != 1024]
+        assert section_requests
+        for request in section_requests:
+            assert handler.SECTION_SYSTEM_PROMPT in json.dumps(request['system'])
+    
+    def test_parallel_failure_cancels_other_section_retries(self, ssm_client, ssm_parameters, sample_landing_content):
+        """Test that a failed section stops the other section requests from retrying while the fallback runs."""
+        import sys
+        import time
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from botocore.exceptions import ClientError
+        from models import ThemeInfo
+        
+        routes = handler.get_model_routes('test-model')
+        hero_attempts = []
+        
+        def invoke_model(**kwargs):
+            request = json.loads(kwargs['body'])
+            if request['max_tokens'] == routes['hero_html'].max_tokens:
+                hero_attempts.append(kwargs['modelId'])
+                raise ClientError(
+                    {"Error": {"Code": "InternalServerException"}, "ResponseMetadata": {"HTTPStatusCode": 500}},
+                    "InvokeModel"
+                )
+            if request['max_tokens'] == routes['cta_html'].max_tokens:
+                raise ClientError(
+                    {"Error": {"Code": "ValidationException"}, "ResponseMetadata": {"HTTPStatusCode": 400}},
+                    "InvokeModel"
+                )
+            return {'body': MagicMock(read=lambda: json.dumps({
+                'content': [{'type': 'text', 'text': json.dumps(sample_landing_content)}],
+                'stop_reason': 'end_turn'
+            }).encode())}
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = invoke_model
+        stats = {}
+        with patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'bedrock_rate_limiter', handler.AdaptiveRateLimiter(max_rate=100)):
+            result = handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "test-model", strategy="parallel", stats=stats
+            )
+            # Give an uncancelled hero request time for its next attempt (the first backoff is at least 1s)
+            time.sleep(1.5)
+        
+        assert vars(result) == sample_landing_content
+        assert stats["strategy"] == "parallel_fallback"
+        assert len(hero_attempts) <= 1
+
+    def test_throttled_primary_falls_back_to_lower_tier(self, monkeypatch, s3_client, test_bucket, ssm_client,
+                                                        ssm_parameters, lambda_context, sample_landing_content):
+        """Test that a primary model still throttled after a backoff hands the sub-task to the next tier."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from botocore.exceptions import ClientError
+        from generation_bundle import read_generation_bundle
+        from rate_limiter import AdaptiveRateLimiter
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        monkeypatch.setenv("BEDROCK_LLM_MODEL_ID", "primary-model")
+        
+        def invoke_model(**kwargs):
+            if kwargs['modelId'] == 'primary-model':
+                raise ClientError({"Error": {"Code": "ThrottlingException"},
+                                   "ResponseMetadata": {"HTTPStatusCode": 429}}, "InvokeModel")
+            return {'body': MagicMock(read=lambda: json.dumps({
+                'content': [{'type': 'text', 'text': json.dumps(sample_landing_content)}],
+                'stop_reason': 'end_turn'
+            }).encode())}
+        
+        mock_bedrock = MagicMock()
+        mock_bedrock.invoke_model.side_effect = invoke_model
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'bedrock_runtime', mock_bedrock), \
+             patch.object(handler, 'bedrock_rate_limiter', AdaptiveRateLimiter(max_rate=100)), \
+             patch('time.sleep'):
+            response = handler.handler({"prompt": "dental clinic"}, lambda_context)
+        
+        assert response["statusCode"] == 200
+        assert [call.kwargs['modelId'] for call in mock_bedrock.invoke_model.call_args_list] == [
+            'primary-model', 'primary-model', handler.BEDROCK_FAST_MODEL_ID
+        ]
+        
+        bundle = read_generation_bundle(s3_client, test_bucket, json.loads(response["body"])["generation_id"])
+        page = bundle["routing"]["page"]
+        assert (page["model_id"], page["tier"], page["fell_back_from"]) == (
+            handler.BEDROCK_FAST_MODEL_ID, 1, ['primary-model']
+        )
+        assert page["slo_met"] is True
+
+    def test_model_route_overrides(self):
+        """Test that routing overrides replace only the given fields and reject unknown sub-tasks."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        from model_router import load_routes
+        
+        routes = load_routes("primary", "fast", json.dumps({
+            "img_prompts": {"max_tokens": 120}, "cta_html": {"models": ["fast"]}, "page": {"throttle_retries": 0}
+        }))
+        
+        assert routes["page"].throttle_retries == 0
+        assert routes["hero_html"].throttle_retries == 1
+        assert routes["img_prompts"].models == ("fast",)
+        assert routes["img_prompts"].max_tokens == 120
+        assert routes["cta_html"].models == ("fast",)
+        assert routes["hero_html"].models == ("primary", "fast")
+        with pytest.raises(ValueError):
+            load_routes("primary", "fast", json.dumps({"footer_html": {"max_tokens": 10}}))
+
+    def test_prompt_caching_puts_static_prefix_first(self, fake_bedrock, sample_landing_content):
+        """Test that cache breakpoints follow the static prompt blocks and cache reads are counted."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import SSMPrompts, ThemeInfo
+        
+        prompts = SSMPrompts(system_prompt=handler.DEFAULT_SYSTEM_PROMPT, prompt_template=handler.DEFAULT_PROMPT_TEMPLATE)
+        fake = fake_bedrock(completion=json.dumps(sample_landing_content))
+        invoke_model = fake.invoke_model
+        fake.invoke_model = MagicMock(side_effect=invoke_model)
+        usages = []
+        with patch.object(handler, 'BEDROCK_PROMPT_CACHING', True), \
+             patch.object(handler, 'get_prompts_from_ssm', return_value=prompts):
+            for industry in ("dental clinic", "bakery"):
+                stats = {}
+                handler.generate_landing_content(industry, ThemeInfo(fonts=["Inter"]), fake, "test-model", stats=stats)
+                usages.append(stats["token_usage"])
+        
+        body = json.loads(fake.invoke_model.call_args.kwargs['body'])
+        assert body['system'] == [
+            {'type': 'text', 'text': handler.DEFAULT_SYSTEM_PROMPT, 'cache_control': {'type': 'ephemeral'}}
+        ]
+        static_block, variable_block = body['messages'][0]['content']
+        assert static_block['cache_control'] == {'type': 'ephemeral'}
+        assert "bakery" not in static_block['text']
+        assert variable_block == {'type': 'text', 'text': 'bakery Use fonts: Inter. '}
+        assert usages[0]['cache_creation_input_tokens'] > 0
+        assert usages[1]['cache_read_input_tokens'] == usages[0]['cache_creation_input_tokens']
+
+    def test_deployed_prompt_prefix_is_cacheable(self):
+        """Test that the prod SSM template keeps placeholders last and its static prefix reaches the cache minimum."""
+        import re
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import SSMPrompts
+        
+        with open('infrastructure/terraform/environment/prod/ssm_parameters/terragrunt.hcl') as f:
+            hcl = f.read()
+        values = dict(re.findall(r'"(/laas/bedrock/\w+)" = \{.*?value\s+= <<EOF\n(.*?)\nEOF', hcl, re.S))
+        prompts = SSMPrompts(
+            system_prompt=values[handler.PROMPT_PARAMETER_NAMES["system_prompt"]],
+            prompt_template=values[handler.PROMPT_PARAMETER_NAMES["prompt_template"]],
+        )
+        
+        assert prompts.prompt_template.rstrip().endswith("{industry}{theme_context}")
+        assert handler.estimate_cacheable_tokens(prompts) >= handler.PROMPT_CACHE_MIN_TOKENS
+
+    def test_stage_metrics_carry_model_and_outcome(self, s3_client, test_bucket, ssm_client, ssm_parameters,
+                                                   fake_bedrock, sample_landing_content):
+        """Test that each stage emits its latency, tokens and sizes with model_id and outcome dimensions."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        recorded = []
+        fake = fake_bedrock(completion=json.dumps(sample_landing_content))
+        stats = {}
+        with patch.object(handler, 'record_stage_metric',
+                          side_effect=lambda name, unit, value, **dims: recorded.append((name, value, dims))), \
+             patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client):
+            handler._fetch_prompts_from_ssm()
+            landing_content = handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), fake, "test-model", strategy="single", stats=stats
+            )
+            _, assets = handler.store_landing_assets(landing_content, test_bucket, ThemeInfo(), stats=stats)
+        
+        metrics_by_name = {}
+        for name, value, dims in recorded:
+            metrics_by_name.setdefault(name, []).append((value, dims))
+        
+        assert metrics_by_name["SSMFetchLatency"][0][1] == {"outcome": "success"}
+        for name in ("BedrockLatency", "BedrockTimeToFirstByte"):
+            assert [dims for _, dims in metrics_by_name[name]] == [{"model_id": "test-model", "outcome": "success"}]
+        assert metrics_by_name["BedrockCallLatency"][0][1] == {"model_id": "test-model", "outcome": "success"}
+        assert metrics_by_name["BedrockRetries"] == [(0, {"model_id": "test-model"})]
+        assert metrics_by_name["InputTokens"] == [(stats["token_usage"]["input_tokens"], {"model_id": "test-model"})]
+        assert metrics_by_name["LandingParseTime"][0][1] == {"outcome": "ok"}
+        bundle_bytes, dims = metrics_by_name["S3WriteBytes"][0]
+        assert dims == {"object": "bundle", "outcome": "success"}
+        assert bundle_bytes == s3_client.head_object(Bucket=test_bucket, Key=assets["bundle_key"])["ContentLength"]
+
+
+    def test_unparsable_completion_is_not_counted_as_success(self, ssm_client, ssm_parameters, fake_bedrock):
+        """Test that a completion without landing content is recorded as parse_error, with its tokens."""
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+        import handler
+        from models import ThemeInfo
+        
+        recorded = []
+        with patch.object(handler, 'record_stage_metric',
+                          side_effect=lambda name, unit, value, **dims: recorded.append((name, value, dims))), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             pytest.raises(handler.BedrockError):
+            handler.generate_landing_content(
+                "dental clinic", ThemeInfo(), fake_bedrock(completion="Sorry, I cannot help."), "test-model",
+                strategy="single"
+            )
+        
+        outcomes = [dims["outcome"] for name, _, dims in recorded if name == "BedrockLatency"]
+        assert outcomes == ["parse_error"]
+        assert [name for name, _, _ in recorded if name == "OutputTokens"] == ["OutputTokens"]
+
+class TestGenerationCache:
+    """Test the content-addressed generation cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    def test_cache_key_normalizes_prompt(self):
+        """Test that case and whitespace differences map to the same key."""
+        from generation_cache import build_cache_key
+        
+        key = build_cache_key("Dental  Clinic", " Use colors: #333. ", "model-a", "default")
+        
+        assert key == build_cache_key("dental clinic", "Use colors: #333.", "model-a", "default")
+        assert key != build_cache_key("dental clinic", "Use colors: #333.", "model-b", "default")
+        assert key != build_cache_key("dental clinic", "Use colors: #333.", "model-a", "prompt:2")
+
+    def test_s3_tier_round_trip_and_lru_eviction(self, s3_client, test_bucket):
+        """Test that entries survive a cold container via S3 and the LRU is capped."""
+        from generation_cache import GenerationCache
+        
+        cache = GenerationCache(s3_client, test_bucket, max_entries=1)
+        cache.put("key-a", {"hero_html": "a"})
+        cache.put("key-b", {"hero_html": "b"})
+        
+        assert list(cache._entries) == ["key-b"]
+        assert cache.get("key-b") == ({"hero_html": "b"}, "memory")
+        assert cache.get("key-a") == ({"hero_html": "a"}, "s3")
+        assert cache.get("missing") == (None, None)
+
+    def test_s3_tier_evicts_oldest_entries_beyond_cap(self, s3_client, test_bucket):
+        """Test that every evict_every writes the S3 tier is trimmed to s3_max_entries, oldest first."""
+        import time
+        from generation_cache import GenerationCache
+        
+        cache = GenerationCache(s3_client, test_bucket, max_entries=1, s3_max_entries=2, evict_every=2)
+        cache.put("key-a", {"hero_html": "key-a"})
+        cache.put("key-b", {"hero_html": "key-b"})
+        # LastModified has one-second resolution
+        time.sleep(1.05)
+        cache.put("key-c", {"hero_html": "key-c"})
+        
+        listed = s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/cache/")
+        assert len(listed["Contents"]) == 3
+        
+        cache.put("key-d", {"hero_html": "key-d"})
+        
+        listed = s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/cache/")
+        assert sorted(item["Key"] for item in listed["Contents"]) == [
+            "generated/cache/key-c.json", "generated/cache/key-d.json"
+        ]
+        assert cache.get("key-a") == (None, None)
+        assert cache.get("key-c") == ({"hero_html": "key-c"}, "s3")
+
+    def test_expired_entries_are_misses(self, s3_client, test_bucket):
+        """Test that entries past their TTL are not served from either tier."""
+        from generation_cache import GenerationCache
+        
+        cache = GenerationCache(s3_client, test_bucket, ttl_seconds=-1)
+        cache.put("key-a", {"hero_html": "a"})
+        
+        assert cache.get("key-a") == (None, None)
+
+    def test_hit_skips_bedrock(self, s3_client, test_bucket, ssm_client, ssm_parameters, sample_landing_content):
+        """Test that a cache hit returns stored content without invoking Bedrock."""
+        import handler
+        from models import ThemeInfo
+        
+        mock_bedrock = MagicMock()
+        with patch.object(handler, 'GENERATION_CACHE_ENABLED', True), \
+             patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, '_generation_caches', {}), \
+             patch.object(handler, 'generate_landing_content') as mock_generate:
+            mock_generate.return_value = handler.LandingContent(**sample_landing_content)
+            
+            first = handler.get_or_generate_landing_content(
+                "Dental clinic", ThemeInfo(), mock_bedrock, "model-a", test_bucket
+            )
+            second = handler.get_or_generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "model-a", test_bucket
+            )
+            handler.get_or_generate_landing_content(
+                "dental clinic", ThemeInfo(), mock_bedrock, "model-a", test_bucket, bypass_cache=True
+            )
+        
+        assert vars(first) == vars(second)
+        assert mock_generate.call_count == 2
+
+    def test_identical_in_flight_requests_share_one_generation(self, s3_client, test_bucket, ssm_client,
+                                                               ssm_parameters, sample_landing_content):
+        """Test that concurrent duplicates wait for the lease holder and reuse its cached result."""
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        import handler
+        from models import ThemeInfo
+        from single_flight import LocalLeaseStore, SingleFlight
+        
+        calls = []
+        calls_lock = threading.Lock()
+        
+        def slow_generate(*args, **kwargs):
+            with calls_lock:
+                calls.append(args[0])
+            time.sleep(0.3)
+            return handler.LandingContent(**sample_landing_content)
+        
+        stats = [{} for _ in range(5)]
+        with patch.object(handler, 'GENERATION_CACHE_ENABLED', True), \
+             patch.object(handler, 'SINGLE_FLIGHT_ENABLED', True), \
+             patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, '_generation_caches', {}), \
+             patch.object(handler, '_single_flights', {test_bucket: SingleFlight(LocalLeaseStore(), poll_interval=0.02)}), \
+             patch.object(handler, 'generate_landing_content', side_effect=slow_generate):
+            handler.get_prompts_from_ssm()
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                results = list(executor.map(
+                    lambda index: handler.get_or_generate_landing_content(
+                        "dental clinic", ThemeInfo(), MagicMock(), "model-a", test_bucket, stats=stats[index]
+                    ),
+                    range(5),
+                ))
+        
+        assert len(calls) == 1
+        assert all(vars(result) == sample_landing_content for result in results)
+        assert sorted(item.get("cache_hit", "") for item in stats) == ["", "single_flight", "single_flight",
+                                                                       "single_flight", "single_flight"]
+
+    def test_lease_passes_on_when_the_leader_fails_or_expires(self):
+        """Test that a waiter takes over from a failed leader and from an expired lease."""
+        import threading
+        import time
+        from single_flight import LocalLeaseStore, SingleFlight
+        
+        store = LocalLeaseStore()
+        single_flight = SingleFlight(store, lease_seconds=60, poll_interval=0.01)
+        leader_started = threading.Event()
+        leader_errors = []
+        
+        def failing_generation():
+            leader_started.set()
+            time.sleep(0.1)
+            raise RuntimeError("generation failed")
+        
+        def run_leader():
+            try:
+                single_flight.run("key", failing_generation, lambda: None, 5)
+            except RuntimeError as e:
+                leader_errors.append(e)
+        
+        leader = threading.Thread(target=run_leader)
+        leader.start()
+        leader_started.wait()
+        result = single_flight.run("key", lambda: "generated", lambda: None, 5)
+        leader.join()
+        
+        assert result == ("generated", "leader")
+        assert len(leader_errors) == 1
+        assert store.holder("key") is None
+        
+        # A crashed leader never releases its lease; it is taken over once expired
+        assert store.acquire("crashed", "dead-owner", ttl_seconds=0.05)
+        assert single_flight.run("crashed", lambda: "regenerated", lambda: None, 5) == ("regenerated", "leader")
+
+    @pytest.mark.skipif(
+        "IfNoneMatch" not in __import__("botocore.session").session.get_session()
+        .get_service_model("s3").operation_model("PutObject").input_shape.members,
+        reason="installed botocore predates S3 conditional writes",
+    )
+    def test_s3_lease_store_uses_conditional_put(self, s3_client, test_bucket):
+        """Test that only one owner can create a lease object until it is released."""
+        from single_flight import S3LeaseStore
+        
+        store = S3LeaseStore(s3_client, test_bucket)
+        
+        assert store.acquire("key", "owner-a", ttl_seconds=60)
+        assert not store.acquire("key", "owner-b", ttl_seconds=60)
+        assert store.holder("key")["owner"] == "owner-a"
+        store.release("key", "owner-b")
+        assert store.holder("key")["owner"] == "owner-a"
+        store.release("key", "owner-a")
+        assert store.acquire("key", "owner-b", ttl_seconds=60)
+
+
+    def test_request_history_ranks_combinations(self, s3_client, test_bucket):
+        """Test that buffered history is flushed as one object and ranked by popularity."""
+        from pregeneration import HistoryBuffer, summarize_history, top_combinations
+        
+        buffer = HistoryBuffer(flush_every=5)
+        for served_by in ("generated", "cache", "pregenerated"):
+            buffer.record("key-dental", "dental clinic", {"font_family": "Inter"}, served_by)
+        buffer.record("key-bakery", "bakery", {}, "generated")
+        assert not buffer.due()
+        buffer.record("key-dental", "dental clinic", {}, "cache")
+        assert buffer.due()
+        
+        keys = buffer.flush(s3_client, test_bucket)
+        summary = summarize_history(s3_client, test_bucket, hours=2)
+        top = top_combinations(summary, top_n=1)
+        
+        assert len(keys) == 1
+        assert buffer.pending == 0
+        assert summary["key-dental"]["requests"] == 4
+        assert summary["key-dental"]["served"]["pregenerated"] == 1
+        assert summary["key-dental"]["served"]["cache"] == 2
+        assert [item["cache_key"] for item in top] == ["key-dental"]
+        assert top[0]["request"] == {"prompt": "dental clinic", "theme_info": {"font_family": "Inter"}}
+
+    def test_request_history_stays_off_the_request_path(self, s3_client, test_bucket, lambda_context):
+        """Test that requests only write history when the per-container buffer is due."""
+        import handler
+        from pregeneration import HistoryBuffer, summarize_history
+        
+        with patch.object(handler, 'REQUEST_HISTORY_ENABLED', True), \
+             patch.object(handler, 'request_history', HistoryBuffer(flush_every=3)), \
+             patch.object(handler, 's3_client', s3_client):
+            for _ in range(2):
+                handler.record_request_history("key-dental", "dental clinic", handler.ThemeInfo(), "cache")
+                handler.flush_request_history(test_bucket)
+            assert "Contents" not in s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/history/")
+            
+            handler.record_request_history("key-dental", "dental clinic", handler.ThemeInfo(), "cache")
+            handler.flush_request_history(test_bucket)
+        
+        listing = s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/history/")
+        assert listing["KeyCount"] == 1
+        assert summarize_history(s3_client, test_bucket, hours=1)["key-dental"]["requests"] == 3
+
+    def test_request_history_flush_failure_keeps_counts(self, test_bucket):
+        """Test that counts survive a failed flush and are written by the next one."""
+        from pregeneration import HistoryBuffer
+        
+        buffer = HistoryBuffer()
+        buffer.record("key-dental", "dental clinic", {}, "generated")
+        failing = MagicMock()
+        failing.put_object.side_effect = RuntimeError("throttled")
+        
+        with pytest.raises(RuntimeError):
+            buffer.flush(failing, test_bucket)
+        
+        assert buffer.pending == 1
+        working = MagicMock()
+        assert len(buffer.flush(working, test_bucket)) == 1
+        assert '"key-dental":{"generated":1}' in working.put_object.call_args.kwargs["Body"]
+
+    def test_pregeneration_warms_cache_and_reports_cost_per_hit(self, s3_client, test_bucket, ssm_client,
+                                                                ssm_parameters, lambda_context,
+                                                                sample_landing_content):
+        """Test that a run pre-generates popular combinations whose later hits are counted against its cost."""
+        import handler
+        from models import ThemeInfo
+        from pregeneration import HistoryBuffer
+        
+        def generate(prompt, theme_info, client, model_id, deadline=None, stats=None):
+            if stats is not None:
+                stats["token_usage"] = {"input_tokens": 1000, "output_tokens": 1000}
+            return handler.LandingContent(**sample_landing_content)
+        
+        with patch.object(handler, 'GENERATION_CACHE_ENABLED', True), \
+             patch.object(handler, 'REQUEST_HISTORY_ENABLED', True), \
+             patch.object(handler, 'request_history', HistoryBuffer()), \
+             patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'generate_landing_content', side_effect=generate) as mock_generate, \
+             patch.dict('os.environ', {"OUTPUT_BUCKET": test_bucket, "BEDROCK_LLM_MODEL_ID": "model-a"}):
+            # Yesterday's traffic, served live with the cache since emptied
+            with patch.object(handler, '_generation_caches', {}):
+                handler.get_or_generate_landing_content("dental clinic", ThemeInfo(), MagicMock(), "model-a",
+                                                        test_bucket, bypass_cache=True)
+                handler.get_or_generate_landing_content("bakery", ThemeInfo(), MagicMock(), "model-a",
+                                                        test_bucket, bypass_cache=True)
+                handler.get_or_generate_landing_content("dental clinic", ThemeInfo(), MagicMock(), "model-a",
+                                                        test_bucket, bypass_cache=True)
+            for item in s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/cache/")["Contents"]:
+                s3_client.delete_object(Bucket=test_bucket, Key=item["Key"])
+            
+            with patch.object(handler, '_generation_caches', {}):
+                first_run = handler.run_pregeneration({"top_n": 1}, lambda_context)
+                handler.get_or_generate_landing_content("Dental  Clinic", ThemeInfo(), MagicMock(), "model-a",
+                                                        test_bucket)
+                second_run = handler.run_pregeneration({"top_n": 1}, lambda_context)
+        
+        cache_key = handler.generation_cache_key("dental clinic", ThemeInfo(), "model-a")
+        entry, _ = handler.get_generation_cache(test_bucket).lookup(cache_key)
+        
+        assert first_run["pregenerated"] == 1
+        assert first_run["live_hits"] == 0
+        assert second_run["cached"] == 1
+        assert mock_generate.call_count == 4
+        assert entry["origin"] == "pregenerated"
+        assert second_run["live_hits"] == 1
+        assert second_run["pregeneration_cost_usd"] == pytest.approx(0.018)
+        assert second_run["cost_per_hit_usd"] == pytest.approx(0.018)
+
+
+class TestPageImages:
+    """Test rendering img_prompts into stored, responsive image variants."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    def test_images_render_concurrently_into_content_hashed_variants(self, monkeypatch, fake_bedrock, s3_client,
+                                                                      test_bucket, lambda_context,
+                                                                      sample_landing_content):
+        """Test that all prompts render with bounded parallelism and their URLs land in the bundle."""
+        import hashlib
+        import handler
+        from fake_bedrock import fixed_latency
+        from generation_bundle import read_generation_bundle
+        from image_pipeline import supported_formats
+        from models import GenerationRequest
+        
+        fake = fake_bedrock(latency=fixed_latency(100))
+        monkeypatch.setattr(handler, 'IMAGE_GENERATION_ENABLED', True)
+        monkeypatch.setattr(handler, 'IMAGE_MODEL_ID', "amazon.titan-image-generator-v1")
+        monkeypatch.setattr(handler, 'IMAGE_MAX_CONCURRENCY', 2)
+        monkeypatch.setattr(handler, 'IMAGE_SIZE', (64, 40))
+        monkeypatch.setattr(handler, 'IMAGE_WIDTHS', (32, 64))
+        monkeypatch.setattr(handler, 'CLOUDFRONT_DOMAIN', "cdn.example.com")
+        monkeypatch.setattr(handler, 'bedrock_runtime', fake)
+        monkeypatch.setattr(handler, 's3_client', s3_client)
+        monkeypatch.setattr(handler, 'bedrock_rate_limiter', handler.AdaptiveRateLimiter(max_rate=1000))
+        monkeypatch.setattr(handler, 'get_or_generate_landing_content',
+                            lambda *args, **kwargs: handler.LandingContent(**sample_landing_content))
+        
+        generation_id, _ = handler.generate_and_store_landing(
+            GenerationRequest(prompt="dental clinic"), test_bucket, "model-a", "gen-img", {},
+            deadline=handler.Deadline.from_context(lambda_context)
+        )
+        bundle = read_generation_bundle(s3_client, test_bucket, generation_id)
+        images = bundle["images"]
+        
+        assert bundle["content"]["hero_html"].startswith('<div class="lp-hero"><h1>Test Hero</h1><picture>')
+        assert f'src="{images[0]["src"]}"' in bundle["content"]["hero_html"]
+        assert f'src="{images[1]["src"]}"' in bundle["content"]["features_html"]
+        assert fake.stats["images"] == len(sample_landing_content["img_prompts"])
+        assert fake.stats["peak_in_flight"] == 2
+        assert [image["prompt"] for image in images] == sample_landing_content["img_prompts"]
+        formats = supported_formats(handler.IMAGE_FORMATS)
+        for image in images:
+            assert image["outcome"] == "success"
+            assert image["src"].startswith("https://cdn.example.com/generated/gen-img/images/")
+            assert set(image["srcset"]) == set(formats)
+            widest = [variant for variant in image["variants"] if variant["format"] == formats[0]][-1]
+            assert image["src"] == widest["url"]
+            assert image["saved_bytes"] == image["png_bytes"] - widest["bytes"]
+            for variant in image["variants"]:
+                body = s3_client.get_object(Bucket=test_bucket, Key=variant["key"])["Body"].read()
+                assert hashlib.sha256(body).hexdigest()[:16] in variant["key"]
+                assert len(body) == variant["bytes"]
+
+    def test_failed_and_late_images_do_not_fail_the_page(self):
+        """Test that a failing prompt is reported and prompts without time left are skipped."""
+        import base64
+        import sys
+        sys.path.append('tests/benchmarks')
+        from fake_bedrock import gradient_png
+        from image_pipeline import render_images
+        
+        stored = {}
+        
+        def invoke(body):
+            if "filtered" in body["textToImageParams"]["text"]:
+                return {"images": [], "error": "This request has been blocked by our content filters."}
+            return {"images": [base64.b64encode(gradient_png(16, 8)).decode("ascii")]}
+        
+        results = render_images(
+            ["office", "filtered prompt"], "gen-1", "amazon.titan-image-generator-v1",
+            invoke, lambda key, body, content_type: stored.update({key: body}), lambda key: key,
+            widths=(16,), size=(16, 8)
+        )
+        late = render_images(
+            ["office"], "gen-1", "amazon.titan-image-generator-v1", invoke, lambda *args: None, lambda key: key,
+            time_left=lambda: 1.0, min_seconds=10.0
+        )
+        
+        assert [result.outcome for result in results] == ["success", "failed"]
+        assert "content filters" in results[1].error
+        assert sorted(stored) == sorted(variant.key for variant in results[0].variants)
+        assert late[0].outcome == "skipped"
+
+
+    def test_images_are_written_into_their_sections(self):
+        """Test that rendered images replace the section's <img> tags in order, or are added to the section."""
+        from image_pipeline import apply_images
+        
+        def image(index, outcome="success"):
+            return {
+                "index": index, "prompt": f"prompt {index}", "outcome": outcome, "src": f"https://cdn/{index}.avif",
+                "srcset": {"avif": f"https://cdn/{index}-480w.avif 480w", "webp": f"https://cdn/{index}-480w.webp 480w"},
+            }
+        
+        content = {
+            "hero_html": '<section class="lp-hero"><h1>Hi</h1></section>',
+            "features_html": '<div><img src="https://stock/a.jpg" alt="A" class="lp-img"><img src=\'https://stock/b.jpg\' alt="B"/></div>',
+            "cta_html": '<div class="lp-cta"><img src="https://stock/c.jpg" alt="C"></div>',
+            "img_prompts": ["prompt 0", "prompt 1", "prompt 2", "prompt 3"],
+        }
+        
+        result = apply_images(content, [image(0), image(1), image(2, "failed"), image(3, "reused")])
+        
+        assert result["hero_html"] == (
+            '<section class="lp-hero"><h1>Hi</h1><picture>'
+            '<source type="image/avif" srcset="https://cdn/0-480w.avif 480w" sizes="100vw">'
+            '<source type="image/webp" srcset="https://cdn/0-480w.webp 480w" sizes="100vw">'
+            '<img class="lp-image" src="https://cdn/0.avif" alt="prompt 0" loading="lazy"></picture></section>'
+        )
+        assert result["features_html"].count("<picture>") == 2
+        assert '<img src="https://cdn/1.avif" alt="A" class="lp-img"></picture>' in result["features_html"]
+        assert '<img src="https://cdn/3.avif" alt="B"/></picture></div>' in result["features_html"]
+        assert "stock" not in result["features_html"]
+        assert result["cta_html"] == content["cta_html"]
+        assert content["hero_html"] == '<section class="lp-hero"><h1>Hi</h1></section>'
+
+    def test_identical_images_are_stored_once(self):
+        """Test that prompts rendering the same bytes share their variants and write each key once."""
+        import base64
+        import sys
+        sys.path.append('tests/benchmarks')
+        from fake_bedrock import gradient_png
+        from image_pipeline import render_images
+        
+        writes = []
+        png = base64.b64encode(gradient_png(16, 8)).decode("ascii")
+        results = render_images(
+            ["office", "office", "team"], "gen-1", "amazon.titan-image-generator-v1",
+            lambda body: {"images": [png]}, lambda key, body, content_type: writes.append(key), lambda key: key,
+            widths=(16,), size=(16, 8), max_concurrency=3
+        )
+        
+        assert [result.outcome for result in results] == ["success"] * 3
+        assert len({result.src for result in results}) == 1
+        assert sorted(writes) == sorted(variant.key for variant in results[0].variants)
+
+    def test_image_index_matches_reworded_prompts_across_containers(self, s3_client, test_bucket):
+        """Test that a reworded prompt finds an image indexed by another container and a new one misses."""
+        pytest.importorskip("numpy")
+        import sys
+        sys.path.append('tests/benchmarks')
+        from fake_bedrock import hashed_embedding
+        from image_index import ImageIndex
+        
+        writer = ImageIndex(s3_client, test_bucket, hashed_embedding, threshold=0.8)
+        writer.add("modern dental office with natural light", {"src": "https://cdn/a.avif"})
+        writer.add("bakery storefront at night", {"src": "https://cdn/b.avif"})
+        
+        reader = ImageIndex(s3_client, test_bucket, hashed_embedding, threshold=0.8)
+        match, similarity = reader.find("Modern dental office with lots of natural light")
+        miss, _ = reader.find("construction crew on a building site")
+        
+        assert match["image"]["src"] == "https://cdn/a.avif"
+        assert similarity >= 0.8
+        assert miss is None
+        assert len(reader) == 2
+
+    def test_image_index_compaction_folds_deltas_into_snapshot(self, s3_client, test_bucket):
+        """Test that compaction replaces deltas with a snapshot and later appends still reach readers."""
+        pytest.importorskip("numpy")
+        import sys
+        sys.path.append('tests/benchmarks')
+        from fake_bedrock import hashed_embedding
+        from image_index import ImageIndex
+        from single_flight import LocalLeaseStore
+        
+        lease_store = LocalLeaseStore()
+        index = ImageIndex(s3_client, test_bucket, hashed_embedding, compact_after=3, lease_store=lease_store)
+        compactions = [index.add(f"prompt number {n}", {"src": f"https://cdn/{n}.webp"}) for n in range(4)]
+        
+        listed = s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/image-index/")["Contents"]
+        keys = sorted(item["Key"] for item in listed)
+        reader = ImageIndex(s3_client, test_bucket, hashed_embedding)
+        
+        assert compactions == [False, False, True, False]
+        assert keys[-1] == "generated/image-index/snapshot.npz"
+        assert len([key for key in keys if "/deltas/" in key]) == 1
+        assert reader.find("prompt number 3")[0]["image"]["src"] == "https://cdn/3.webp"
+        assert len(reader) == 4
+        
+        # Another container holding the lease makes compaction a no-op
+        assert lease_store.acquire("image-index-compaction", "other", ttl_seconds=60)
+        assert index.compact() is False
+
+    def test_similar_prompt_reuses_rendered_image(self, monkeypatch, fake_bedrock, s3_client, test_bucket):
+        """Test that a second page with reworded prompts reuses the first page's images instead of rendering."""
+        pytest.importorskip("numpy")
+        import handler
+        from single_flight import LocalLeaseStore
+        
+        fake = fake_bedrock()
+        monkeypatch.setattr(handler, 'IMAGE_MODEL_ID', "amazon.titan-image-generator-v1")
+        monkeypatch.setattr(handler, 'IMAGE_SIZE', (32, 16))
+        monkeypatch.setattr(handler, 'IMAGE_WIDTHS', (32,))
+        monkeypatch.setattr(handler, 'IMAGE_REUSE_ENABLED', True)
+        monkeypatch.setattr(handler, 'IMAGE_REUSE_THRESHOLD', 0.8)
+        monkeypatch.setattr(handler, '_image_indexes', {})
+        monkeypatch.setattr(handler, 'S3LeaseStore', lambda *args: LocalLeaseStore())
+        monkeypatch.setattr(handler, 'bedrock_runtime', fake)
+        monkeypatch.setattr(handler, 's3_client', s3_client)
+        monkeypatch.setattr(handler, 'bedrock_rate_limiter', handler.AdaptiveRateLimiter(max_rate=1000))
+        
+        first = handler.generate_page_images(["modern dental office with natural light"], test_bucket, "gen-1")
+        second = handler.generate_page_images(
+            ["modern dental office with lots of natural light", "bakery storefront at night"], test_bucket, "gen-2"
+        )
+        
+        assert fake.stats["images"] == 2
+        assert [image["outcome"] for image in second] == ["reused", "success"]
+        assert second[0]["src"] == first[0]["src"]
+        assert second[0]["reused_from"] == "modern dental office with natural light"
+        assert second[0]["similarity"] >= 0.8
+
+class TestGenerationBundle:
+    """Test the compressed generation bundle format."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    def test_bundle_round_trip(self, s3_client, test_bucket, sample_landing_content, sample_theme_info):
+        """Test that a bundle is stored as one gzip object and read back intact."""
+        from generation_bundle import build_bundle, read_generation_bundle, write_generation_bundle
+        
+        bundle = build_bundle(
+            "gen-1", sample_landing_content, sample_theme_info,
+            model_id="model-a", token_usage={"input_tokens": 10, "output_tokens": 20},
+            timings={"bedrock_ms": 1234.5}
+        )
+        key = write_generation_bundle(s3_client, test_bucket, bundle)
+        
+        stored = s3_client.get_object(Bucket=test_bucket, Key=key)
+        assert stored["ContentEncoding"] == "gzip"
+        assert s3_client.list_objects_v2(Bucket=test_bucket, Prefix="generated/gen-1/")["KeyCount"] == 1
+        
+        result = read_generation_bundle(s3_client, test_bucket, "gen-1")
+        assert result["format_version"] == 1
+        assert result["content"] == sample_landing_content
+        assert result["theme_info"] == sample_theme_info
+        assert result["token_usage"]["output_tokens"] == 20
+
+    def test_reads_legacy_two_file_layout(self, s3_client, test_bucket, sample_landing_content, sample_theme_info):
+        """Test that generations stored before the bundle format can still be read."""
+        from generation_bundle import read_generation_bundle
+        
+        s3_client.put_object(Bucket=test_bucket, Key="generated/old/landing_content.json",
+                             Body=json.dumps(sample_landing_content))
+        s3_client.put_object(Bucket=test_bucket, Key="generated/old/theme_info.json",
+                             Body=json.dumps(sample_theme_info))
+        
+        result = read_generation_bundle(s3_client, test_bucket, "old")
+        
+        assert result["format_version"] == 0
+        assert result["content"] == sample_landing_content
+        assert result["theme_info"] == sample_theme_info
+
+    def test_store_writes_only_the_bundle_by_default(self, s3_client, test_bucket,
+                                                     sample_landing_content, sample_theme_info):
+        """Test that a generation is stored with a single PUT unless legacy writes are enabled."""
+        from types import SimpleNamespace
+        import handler
+        
+        with patch.object(handler, 's3_client', s3_client):
+            generation_id, assets = handler.store_landing_assets(
+                SimpleNamespace(**sample_landing_content), test_bucket, SimpleNamespace(**sample_theme_info)
+            )
+        
+        assert handler.WRITE_LEGACY_ASSETS is False
+        assert assets == {"bundle_key": f"generated/{generation_id}/bundle.json.gz"}
+        listed = s3_client.list_objects_v2(Bucket=test_bucket, Prefix=f"generated/{generation_id}/")
+        assert [item["Key"] for item in listed["Contents"]] == [assets["bundle_key"]]
+
+    def test_store_writes_legacy_assets_when_enabled(self, s3_client, test_bucket,
+                                                     sample_landing_content, sample_theme_info):
+        """Test that the legacy pair and its keys are written next to the bundle when enabled."""
+        from types import SimpleNamespace
+        import handler
+        
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'WRITE_LEGACY_ASSETS', True):
+            generation_id, assets = handler.store_landing_assets(
+                SimpleNamespace(**sample_landing_content), test_bucket, SimpleNamespace(**sample_theme_info)
+            )
+        
+        assert assets == {
+            "bundle_key": f"generated/{generation_id}/bundle.json.gz",
+            "content_key": f"generated/{generation_id}/landing_content.json",
+            "theme_key": f"generated/{generation_id}/theme_info.json",
+        }
+        stored = s3_client.get_object(Bucket=test_bucket, Key=assets["content_key"])["Body"].read()
+        assert json.loads(stored) == sample_landing_content
+
+
+class TestAsyncJobs:
+    """Test the 202 + status object job mode."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    def test_async_request_is_acknowledged_then_completed(self, monkeypatch, fake_bedrock, s3_client, test_bucket,
+                                                           ssm_client, ssm_parameters, lambda_context,
+                                                           sample_landing_content):
+        """Test that an async request returns 202 at once and the self-invocation records every stage."""
+        import handler
+        from job_status import read_job_status
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        mock_lambda = MagicMock()
+        fake = fake_bedrock(completion=json.dumps(sample_landing_content))
+        written_states = []
+        write_job_status = handler.write_job_status
+        
+        def recording_write(client, bucket, generation_id, state, **fields):
+            written_states.append(state)
+            return write_job_status(client, bucket, generation_id, state, **fields)
+        
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'ssm_client', ssm_client), \
+             patch.object(handler, 'lambda_client', mock_lambda), \
+             patch.object(handler, 'bedrock_runtime', fake), \
+             patch.object(handler, 'write_job_status', side_effect=recording_write):
+            response = handler.handler({"prompt": "dental clinic", "async": True}, lambda_context)
+            
+            body = json.loads(response["body"])
+            assert response["statusCode"] == 202
+            assert fake.stats["calls"] == 0
+            assert read_job_status(s3_client, test_bucket, body["generation_id"])["status"] == "queued"
+            
+            invoke_kwargs = mock_lambda.invoke.call_args.kwargs
+            assert invoke_kwargs["InvocationType"] == "Event"
+            assert invoke_kwargs["FunctionName"] == lambda_context.invoked_function_arn
+            handler.handler(json.loads(invoke_kwargs["Payload"]), lambda_context)
+        
+        status = read_job_status(s3_client, test_bucket, body["generation_id"])
+        assert written_states == ["queued", "generating", "storing", "done"]
+        assert status["status"] == "done"
+        assert "bundle_key" in status["assets"]
+
+    def test_failed_job_is_recorded_not_raised(self, monkeypatch, s3_client, test_bucket, lambda_context):
+        """Test that a worker failure ends in a failed status instead of a retried invocation."""
+        import handler
+        from job_status import read_job_status
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        job = {"generation_id": "gen-1", "request": {"prompt": "dental clinic"}}
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'get_or_generate_landing_content', side_effect=handler.BedrockError("boom")):
+            result = handler.handler({handler.ASYNC_JOB_EVENT_KEY: job}, lambda_context)
+        
+        status = read_job_status(s3_client, test_bucket, "gen-1")
+        assert result == {"generation_id": "gen-1", "status": "failed"}
+        assert (status["status"], status["error"]) == ("failed", "boom")
+        assert read_job_status(s3_client, test_bucket, "unknown") is None
+
+    def test_duplicate_delivery_is_skipped(self, monkeypatch, s3_client, test_bucket, lambda_context):
+        """Test that a job event delivered after the job has started does not generate again."""
+        import handler
+        from job_status import read_job_status, write_job_status
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        write_job_status(s3_client, test_bucket, "gen-1", "generating")
+        job = {"generation_id": "gen-1", "request": {"prompt": "dental clinic"}}
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'get_or_generate_landing_content') as generate:
+            result = handler.handler({handler.ASYNC_JOB_EVENT_KEY: job}, lambda_context)
+        
+        assert result == {"generation_id": "gen-1", "status": "skipped"}
+        generate.assert_not_called()
+        assert read_job_status(s3_client, test_bucket, "gen-1")["status"] == "generating"
+
+    def test_status_changes_are_pushed_to_subscribers(self, monkeypatch, s3_client, test_bucket, lambda_context,
+                                                      sample_landing_content):
+        """Test that the worker pushes every stage to the progress channel as well as writing it."""
+        import handler
+        from progress_channel import LocalProgressChannel
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        channel = LocalProgressChannel()
+        subscriber = channel.subscribe("gen-1")
+        job = {"generation_id": "gen-1", "request": {"prompt": "dental clinic"}}
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'progress_channel', channel), \
+             patch.object(handler, 'get_or_generate_landing_content',
+                          return_value=handler.LandingContent(**sample_landing_content)):
+            handler.handler({handler.ASYNC_JOB_EVENT_KEY: job}, lambda_context)
+        
+        pushed = [subscriber.get_nowait() for _ in range(subscriber.qsize())]
+        assert [message["status"] for message in pushed] == ["generating", "storing", "done"]
+        assert pushed[-1]["assets"]["bundle_key"]
+        assert channel.publish("other-job", {"status": "done"}) == 0
+
+    def test_generation_progress_reaches_the_web_clients_job(self, monkeypatch, s3_client, test_bucket,
+                                                             lambda_context, sample_landing_content):
+        """Test that a request carrying the orchestrator's job_id pushes to that job in the client's schema."""
+        import handler
+        from progress_channel import WebSocketProgressChannel
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        management = MagicMock()
+        channel = WebSocketProgressChannel(management, s3_client, test_bucket)
+        # What progress_ws records when web/chat.js connects with ?job_id=<orchestrator job_id>
+        channel.subscribe("job-123", "conn-1")
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'progress_channel', channel), \
+             patch.object(handler, 'get_or_generate_landing_content',
+                          return_value=handler.LandingContent(**sample_landing_content)):
+            response = handler.handler({"prompt": "dental clinic", "job_id": "job-123"}, lambda_context)
+            rejected = handler.handler({"prompt": "dental clinic", "job_id": "../job"}, lambda_context)
+        
+        pushed = [json.loads(call.kwargs["Data"]) for call in management.post_to_connection.call_args_list]
+        assert response["statusCode"] == 200
+        assert rejected["statusCode"] == 400
+        assert {call.kwargs["ConnectionId"] for call in management.post_to_connection.call_args_list} == {"conn-1"}
+        # handleStatusUpdate shows processing steps; only completed and failed end the watch
+        assert [(message["status"], message["data"]["step"]) for message in pushed] == [
+            ("processing", 2), ("processing", 2), ("processing", 3)
+        ]
+        assert all(message["job_id"] == "job-123" for message in pushed)
+        assert pushed[-1]["data"]["generation_id"] == json.loads(response["body"])["generation_id"]
+        assert pushed[-1]["data"]["assets"]["bundle_key"]
+
+    def test_async_failure_is_pushed_to_the_web_clients_job(self, monkeypatch, s3_client, test_bucket,
+                                                            lambda_context):
+        """Test that an async generation failing ends the watching client's job as failed."""
+        import handler
+        from progress_channel import LocalProgressChannel
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", test_bucket)
+        channel = LocalProgressChannel()
+        subscriber = channel.subscribe("job-123")
+        job = {"generation_id": "gen-1", "job_id": "job-123", "request": {"prompt": "dental clinic"}}
+        with patch.object(handler, 's3_client', s3_client), \
+             patch.object(handler, 'progress_channel', channel), \
+             patch.object(handler, 'get_or_generate_landing_content', side_effect=handler.BedrockError("throttled")):
+            handler.handler({handler.ASYNC_JOB_EVENT_KEY: job}, lambda_context)
+        
+        pushed = [subscriber.get_nowait() for _ in range(subscriber.qsize())]
+        assert [message["status"] for message in pushed] == ["processing", "failed"]
+        assert "throttled" in pushed[-1]["error"]
+
+    def test_progress_channel_creates_s3_client_without_deadlock(self):
+        """Test that the first progress channel can be built before the S3 client exists."""
+        import threading
+        import handler
+        
+        result = []
+        with patch.object(handler, 's3_client', None), \
+             patch.object(handler, 'progress_channel', None), \
+             patch.object(handler, 'PROGRESS_WS_ENDPOINT', 'https://ws.example.com/prod'), \
+             patch.object(handler.boto3, 'client', return_value=MagicMock()):
+            worker = threading.Thread(target=lambda: result.append(handler.get_progress_channel("bucket")), daemon=True)
+            worker.start()
+            worker.join(timeout=5)
+        
+        assert not worker.is_alive()
+        assert isinstance(result[0], handler.WebSocketProgressChannel)
+
+    def test_websocket_channel_drops_gone_connections(self, s3_client, test_bucket):
+        """Test that publishing reaches subscribed connections and unsubscribes closed ones."""
+        from botocore.exceptions import ClientError
+        from progress_channel import WebSocketProgressChannel
+        
+        management = MagicMock()
+        
+        def post_to_connection(ConnectionId, Data):
+            if ConnectionId == "closed":
+                raise ClientError({"Error": {"Code": "GoneException"}}, "PostToConnection")
+        
+        management.post_to_connection.side_effect = post_to_connection
+        channel = WebSocketProgressChannel(management, s3_client, test_bucket)
+        channel.subscribe("gen-1", "open")
+        channel.subscribe("gen-1", "closed")
+        
+        assert channel.publish("gen-1", {"status": "generating"}) == 1
+        assert json.loads(management.post_to_connection.call_args_list[-1].kwargs["Data"]) == {"status": "generating"}
+        assert channel.publish("gen-1", {"status": "done"}) == 1
+        assert channel.unsubscribe("closed") is None
+        assert channel.unsubscribe("open") == "gen-1"
+        assert s3_client.list_objects_v2(Bucket=test_bucket, Prefix="status/")["KeyCount"] == 0
+
+    def test_websocket_channel_reaches_subscribers_past_one_listing_page(self, s3_client, test_bucket):
+        """Test that publishing pages through the subscriptions instead of stopping at 1,000."""
+        from progress_channel import WebSocketProgressChannel, subscription_prefix
+        
+        for index in range(1005):
+            s3_client.put_object(Bucket=test_bucket, Key=f"{subscription_prefix('gen-1')}conn-{index:04d}", Body=b"")
+        management = MagicMock()
+        channel = WebSocketProgressChannel(management, s3_client, test_bucket)
+        
+        assert channel.publish("gen-1", {"status": "done"}) == 1005
+        assert management.post_to_connection.call_args.kwargs["ConnectionId"] == "conn-1004"
+
+
+def load_completion_corpus():
+    with open('tests/benchmarks/completion_corpus.json') as f:
+        return json.load(f)
+
+
+class TestAdmissionControl:
+    """Test per-tenant budgets and weighted sharing of the Bedrock capacity."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    def test_tenant_budgets_are_isolated_and_settled(self):
+        """Test that one tenant running out of budget does not affect another, and settling returns tokens."""
+        from admission import AdmissionController, LocalAdmissionStore, TenantBudget, WINDOW_SECONDS
+        
+        controller = AdmissionController(
+            LocalAdmissionStore(), default_budget=TenantBudget(2, 1000), capacity=TenantBudget(100, 100000)
+        )
+        
+        assert controller.admit("tenant-a", tokens=400).admitted
+        second = controller.admit("tenant-a", tokens=400)
+        refused = controller.admit("tenant-a", tokens=400)
+        
+        assert second.admitted
+        assert not refused.admitted
+        assert refused.reason == "tenant_requests"
+        assert 1 <= refused.retry_after <= WINDOW_SECONDS
+        assert controller.admit("tenant-b", tokens=900).admitted
+        
+        # The second request used 100 tokens instead of 400, so a 600-token request fits again
+        controller.tenant_budgets = {"tenant-a": {"requests_per_window": 3}}
+        assert controller.admit("tenant-a", tokens=600).reason == "tenant_tokens"
+        controller.settle(second.ticket, 100)
+        assert controller.admit("tenant-a", tokens=500).admitted
+
+    def test_batch_is_limited_to_its_share_of_capacity(self):
+        """Test that batch work only fills its weighted share, leaving the rest for interactive requests."""
+        from admission import AdmissionController, LocalAdmissionStore, TenantBudget
+        
+        controller = AdmissionController(
+            LocalAdmissionStore(), default_budget=TenantBudget(100, 100000), capacity=TenantBudget(6, 100000),
+            class_weights={"interactive": 3.0, "batch": 1.0}
+        )
+        
+        batch = [controller.admit(f"bulk-{index}", "batch") for index in range(3)]
+        interactive = [controller.admit(f"user-{index}", "interactive") for index in range(5)]
+        
+        assert [decision.admitted for decision in batch] == [True, True, False]
+        assert batch[2].reason == "capacity_requests"
+        assert [decision.admitted for decision in interactive] == [True, True, True, True, False]
+
+    def test_dynamodb_store_applies_conditional_counters(self, aws_credentials):
+        """Test that the shared store refuses an increment past the limit and accepts refunds."""
+        import boto3
+        from moto import mock_dynamodb
+        from admission import DynamoDBAdmissionStore
+        
+        with mock_dynamodb():
+            client = boto3.client("dynamodb", region_name="us-east-1")
+            client.create_table(
+                TableName="admission",
+                KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": "pk", "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            store = DynamoDBAdmissionStore(client, "admission")
+            
+            assert store.try_add("tenant:a#tokens#1", 600, 1000, 120)
+            assert not store.try_add("tenant:a#tokens#1", 600, 1000, 120)
+            store.add("tenant:a#tokens#1", -300, 120)
+            assert store.try_add("tenant:a#tokens#1", 600, 1000, 120)
+            
+            item = client.get_item(TableName="admission", Key={"pk": {"S": "tenant:a#tokens#1"}})["Item"]
+            assert item["used"] == {"N": "900"}
+
+    def test_over_budget_request_gets_429_with_retry_after(self, monkeypatch, fake_bedrock, lambda_context,
+                                                            sample_landing_content):
+        """Test that a tenant without budget is refused before Bedrock is called."""
+        import handler
+        from admission import AdmissionController, LocalAdmissionStore, TenantBudget
+        
+        monkeypatch.setenv("OUTPUT_BUCKET", "unused-bucket")
+        controller = AdmissionController(
+            LocalAdmissionStore(), default_budget=TenantBudget(0, 100000), capacity=TenantBudget(100, 100000)
+        )
+        fake = fake_bedrock(completion=json.dumps(sample_landing_content))
+        event = {
+            "body": json.dumps({"prompt": "dental clinic", "tenant_id": "someone-else"}),
+            "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "tenant-a"}}}},
+        }
+        
+        with patch.object(handler, 'admission_controller', controller), \
+             patch.object(handler, 'ADMISSION_MAX_WAIT_SECONDS', 0), \
+             patch.object(handler, 'bedrock_runtime', fake):
+            response = handler.handler(event, lambda_context)
+        
+        body = json.loads(response["body"])
+        assert response["statusCode"] == 429
+        assert int(response["headers"]["Retry-After"]) == body["retry_after"] >= 1
+        assert body["reason"] == "tenant_requests"
+        assert fake.stats["calls"] == 0
+        assert handler.tenant_id_from_event(event, "someone-else") == "tenant-a"
+        assert handler.tenant_id_from_event({}, "orchestrator-tenant") == "orchestrator-tenant"
+
+    def test_admission_without_table_is_disabled(self):
+        """Test that admission control without a shared table is turned off instead of counting per container."""
+        import handler
+        
+        with patch.object(handler, 'admission_controller', None), \
+             patch.object(handler, 'ADMISSION_CONTROL', True), \
+             patch.object(handler, 'ADMISSION_TABLE', ''), \
+             patch.object(handler.logger, 'warning') as warning:
+            assert handler.get_admission_controller() is None
+            assert handler.admission_controller is None
+        
+        warning.assert_called_once_with("Admission control disabled: ADMISSION_TABLE is not set")
+
+
+class TestJSONExtraction:
+    """Test JSON extraction from model completions."""
+
+    @pytest.fixture(autouse=True)
+    def setup_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/lambda/build')
+
+    @pytest.mark.parametrize("case", load_completion_corpus(), ids=lambda case: case["name"])
+    def test_completion_corpus(self, case):
+        """Test parse_landing_content against recorded completion shapes."""
+        import handler
+        
+        if case["valid"]:
+            assert handler.parse_landing_content(case["completion"]).hero_html == case["hero_html"]
+        else:
+            with pytest.raises(handler.LandingValidationError):
+                handler.parse_landing_content(case["completion"])
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 16, 1000])
+    def test_chunked_scan_matches_whole_text(self, chunk_size):
+        """Test that feeding a completion in chunks finds the same objects as one pass."""
+        from json_extract import JSONObjectScanner
+        
+        text = 'Use {industry} here } then {"a": "x{y}\\"}", "b": {"c": [1, {"d": 2}]}} and {"e": 3}'
+        scanner = JSONObjectScanner()
+        found = []
+        for start in range(0, len(text), chunk_size):
+            found.extend(scanner.feed(text[start:start + chunk_size]))
+        
+        assert found == [{"a": 'x{y}"}', "b": {"c": [1, {"d": 2}]}}, {"e": 3}]
+        assert not scanner.in_object
+
+    def test_truncated_object_stays_pending(self):
+        """Test that a cut-off object is reported as pending instead of partially parsed."""
+        from json_extract import JSONObjectScanner, extract_json_object
+        
+        text = 'Sure:\n{"hero_html": "<div class=\\"lp-hero\\">{'
+        scanner = JSONObjectScanner()
+        
+        assert scanner.feed(text) == []
+        assert scanner.in_object
+        assert scanner.pending_text == text[text.index('{'):]
+        assert extract_json_object(text) is None
@@ -198,4 +198,305 @@ class TestInjectHtmlLambda:
         assert 'onclick=' not in result['cta_html']
         # But keep safe content
         assert '<h1>Hero</h1>' in result['hero_html']
-        assert '<button' in result['cta_html'] 
\ No newline at end of file
+        assert '<button' in result['cta_html'] 
+
+FRAGMENT_CORPUS = [
+    '<div class="hero"><h1 class="title">Test</h1></div>',
+    '<div class="lp-hero"><script>alert("xss")</script><h1>Hero</h1></div>',
+    '<div class="lp-cta"><button onclick="evil()" onMouseOver=x>Click</button></div>',
+    '<div id="header">Original</div>\n<div id="content"><div id="header">Copy</div><p id="lp-header">x</p></div>',
+    '<section class=" a  b lp-c"><p>Fast &amp; <em>reliable</em>&nbsp;&#128;&bogus;</p></section>',
+    '<p>a <iframe src="https://evil.example"><b>in</b></iframe>\n b</p>  <script>x()</script>\n',
+    '<img src="a.png" alt=\'Say "hi"\'><input disabled><a title="it\'s &quot;q&quot;" href="?a=1&b=2" rel=" x  y ">go</a>',
+    '<div><p>unclosed<span>tags</div></b><style>.lp-x > p { color: red }</style>',
+    '<pre>  keep\n  this  </pre><textarea>\n</textarea><!--   --><!-- note -->',
+    '<ul><li class=item>one<li class=item>two</ul><br></br><hr/><div/>',
+    '<x-card data-a="1" data-a="2" class=a class=b><meta charset="latin1"></x-card>',
+]
+
+
+class TestFragmentRewriter:
+    """Test the single-pass section rewriter against the BeautifulSoup passes."""
+
+    @pytest.fixture(autouse=True)
+    def rewriter_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/inject_html_lambda/build')
+        sys.path.append('tests/benchmarks')
+
+    @pytest.mark.parametrize("html", FRAGMENT_CORPUS)
+    def test_matches_multipass(self, html):
+        """Test that one traversal writes exactly what the three passes write."""
+        from html_rewriter import rewrite_fragment
+        from html_rewrite_bench import multipass_rewrite
+
+        assert rewrite_fragment(html, {"header"}) == multipass_rewrite(html, {"header"})
+
+    def test_rules_applied(self):
+        """Test the lp- prefix, sanitizing and id rules."""
+        from html_rewriter import rewrite_fragment
+
+        taken_ids = {"header"}
+        result = rewrite_fragment(
+            '<div class="hero" id="header"><script>alert(1)</script>'
+            '<button class="btn lp-x" onclick="evil()">Go</button><iframe src="x"></iframe></div>'
+            '<p id="header">again</p>',
+            taken_ids,
+        )
+
+        assert result == (
+            '<div class="lp-hero" id="lp-header"><button class="lp-btn lp-x">Go</button></div>'
+            '<p id="lp-header-2">again</p>'
+        )
+        assert taken_ids == {"header", "lp-header", "lp-header-2"}
+
+    def test_landing_content_shares_ids(self):
+        """Test that an id repeated in a later section is renamed."""
+        from html_rewriter import rewrite_landing_content
+
+        content = {
+            'hero_html': '<div id="cta" class="hero">Hero</div>',
+            'features_html': '<div class="features"><p>Feature</p></div>',
+            'cta_html': '<div id="cta"><a onclick="x()">Go</a></div>',
+            'img_prompts': ['office'],
+        }
+
+        result = rewrite_landing_content(content, {"nav"})
+
+        assert result['hero_html'] == '<div class="lp-hero" id="cta">Hero</div>'
+        assert result['cta_html'] == '<div id="lp-cta"><a>Go</a></div>'
+        assert result['img_prompts'] == ['office']
+        assert content['cta_html'] == '<div id="cta"><a onclick="x()">Go</a></div>'
+
+    def test_mixed_void_tags_settle(self):
+        """Test that <br> followed by <br/> is written the way repeated passes settle it."""
+        from html_rewriter import rewrite_fragment
+        from html_rewrite_bench import multipass_rewrite
+
+        html = '<p>a<br>b<br/>c<br/>d<br/><a href="/">e</a></br>f</p>'
+        settled = multipass_rewrite(html)
+        while multipass_rewrite(settled) != settled:
+            settled = multipass_rewrite(settled)
+
+        assert multipass_rewrite(html) != settled
+        assert rewrite_fragment(html) == settled
+
+
+class TestStreamingInjector:
+    """Test the constant-memory splice injector for large pages."""
+
+    SECTIONS = '<section class="lp-hero" id="hero">Hi</section>'
+    CSS = '.lp-hero{color:red}'
+
+    @pytest.fixture(autouse=True)
+    def injector_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/inject_html_lambda/build')
+
+    def splice(self, page, chunk_size, encoding=None):
+        from streaming_injector import PageSplicer
+
+        splicer = PageSplicer(self.SECTIONS, self.CSS, encoding)
+        out = [splicer.feed(page[i:i + chunk_size]) for i in range(0, len(page), chunk_size)]
+        out.append(splicer.close())
+        return b"".join(out), splicer
+
+    def test_splice_after_header(self):
+        """Test that the sections follow the outer header whatever the chunk boundaries."""
+        page = (
+            b'<html><head><title>a</head></title><script>"</header>"</script></head><body>'
+            b'<!-- <header></header> --><header data-x="a>b"><header>inner</header></header>'
+            b'<main>Body</main></body></html>'
+        )
+        expected = (
+            b'<html><head><title>a</head></title><script>"</header>"</script>'
+            b'<style id="lp-styles">.lp-hero{color:red}</style></head><body>'
+            b'<!-- <header></header> --><header data-x="a>b"><header>inner</header></header>'
+            b'<section class="lp-hero" id="hero">Hi</section><main>Body</main></body></html>'
+        )
+
+        for chunk_size in (1, 7, len(page)):
+            output, splicer = self.splice(page, chunk_size)
+            assert output == expected
+            assert splicer.injection_point == "after_header"
+            assert splicer.css_point == "head"
+            assert splicer.bytes_out == len(expected)
+
+    def test_splice_before_main(self):
+        """Test that a page without a header gets the CSS and sections before <main>."""
+        output, splicer = self.splice(b'<body><main>Body</main></body>', 1)
+
+        assert output == (
+            b'<body><style id="lp-styles">.lp-hero{color:red}</style>'
+            b'<section class="lp-hero" id="hero">Hi</section><main>Body</main></body>'
+        )
+        assert splicer.injection_point == "before_main"
+        assert splicer.css_point == "body"
+
+    @pytest.mark.parametrize("page", [
+        b'<html><body><div>No landmarks</div></body></html>',
+        '<html><header></header><main></main></html>'.encode('utf-16'),
+    ])
+    def test_unsupported_pages(self, page):
+        """Test that pages the splicer cannot handle raise StreamingUnsupported."""
+        from streaming_injector import StreamingUnsupported
+
+        with pytest.raises(StreamingUnsupported):
+            self.splice(page, 4)
+
+    def test_sections_use_page_encoding(self):
+        """Test that the sections are encoded in the charset the page declares."""
+        from streaming_injector import PageSplicer
+
+        page = '<head><meta charset="iso-8859-1"></head><header>Café</header>'.encode('iso-8859-1')
+        splicer = PageSplicer('<p>Café ✓</p>', '')
+        output = splicer.feed(page) + splicer.close()
+
+        assert output == page + '<p>Café &#10003;</p>'.encode('iso-8859-1')
+        assert splicer.content_type == 'text/html; charset=iso-8859-1'
+
+    def test_tag_scanner_offsets(self):
+        """Test that tags split across chunks are reported at their page offsets."""
+        from streaming_injector import TagScanner
+
+        page = b'ab<div class="x">c</div>'
+        scanner = TagScanner()
+        tags = scanner.feed(page[:9]) + scanner.feed(page[9:])
+
+        assert [(tag.name, tag.closing, tag.start, tag.end) for tag in tags] == [
+            ('div', False, 2, 17),
+            ('div', True, 18, 24),
+        ]
+        assert tags[0].raw == b'<div class="x">'
+
+    def large_page(self, landmark=b'<header>Shop</header>'):
+        filler = b'<p>' + b'x' * 1020 + b'</p>'
+        return b'<html><head></head><body>' + landmark + filler * 5200 + b'</body></html>'
+
+    def test_inject_page_streams_in_parts(self, s3_client, test_bucket):
+        """Test that a large page is spliced into a multipart upload."""
+        from streaming_injector import inject_page
+
+        page = self.large_page()
+        s3_client.put_object(Bucket=test_bucket, Key='raw/site.html', Body=page, ContentType='text/html')
+        dom_inject = MagicMock()
+
+        result = inject_page(
+            s3_client, test_bucket, 'raw/site.html', 'public/site.html',
+            self.SECTIONS, self.CSS, dom_inject, part_size=5 * 1024 * 1024,
+        )
+
+        output = s3_client.get_object(Bucket=test_bucket, Key='public/site.html')
+        expected = page.replace(b'</head>', b'<style id="lp-styles">.lp-hero{color:red}</style></head>', 1)
+        expected = expected.replace(b'</header>', b'</header>' + self.SECTIONS.encode(), 1)
+        assert output['Body'].read() == expected
+        assert output['ContentType'] == 'text/html; charset=utf-8'
+        assert result.path == 'streaming'
+        assert result.parts == 2
+        assert result.bytes_out == len(expected)
+        dom_inject.assert_not_called()
+
+    def test_inject_page_falls_back_to_dom(self, s3_client, test_bucket):
+        """Test that a page without landmarks goes through the DOM path and leaves no upload behind."""
+        from streaming_injector import inject_page
+
+        page = self.large_page(landmark=b'')
+        s3_client.put_object(Bucket=test_bucket, Key='raw/site.html', Body=page)
+
+        result = inject_page(
+            s3_client, test_bucket, 'raw/site.html', 'public/site.html',
+            self.SECTIONS, self.CSS, lambda html: 'injected', part_size=5 * 1024 * 1024,
+        )
+
+        assert result.path == 'dom'
+        assert result.fallback_reason
+        assert s3_client.get_object(Bucket=test_bucket, Key='public/site.html')['Body'].read() == b'injected'
+        assert 'Uploads' not in s3_client.list_multipart_uploads(Bucket=test_bucket)
+
+    def test_inject_page_small_page_uses_dom(self, s3_client, test_bucket):
+        """Test that pages below the streaming threshold take the DOM path."""
+        from streaming_injector import inject_page
+
+        s3_client.put_object(Bucket=test_bucket, Key='raw/site.html', Body=b'<header></header>')
+        dom_inject = MagicMock(return_value='<header></header>done')
+
+        result = inject_page(
+            s3_client, test_bucket, 'raw/site.html', 'public/site.html',
+            self.SECTIONS, self.CSS, dom_inject,
+        )
+
+        dom_inject.assert_called_once_with('<header></header>')
+        assert result.path == 'dom'
+        assert result.fallback_reason == 'small_page'
+
+    def test_scan_page_ids(self, s3_client, test_bucket):
+        """Test that ids are collected from every start tag of the page."""
+        from streaming_injector import scan_page_ids
+
+        page = b'<div id="hero"><p data-id="x" ID=\'cta\'>a</p><!-- <i id="c"> --><span id=a&amp;b></span></div>'
+        s3_client.put_object(Bucket=test_bucket, Key='raw/site.html', Body=page)
+
+        assert scan_page_ids(s3_client, test_bucket, 'raw/site.html', chunk_size=5) == {'hero', 'cta', 'a&b'}
+
+
+class TestLandingSource:
+    """Test loading the landing content to inject from the event or the stored generation."""
+
+    @pytest.fixture(autouse=True)
+    def source_path(self):
+        import sys
+        sys.path.append('infrastructure/terraform_modules/inject_html_lambda/build')
+
+    def test_generation_bundle_copy_matches_gen_landing(self):
+        """Test that the shipped copy of generation_bundle is identical to gen_landing's."""
+        import filecmp
+
+        assert filecmp.cmp(
+            'infrastructure/terraform_modules/inject_html_lambda/build/generation_bundle.py',
+            'infrastructure/terraform_modules/lambda/build/generation_bundle.py',
+            shallow=False,
+        )
+
+    def test_inline_content_wins(self, s3_client, test_bucket, sample_landing_content):
+        """Test that content passed in the event is used without reading S3."""
+        from landing_source import load_landing_generation
+
+        event = {"landing_content": sample_landing_content, "generation_id": "unused"}
+        content, theme_info = load_landing_generation(event, s3_client, test_bucket)
+
+        assert content == sample_landing_content
+        assert theme_info == {}
+
+    def test_reads_bundle_by_generation_id(self, s3_client, test_bucket, sample_landing_content):
+        """Test that a generation_id is resolved with a single bundle GET."""
+        from generation_bundle import build_bundle, write_generation_bundle
+        from landing_source import load_landing_generation
+
+        theme = {"fonts": ["Arial"], "color_palette": ["#333"]}
+        write_generation_bundle(s3_client, test_bucket, build_bundle("gen-1", sample_landing_content, theme))
+
+        with patch.object(s3_client, 'get_object', wraps=s3_client.get_object) as get_object:
+            content, theme_info = load_landing_generation({"generation_id": "gen-1"}, s3_client, test_bucket)
+
+        assert (content, theme_info) == (sample_landing_content, theme)
+        assert get_object.call_count == 1
+
+    def test_reads_legacy_layout(self, s3_client, test_bucket, sample_landing_content):
+        """Test that generations stored before the bundle still load."""
+        from landing_source import load_landing_generation
+
+        s3_client.put_object(Bucket=test_bucket, Key="generated/old/landing_content.json",
+                             Body=json.dumps(sample_landing_content))
+        event = {"generation_id": "old", "theme_info": {"fonts": ["Georgia"]}}
+
+        content, theme_info = load_landing_generation(event, s3_client, test_bucket)
+
+        assert content == sample_landing_content
+        assert theme_info == {"fonts": ["Georgia"]}
+
+    def test_event_without_content_or_generation(self, s3_client, test_bucket):
+        """Test that an event naming no content is rejected."""
+        from landing_source import load_landing_generation
+
+        with pytest.raises(ValueError):
+            load_landing_generation({}, s3_client, test_bucket)
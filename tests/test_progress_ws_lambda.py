@@ -0,0 +1,56 @@
+"""Tests for the progress_ws Lambda function (job progress WebSocket subscriptions)."""
+
+import importlib.util
+import sys
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def progress_ws():
+    """Load the progress_ws handler without clashing with the other handler modules."""
+    sys.path.append('infrastructure/terraform_modules/lambda/build')
+    spec = importlib.util.spec_from_file_location(
+        "progress_ws_handler", "infrastructure/terraform_modules/progress_ws/build/handler.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def websocket_event(route_key, job_id=None):
+    return {
+        "requestContext": {"routeKey": route_key, "connectionId": "conn-1"},
+        "queryStringParameters": {"job_id": job_id} if job_id is not None else None,
+    }
+
+
+class TestProgressWebSocket:
+    """Test connection subscription handling."""
+
+    def test_connect_and_disconnect_manage_subscription(self, progress_ws, s3_client, test_bucket, lambda_context):
+        """Test that a connection is subscribed to its job and removed again on disconnect."""
+        from progress_channel import WebSocketProgressChannel
+        
+        with patch.object(progress_ws, 's3_client', s3_client), \
+             patch.object(progress_ws, 'STATUS_BUCKET', test_bucket):
+            assert progress_ws.handler(websocket_event("$connect", "job-1"), lambda_context)["statusCode"] == 200
+            
+            keys = [item["Key"] for item in s3_client.list_objects_v2(Bucket=test_bucket)["Contents"]]
+            assert "status/subscriptions/job-1/conn-1" in keys
+            
+            assert progress_ws.handler(websocket_event("$disconnect"), lambda_context)["statusCode"] == 200
+        
+        assert s3_client.list_objects_v2(Bucket=test_bucket)["KeyCount"] == 0
+        assert WebSocketProgressChannel(None, s3_client, test_bucket).unsubscribe("conn-1") is None
+
+    @pytest.mark.parametrize("job_id", [None, "", "../other", "a" * 65])
+    def test_connect_rejects_invalid_job_id(self, progress_ws, s3_client, test_bucket, lambda_context, job_id):
+        """Test that connections without a usable job_id are refused before touching S3."""
+        with patch.object(progress_ws, 's3_client', s3_client), \
+             patch.object(progress_ws, 'STATUS_BUCKET', test_bucket):
+            response = progress_ws.handler(websocket_event("$connect", job_id), lambda_context)
+        
+        assert response["statusCode"] == 400
+        assert s3_client.list_objects_v2(Bucket=test_bucket)["KeyCount"] == 0
@@ -148,6 +148,178 @@ function getProgressMessage(flowType, step, message) {
     }
 }
 
+/**
+ * Show a job status update in the chat
+ * @param {Object} statusData - Status object from the status endpoint or the progress channel
+ * @param {string} flowType - The flow type for progress messages
+ * @returns {boolean} - Whether the job has finished (successfully or not)
+ */
+function handleStatusUpdate(statusData, flowType) {
+    switch (statusData.status) {
+        case 'completed':
+            if (statusData.data && statusData.data.htmlUrl) {
+                let completionMessage = `✅ <strong>Landing page generated successfully!</strong><br/>`;
+                
+                // Add flow-specific completion details
+                if (flowType === 'company_landing') {
+                    const companyName = statusData.data.company_name || 'Unknown';
+                    const industry = statusData.data.industry || 'Unknown';
+                    completionMessage += `<em>Company: ${companyName} | Industry: ${industry}</em><br/>`;
+                }
+                
+                completionMessage += `<a href="${statusData.data.htmlUrl}" target="_blank" rel="noopener noreferrer">🔗 Open Generated Landing Page</a>`;
+                
+                addMessage(completionMessage);
+                
+                // Embed the result in an iframe
+                addMessage(
+                    `<iframe src="${statusData.data.htmlUrl}" style="width:100%;height:400px;border:1px solid #ccc;border-radius:8px;" title="Generated Landing Page"></iframe>`
+                );
+            } else {
+                showErrorMessage('Job completed but no landing page URL received');
+            }
+            return true;
+        
+        case 'failed':
+            showErrorMessage(statusData.error || 'Job failed with unknown error');
+            return true;
+        
+        case 'processing': {
+            // Update progress message
+            const step = statusData.data?.step || 0;
+            const message = statusData.data?.message || 'Processing...';
+            
+            const progressText = getProgressMessage(flowType, step, message);
+            
+            // Only add message if it's different from the last one
+            const chatbox = document.getElementById('chatbox');
+            const lastMessage = chatbox.lastElementChild;
+            if (!lastMessage || !lastMessage.textContent.includes(progressText)) {
+                addMessage(progressText);
+            }
+            return false;
+        }
+        
+        case 'queued':
+            addMessage('📋 Job queued for processing...');
+            return false;
+        
+        case 'not_found':
+            showErrorMessage('Job not found. Please try again.');
+            return true;
+        
+        default:
+            console.log(`Unknown status: ${statusData.status}`);
+            return false;
+    }
+}
+
+/**
+ * Fetch the current status of a job once
+ * @param {string} jobId - The job ID
+ * @param {string} statusUrl - The URL to check job status
+ * @returns {Promise<Object>} - The status object
+ */
+async function fetchJobStatus(jobId, statusUrl) {
+    const response = await fetch(`${statusUrl}/${jobId}`, {
+        method: 'GET',
+        headers: { 
+            'Accept': 'application/json'
+        }
+    });
+    
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+    
+    return response.json();
+}
+
+/**
+ * Follow a job's progress, pushed over the progress WebSocket when one is
+ * configured, falling back to polling when the socket fails or goes quiet
+ * @param {string} jobId - The job ID to follow
+ * @param {string} statusUrl - The URL to check job status
+ * @param {string} flowType - The flow type for progress messages
+ */
+async function watchJobStatus(jobId, statusUrl, flowType) {
+    if (config.progressWebSocketUrl && typeof WebSocket !== 'undefined') {
+        const outcome = await followJobPushes(jobId, statusUrl, flowType);
+        if (outcome !== 'fallback') {
+            return;
+        }
+        console.log('Progress channel unavailable, falling back to polling');
+    }
+    
+    await pollJobStatus(jobId, statusUrl, flowType);
+}
+
+/**
+ * Receive status updates for a job over the progress WebSocket
+ * @param {string} jobId - The job ID to follow
+ * @param {string} statusUrl - The URL to check job status
+ * @param {string} flowType - The flow type for progress messages
+ * @returns {Promise<string>} - 'finished', 'cancelled' or 'fallback'
+ */
+function followJobPushes(jobId, statusUrl, flowType) {
+    return new Promise((resolve) => {
+        const socket = new WebSocket(`${config.progressWebSocketUrl}?job_id=${encodeURIComponent(jobId)}`);
+        const pushOperation = { cancelled: false, socket };
+        currentPollingOperation = pushOperation;
+        let settled = false;
+        let idleTimer = null;
+        
+        const settle = (outcome) => {
+            if (settled) {
+                return;
+            }
+            settled = true;
+            clearTimeout(idleTimer);
+            socket.close();
+            if (currentPollingOperation === pushOperation) {
+                currentPollingOperation = null;
+            }
+            resolve(outcome);
+        };
+        
+        // A stage that never publishes must not leave the user waiting forever
+        const resetIdleTimer = () => {
+            clearTimeout(idleTimer);
+            idleTimer = setTimeout(() => settle('fallback'), config.progressIdleTimeout);
+        };
+        
+        const applyUpdate = (statusData) => {
+            if (pushOperation.cancelled) {
+                settle('cancelled');
+            } else if (handleStatusUpdate(statusData, flowType)) {
+                settle('finished');
+            }
+        };
+        
+        socket.addEventListener('open', async () => {
+            resetIdleTimer();
+            // The job may have moved on before the subscription existed
+            try {
+                applyUpdate(await fetchJobStatus(jobId, statusUrl));
+            } catch (error) {
+                console.error('Status check error:', error);
+            }
+        });
+        
+        socket.addEventListener('message', (event) => {
+            resetIdleTimer();
+            try {
+                applyUpdate(JSON.parse(event.data));
+            } catch (error) {
+                console.error('Invalid progress message:', error);
+            }
+        });
+        
+        socket.addEventListener('error', () => settle(pushOperation.cancelled ? 'cancelled' : 'fallback'));
+        socket.addEventListener('close', () => settle(pushOperation.cancelled ? 'cancelled' : 'fallback'));
+    });
+}
+
 /**
  * Poll for job status until completion
  * @param {string} jobId - The job ID to poll
@@ -164,18 +336,7 @@ async function pollJobStatus(jobId, statusUrl, flowType) {
     
     while (attempts < maxAttempts && !pollingOperation.cancelled) {
         try {
-            const response = await fetch(`${statusUrl}/${jobId}`, {
-                method: 'GET',
-                headers: { 
-                    'Accept': 'application/json'
-                }
-            });
-            
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-            }
-            
-            const statusData = await response.json();
+            const statusData = await fetchJobStatus(jobId, statusUrl);
             console.log('Status check:', statusData);
             
             // Check if this polling operation was cancelled
@@ -183,80 +344,15 @@ async function pollJobStatus(jobId, statusUrl, flowType) {
                 return;
             }
             
-            switch (statusData.status) {
-                case 'completed':
-                    if (statusData.data && statusData.data.htmlUrl) {
-                        let completionMessage = `✅ <strong>Landing page generated successfully!</strong><br/>`;
-                        
-                        // Add flow-specific completion details
-                        if (flowType === 'company_landing') {
-                            const companyName = statusData.data.company_name || 'Unknown';
-                            const industry = statusData.data.industry || 'Unknown';
-                            completionMessage += `<em>Company: ${companyName} | Industry: ${industry}</em><br/>`;
-                        }
-                        
-                        completionMessage += `<a href="${statusData.data.htmlUrl}" target="_blank" rel="noopener noreferrer">🔗 Open Generated Landing Page</a>`;
-                        
-                        addMessage(completionMessage);
-                        
-                        // Embed the result in an iframe
-                        addMessage(
-                            `<iframe src="${statusData.data.htmlUrl}" style="width:100%;height:400px;border:1px solid #ccc;border-radius:8px;" title="Generated Landing Page"></iframe>`
-                        );
-                    } else {
-                        showErrorMessage('Job completed but no landing page URL received');
-                    }
-                    
-                    // Clear the current polling operation
-                    if (currentPollingOperation === pollingOperation) {
-                        currentPollingOperation = null;
-                    }
-                    return;
-                
-                case 'failed':
-                    showErrorMessage(statusData.error || 'Job failed with unknown error');
-                    
-                    // Clear the current polling operation
-                    if (currentPollingOperation === pollingOperation) {
-                        currentPollingOperation = null;
-                    }
-                    return;
-                
-                case 'processing':
-                    // Update progress message
-                    const step = statusData.data?.step || 0;
-                    const message = statusData.data?.message || 'Processing...';
-                    
-                    const progressText = getProgressMessage(flowType, step, message);
-                    
-                    // Only add message if it's different from the last one
-                    const chatbox = document.getElementById('chatbox');
-                    const lastMessage = chatbox.lastElementChild;
-                    if (!lastMessage || !lastMessage.textContent.includes(progressText)) {
-                        addMessage(progressText);
-                    }
-                    break;
-                
-                case 'queued':
-                    addMessage('📋 Job queued for processing...');
-                    break;
-                
-                case 'not_found':
-                    showErrorMessage('Job not found. Please try again.');
-                    
-                    // Clear the current polling operation
-                    if (currentPollingOperation === pollingOperation) {
-                        currentPollingOperation = null;
-                    }
-                    return;
-                
-                default:
-                    console.log(`Unknown status: ${statusData.status}`);
-                    break;
+            if (handleStatusUpdate(statusData, flowType)) {
+                // Clear the current polling operation
+                if (currentPollingOperation === pollingOperation) {
+                    currentPollingOperation = null;
+                }
+                return;
             }
             
-            // Wait 2 seconds before next poll (faster feedback)
-            await new Promise(resolve => setTimeout(resolve, 2000));
+            await new Promise(resolve => setTimeout(resolve, config.statusCheckInterval));
             attempts++;
             
         } catch (error) {
@@ -273,8 +369,7 @@ async function pollJobStatus(jobId, statusUrl, flowType) {
                 return;
             }
             
-            // Wait 2 seconds before retry (faster retry)
-            await new Promise(resolve => setTimeout(resolve, 2000));
+            await new Promise(resolve => setTimeout(resolve, config.statusCheckInterval));
         }
     }
     
@@ -298,6 +393,9 @@ async function sendRequest(sourceUrl, prompt, flowType) {
     // Cancel any existing polling operation
     if (currentPollingOperation) {
         currentPollingOperation.cancelled = true;
+        if (currentPollingOperation.socket) {
+            currentPollingOperation.socket.close();
+        }
         currentPollingOperation = null;
     }
     
@@ -367,9 +465,9 @@ async function sendRequest(sourceUrl, prompt, flowType) {
             
             addMessage(processingMessage);
             
-            // Start polling for status
+            // Follow the job over the progress channel, or poll for status
             const statusUrl = config.apiEndpoint + '/status';
-            await pollJobStatus(data.job_id, statusUrl, flowType);
+            await watchJobStatus(data.job_id, statusUrl, flowType);
             
         } else if (data.error) {
             showErrorMessage(data.error);
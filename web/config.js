@@ -4,6 +4,10 @@ const config = {
     maxRetries: 3,
     retryDelay: 1000,
     statusCheckInterval: 2000,
+    // Progress WebSocket (progress_ws module output websocket_url); empty uses status polling only
+    progressWebSocketUrl: '',
+    // Fall back to polling when no progress message arrives for this long
+    progressIdleTimeout: 30000,
     timeout: 300000 // 5 minutes
 };
 